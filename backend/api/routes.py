@@ -5,8 +5,10 @@ API路由配置
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 import logging
+import os
 import time
 from typing import Dict, Any
 
@@ -15,17 +17,39 @@ from backend.models.schemas import (
     CodeExplanationResponse, 
     CodeReviewResponse,
     ErrorResponse,
-    AnalysisType
+    AnalysisType,
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    KnowledgeIngestRequest,
+    KnowledgeIngestResponse
 )
 from backend.services.code_explainer import CodeExplainerService
 from backend.services.code_reviewer import CodeReviewerService
-from backend.core.dependencies import get_code_explainer, get_code_reviewer
+from backend.services.batch_analyzer import BatchAnalyzerService
+from backend.core.dependencies import (
+    get_code_explainer,
+    get_code_reviewer,
+    get_batch_analyzer,
+    get_knowledge_ingestion,
+    verify_admin_key
+)
+from backend.core.result_cache import get_result_cache
+from backend.core.executors import EMBEDDING_POOL, ExecutorSaturatedError, get_executor, get_executor_metrics
+from backend.core.llm_provider import get_llm_provider
+from backend.core.single_flight import get_single_flight
+from backend.tools.flake8_pool import get_flake8_pool
+from backend.tools.partitioned_index import RetrievalFilter
+from backend.tools.knowledge_ingest import IngestionInProgressError, KnowledgeIngestionPipeline
+from backend.tools.vector_registry import get_vector_registry
+from backend.utils.formatters import format_sse_event
+from config.settings import get_settings
 
 # 创建API路由器
 api_router = APIRouter()
 
 # 设置日志
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 @api_router.post(
@@ -73,9 +97,13 @@ async def explain_code(
             explanation=result["explanation"],
             code_summary=result["summary"],
             key_concepts=result["key_concepts"],
-            execution_time=execution_time
+            execution_time=execution_time,
+            cache_hit=result.get("cache_hit", False)
         )
         
+    except ExecutorSaturatedError:
+        # 线程池饱和由全局异常处理器转换为429/503
+        raise
     except Exception as e:
         execution_time = time.time() - start_time
         logger.error(f"代码解释失败: {str(e)}, 耗时: {execution_time:.2f}秒")
@@ -85,6 +113,60 @@ async def explain_code(
         )
 
 
+@api_router.post(
+    "/explain/stream",
+    summary="流式代码解释接口",
+    description="以Server-Sent Events逐段返回代码解释，最后一个事件包含摘要和关键概念"
+)
+async def explain_code_stream(
+    request: CodeAnalysisRequest,
+    explainer: CodeExplainerService = Depends(get_code_explainer)
+) -> StreamingResponse:
+    """
+    流式代码解释API端点
+    
+    事件类型：token（解释文本片段）、done（摘要、关键概念和耗时）、error（出错信息）
+    
+    Args:
+        request: 包含待分析代码的请求
+        explainer: 代码解释服务实例
+    
+    Returns:
+        StreamingResponse: text/event-stream 响应
+    """
+    # 验证分析类型
+    if request.analysis_type != AnalysisType.EXPLAIN:
+        raise HTTPException(
+            status_code=400,
+            detail="此接口仅支持代码解释分析"
+        )
+    
+    logger.info(f"开始流式解释代码，代码长度: {len(request.code)} 字符")
+    
+    async def event_stream():
+        try:
+            async for event in explainer.stream_explanation(
+                code=request.code,
+                language=request.language
+            ):
+                yield format_sse_event(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"流式代码解释失败: {str(e)}")
+            yield format_sse_event("error", {
+                "detail": f"代码解释服务出错: {str(e)}",
+                "status_code": getattr(e, "status_code", 500)
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 禁止反向代理缓冲，保证token及时送达
+        }
+    )
+
+
 @api_router.post(
     "/review",
     response_model=CodeReviewResponse,
@@ -120,7 +202,8 @@ async def review_code(
         # 调用代码审查服务
         result = await reviewer.review_code(
             code=request.code,
-            language=request.language
+            language=request.language,
+            knowledge_filter=RetrievalFilter.create(request.knowledge_categories, request.knowledge_topics)
         )
         
         execution_time = time.time() - start_time
@@ -133,9 +216,13 @@ async def review_code(
             style_issues=result["style_issues"],
             optimizations=result["optimizations"],
             execution_time=execution_time,
-            lines_analyzed=len(request.code.split('\n'))
+            lines_analyzed=len(request.code.split('\n')),
+            cache_hit=result.get("cache_hit", False),
+            llm_skipped=result.get("llm_skipped", False)
         )
         
+    except ExecutorSaturatedError:
+        raise
     except Exception as e:
         execution_time = time.time() - start_time
         logger.error(f"代码审查失败: {str(e)}, 耗时: {execution_time:.2f}秒")
@@ -145,6 +232,180 @@ async def review_code(
         )
 
 
+@api_router.post(
+    "/review/stream",
+    summary="流式代码审查接口",
+    description="以Server-Sent Events分阶段返回审查结果：静态分析和知识库检索先行，随后是LLM报告和结构化条目"
+)
+async def review_code_stream(
+    request: CodeAnalysisRequest,
+    reviewer: CodeReviewerService = Depends(get_code_reviewer)
+) -> StreamingResponse:
+    """
+    流式代码审查API端点
+    
+    事件类型：static（flake8问题和结构指标）、knowledge（知识库建议）、token（报告文本片段）、
+    bug / style_issue / optimization（结构化条目）、done（评分、摘要和耗时）、error（出错信息）
+    
+    Args:
+        request: 包含待审查代码的请求
+        reviewer: 代码审查服务实例
+    
+    Returns:
+        StreamingResponse: text/event-stream 响应
+    """
+    # 验证分析类型
+    if request.analysis_type != AnalysisType.REVIEW:
+        raise HTTPException(
+            status_code=400,
+            detail="此接口仅支持代码审查分析"
+        )
+    
+    logger.info(f"开始流式审查代码，代码长度: {len(request.code)} 字符")
+    
+    async def event_stream():
+        try:
+            async for event in reviewer.stream_review(
+                code=request.code,
+                language=request.language,
+                knowledge_filter=RetrievalFilter.create(request.knowledge_categories, request.knowledge_topics)
+            ):
+                yield format_sse_event(event["event"], event["data"])
+        except Exception as e:
+            logger.error(f"流式代码审查失败: {str(e)}")
+            yield format_sse_event("error", {
+                "detail": f"代码审查服务出错: {str(e)}",
+                "status_code": getattr(e, "status_code", 500)
+            })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@api_router.post(
+    "/batch",
+    response_model=BatchAnalysisResponse,
+    summary="批量代码分析接口",
+    description="一次提交多段代码（可混合解释和审查），相同输入只分析一次，可选以NDJSON逐条返回"
+)
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    batch_analyzer: BatchAnalyzerService = Depends(get_batch_analyzer)
+):
+    """
+    批量代码分析API端点
+    
+    Args:
+        request: 包含多段待分析代码的请求
+        batch_analyzer: 批量分析服务实例
+    
+    Returns:
+        BatchAnalysisResponse: 按请求顺序排列的结果；stream为true时返回 application/x-ndjson，
+        每行一个已完成条目的 BatchItemResult
+    """
+    if len(request.items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次批量分析最多 {settings.batch_max_items} 个条目"
+        )
+    
+    start_time = time.time()
+    logger.info(f"开始批量分析，条目数: {len(request.items)}")
+    
+    if request.stream:
+        async def ndjson_stream():
+            try:
+                async for item in batch_analyzer.analyze(request.items):
+                    yield item.model_dump_json() + "\n"
+            except Exception as e:
+                logger.error(f"流式批量分析失败: {str(e)}")
+                yield json.dumps({
+                    "error": f"批量分析服务出错: {str(e)}",
+                    "status_code": getattr(e, "status_code", 500)
+                }, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(
+            ndjson_stream(),
+            media_type="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no"}
+        )
+    
+    try:
+        results = [item async for item in batch_analyzer.analyze(request.items)]
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(f"批量分析失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"批量分析服务出错: {str(e)}"
+        )
+    results.sort(key=lambda item: item.index)
+    
+    execution_time = time.time() - start_time
+    logger.info(f"批量分析完成，耗时: {execution_time:.2f}秒")
+    return BatchAnalysisResponse(
+        results=results,
+        total_items=len(results),
+        unique_items=sum(1 for item in results if item.duplicate_of is None),
+        execution_time=execution_time
+    )
+
+
+@api_router.post(
+    "/admin/knowledge/ingest",
+    response_model=KnowledgeIngestResponse,
+    summary="知识库导入接口",
+    description="从知识库目录导入Markdown、JSONL和Python文件，只追加新增内容",
+    dependencies=[Depends(verify_admin_key)]
+)
+async def ingest_knowledge(
+    request: KnowledgeIngestRequest,
+    pipeline: KnowledgeIngestionPipeline = Depends(get_knowledge_ingestion)
+) -> KnowledgeIngestResponse:
+    """
+    知识库导入API端点
+    
+    Args:
+        request: 导入路径、批大小和是否压缩
+        pipeline: 知识库导入流水线
+    
+    Returns:
+        KnowledgeIngestResponse: 导入统计
+    """
+    root = os.path.realpath(settings.knowledge_base_path)
+    path = os.path.realpath(os.path.join(root, request.path)) if request.path else root
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=400, detail="导入路径必须位于知识库目录内")
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f"导入路径不存在: {request.path}")
+    
+    logger.info(f"开始导入知识库: {path}")
+    try:
+        # 导入期间嵌入计算在嵌入线程池中执行，不阻塞事件循环
+        report = await get_executor(EMBEDDING_POOL).run(
+            pipeline.run, path, batch_size=request.batch_size, compact=request.compact, root=root
+        )
+    except IngestionInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ExecutorSaturatedError:
+        raise
+    except Exception as e:
+        logger.error(f"知识库导入失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"知识库导入出错: {str(e)}"
+        )
+    
+    return KnowledgeIngestResponse(**report)
+
+
 @api_router.get(
     "/status",
     summary="服务状态检查",
@@ -154,12 +415,34 @@ async def check_ai_status() -> Dict[str, Any]:
     """检查AI服务状态"""
     try:
         # 这里可以添加对AI模型和数据库的健康检查
-        return {
+        registry = get_vector_registry()
+        status = {
             "ai_service": "available",
             "model_status": "ready",
-            "vector_db": "connected",
+            "vector_db": "connected" if registry.initialized else "not_loaded",
+            "vector_store": registry.get_memory_footprint(),
             "timestamp": time.time()
         }
+        
+        # 结果缓存命中率
+        result_cache = get_result_cache()
+        if result_cache is not None:
+            status["result_cache"] = result_cache.get_stats()
+        
+        # 相同请求合并统计（coalesced 为挂在进行中请求上、未重复调用模型的次数）
+        status["single_flight"] = get_single_flight().get_stats()
+        
+        # flake8 worker进程池指标（排队深度、超时、回收次数等）
+        if settings.flake8_engine == "pool":
+            status["flake8_pool"] = get_flake8_pool().get_metrics()
+        
+        # 阻塞任务线程池利用率（并发、排队、拒绝和超时次数）
+        status["executors"] = get_executor_metrics()
+        
+        # LLM调用适配器（进行中的请求数、HTTP连接池上限等）
+        status["llm"] = get_llm_provider().get_metrics()
+        
+        return status
     except Exception as e:
         logger.error(f"服务状态检查失败: {str(e)}")
         raise HTTPException(
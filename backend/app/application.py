@@ -10,8 +10,11 @@ from datetime import datetime
 
 from backend.services.code_explainer import CodeExplainerService
 from backend.services.code_reviewer import CodeReviewerService
-from backend.tools.rag_tool import RAGTool
-from backend.tools.flake8_tool import Flake8Tool
+from backend.core.dependencies import get_code_explainer, get_code_reviewer
+from backend.tools.rag_tool import RAGTool, get_rag_tool
+from backend.tools.flake8_tool import Flake8Tool, get_flake8_tool
+from backend.tools.vector_registry import get_vector_registry
+from backend.core.executors import EMBEDDING_POOL, get_executor
 from config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -35,13 +38,16 @@ class CodeWiseApplication:
         try:
             logger.info("开始初始化 CodeWise AI 应用...")
             
-            # 初始化工具
-            self.rag_tool = RAGTool()
-            self.flake8_tool = Flake8Tool()
+            # 初始化工具（与API依赖注入共享同一份实例）
+            self.rag_tool = get_rag_tool()
+            self.flake8_tool = get_flake8_tool()
+            
+            # 在线程中预热共享的嵌入模型和向量数据库，避免首个请求承担加载开销
+            await get_executor(EMBEDDING_POOL).run(get_vector_registry().get_vector_store)
             
             # 初始化服务
-            self.explainer_service = CodeExplainerService()
-            self.reviewer_service = CodeReviewerService()
+            self.explainer_service = get_code_explainer()
+            self.reviewer_service = get_code_reviewer()
             
             self.startup_time = datetime.now()
             self.is_initialized = True
@@ -82,7 +88,8 @@ class CodeWiseApplication:
                 "code_reviewer": bool(self.reviewer_service),
                 "rag_tool": bool(self.rag_tool),
                 "flake8_tool": bool(self.flake8_tool)
-            }
+            },
+            "vector_store": get_vector_registry().get_memory_footprint()
         }
     
     async def health_check(self) -> Dict[str, Any]:
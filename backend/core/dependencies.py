@@ -4,9 +4,17 @@
 作用：管理服务依赖，提供单例模式的服务实例
 """
 
+import hmac
 from functools import lru_cache
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
 from backend.services.code_explainer import CodeExplainerService
 from backend.services.code_reviewer import CodeReviewerService
+from backend.services.batch_analyzer import BatchAnalyzerService
+from backend.tools.knowledge_ingest import KnowledgeIngestionPipeline, get_ingestion_pipeline
+from config.settings import get_settings
+
+settings = get_settings()
 
 
 @lru_cache()
@@ -28,4 +36,41 @@ def get_code_reviewer() -> CodeReviewerService:
     Returns:
         CodeReviewerService: 代码审查服务实例
     """
-    return CodeReviewerService()
\ No newline at end of file
+    return CodeReviewerService()
+
+
+def get_batch_analyzer(
+    explainer: CodeExplainerService = Depends(get_code_explainer),
+    reviewer: CodeReviewerService = Depends(get_code_reviewer)
+) -> BatchAnalyzerService:
+    """
+    获取批量分析服务实例（复用解释和审查服务单例）
+    
+    Returns:
+        BatchAnalyzerService: 批量分析服务实例
+    """
+    return BatchAnalyzerService(explainer, reviewer)
+
+
+
+def verify_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """
+    校验管理接口密钥（未配置 ADMIN_API_KEY 时拒绝所有管理请求）
+    
+    Raises:
+        HTTPException: 未配置密钥、密钥缺失或不正确时返回403
+    """
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=403, detail="管理接口未启用，请配置 ADMIN_API_KEY")
+    if not hmac.compare_digest(x_admin_key or "", settings.admin_api_key):
+        raise HTTPException(status_code=403, detail="管理接口密钥无效")
+
+
+def get_knowledge_ingestion() -> KnowledgeIngestionPipeline:
+    """
+    获取知识库导入流水线实例
+    
+    Returns:
+        KnowledgeIngestionPipeline: 共享的导入流水线
+    """
+    return get_ingestion_pipeline()
@@ -0,0 +1,428 @@
+"""
+阻塞任务执行器
+负责人：组长
+作用：为LLM调用、CPU密集的静态分析和嵌入/向量检索分别提供有界线程池，
+      原生异步的LLM调用使用同样有界的协程并发限制器，
+      限制并发数和排队长度，饱和时快速拒绝而不是无限堆积，并统计各池利用率
+"""
+
+import asyncio
+import functools
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+LLM_POOL = "llm"
+CPU_POOL = "cpu"
+EMBEDDING_POOL = "embedding"
+
+
+class ExecutorSaturatedError(Exception):
+    """执行器饱和（排队已满、排队超时或已关闭）"""
+
+    def __init__(self, pool: str, status_code: int, reason: str, retry_after: int = 1):
+        super().__init__(f"执行器 {pool} {reason}")
+        self.pool = pool
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class BoundedExecutor(Executor):
+    """
+    有界线程池
+
+    最多 max_workers 个任务同时运行，最多 max_queue 个任务排队；
+    排队已满时提交直接抛出 ExecutorSaturatedError(429)，
+    排队时间超过 queue_timeout 的任务不再执行并抛出 ExecutorSaturatedError(503)。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"codewise-{name}")
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._queued = 0
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._cancelled = 0
+        self._total_wait = 0.0
+        self._busy_time = 0.0
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        提交任务
+
+        Raises:
+            ExecutorSaturatedError: 排队已满或执行器已关闭
+        """
+        with self._lock:
+            if self._closed:
+                raise ExecutorSaturatedError(self.name, 503, "已关闭")
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(self.name, 429, f"排队任务已达上限 {self.max_queue}")
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        enqueued_at = time.monotonic()
+        # 排队名额只释放一次：任务开始执行时，或任务在排队中被取消时
+        slot = {"held": True}
+
+        def release_slot() -> bool:
+            if not slot["held"]:
+                return False
+            slot["held"] = False
+            self._queued -= 1
+            return True
+
+        def task():
+            started_at = time.monotonic()
+            waited = started_at - enqueued_at
+            with self._lock:
+                release_slot()
+                self._total_wait += waited
+                if self.queue_timeout is not None and waited > self.queue_timeout:
+                    self._timed_out += 1
+                    raise ExecutorSaturatedError(
+                        self.name, 503, f"任务排队超过 {self.queue_timeout} 秒"
+                    )
+                self._active += 1
+
+            succeeded = False
+            try:
+                result = fn(*args, **kwargs)
+                succeeded = True
+                return result
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._busy_time += time.monotonic() - started_at
+                    if succeeded:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        def on_done(future: Future):
+            if future.cancelled():
+                with self._lock:
+                    if release_slot():
+                        self._cancelled += 1
+
+        try:
+            future = self._pool.submit(task)
+        except RuntimeError:
+            with self._lock:
+                release_slot()
+            raise ExecutorSaturatedError(self.name, 503, "已关闭")
+        future.add_done_callback(on_done)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        在本线程池中执行阻塞函数并等待结果
+
+        Args:
+            fn: 阻塞函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self, functools.partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        """关闭线程池"""
+        with self._lock:
+            self._closed = True
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取线程池利用率指标"""
+        with self._lock:
+            started = self._completed + self._failed + self._active
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "max_queued": self._max_queued,
+                "utilization": round(self._active / self.max_workers, 4),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._total_wait * 1000 / (started + self._timed_out), 2)
+                if started + self._timed_out else 0.0,
+                "busy_seconds": round(self._busy_time, 3)
+            }
+
+
+class _Waiter:
+    """限制器中排队的协程"""
+
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class AsyncBoundedLimiter:
+    """
+    有界协程并发限制器
+
+    与 BoundedExecutor 语义和指标相同，但不占用线程，用于原生异步的调用：
+    最多 max_workers 个协程同时执行，最多 max_queue 个协程排队；
+    排队已满时直接抛出 ExecutorSaturatedError(429)，
+    排队时间超过 queue_timeout 时放弃执行并抛出 ExecutorSaturatedError(503)。
+    计数不绑定事件循环，多个事件循环（如测试中多次 asyncio.run）共用同一上限。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        queue_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+
+        self._active = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._cancelled = 0
+        self._total_wait = 0.0
+        self._busy_time = 0.0
+
+    async def acquire(self):
+        """
+        获取一个执行名额
+
+        Raises:
+            ExecutorSaturatedError: 排队已满或排队超时
+        """
+        with self._lock:
+            if self._active < self.max_workers and not self._waiters:
+                self._active += 1
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturatedError(self.name, 429, f"排队任务已达上限 {self.max_queue}")
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+            self._max_queued = max(self._max_queued, len(self._waiters))
+
+        enqueued_at = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except BaseException as exc:
+            with self._lock:
+                self._total_wait += time.monotonic() - enqueued_at
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+                    if isinstance(exc, asyncio.TimeoutError):
+                        self._timed_out += 1
+                    elif isinstance(exc, asyncio.CancelledError):
+                        self._cancelled += 1
+            if granted:
+                # 名额已经转交过来，不再使用时转交给下一个排队的协程
+                self.release()
+            if isinstance(exc, asyncio.TimeoutError):
+                raise ExecutorSaturatedError(self.name, 503, f"任务排队超过 {self.queue_timeout} 秒")
+            raise
+        with self._lock:
+            self._total_wait += time.monotonic() - enqueued_at
+
+    def release(self):
+        """归还执行名额，有排队的协程时直接转交给最早排队的协程"""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.loop.call_soon_threadsafe(self._wake, waiter.future)
+                except RuntimeError:
+                    # 排队协程所在的事件循环已关闭
+                    continue
+                waiter.granted = True
+                return
+            self._active -= 1
+
+    @staticmethod
+    def _wake(future: asyncio.Future):
+        if not future.done():
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """在一个执行名额内运行代码块"""
+        await self.acquire()
+        started_at = time.monotonic()
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        except (GeneratorExit, asyncio.CancelledError):
+            # 调用方提前结束，不计为失败
+            succeeded = True
+            raise
+        finally:
+            with self._lock:
+                self._busy_time += time.monotonic() - started_at
+                if succeeded:
+                    self._completed += 1
+                else:
+                    self._failed += 1
+            self.release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取并发利用率指标（字段与 BoundedExecutor 相同）"""
+        with self._lock:
+            started = self._completed + self._failed + self._active
+            waited = started + self._timed_out + self._cancelled
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "max_queued": self._max_queued,
+                "utilization": round(self._active / self.max_workers, 4),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "timed_out": self._timed_out,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._total_wait * 1000 / waited, 2) if waited else 0.0,
+                "busy_seconds": round(self._busy_time, 3)
+            }
+
+
+_executors: Dict[str, BoundedExecutor] = {}
+_limiters: Dict[str, AsyncBoundedLimiter] = {}
+_executors_lock = threading.Lock()
+
+
+def _pool_config(name: str):
+    """按名称读取线程池配置"""
+    configs = {
+        LLM_POOL: (settings.executor_llm_workers, settings.executor_llm_queue),
+        CPU_POOL: (settings.executor_cpu_workers, settings.executor_cpu_queue),
+        EMBEDDING_POOL: (settings.executor_embedding_workers, settings.executor_embedding_queue),
+    }
+    if name not in configs:
+        raise ValueError(f"未知的执行器: {name}")
+    return configs[name]
+
+
+def _limiter_config(name: str):
+    """按名称读取协程限制器配置，LLM原生异步调用不占用线程，使用单独的上限"""
+    if name == LLM_POOL:
+        return settings.llm_async_max_in_flight, settings.llm_async_queue
+    return _pool_config(name)
+
+
+def get_executor(name: str) -> BoundedExecutor:
+    """
+    获取全局执行器（首次使用时创建）
+
+    Args:
+        name: 执行器名称（llm / cpu / embedding）
+
+    Returns:
+        BoundedExecutor实例
+    """
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                max_workers, max_queue = _pool_config(name)
+                executor = BoundedExecutor(
+                    name,
+                    max_workers=max_workers,
+                    max_queue=max_queue,
+                    queue_timeout=settings.executor_queue_timeout
+                )
+                _executors[name] = executor
+    return executor
+
+
+def get_async_limiter(name: str) -> AsyncBoundedLimiter:
+    """
+    获取全局协程并发限制器（首次使用时创建，LLM取 llm_async_* 配置，其余与同名线程池的配置相同）
+
+    Args:
+        name: 限制器名称（llm / cpu / embedding）
+
+    Returns:
+        AsyncBoundedLimiter实例
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _executors_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                max_workers, max_queue = _limiter_config(name)
+                limiter = AsyncBoundedLimiter(
+                    name,
+                    max_workers=max_workers,
+                    max_queue=max_queue,
+                    queue_timeout=settings.executor_queue_timeout
+                )
+                _limiters[name] = limiter
+    return limiter
+
+
+def get_executor_metrics() -> Dict[str, Dict[str, Any]]:
+    """获取所有已创建执行器的指标，协程限制器以 "<名称>_async" 为键"""
+    with _executors_lock:
+        executors = dict(_executors)
+        limiters = dict(_limiters)
+    metrics = {name: executor.get_metrics() for name, executor in executors.items()}
+    metrics.update({f"{name}_async": limiter.get_metrics() for name, limiter in limiters.items()})
+    return metrics
+
+
+def shutdown_executors(wait: bool = True):
+    """关闭所有执行器（应用退出时调用）"""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+        _limiters.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
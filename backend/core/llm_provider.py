@@ -0,0 +1,355 @@
+"""
+LLM调用适配层
+负责人：组长
+作用：为代码解释和代码审查服务提供统一的异步LLM接口，
+      默认直接通过共享的长连接HTTP客户端池调用DashScope，所有请求在事件循环上并发，不占用线程，
+      并发数和排队数由 llm_async_* 配置单独限制；
+      也可包装LangChain的同步LLM（如测试用的假模型）在线程池中调用
+"""
+
+import asyncio
+import json
+import threading
+import logging
+import weakref
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from config.settings import get_settings
+from backend.core.executors import LLM_POOL, AsyncBoundedLimiter, get_async_limiter, get_executor
+from backend.core.streaming import iterate_in_thread
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+GENERATION_PATH = "/services/aigc/text-generation/generation"
+
+
+class LLMProviderError(Exception):
+    """LLM服务返回错误"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"LLM服务错误 ({status_code}): {message}")
+        self.status_code = status_code
+
+
+def _text_of(response: Any) -> str:
+    """从LangChain LLM或ChatModel的输出中取出文本"""
+    return response if isinstance(response, str) else getattr(response, "content", str(response))
+
+
+class LLMProvider:
+    """异步LLM接口"""
+
+    name = "base"
+
+    async def complete(self, prompt: str) -> str:
+        """
+        生成完整回复
+
+        Args:
+            prompt: 完整的提示词
+
+        Returns:
+            模型输出文本
+        """
+        raise NotImplementedError
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """
+        流式生成回复
+
+        Args:
+            prompt: 完整的提示词
+
+        Yields:
+            增量文本片段
+        """
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取调用指标"""
+        return {"provider": self.name}
+
+    async def aclose(self):
+        """释放连接等资源"""
+
+
+class LangChainLLMProvider(LLMProvider):
+    """包装LangChain同步LLM，在LLM线程池中调用"""
+
+    name = "langchain"
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    async def complete(self, prompt: str) -> str:
+        response = await get_executor(LLM_POOL).run(self.llm.invoke, prompt)
+        return _text_of(response)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async for chunk in iterate_in_thread(
+            lambda: self.llm.stream(prompt),
+            executor=get_executor(LLM_POOL)
+        ):
+            text = _text_of(chunk)
+            if text:
+                yield text
+
+
+class DashScopeAsyncProvider(LLMProvider):
+    """
+    DashScope原生异步客户端
+
+    所有请求复用同一个httpx.AsyncClient连接池（支持keep-alive，可选HTTP/2），
+    等待模型输出期间不占用任何线程；同时进行的请求数受协程并发限制器约束，饱和时返回429。
+    """
+
+    name = "dashscope"
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        temperature: float,
+        max_tokens: int,
+        base_url: str = "https://dashscope.aliyuncs.com/api/v1",
+        max_connections: int = 200,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 30,
+        timeout: float = 120,
+        http2: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        limiter: Optional[AsyncBoundedLimiter] = None
+    ):
+        """
+        初始化DashScope异步客户端
+
+        Args:
+            api_key: DashScope API密钥
+            model_name: 模型名称
+            temperature: 温度参数
+            max_tokens: 最大生成token数
+            base_url: API地址
+            max_connections: 连接池最大连接数
+            max_keepalive_connections: 最多保持的空闲长连接数
+            keepalive_expiry: 空闲长连接保持时间（秒）
+            timeout: 单次请求超时时间（秒）
+            http2: 是否启用HTTP/2
+            transport: 自定义传输层（测试时可指向本地ASGI应用）
+            limiter: 并发限制器，默认使用全局的LLM限制器（上限取 llm_async_* 配置）
+        """
+        self.api_key = api_key
+        self.model_name = model_name
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.base_url = base_url.rstrip("/")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        self.http2 = http2 and self._http2_available()
+        self.transport = transport
+        self.limiter = limiter
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._requests = 0
+        self._errors = 0
+
+    @staticmethod
+    def _http2_available() -> bool:
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            logger.warning("未安装h2，LLM客户端回退到HTTP/1.1")
+            return False
+
+    def _get_limiter(self) -> AsyncBoundedLimiter:
+        return self.limiter or get_async_limiter(LLM_POOL)
+
+    def _client_lock(self, loop: asyncio.AbstractEventLoop) -> asyncio.Lock:
+        """当前事件循环上创建客户端用的锁"""
+        with self._lock:
+            lock = self._client_locks.get(loop)
+            if lock is None:
+                lock = self._client_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def _get_client(self) -> httpx.AsyncClient:
+        """获取当前事件循环上的共享客户端（连接绑定事件循环，换循环时关闭旧客户端后重建）"""
+        loop = asyncio.get_running_loop()
+        client = self._client
+        if client is not None and self._client_loop is loop:
+            return client
+        # 关闭旧客户端需要等待，加锁避免并发请求各自重建客户端而泄漏连接池
+        async with self._client_lock(loop):
+            if self._client is None or self._client_loop is not loop:
+                stale, stale_loop = self._client, self._client_loop
+                if stale is not None:
+                    await self._close_stale(stale, stale_loop)
+                self._client = httpx.AsyncClient(
+                    base_url=self.base_url,
+                    headers={"Authorization": f"Bearer {self.api_key}"},
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    http2=self.http2,
+                    transport=self.transport
+                )
+                self._client_loop = loop
+            return self._client
+
+    @staticmethod
+    async def _close_stale(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]):
+        """关闭绑定在其他事件循环上的旧客户端"""
+        try:
+            if loop is not None and loop.is_running():
+                # 旧循环仍在运行（其他线程），在其所属循环上关闭
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), loop))
+            else:
+                await client.aclose()
+        except Exception as e:
+            logger.warning(f"关闭旧的LLM客户端失败: {str(e)}")
+
+    def _payload(self, prompt: str, stream: bool) -> Dict[str, Any]:
+        parameters = {
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "result_format": "text"
+        }
+        if stream:
+            parameters["incremental_output"] = True
+        return {
+            "model": self.model_name,
+            "input": {"prompt": prompt},
+            "parameters": parameters
+        }
+
+    def _enter(self):
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def _exit(self, failed: bool):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._errors += 1
+
+    @staticmethod
+    def _error_message(body: bytes) -> str:
+        try:
+            data = json.loads(body)
+            return f"{data.get('code', '')} {data.get('message', '')}".strip()
+        except ValueError:
+            return body.decode("utf-8", errors="replace")[:200]
+
+    async def complete(self, prompt: str) -> str:
+        async with self._get_limiter().slot():
+            self._enter()
+            failed = True
+            try:
+                client = await self._get_client()
+                response = await client.post(
+                    GENERATION_PATH,
+                    json=self._payload(prompt, stream=False)
+                )
+                if response.status_code != 200:
+                    raise LLMProviderError(response.status_code, self._error_message(response.content))
+                text = response.json()["output"]["text"]
+                failed = False
+                return text
+            finally:
+                self._exit(failed)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        async with self._get_limiter().slot():
+            self._enter()
+            failed = True
+            try:
+                client = await self._get_client()
+                async with client.stream(
+                    "POST",
+                    GENERATION_PATH,
+                    json=self._payload(prompt, stream=True),
+                    headers={"Accept": "text/event-stream", "X-DashScope-SSE": "enable"}
+                ) as response:
+                    if response.status_code != 200:
+                        raise LLMProviderError(response.status_code, self._error_message(await response.aread()))
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = json.loads(line[5:])
+                        if "output" not in data:
+                            raise LLMProviderError(500, f"{data.get('code', '')} {data.get('message', '')}".strip())
+                        text = data["output"].get("text")
+                        if text:
+                            yield text
+                failed = False
+            except (GeneratorExit, asyncio.CancelledError):
+                # 调用方提前结束（如客户端断开），不计为错误
+                failed = False
+                raise
+            finally:
+                self._exit(failed)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "provider": self.name,
+                "http2": self.http2,
+                "max_connections": self.limits.max_connections,
+                "in_flight": self._in_flight,
+                "max_in_flight": self._max_in_flight,
+                "requests": self._requests,
+                "errors": self._errors
+            }
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+@lru_cache()
+def get_llm_provider() -> LLMProvider:
+    """
+    获取全局LLM调用适配器
+
+    Returns:
+        按 llm_provider 配置创建的适配器实例
+    """
+    if settings.llm_provider == "langchain":
+        from langchain_community.llms import Tongyi
+        return LangChainLLMProvider(Tongyi(
+            dashscope_api_key=settings.dashscope_api_key,
+            model_name=settings.model_name,
+            temperature=settings.temperature,
+            max_tokens=settings.max_tokens
+        ))
+
+    return DashScopeAsyncProvider(
+        api_key=settings.dashscope_api_key,
+        model_name=settings.model_name,
+        temperature=settings.temperature,
+        max_tokens=settings.max_tokens,
+        base_url=settings.dashscope_base_url,
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry,
+        timeout=settings.llm_request_timeout,
+        http2=settings.llm_http2
+    )
@@ -4,6 +4,9 @@ AI模型Prompt模板定义
 作用：定义用于代码解释和代码审查的结构化Prompt模板
 """
 
+# Prompt模板版本号：修改任意模板后递增，使已缓存的分析结果失效
+PROMPT_TEMPLATE_VERSION = "3"
+
 # 代码解释Prompt模板
 CODE_EXPLANATION_PROMPT = """
 你是一位经验丰富的Python编程导师，擅长用清晰易懂的语言解释代码。
@@ -81,6 +84,100 @@ CODE_REVIEW_PROMPT = """
 请确保建议具体、可操作，并解释为什么这样做更好。用中文回答。
 """
 
+# ReAct Agent的工具调用格式说明（追加在代码审查Prompt之后）
+REACT_AGENT_SUFFIX = """
+可用工具的详细说明：
+{tools}
+
+请严格使用以下格式：
+
+Thought: 思考下一步该做什么
+Action: 要使用的工具，必须是 [{tool_names}] 之一
+Action Input: 工具的输入
+Observation: 工具返回的结果
+...（Thought/Action/Action Input/Observation 可以重复多次）
+Thought: 我已经可以给出最终报告
+Final Answer: 最终审查报告
+
+开始！
+
+Thought:{agent_scratchpad}
+"""
+
+# 带预计算工具结果的代码审查Prompt模板（单次LLM调用，可流式输出）
+CODE_REVIEW_WITH_CONTEXT_PROMPT = """
+你是一位资深的Python代码审查专家，具有丰富的代码质量评估经验。
+
+请对以下{language}代码进行全面的审查分析：
+
+```{language}
+{code}
+```
+
+以下是已经完成的静态分析和知识库检索结果，请直接参考，无需再调用工具：
+
+### flake8静态分析结果
+{flake8_result}
+
+### 知识库检索到的最佳实践
+{rag_result}
+
+最终报告请包含以下内容：
+
+## 📊 总体评分
+给出0-100分的评分，并简要说明评分依据。
+
+## 🐛 潜在Bug分析
+- 识别可能的逻辑错误
+- 指出边界条件问题
+- 标注可能的运行时错误
+
+## 🎨 代码风格检查
+- 基于flake8结果分析风格问题
+- 提供具体的改进建议
+- 参考PEP 8规范
+
+## ⚡ 优化建议
+- 基于知识库检索结果提供优化方案
+- 性能改进建议
+- 代码可读性提升
+- 更Pythonic的写法
+
+## 💡 总结建议
+提供3-5条最重要的改进建议，按优先级排序。
+
+请确保建议具体、可操作，并解释为什么这样做更好。用中文回答。
+"""
+
+# 结构化输出的代码审查Prompt模板（预计算工具结果，回复为符合Schema的JSON）
+CODE_REVIEW_JSON_PROMPT = """
+你是一位资深的Python代码审查专家，具有丰富的代码质量评估经验。
+
+请对以下{language}代码进行全面的审查分析：
+
+```{language}
+{code}
+```
+
+以下是已经完成的静态分析和知识库检索结果，请直接参考，无需再调用工具：
+
+### flake8静态分析结果
+{flake8_result}
+
+### 知识库检索到的最佳实践
+{rag_result}
+
+请只输出一个JSON对象，不要输出代码块标记或任何其他文字。JSON必须符合以下JSON Schema：
+{schema}
+
+要求：
+- overall_score 为0-100的整数评分，summary 用一两句话说明评分依据和最重要的改进建议
+- bugs 列出可能的逻辑错误、边界条件问题和运行时错误，severity 取 high、medium 或 low
+- style_issues 基于flake8结果和PEP 8列出风格问题，rule 填写规则代码
+- optimizations 基于知识库检索结果给出性能和可读性优化，尽量给出 before_code 和 after_code
+- line_number 为代码中的行号，所有描述和建议用中文
+"""
+
 # 错误处理Prompt模板
 ERROR_HANDLING_PROMPT = """
 分析以下Python代码中可能出现的错误和异常情况：
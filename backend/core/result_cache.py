@@ -0,0 +1,333 @@
+"""
+分析结果缓存
+负责人：组长
+作用：按规范化代码内容寻址缓存代码解释和代码审查结果，
+      内存LRU层支持TTL和按字节数淘汰，可选SQLite磁盘层在重启后保留结果
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from pydantic import BaseModel
+
+from config.settings import get_settings
+from backend.core.prompts import PROMPT_TEMPLATE_VERSION
+from backend.utils.code_fingerprint import ast_fingerprint, text_fingerprint
+from backend.utils.text_processor import TextProcessor
+from backend.utils.validation import sanitize_code
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def normalize_code(code: str) -> str:
+    """
+    规范化代码文本（去BOM、统一换行、去除多余空行和行尾空白）
+
+    Args:
+        code: 原始代码
+
+    Returns:
+        规范化后的代码
+    """
+    return TextProcessor.clean_code(sanitize_code(code))
+
+
+def compute_fingerprint(kind: str, code: str, language: str, mode: Optional[str] = None) -> str:
+    """
+    计算代码指纹
+
+    解释结果只与代码语义有关：ast/ast_alpha 模式下Python代码使用AST指纹，
+    注释、空白和文档字符串排版不同的代码共享结果，无法解析时回退到规范化文本指纹。
+    审查结果包含flake8风格问题（空白、注释、noqa、行号和列号），
+    因此审查指纹总是使用只去BOM、统一换行和去末尾空白的原始文本，不受指纹模式影响。
+
+    Args:
+        kind: 分析类型（explain / review）
+        code: 原始代码
+        language: 编程语言
+        mode: 解释的指纹模式（text / ast / ast_alpha），默认取配置
+
+    Returns:
+        带模式前缀的指纹字符串
+    """
+    source = sanitize_code(code)
+    if kind == "review":
+        return f"raw:{text_fingerprint(source)}"
+
+    mode = mode or settings.result_cache_key_mode
+    if mode in ("ast", "ast_alpha") and language.lower().strip() == "python":
+        fingerprint = ast_fingerprint(source, rename_locals=(mode == "ast_alpha"))
+        if fingerprint is not None:
+            return f"{mode}:{fingerprint}"
+
+    return f"text:{text_fingerprint(normalize_code(code))}"
+
+
+def make_cache_key(
+    kind: str,
+    code: str,
+    language: str,
+    model_name: Optional[str] = None,
+    temperature: Optional[float] = None,
+    fingerprint: Optional[str] = None,
+    variant: Optional[str] = None
+) -> str:
+    """
+    生成结果缓存键
+
+    Args:
+        kind: 分析类型（explain / review）
+        code: 原始代码
+        language: 编程语言
+        model_name: 模型名称，默认取配置
+        temperature: 温度参数，默认取配置
+        fingerprint: 代码指纹，默认按配置的指纹模式计算
+        variant: 影响结果的其他请求参数（如知识库过滤条件），为空时不参与计算
+
+    Returns:
+        缓存键（sha256十六进制字符串）
+    """
+    if fingerprint is None:
+        fingerprint = compute_fingerprint(kind, code, language)
+
+    parts = [
+        kind,
+        language.lower().strip(),
+        model_name if model_name is not None else settings.model_name,
+        repr(temperature if temperature is not None else settings.temperature),
+        PROMPT_TEMPLATE_VERSION,
+        fingerprint
+    ]
+    if variant:
+        parts.append(variant)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _encode_value(value: Any) -> Any:
+    """将Pydantic模型等对象转换为可JSON序列化的结构"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+class _SQLiteTier:
+    """SQLite磁盘缓存层"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= time.time():
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            return row[0], row[1]
+
+    def set(self, key: str, value: bytes, expires_at: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at)
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+            return cursor.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """
+    两级结果缓存
+
+    内存层为按最近使用排序的LRU，条目过期或总字节数超过上限时淘汰；
+    配置了磁盘路径时，写入同时落盘，内存未命中时从磁盘读取并回填内存。
+    """
+
+    def __init__(
+        self,
+        ttl: float = 86400,
+        max_bytes: int = 64 * 1024 * 1024,
+        db_path: Optional[str] = None
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._disk: Optional[_SQLiteTier] = None
+
+        if db_path:
+            try:
+                self._disk = _SQLiteTier(db_path)
+                self._disk.purge_expired()
+            except Exception as e:
+                logger.error(f"结果缓存磁盘层初始化失败: {str(e)}")
+                self._disk = None
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的结果，未命中返回None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return json.loads(entry[0])
+                self._remove(key)
+
+        if self._disk is not None:
+            try:
+                stored = self._disk.get(key)
+            except Exception as e:
+                logger.warning(f"读取磁盘结果缓存失败: {str(e)}")
+                stored = None
+            if stored is not None:
+                with self._lock:
+                    self._store(key, stored[0], stored[1])
+                    self._hits += 1
+                    self._disk_hits += 1
+                return json.loads(stored[0])
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """
+        写入缓存结果
+
+        Args:
+            key: 缓存键
+            value: 分析结果（可包含Pydantic模型）
+        """
+        data = json.dumps(value, ensure_ascii=False, default=_encode_value).encode("utf-8")
+        expires_at = time.time() + self.ttl
+
+        with self._lock:
+            self._store(key, data, expires_at)
+
+        if self._disk is not None:
+            try:
+                self._disk.set(key, data, expires_at)
+            except Exception as e:
+                logger.warning(f"写入磁盘结果缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空所有缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "disk_enabled": self._disk is not None
+            }
+        if self._disk is not None:
+            try:
+                stats["disk_entries"] = self._disk.count()
+            except Exception:
+                stats["disk_entries"] = None
+        return stats
+
+    def _store(self, key: str, data: bytes, expires_at: float):
+        """写入内存层并按字节数淘汰（调用方持有锁）"""
+        if key in self._entries:
+            self._remove(key)
+        if len(data) > self.max_bytes:
+            return
+
+        self._entries[key] = (data, expires_at)
+        self._total_bytes += len(data)
+
+        while self._total_bytes > self.max_bytes and self._entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[0])
+
+
+_cache_instance: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """获取全局结果缓存（未启用时返回None）"""
+    global _cache_instance
+    if not settings.result_cache_enabled:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = ResultCache(
+                    ttl=settings.result_cache_ttl,
+                    max_bytes=settings.result_cache_max_bytes,
+                    db_path=settings.result_cache_db_path or None
+                )
+    return _cache_instance
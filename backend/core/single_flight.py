@@ -0,0 +1,102 @@
+"""
+相同请求合并（single-flight）
+负责人：组长
+作用：同一缓存键的并发请求只执行一次，后到的请求挂在进行中的任务上共享结果；
+      出错时所有等待方收到同一异常且不缓存，单个等待方取消不影响其他人，全部等待方取消时才取消任务
+"""
+
+import asyncio
+import functools
+import logging
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """一个进行中的任务及其等待方数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按键合并并发的异步调用"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._executed = 0
+        self._coalesced = 0
+        self._failed = 0
+        self._cancelled = 0
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        执行或加入同一键的进行中调用
+
+        Args:
+            key: 合并键（通常为结果缓存键）
+            factory: 没有进行中的调用时，用于创建调用的函数
+
+        Returns:
+            (结果, 是否与其他请求共享)
+
+        Raises:
+            调用抛出的异常会传给所有等待方
+        """
+        loop = asyncio.get_running_loop()
+        flight = self._flights.get(key)
+        shared = flight is not None and not flight.task.done() and flight.task.get_loop() is loop
+
+        if shared:
+            self._coalesced += 1
+            logger.info(f"合并相同的进行中请求，当前等待方: {flight.waiters + 1}")
+        else:
+            # 调用在独立任务中执行，发起方被取消时其他等待方仍能拿到结果
+            flight = _Flight(loop.create_task(factory()))
+            self._flights[key] = flight
+            self._executed += 1
+            flight.task.add_done_callback(functools.partial(self._finish, key, flight))
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有等待方都已取消，结果不再需要
+                flight.task.cancel()
+        return result, shared
+
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Task):
+        """任务结束后移除记录（失败结果不保留，下一次请求重新执行）"""
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if task.cancelled():
+            self._cancelled += 1
+        elif task.exception() is not None:
+            self._failed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取合并统计"""
+        total = self._executed + self._coalesced
+        return {
+            "in_flight": len(self._flights),
+            "executed": self._executed,
+            "coalesced": self._coalesced,
+            "coalesce_rate": round(self._coalesced / total, 4) if total else 0.0,
+            "failed": self._failed,
+            "cancelled": self._cancelled
+        }
+
+
+@lru_cache()
+def get_single_flight() -> SingleFlight:
+    """获取全局的请求合并器（解释和审查共用，键中已包含分析类型）"""
+    return SingleFlight()
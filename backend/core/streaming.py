@@ -0,0 +1,71 @@
+"""
+流式输出工具
+负责人：组长
+作用：把阻塞的同步迭代器（如LLM逐token输出）桥接为异步迭代器，供SSE等流式接口使用
+"""
+
+import asyncio
+import threading
+import logging
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+from concurrent.futures import Executor
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL = object()
+
+
+class _ProducerError:
+    """在线程中捕获的异常，交给事件循环侧重新抛出"""
+
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def iterate_in_thread(
+    iterator_factory: Callable[[], Iterable[Any]],
+    executor: Optional[Executor] = None
+) -> AsyncIterator[Any]:
+    """
+    在工作线程中消费同步迭代器，并在事件循环中逐项产出
+
+    调用方提前结束迭代（例如客户端断开连接）时，工作线程会在下一项到达后停止消费。
+
+    Args:
+        iterator_factory: 返回同步可迭代对象的函数，在工作线程中调用
+        executor: 执行器，默认使用事件循环的默认线程池
+
+    Yields:
+        迭代器产出的每一项
+    """
+    loop = asyncio.get_event_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stopped = threading.Event()
+
+    def produce():
+        try:
+            for item in iterator_factory():
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, _ProducerError(e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, _SENTINEL)
+
+    future = loop.run_in_executor(executor, produce)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is _SENTINEL:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+        if future.done():
+            future.result()
@@ -21,6 +21,8 @@ from contextlib import asynccontextmanager
 from config.settings import get_settings
 # 导入日志配置函数
 from backend.core.logging_config import setup_logging
+# 导入有界执行器，饱和时返回429/503，退出时关闭线程池
+from backend.core.executors import ExecutorSaturatedError, shutdown_executors
 
 # 获取项目的配置信息（如端口、CORS等）
 settings = get_settings()
@@ -36,9 +38,20 @@ async def lifespan(app: FastAPI):
     # 可以在这里初始化向量数据库等资源（如有需要）
     # await init_vector_db()
     
+    # 预热flake8 worker进程池（仅在使用进程池引擎时）
+    if settings.flake8_engine == "pool":
+        from backend.tools.flake8_pool import get_flake8_pool
+        get_flake8_pool().start()
+    
     yield  # 应用运行期间
     
     # 应用关闭时执行的代码
+    if settings.flake8_engine == "pool":
+        from backend.tools.flake8_pool import get_flake8_pool
+        get_flake8_pool().shutdown()
+    shutdown_executors(wait=False)  # 关闭LLM/静态分析/嵌入线程池
+    from backend.core.llm_provider import get_llm_provider
+    await get_llm_provider().aclose()  # 关闭LLM HTTP连接池
     logging.info("CodeWise AI 后端服务关闭")  # 记录关闭日志
 
 # 创建FastAPI应用实例，配置基本信息和生命周期
@@ -60,6 +73,17 @@ app.add_middleware(
     allow_headers=["*"],  # 允许所有请求头
 )
 
+# 线程池饱和时返回429（排队已满）或503（排队超时/已关闭），提示客户端稍后重试
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request, exc: ExecutorSaturatedError):
+    """执行器饱和异常处理"""
+    logging.warning(f"请求被拒绝: {str(exc)}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"服务繁忙，请稍后重试（{str(exc)}）"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # 定义全局异常处理器，捕获未处理的异常
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
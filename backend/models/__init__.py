@@ -12,7 +12,12 @@ from .schemas import (
     StyleIssue,
     OptimizationSuggestion,
     ErrorResponse,
-    AnalysisType
+    AnalysisType,
+    BatchAnalysisRequest,
+    BatchItemResult,
+    BatchAnalysisResponse,
+    KnowledgeIngestRequest,
+    KnowledgeIngestResponse
 )
 
 __all__ = [
@@ -23,5 +28,10 @@ __all__ = [
     "StyleIssue",
     "OptimizationSuggestion",
     "ErrorResponse",
-    "AnalysisType"
+    "AnalysisType",
+    "BatchAnalysisRequest",
+    "BatchItemResult",
+    "BatchAnalysisResponse",
+    "KnowledgeIngestRequest",
+    "KnowledgeIngestResponse"
 ]
\ No newline at end of file
@@ -4,10 +4,14 @@
 作用：定义API请求和响应的数据结构，使用Pydantic进行数据验证
 """
 
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 
+from config.settings import get_settings
+
+settings = get_settings()
+
 
 class AnalysisType(str, Enum):
     """分析类型枚举"""
@@ -17,9 +21,22 @@ class AnalysisType(str, Enum):
 
 class CodeAnalysisRequest(BaseModel):
     """代码分析请求模型"""
-    code: str = Field(..., min_length=1, max_length=10000, description="待分析的代码")
+    code: str = Field(
+        ...,
+        min_length=1,
+        max_length=settings.max_code_length,
+        description="待分析的代码（超过分块上限时按函数和类分块分析）"
+    )
     language: str = Field(default="python", description="编程语言")
     analysis_type: AnalysisType = Field(..., description="分析类型")
+    knowledge_categories: Optional[List[str]] = Field(
+        default=None,
+        description="审查时只检索这些分类的知识库内容（如 性能优化、最佳实践），为空时不限制"
+    )
+    knowledge_topics: Optional[List[str]] = Field(
+        default=None,
+        description="审查时只检索这些主题的知识库内容（如 异常处理），为空时不限制"
+    )
     
     class Config:
         json_schema_extra = {
@@ -37,6 +54,7 @@ class CodeExplanationResponse(BaseModel):
     code_summary: str = Field(..., description="代码功能摘要")
     key_concepts: List[str] = Field(default=[], description="关键概念列表")
     execution_time: float = Field(..., description="分析耗时（秒）")
+    cache_hit: bool = Field(default=False, description="是否命中结果缓存")
     
     class Config:
         json_schema_extra = {
@@ -44,7 +62,8 @@ class CodeExplanationResponse(BaseModel):
                 "explanation": "这是一个简单的函数定义...",
                 "code_summary": "定义了一个打印问候语的函数",
                 "key_concepts": ["函数定义", "print语句"],
-                "execution_time": 1.23
+                "execution_time": 1.23,
+                "cache_hit": False
             }
         }
 
@@ -114,6 +133,8 @@ class CodeReviewResponse(BaseModel):
     optimizations: List[OptimizationSuggestion] = Field(default=[], description="优化建议列表")
     execution_time: float = Field(..., description="分析耗时（秒）")
     lines_analyzed: int = Field(..., description="分析的代码行数")
+    cache_hit: bool = Field(default=False, description="是否命中结果缓存")
+    llm_skipped: bool = Field(default=False, description="是否只做了静态审查而未调用LLM")
     
     class Config:
         json_schema_extra = {
@@ -124,7 +145,9 @@ class CodeReviewResponse(BaseModel):
                 "style_issues": [],
                 "optimizations": [],
                 "execution_time": 2.45,
-                "lines_analyzed": 15
+                "lines_analyzed": 15,
+                "cache_hit": False,
+                "llm_skipped": False
             }
         }
 
@@ -142,4 +165,57 @@ class ErrorResponse(BaseModel):
                 "error_code": "ANALYSIS_ERROR",
                 "timestamp": "2024-01-01T12:00:00Z"
             }
-        }
\ No newline at end of file
+        }
+
+
+class BatchAnalysisRequest(BaseModel):
+    """批量代码分析请求模型"""
+    items: List[CodeAnalysisRequest] = Field(..., min_length=1, description="待分析的代码列表，可混合解释和审查")
+    stream: bool = Field(default=False, description="是否以NDJSON逐条返回已完成的结果")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "items": [
+                    {"code": "def hello():\n    print('Hello')", "language": "python", "analysis_type": "explain"},
+                    {"code": "def add(a, b):\n    return a + b", "language": "python", "analysis_type": "review"}
+                ],
+                "stream": False
+            }
+        }
+
+
+class BatchItemResult(BaseModel):
+    """批量分析中单条代码的结果"""
+    index: int = Field(..., description="在请求items中的位置")
+    analysis_type: AnalysisType = Field(..., description="分析类型")
+    status: str = Field(..., description="处理状态：ok 或 error")
+    result: Optional[Union[CodeExplanationResponse, CodeReviewResponse]] = Field(None, description="分析结果")
+    error: Optional[str] = Field(None, description="出错信息")
+    duplicate_of: Optional[int] = Field(None, description="与之重复、共享结果的条目位置")
+
+
+class BatchAnalysisResponse(BaseModel):
+    """批量代码分析响应模型"""
+    results: List[BatchItemResult] = Field(..., description="按请求顺序排列的结果")
+    total_items: int = Field(..., description="请求条目数")
+    unique_items: int = Field(..., description="去重后实际分析的条目数")
+    execution_time: float = Field(..., description="总耗时（秒）")
+
+
+class KnowledgeIngestRequest(BaseModel):
+    """知识库导入请求模型"""
+    path: Optional[str] = Field(None, description="知识库目录下的相对路径，为空时导入整个知识库目录")
+    batch_size: Optional[int] = Field(None, ge=1, le=1024, description="每批嵌入的文本块数")
+    compact: bool = Field(default=False, description="导入完成后是否压缩为新的索引快照")
+
+
+class KnowledgeIngestResponse(BaseModel):
+    """知识库导入响应模型"""
+    files: int = Field(..., description="读取的文件数")
+    chunks: int = Field(..., description="切分得到的文本块数")
+    added: int = Field(..., description="新增到向量数据库的文本块数")
+    skipped: int = Field(..., description="已存在而跳过的文本块数")
+    batches: int = Field(..., description="嵌入批次数")
+    compacted: bool = Field(..., description="是否已压缩为新的索引快照")
+    execution_time: float = Field(..., description="导入耗时（秒）")
@@ -7,7 +7,7 @@
 # 移除直接导入，避免循环依赖
 # 服务类应该在需要时直接从模块导入
 
-__all__ = ["CodeExplainerService", "CodeReviewerService"]
+__all__ = ["CodeExplainerService", "CodeReviewerService", "BatchAnalyzerService"]
 
 # 使用延迟导入避免循环依赖
 def get_code_explainer_service():
@@ -16,4 +16,8 @@ def get_code_explainer_service():
 
 def get_code_reviewer_service():
     from .code_reviewer import CodeReviewerService
-    return CodeReviewerService
\ No newline at end of file
+    return CodeReviewerService
+
+def get_batch_analyzer_service():
+    from .batch_analyzer import BatchAnalyzerService
+    return BatchAnalyzerService
@@ -0,0 +1,233 @@
+"""
+批量代码分析服务
+负责人：组长
+作用：一次请求分析多段代码，相同输入只分析一次；静态分析和模型调用限制并行数，
+      审查条目先做静态预审查，需要调用模型的条目的知识库查询合并为一次批量嵌入，结果按完成顺序逐条产出
+"""
+
+import asyncio
+import time
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from config.settings import get_settings
+from backend.core.executors import CPU_POOL, EMBEDDING_POOL, get_executor
+from backend.core.result_cache import get_result_cache, make_cache_key
+from backend.models.schemas import (
+    AnalysisType,
+    BatchItemResult,
+    CodeAnalysisRequest,
+    CodeExplanationResponse,
+    CodeReviewResponse
+)
+from backend.services.code_explainer import CodeExplainerService
+from backend.services.code_reviewer import CodeReviewerService
+from backend.tools.partitioned_index import RetrievalFilter
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class _UniqueItem:
+    """去重后的分析条目"""
+
+    __slots__ = ("key", "request", "knowledge_filter", "indices", "cached", "static_future", "knowledge_index")
+
+    def __init__(self, key: str, request: CodeAnalysisRequest, knowledge_filter: Optional[RetrievalFilter] = None):
+        self.key = key
+        self.request = request
+        self.knowledge_filter = knowledge_filter
+        self.indices: List[int] = []
+        self.cached: Optional[Dict[str, Any]] = None
+        self.static_future: Optional[asyncio.Future] = None
+        self.knowledge_index: Optional[int] = None
+
+
+class BatchAnalyzerService:
+    """批量代码分析服务类"""
+
+    def __init__(
+        self,
+        explainer: CodeExplainerService,
+        reviewer: CodeReviewerService,
+        max_concurrency: Optional[int] = None
+    ):
+        """
+        初始化批量分析服务
+
+        Args:
+            explainer: 代码解释服务实例
+            reviewer: 代码审查服务实例
+            max_concurrency: 静态分析和模型调用的最大并行数，默认取配置
+        """
+        self.explainer = explainer
+        self.reviewer = reviewer
+        self.max_concurrency = max_concurrency or settings.batch_max_concurrency
+
+    def deduplicate(self, items: List[CodeAnalysisRequest]) -> List[_UniqueItem]:
+        """
+        按结果缓存键合并相同输入（分析类型、语言、代码指纹均相同，审查条目的知识库过滤条件也相同）
+
+        Args:
+            items: 请求条目
+
+        Returns:
+            去重后的条目，保持首次出现的顺序
+        """
+        unique: Dict[str, _UniqueItem] = {}
+        for index, item in enumerate(items):
+            knowledge_filter = None
+            if item.analysis_type == AnalysisType.REVIEW:
+                knowledge_filter = RetrievalFilter.create(item.knowledge_categories, item.knowledge_topics)
+                key = self.reviewer._review_cache_key(item.code, item.language, knowledge_filter)
+            else:
+                key = make_cache_key(item.analysis_type.value, item.code, item.language)
+            if key not in unique:
+                unique[key] = _UniqueItem(key, item, knowledge_filter)
+            unique[key].indices.append(index)
+        return list(unique.values())
+
+    async def analyze(self, items: List[CodeAnalysisRequest]) -> AsyncIterator[BatchItemResult]:
+        """
+        批量分析代码
+
+        Args:
+            items: 请求条目，可混合解释和审查
+
+        Yields:
+            每个条目的结果，按完成顺序产出；重复条目随其首次出现的条目一起产出
+        """
+        unique = self.deduplicate(items)
+        logger.info(f"开始批量分析: {len(items)} 个条目，去重后 {len(unique)} 个")
+
+        # 审查条目先查结果缓存，未命中的条目先做静态预审查，再一起检索需要调用模型的条目
+        cache = get_result_cache()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        static_entries: List[_UniqueItem] = []
+        for entry in unique:
+            if entry.request.analysis_type != AnalysisType.REVIEW:
+                continue
+            if cache is not None:
+                entry.cached = self.reviewer.cached_review(
+                    cache, entry.request.code, entry.request.language, entry.knowledge_filter
+                )
+            if entry.cached is None and not self.reviewer.needs_chunking(entry.request.code):
+                entry.static_future = asyncio.ensure_future(self._prereview(entry, semaphore))
+                static_entries.append(entry)
+
+        knowledge_future = None
+        if static_entries:
+            knowledge_future = asyncio.ensure_future(self._retrieve_knowledge(static_entries))
+
+        tasks = [
+            asyncio.ensure_future(self._run_item(entry, semaphore, knowledge_future))
+            for entry in unique
+        ]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                entry, response, error = await next_done
+                first = entry.indices[0]
+                for index in entry.indices:
+                    yield BatchItemResult(
+                        index=index,
+                        analysis_type=entry.request.analysis_type,
+                        status="error" if error else "ok",
+                        result=response,
+                        error=error,
+                        duplicate_of=first if index != first else None
+                    )
+        finally:
+            # 调用方提前结束（如客户端断开）时取消尚未完成的条目
+            for task in tasks:
+                task.cancel()
+            for entry in static_entries:
+                entry.static_future.cancel()
+            if knowledge_future is not None:
+                knowledge_future.cancel()
+
+    async def _prereview(self, entry: _UniqueItem, semaphore: asyncio.Semaphore):
+        """对审查条目执行flake8检查和规则审查"""
+        async with semaphore:
+            return await get_executor(CPU_POOL).run(self.reviewer.run_static_analysis, entry.request.code)
+
+    async def _retrieve_knowledge(self, entries: List[_UniqueItem]) -> List[str]:
+        """
+        等所有条目的静态预审查完成后，只为需要调用模型的条目做一次批量知识库检索
+
+        Returns:
+            检索结果文本，按条目的 knowledge_index 取用
+        """
+        await asyncio.gather(*(entry.static_future for entry in entries), return_exceptions=True)
+        needs_llm: List[_UniqueItem] = []
+        for entry in entries:
+            future = entry.static_future
+            if future.cancelled() or future.exception() is not None or not future.result()[2].needs_llm:
+                continue
+            entry.knowledge_index = len(needs_llm)
+            needs_llm.append(entry)
+        if not needs_llm:
+            return []
+        return await get_executor(EMBEDDING_POOL).run(
+            self.reviewer.retrieve_knowledge_batch,
+            [entry.request.code for entry in needs_llm],
+            [entry.knowledge_filter for entry in needs_llm]
+        )
+
+    async def _run_item(
+        self,
+        entry: _UniqueItem,
+        semaphore: asyncio.Semaphore,
+        knowledge_future
+    ) -> Tuple[_UniqueItem, Any, Optional[str]]:
+        """分析单个去重后的条目，返回 (条目, 响应模型, 出错信息)"""
+        request = entry.request
+        start_time = time.perf_counter()
+        try:
+            if request.analysis_type == AnalysisType.EXPLAIN:
+                async with semaphore:
+                    result = await self.explainer.explain_code(request.code, request.language)
+                return entry, CodeExplanationResponse(
+                    explanation=result["explanation"],
+                    code_summary=result["summary"],
+                    key_concepts=result["key_concepts"],
+                    execution_time=time.perf_counter() - start_time,
+                    cache_hit=result.get("cache_hit", False)
+                ), None
+
+            if entry.cached is not None:
+                result = {**entry.cached, "cache_hit": True}
+            elif entry.static_future is None:
+                # 大文件分块审查，分块之间的并发由审查服务自行控制
+                async with semaphore:
+                    result = await self.reviewer.review_code(
+                        request.code, request.language, entry.knowledge_filter
+                    )
+            else:
+                _, flake8_result, prereview = await entry.static_future
+                if not prereview.needs_llm:
+                    # 静态预审查已足够，不再调用模型
+                    result = self.reviewer.static_result(
+                        prereview, self.reviewer.static_cache_key(request.code, request.language)
+                    )
+                else:
+                    rag_result = (await knowledge_future)[entry.knowledge_index]
+                    async with semaphore:
+                        result = await self.reviewer.review_with_context(
+                            request.code, request.language, flake8_result, rag_result, entry.knowledge_filter
+                        )
+            return entry, CodeReviewResponse(
+                overall_score=result["score"],
+                summary=result["summary"],
+                bugs=result["bugs"],
+                style_issues=result["style_issues"],
+                optimizations=result["optimizations"],
+                execution_time=time.perf_counter() - start_time,
+                lines_analyzed=len(request.code.split('\n')),
+                cache_hit=result.get("cache_hit", False),
+                llm_skipped=result.get("llm_skipped", False)
+            ), None
+
+        except Exception as e:
+            logger.error(f"批量分析条目 {entry.indices[0]} 失败: {str(e)}")
+            return entry, None, str(e)
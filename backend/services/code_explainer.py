@@ -1,29 +1,24 @@
 """
 代码解释服务
 负责人：组长
-作用：基于LangChain实现的AI代码解释器，使用通义千问模型解释Python代码
+作用：基于LangChain提示模板和异步LLM适配层实现的AI代码解释器，使用通义千问模型解释Python代码
 """
 
-import asyncio  # 导入异步IO库，用于异步操作
 import logging  # 导入日志库，用于记录日志信息
-from typing import Dict, List, Any  # 导入类型注解，用于类型提示
-
-# 修复 LangChain 导入 - 使用兼容的导入方式
-try:
-    from langchain.chains import LLMChain  # 导入LangChain的LLMChain，用于构建大模型链
-except ImportError:
-    # 如果 LLMChain 导入失败，使用新版本的导入方式
-    try:
-        from langchain.chains.llm import LLMChain
-    except ImportError:
-        # 如果都失败，设置为 None，使用直接调用模式
-        LLMChain = None
+import re  # 导入正则库，用于切分分块解释的章节
+import time  # 导入时间库，用于统计首token耗时
+from typing import Dict, List, Any, AsyncIterator, Optional  # 导入类型注解，用于类型提示
 
 from langchain.prompts import PromptTemplate  # 导入提示模板，用于构建大模型输入模板
-from langchain_community.llms import Tongyi  # 导入通义千问模型的LangChain适配器
 
 from config.settings import get_settings  # 导入配置获取函数，用于获取项目配置
 from backend.core.prompts import CODE_EXPLANATION_PROMPT  # 导入代码解释提示词模板
+from backend.core.result_cache import get_result_cache, make_cache_key  # 导入结果缓存
+from backend.core.single_flight import get_single_flight  # 导入相同请求合并器
+from backend.core.llm_provider import LLMProvider, LangChainLLMProvider, get_llm_provider  # 导入异步LLM适配层
+from backend.utils.code_chunker import (  # 导入大文件分块工具
+    CodeChunk, chunk_code, estimate_tokens, gather_limited, select_within_budget
+)
 
 logger = logging.getLogger(__name__)  # 获取当前模块的日志记录器
 settings = get_settings()  # 获取全局配置对象
@@ -32,52 +27,35 @@ settings = get_settings()  # 获取全局配置对象
 class CodeExplainerService:
     """代码解释服务类"""
 
-    def __init__(self):
-        """初始化代码解释服务"""
-        self.llm = None  # 初始化大模型对象为None
-        self.explanation_chain = None  # 初始化解释链对象为None
-        self.use_direct_mode = False  # 是否使用直接调用模式
-        self._init_llm()  # 调用内部方法初始化大模型和链
+    def __init__(self, llm=None, provider: Optional[LLMProvider] = None):
+        """
+        初始化代码解释服务
+
+        Args:
+            llm: 可选的LangChain LLM实例（测试时可注入假模型），在线程池中调用
+            provider: 可选的LLM适配器，默认使用全局共享的异步适配器
+        """
+        self.llm = llm  # 注入的同步大模型对象
+        self.provider = provider  # 异步LLM适配器
+        self.prompt = PromptTemplate(  # 代码解释提示模板，完整输出和流式输出共用
+            input_variables=["code", "language"],
+            template=CODE_EXPLANATION_PROMPT
+        )
+        self._init_llm()  # 调用内部方法初始化LLM适配器
 
     def _init_llm(self):
-        """初始化LLM和链"""
+        """初始化LLM适配器"""
         try:
-            # 初始化通义千问模型，传入API密钥、模型名、温度和最大token数
-            self.llm = Tongyi(
-                dashscope_api_key=settings.dashscope_api_key,
-                model_name=settings.model_name,
-                temperature=settings.temperature,
-                max_tokens=settings.max_tokens
-            )
-
-            # 如果 LLMChain 不可用，使用直接调用模式
-            if LLMChain is None:
-                logger.warning("LLMChain 不可用，使用直接调用模式")
-                self.explanation_chain = None
-                self.use_direct_mode = True
-            else:
-                # 创建代码解释提示模板，指定输入变量和模板内容
-                prompt = PromptTemplate(
-                    input_variables=["code", "language"],
-                    template=CODE_EXPLANATION_PROMPT
-                )
-
-                # 创建LLM链，绑定大模型和提示模板，设置是否输出详细日志
-                self.explanation_chain = LLMChain(
-                    llm=self.llm,
-                    prompt=prompt,
-                    verbose=True if settings.debug else False
-                )
-                self.use_direct_mode = False
+            if self.provider is None:
+                # 注入了同步模型时包装为适配器，否则使用共享的异步客户端
+                self.provider = LangChainLLMProvider(self.llm) if self.llm is not None \
+                    else get_llm_provider()
 
             logger.info("代码解释服务初始化成功")  # 记录初始化成功日志
 
         except Exception as e:
             logger.error(f"代码解释服务初始化失败: {str(e)}")  # 记录初始化失败日志
-            # 如果初始化失败，回退到直接调用模式
-            self.explanation_chain = None
-            self.use_direct_mode = True
-            logger.warning("回退到直接调用模式")
+            self.provider = None
 
     async def explain_code(self, code: str, language: str = "python") -> Dict[str, Any]:
         """
@@ -93,36 +71,175 @@ class CodeExplainerService:
         try:
             logger.info(f"开始解释 {language} 代码")  # 记录开始解释日志
 
-            # 如果是直接调用模式
-            if self.use_direct_mode:
-                # 直接调用通义千问模型进行解释
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.llm(
-                        code=code,
-                        language=language
-                    )
-                )
-            else:
-                # 异步执行LLM链，避免阻塞主线程
-                response = await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.explanation_chain.run(
-                        code=code,
-                        language=language
-                    )
-                )
-
-            # 解析LLM响应，结构化输出
-            result = self._parse_explanation_response(response)
+            # 先查询结果缓存，相同的规范化代码无需重复调用模型
+            cache = get_result_cache()
+            cache_key = make_cache_key("explain", code, language)
+            if cache is not None:
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    logger.info("代码解释命中结果缓存")
+                    return {**cached, "cache_hit": True}
+
+            if self.provider is None:
+                raise RuntimeError("LLM未初始化")
+
+            # 相同代码的并发请求合并为一次模型调用
+            result, _ = await get_single_flight().run(
+                cache_key,
+                lambda: self._generate_explanation(code, language, cache, cache_key)
+            )
 
             logger.info("代码解释完成")  # 记录解释完成日志
-            return result  # 返回结构化解释结果
+            return {**result, "cache_hit": False}  # 返回结构化解释结果
 
         except Exception as e:
             logger.error(f"代码解释过程出错: {str(e)}")  # 记录解释出错日志
             raise  # 抛出异常
 
+    async def _generate_explanation(self, code: str, language: str, cache, cache_key: str) -> Dict[str, Any]:
+        """调用模型生成解释并写入结果缓存"""
+        if estimate_tokens(code) > settings.chunk_max_tokens:
+            # 大文件按函数和类分块解释
+            result = await self._explain_in_chunks(code, language)
+        else:
+            # 异步调用模型，等待期间不阻塞事件循环
+            response = await self.provider.complete(
+                self.prompt.format(code=code, language=language)
+            )
+
+            # 解析LLM响应，结构化输出
+            result = self._parse_explanation_response(response)
+
+        if cache is not None:
+            cache.set(cache_key, result)  # 写入结果缓存
+        return result
+
+    async def stream_explanation(
+        self,
+        code: str,
+        language: str = "python"
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式解释代码，模型每生成一段文本就产出一个事件
+
+        事件类型：
+            token: {"text": 文本片段}
+            done: {"summary", "key_concepts", "time_to_first_token", "execution_time", "cache_hit"}
+
+        Args:
+            code: 待解释的代码
+            language: 编程语言
+
+        Yields:
+            {"event": 事件类型, "data": 事件数据}
+        """
+        start_time = time.perf_counter()
+        logger.info(f"开始流式解释 {language} 代码")
+
+        cache = get_result_cache()
+        cache_key = make_cache_key("explain", code, language) if cache else None
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logger.info("流式代码解释命中结果缓存")
+                yield {"event": "token", "data": {"text": cached["explanation"]}}
+                yield {"event": "done", "data": {
+                    "summary": cached["summary"],
+                    "key_concepts": cached["key_concepts"],
+                    "time_to_first_token": time.perf_counter() - start_time,
+                    "execution_time": time.perf_counter() - start_time,
+                    "cache_hit": True
+                }}
+                return
+
+        if self.provider is None:
+            raise RuntimeError("LLM未初始化")
+
+        if estimate_tokens(code) > settings.chunk_max_tokens:
+            # 大文件分块并发解释，完成后按章节推送
+            result = await self._generate_explanation(code, language, cache, cache_key)
+            for section in re.split(r"(?=\n\n### )", result["explanation"]):
+                yield {"event": "token", "data": {"text": section}}
+            yield {"event": "done", "data": {
+                "summary": result["summary"],
+                "key_concepts": result["key_concepts"],
+                "time_to_first_token": None,
+                "execution_time": time.perf_counter() - start_time,
+                "cache_hit": False
+            }}
+            return
+
+        prompt_text = self.prompt.format(code=code, language=language)
+        chunks: List[str] = []
+        time_to_first_token = None
+
+        # 通过LLM适配器异步消费模型的增量输出，等待期间不阻塞事件循环
+        async for text in self.provider.stream(prompt_text):
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start_time
+                logger.info(f"流式解释首token耗时: {time_to_first_token:.3f}秒")
+            chunks.append(text)
+            yield {"event": "token", "data": {"text": text}}
+
+        # 全部输出完成后再提取摘要和关键概念
+        result = self._parse_explanation_response("".join(chunks))
+        if cache is not None and result["explanation"]:
+            cache.set(cache_key, result)
+
+        execution_time = time.perf_counter() - start_time
+        logger.info(f"流式代码解释完成，耗时: {execution_time:.2f}秒")
+        yield {"event": "done", "data": {
+            "summary": result["summary"],
+            "key_concepts": result["key_concepts"],
+            "time_to_first_token": time_to_first_token,
+            "execution_time": execution_time,
+            "cache_hit": False
+        }}
+
+    async def _explain_in_chunks(self, code: str, language: str) -> Dict[str, Any]:
+        """
+        分块解释大文件
+
+        代码按语法树边界分块，在 request_token_budget 内并发解释各分块，
+        按原文件行号顺序合并为分节的解释；超出预算的分块只列出行号范围和包含的函数/类。
+
+        Args:
+            code: 完整代码
+            language: 编程语言
+
+        Returns:
+            合并后的解释结果
+        """
+        chunks = chunk_code(code, settings.chunk_max_tokens)
+        overhead = estimate_tokens(self.prompt.format(code="", language=language))
+        selected, skipped = select_within_budget(chunks, settings.request_token_budget, overhead)
+        logger.info(f"代码分为 {len(chunks)} 块解释，其中 {len(selected)} 块调用LLM")
+
+        async def explain_chunk(chunk: CodeChunk) -> str:
+            return await self.provider.complete(self.prompt.format(code=chunk.code, language=language))
+
+        responses = dict(zip(map(id, selected), await gather_limited(
+            selected, explain_chunk, settings.chunk_concurrency
+        )))
+
+        sections = []
+        for chunk in chunks:
+            body = responses.get(id(chunk), "（超出本次请求的token预算，未生成解释）")
+            sections.append(f"### {chunk.label}\n{body.strip()}")
+        explanation = "\n\n".join(sections)
+
+        names = [name for chunk in chunks for name in chunk.names]
+        summary = f"代码共 {len(code.splitlines())} 行，分为 {len(chunks)} 部分解释"
+        if names:
+            summary += f"，主要包含 {', '.join(names[:8])}{' 等' if len(names) > 8 else ''}"
+        if skipped:
+            summary += f"；其中 {len(skipped)} 部分超出token预算未解释"
+        return {
+            "explanation": explanation,
+            "summary": summary,
+            "key_concepts": self._extract_key_concepts(explanation)
+        }
+
     def _parse_explanation_response(self, response: str) -> Dict[str, Any]:
         """
         解析LLM的解释响应
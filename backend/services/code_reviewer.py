@@ -6,60 +6,145 @@
 
 import asyncio
 import logging
-import json
-from typing import Dict, List, Any
+import re
+import time
+from typing import Dict, List, Any, AsyncIterator, Optional, Tuple
 # 修复 LangChain 导入 - 使用兼容的导入方式
 try:
     from langchain.agents import AgentExecutor, create_tool_calling_agent
+    USE_REACT_AGENT = False
 except ImportError:
     # 如果新版本的导入失败，尝试旧版本的导入方式
     try:
         from langchain.agents import AgentExecutor
         from langchain.agents import create_react_agent as create_tool_calling_agent
+        USE_REACT_AGENT = True
     except ImportError:
         # 如果都导入失败，使用基础的 AgentExecutor
         from langchain.agents import AgentExecutor
         create_tool_calling_agent = None
+        USE_REACT_AGENT = False
 
-from langchain.prompts import ChatPromptTemplate
+from langchain.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_community.llms import Tongyi
 
 from config.settings import get_settings
-from backend.tools.flake8_tool import Flake8Tool
-from backend.tools.rag_tool import RAGTool
-from backend.core.prompts import CODE_REVIEW_PROMPT
+from backend.tools.flake8_tool import get_flake8_tool
+from backend.tools.rag_tool import get_rag_tool
+from backend.tools.partitioned_index import RetrievalFilter
+from backend.core.prompts import (
+    CODE_REVIEW_JSON_PROMPT, CODE_REVIEW_PROMPT, CODE_REVIEW_WITH_CONTEXT_PROMPT, REACT_AGENT_SUFFIX
+)
+from backend.core.result_cache import get_result_cache, make_cache_key
+from backend.core.single_flight import get_single_flight
+from backend.core.executors import (
+    CPU_POOL, LLM_POOL, ExecutorSaturatedError, get_executor
+)
+from backend.core.llm_provider import LLMProvider, LangChainLLMProvider, get_llm_provider
 from backend.models.schemas import BugReport, StyleIssue, OptimizationSuggestion
+from backend.services.static_reviewer import (
+    POLICY_ALWAYS, POLICY_NEVER, StaticReview, StaticReviewEngine, flake8_issue_to_style_issue
+)
+from backend.utils.code_analyzer import CodeAnalyzer
+from backend.utils.code_chunker import (
+    CodeChunk, chunk_code, estimate_tokens, gather_limited, select_within_budget
+)
+from backend.utils.review_queries import build_review_queries, merge_retrievals
+from backend.utils.structured_output import StreamingJSONParser, repair_json, review_json_schema_text
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# 审查模式：pipeline 并行执行flake8和知识库检索后单次调用LLM；agent 由Agent多轮决定调用工具
+REVIEW_MODE_PIPELINE = "pipeline"
+REVIEW_MODE_AGENT = "agent"
+REVIEW_MODES = (REVIEW_MODE_PIPELINE, REVIEW_MODE_AGENT)
+
+# 单次调用LLM时的输出格式：json 按Schema输出结构化结果；markdown 输出分节的文本报告
+OUTPUT_FORMAT_JSON = "json"
+OUTPUT_FORMAT_MARKDOWN = "markdown"
+OUTPUT_FORMATS = (OUTPUT_FORMAT_JSON, OUTPUT_FORMAT_MARKDOWN)
+
+# 结构化结果字段 -> (流式事件名, 条目模型)
+REVIEW_ITEM_FIELDS = {
+    "bugs": ("bug", BugReport),
+    "style_issues": ("style_issue", StyleIssue),
+    "optimizations": ("optimization", OptimizationSuggestion),
+}
+
+DEFAULT_SCORE = 75
+_SCORE_PATTERN = re.compile(r"(\d{1,3})\s*(?:分|/\s*100)")
+_BULLET_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.、)])\s*(.+)$")
+_LINE_PATTERN = re.compile(r"第\s*(\d+)\s*行|(?:line|行号)\s*[:：]?\s*(\d+)", re.IGNORECASE)
+
 
 class CodeReviewerService:
     """代码审查服务类"""
     
-    def __init__(self):
-        """初始化代码审查服务"""
-        self.llm = None
+    def __init__(
+        self,
+        llm=None,
+        provider: Optional[LLMProvider] = None,
+        mode: Optional[str] = None,
+        output_format: Optional[str] = None
+    ):
+        """
+        初始化代码审查服务
+        
+        Args:
+            llm: 可选的LangChain LLM实例（测试时可注入假模型），默认使用通义千问，Agent模式使用
+            provider: 可选的LLM适配器，单次调用和流式审查使用，默认使用全局共享的异步适配器
+            mode: 审查模式（pipeline 或 agent），默认取配置
+            output_format: 单次调用LLM时的输出格式（json 或 markdown），默认取配置
+        """
+        self.mode = mode or settings.review_mode
+        if self.mode not in REVIEW_MODES:
+            raise ValueError(f"不支持的审查模式: {self.mode}，可选 {', '.join(REVIEW_MODES)}")
+        self.output_format = output_format or settings.review_output_format
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"不支持的输出格式: {self.output_format}，可选 {', '.join(OUTPUT_FORMATS)}")
+        self.llm = llm
+        self.provider = provider
+        if self.output_format == OUTPUT_FORMAT_JSON:
+            self.context_prompt = PromptTemplate.from_template(CODE_REVIEW_JSON_PROMPT).partial(
+                schema=review_json_schema_text()
+            )
+        else:
+            self.context_prompt = PromptTemplate.from_template(CODE_REVIEW_WITH_CONTEXT_PROMPT)
+        self.static_engine = StaticReviewEngine()
         self.tools = []
         self.agent_executor = None
         self.use_simple_mode = False
-        self._init_agent()
+        self._init_provider()
+        if self.mode == REVIEW_MODE_AGENT:
+            self._init_agent()
+    
+    def _init_provider(self):
+        """初始化LLM适配器（注入了同步模型时包装为适配器，否则使用共享的异步客户端）"""
+        try:
+            if self.provider is None:
+                self.provider = LangChainLLMProvider(self.llm) if self.llm is not None \
+                    else get_llm_provider()
+        except Exception as e:
+            logger.error(f"LLM适配器初始化失败: {str(e)}")
+            self.provider = None
     
     def _init_agent(self):
         """初始化Agent和工具"""
         try:
             # 初始化通义千问模型
-            self.llm = Tongyi(
-                dashscope_api_key=settings.dashscope_api_key,
-                model_name=settings.model_name,
-                temperature=settings.temperature,
-                max_tokens=settings.max_tokens
-            )
+            if self.llm is None:
+                self.llm = Tongyi(
+                    dashscope_api_key=settings.dashscope_api_key,
+                    model_name=settings.model_name,
+                    temperature=settings.temperature,
+                    max_tokens=settings.max_tokens
+                )
             
-            # 初始化工具
+            # 初始化工具（共享实例，嵌入模型和向量库由注册中心统一管理）
             self.tools = [
-                Flake8Tool(),
-                RAGTool()
+                get_flake8_tool(),
+                get_rag_tool()
             ]
             
             # 如果 create_tool_calling_agent 不可用，使用简化的代理模式
@@ -69,8 +154,9 @@ class CodeReviewerService:
                 self.agent_executor = None
                 self.use_simple_mode = True
             else:
-                # 创建代码审查提示模板
-                prompt = ChatPromptTemplate.from_template(CODE_REVIEW_PROMPT)
+                # 创建代码审查提示模板（ReAct Agent需要追加工具调用格式说明）
+                template = CODE_REVIEW_PROMPT + REACT_AGENT_SUFFIX if USE_REACT_AGENT else CODE_REVIEW_PROMPT
+                prompt = ChatPromptTemplate.from_template(template)
                 
                 # 创建工具调用代理
                 agent = create_tool_calling_agent(
@@ -98,13 +184,19 @@ class CodeReviewerService:
             self.use_simple_mode = True
             logger.warning("回退到简化模式")
     
-    async def review_code(self, code: str, language: str = "python") -> Dict[str, Any]:
+    async def review_code(
+        self,
+        code: str,
+        language: str = "python",
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Dict[str, Any]:
         """
         全面审查代码
         
         Args:
             code: 待审查的代码
             language: 编程语言
+            knowledge_filter: 知识库检索的分类/主题过滤条件（Agent模式下由Agent自行检索，不生效）
             
         Returns:
             Dict包含审查结果
@@ -112,104 +204,648 @@ class CodeReviewerService:
         try:
             logger.info(f"开始审查 {language} 代码")
             
+            # 先查询结果缓存
+            cache = get_result_cache()
+            cache_key = self._review_cache_key(code, language, knowledge_filter)
+            if cache is not None:
+                cached = self.cached_review(cache, code, language, knowledge_filter)
+                if cached is not None:
+                    logger.info("代码审查命中结果缓存")
+                    return {**cached, "cache_hit": True}
+            
+            # 大文件按函数和类分块，在token预算内并发审查
+            if self.needs_chunking(code):
+                return await self._chunked_review(code, language, knowledge_filter)
+            
+            if self.mode == REVIEW_MODE_PIPELINE:
+                return await self._pipeline_review(code, language, knowledge_filter)
+            
+            # 静态预审查：简单或没有问题的代码直接返回规则审查结果，不调用LLM
+            prereview = None
+            if self.static_engine.policy != POLICY_ALWAYS:
+                _, _, prereview = await get_executor(CPU_POOL).run(self.run_static_analysis, code)
+                if not prereview.needs_llm:
+                    return self.static_result(prereview, self.static_cache_key(code, language))
+            
             # 如果使用简化模式，直接调用工具
             if self.use_simple_mode or self.agent_executor is None:
-                return await self._simple_review(code, language)
+                return await self._simple_review(code, language, knowledge_filter, prereview)
             
-            # 准备Agent输入
-            agent_input = {
-                "code": code,
-                "language": language,
-                "task": "进行全面的代码审查，包括Bug检测、风格检查和优化建议"
-            }
-            
-            # 异步执行Agent
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: self.agent_executor.invoke(agent_input)
+            # 相同代码的并发审查合并为一次Agent运行
+            result, _ = await get_single_flight().run(
+                cache_key,
+                lambda: self._run_agent_review(code, language, cache, cache_key)
             )
             
-            # 解析Agent响应
-            result = self._parse_review_response(response["output"])
-            
             logger.info("代码审查完成")
-            return result
+            return {**result, "cache_hit": False}
             
+        except ExecutorSaturatedError:
+            # 过载时直接拒绝，避免降级到简化模式后继续占用线程池
+            raise
         except Exception as e:
             logger.error(f"代码审查过程出错: {str(e)}")
             # 如果Agent模式失败，回退到简化模式
-            return await self._simple_review(code, language)
+            return await self._simple_review(code, language, knowledge_filter)
     
-    async def _simple_review(self, code: str, language: str) -> Dict[str, Any]:
+    async def _pipeline_review(
+        self,
+        code: str,
+        language: str,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Dict[str, Any]:
         """
-        简化的代码审查模式
-        直接使用工具进行审查，不依赖Agent
+        流水线审查：flake8检查和知识库检索并行执行，结果注入Prompt后只调用一次LLM
+        
+        Agent模式需要LLM逐轮决定调用哪个工具，而审查Prompt本身已规定了两个工具及其顺序，
+        提前执行工具可以省去2-3次串行的LLM往返。
         """
+        static_future = get_executor(CPU_POOL).run(self.run_static_analysis, code)
+        knowledge_future = asyncio.ensure_future(self._retrieve_knowledge(code, knowledge_filter))
         try:
-            logger.info("使用简化模式进行代码审查")
-            
-            # 使用flake8工具进行风格检查
-            flake8_result = ""
-            rag_result = ""
-            
-            try:
-                flake8_tool = Flake8Tool()
-                flake8_result = flake8_tool._run(code)
-            except Exception as e:
-                logger.warning(f"Flake8检查失败: {e}")
-                flake8_result = "静态分析工具暂时不可用"
-            
+            _, flake8_result, prereview = await static_future
+        except BaseException:
+            knowledge_future.cancel()
+            raise
+        
+        if not prereview.needs_llm:
+            knowledge_future.cancel()
+            return self.static_result(prereview, self.static_cache_key(code, language))
+        
+        _, rag_result = await knowledge_future
+        if self.provider is None:
+            return await self._simple_review(code, language, knowledge_filter, prereview)
+        
+        result = await self.review_with_context(code, language, flake8_result, rag_result, knowledge_filter)
+        logger.info("代码审查完成")
+        return result
+    
+    @staticmethod
+    def needs_chunking(code: str) -> bool:
+        """代码是否超过单个分块的token上限"""
+        return estimate_tokens(code) > settings.chunk_max_tokens
+    
+    async def _chunked_review(
+        self,
+        code: str,
+        language: str,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Dict[str, Any]:
+        """
+        分块审查大文件
+        
+        flake8、规则审查和知识库检索对整个文件只做一次；代码按语法树边界分块后，
+        在 request_token_budget 内并发调用LLM审查各分块，分块内的行号换算回原文件。
+        超出预算或审查失败的分块使用规则审查的结果。
+        """
+        static_future = get_executor(CPU_POOL).run(self.run_static_analysis, code)
+        knowledge_future = asyncio.ensure_future(self._retrieve_knowledge(code, knowledge_filter))
+        try:
+            static_data, _, prereview = await static_future
+        except BaseException:
+            knowledge_future.cancel()
+            raise
+        
+        cache_key = self._review_cache_key(code, language, knowledge_filter)
+        if not prereview.needs_llm or self.provider is None:
+            knowledge_future.cancel()
+            if self.provider is None:
+                return await self._simple_review(code, language, knowledge_filter, prereview)
+            return self.static_result(prereview, self.static_cache_key(code, language))
+        
+        _, rag_result = await knowledge_future
+        chunks = chunk_code(code, settings.chunk_max_tokens)
+        overhead = estimate_tokens(self.context_prompt.format(
+            code="", language=language, flake8_result="", rag_result=rag_result
+        ))
+        selected, skipped = select_within_budget(chunks, settings.request_token_budget, overhead)
+        logger.info(f"代码分为 {len(chunks)} 块审查，其中 {len(selected)} 块调用LLM")
+        flake8_tool = get_flake8_tool()
+        
+        async def review_chunk(chunk: CodeChunk):
+            local_issues = [
+                {**issue, "line": issue["line"] - chunk.line_offset} for issue in static_data["issues"]
+                if chunk.start_line <= issue["line"] <= chunk.end_line
+            ]
+            flake8_result = flake8_tool._create_analysis_report(local_issues) if local_issues \
+                else "✅ 代码风格检查通过，未发现问题"
+            prompt_text = self.context_prompt.format(
+                code=chunk.code, language=language, flake8_result=flake8_result, rag_result=rag_result
+            )
             try:
-                rag_tool = RAGTool()
-                rag_result = rag_tool._run(f"Python代码审查和优化建议: {code[:200]}...")
+                return self._parse_review_response(await self.provider.complete(prompt_text))
             except Exception as e:
-                logger.warning(f"RAG检索失败: {e}")
-                rag_result = "知识库查询暂时不可用"
-            
-            # 基于工具结果生成简化的审查报告
-            score = 85  # 默认评分
-            summary = "代码审查完成（简化模式）"
+                logger.warning(f"分块 {chunk.label} 审查失败，使用规则审查结果: {e}")
+                return None
+        
+        partials = await gather_limited(selected, review_chunk, settings.chunk_concurrency)
+        result = self._merge_chunk_reviews(chunks, dict(zip(map(id, selected), partials)), prereview)
+        cache = get_result_cache()
+        if cache is not None and any(partial is not None for partial in partials):
+            cache.set(cache_key, result)
+        return {**result, "cache_hit": False}
+    
+    @staticmethod
+    def _merge_chunk_reviews(
+        chunks: List[CodeChunk],
+        partials: Dict[int, Optional[Dict[str, Any]]],
+        prereview: StaticReview
+    ) -> Dict[str, Any]:
+        """
+        合并各分块的审查结果
+        
+        Args:
+            chunks: 全部分块
+            partials: id(分块) -> LLM审查结果（未调用或失败时为None或缺失）
+            prereview: 整个文件的规则审查结果（行号为原文件行号）
             
-            # 简单分析代码长度和复杂度
-            lines = code.split('\n')
-            non_empty_lines = [line for line in lines if line.strip()]
+        Returns:
+            合并后的审查结果，评分按分块token数加权
+        """
+        # 规则审查覆盖整个文件，LLM的结果只补充规则没有报告的行
+        merged = {"bugs": list(prereview.bugs), "style_issues": list(prereview.style_issues), "optimizations": []}
+        bug_lines = {bug.line_number for bug in prereview.bugs}
+        reported_styles = {(issue.line_number, issue.rule) for issue in prereview.style_issues}
+        weighted_score = 0
+        summaries = []
+        static_chunks = 0
+        
+        for chunk in chunks:
+            partial = partials.get(id(chunk))
+            if partial is None:
+                # 未经LLM审查的分块按规则审查评分
+                static_chunks += 1
+                weighted_score += prereview.score * chunk.tokens
+                continue
+            weighted_score += partial["score"] * chunk.tokens
+            summaries.append(f"{chunk.label}: {partial['summary']}")
+            for bug in partial["bugs"]:
+                line = chunk.to_original_line(bug.line_number)
+                if line is None or line not in bug_lines:
+                    merged["bugs"].append(bug.model_copy(update={"line_number": line}))
+            for issue in partial["style_issues"]:
+                line = chunk.to_original_line(issue.line_number)
+                if (line, issue.rule) not in reported_styles:
+                    reported_styles.add((line, issue.rule))
+                    merged["style_issues"].append(issue.model_copy(update={"line_number": line}))
+            merged["optimizations"] += partial["optimizations"]
+        
+        merged["bugs"].sort(key=lambda bug: bug.line_number or 0)
+        merged["style_issues"].sort(key=lambda issue: issue.line_number or 0)
+        header = f"代码共分为 {len(chunks)} 块审查"
+        if static_chunks:
+            header += f"，其中 {static_chunks} 块超出token预算或审查失败，仅做规则审查"
+        total_tokens = sum(chunk.tokens for chunk in chunks) or 1
+        return {
+            "score": round(weighted_score / total_tokens),
+            "summary": "；".join([header] + summaries),
+            **merged
+        }
+    
+    async def _run_agent_review(self, code: str, language: str, cache, cache_key: str) -> Dict[str, Any]:
+        """运行Agent审查并写入结果缓存"""
+        # 准备Agent输入
+        agent_input = {
+            "code": code,
+            "language": language,
+            "task": "进行全面的代码审查，包括Bug检测、风格检查和优化建议"
+        }
+        
+        # 异步执行Agent
+        response = await get_executor(LLM_POOL).run(
+            lambda: self.agent_executor.invoke(agent_input)
+        )
+        
+        # 解析Agent响应
+        result = self._parse_review_response(response["output"])
+        
+        # 只缓存Agent的完整审查结果，简化模式的降级结果不写入缓存
+        if cache is not None:
+            cache.set(cache_key, result)
+        return result
+    
+    async def _simple_review(
+        self,
+        code: str,
+        language: str,
+        knowledge_filter: Optional[RetrievalFilter] = None,
+        prereview: Optional[StaticReview] = None
+    ) -> Dict[str, Any]:
+        """
+        简化的代码审查模式
+        直接使用工具和静态审查规则进行审查，不依赖Agent
+        """
+        try:
+            logger.info("使用简化模式进行代码审查")
             
-            if len(non_empty_lines) > 50:
-                score -= 5
-                summary += "，代码较长建议拆分"
+            # flake8检查和规则审查（已做过静态预审查时直接复用）
+            flake8_result = ""
+            if prereview is None:
+                _, flake8_result, prereview = await get_executor(CPU_POOL).run(self.run_static_analysis, code)
             
-            if "except:" in code:
-                score -= 10
-                summary += "，发现裸露的except语句"
+            _, rag_result = await self._retrieve_knowledge(code, knowledge_filter)
             
             return {
-                "score": score,
-                "summary": summary,
-                "bugs": [],
-                "style_issues": [],
-                "optimizations": [],
+                "score": prereview.score,
+                "summary": f"{prereview.summary}（简化模式）",
+                "bugs": prereview.bugs,
+                "style_issues": prereview.style_issues,
+                "optimizations": prereview.optimizations,
                 "flake8_result": flake8_result,
                 "rag_suggestions": rag_result
             }
             
+        except ExecutorSaturatedError:
+            raise
         except Exception as e:
             logger.error(f"简化审查模式失败: {e}")
             return self._create_fallback_result("简化审查模式失败")
     
+    async def stream_review(
+        self,
+        code: str,
+        language: str = "python",
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        渐进式流式审查，每个阶段完成后立即产出事件，无需等待LLM生成完整报告
+        
+        静态分析和知识库检索并行执行，结果直接作为上下文交给LLM单次生成报告。
+        
+        事件类型：
+            static: {"issues", "style_issues", "metrics", "syntax_errors"}
+            knowledge: {"suggestions": [{"topic", "category", "content"}]}
+            token: {"text": 报告文本片段}
+            bug / style_issue / optimization: 从完整报告中解析出的单条结果
+            done: {"score", "summary", "time_to_first_token", "execution_time", "cache_hit"}
+        
+        Args:
+            code: 待审查的代码
+            language: 编程语言
+            knowledge_filter: 知识库检索的分类/主题过滤条件
+            
+        Yields:
+            {"event": 事件类型, "data": 事件数据}
+        """
+        start_time = time.perf_counter()
+        logger.info(f"开始流式审查 {language} 代码")
+        
+        cache = get_result_cache()
+        cache_key = self._review_cache_key(code, language, knowledge_filter) if cache else None
+        if cache is not None:
+            cached = self.cached_review(cache, code, language, knowledge_filter)
+            if cached is not None:
+                logger.info("流式代码审查命中结果缓存")
+                for event in self._item_events(cached):
+                    yield event
+                yield {"event": "done", "data": {
+                    "score": cached["score"],
+                    "summary": cached["summary"],
+                    "time_to_first_token": None,
+                    "execution_time": time.perf_counter() - start_time,
+                    "cache_hit": True
+                }}
+                return
+        
+        if self.needs_chunking(code):
+            # 大文件分块审查完成后逐条推送结果
+            result = await self._chunked_review(code, language, knowledge_filter)
+            for event in self._item_events(result):
+                yield event
+            yield {"event": "done", "data": {
+                "score": result["score"],
+                "summary": result["summary"],
+                "time_to_first_token": None,
+                "execution_time": time.perf_counter() - start_time,
+                "cache_hit": False,
+                "llm_skipped": result.get("llm_skipped", False)
+            }}
+            return
+        
+        knowledge_future = asyncio.ensure_future(self._retrieve_knowledge(code, knowledge_filter))
+        try:
+            static_data, flake8_result, prereview = await get_executor(CPU_POOL).run(
+                self.run_static_analysis, code
+            )
+            yield {"event": "static", "data": static_data}
+            
+            suggestions, rag_result = await knowledge_future
+            yield {"event": "knowledge", "data": {"suggestions": suggestions}}
+        finally:
+            # 静态分析失败或调用方提前断开时，不再占用嵌入线程做检索
+            knowledge_future.cancel()
+        
+        if not prereview.needs_llm:
+            # 静态预审查已足够，直接产出规则审查结果
+            result = self.static_result(prereview, self.static_cache_key(code, language) if cache else None)
+            for event in self._item_events(result):
+                yield event
+            yield {"event": "done", "data": {
+                "score": result["score"],
+                "summary": result["summary"],
+                "time_to_first_token": None,
+                "execution_time": time.perf_counter() - start_time,
+                "cache_hit": False,
+                "llm_skipped": True
+            }}
+            return
+        
+        if self.provider is None:
+            # 模型不可用时只返回静态分析结果
+            fallback = await self._simple_review(code, language, knowledge_filter, prereview)
+            yield {"event": "done", "data": {
+                "score": fallback["score"],
+                "summary": fallback["summary"],
+                "time_to_first_token": None,
+                "execution_time": time.perf_counter() - start_time,
+                "cache_hit": False
+            }}
+            return
+        
+        prompt_text = self.context_prompt.format(
+            code=code,
+            language=language,
+            flake8_result=flake8_result,
+            rag_result=rag_result
+        )
+        chunks: List[str] = []
+        time_to_first_token = None
+        # JSON输出时边生成边解析，条目一完成就推送
+        parser = StreamingJSONParser() if self.output_format == OUTPUT_FORMAT_JSON else None
+        streamed = {key: 0 for key in REVIEW_ITEM_FIELDS}
+        
+        async for text in self.provider.stream(prompt_text):
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start_time
+                logger.info(f"流式审查首token耗时: {time_to_first_token:.3f}秒")
+            chunks.append(text)
+            yield {"event": "token", "data": {"text": text}}
+            if parser is not None:
+                for key, value in parser.feed(text):
+                    if key in REVIEW_ITEM_FIELDS:
+                        event, model = REVIEW_ITEM_FIELDS[key]
+                        item = self._build_item(model, value)
+                        if item is not None:
+                            streamed[key] += 1
+                            yield {"event": event, "data": item}
+        
+        # 完整回复生成后解析结构化结果，只补发流式过程中没有推送的条目（如修复截断JSON后得到的）
+        result = self._parse_review_response("".join(chunks))
+        for key, (event, _) in REVIEW_ITEM_FIELDS.items():
+            for item in result[key][streamed[key]:]:
+                yield {"event": event, "data": item}
+        
+        if cache is not None and chunks:
+            cache.set(cache_key, result)
+        
+        execution_time = time.perf_counter() - start_time
+        logger.info(f"流式代码审查完成，耗时: {execution_time:.2f}秒")
+        yield {"event": "done", "data": {
+            "score": result["score"],
+            "summary": result["summary"],
+            "time_to_first_token": time_to_first_token,
+            "execution_time": execution_time,
+            "cache_hit": False
+        }}
+    
+    async def review_with_context(
+        self,
+        code: str,
+        language: str,
+        flake8_result: str,
+        rag_result: str,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Dict[str, Any]:
+        """
+        基于已完成的静态分析和知识库检索结果，单次调用LLM生成审查报告
+        
+        供批量分析等已提前准备好工具结果的场景使用，完整结果写入结果缓存。
+        
+        Args:
+            code: 待审查的代码
+            language: 编程语言
+            flake8_result: flake8报告文本
+            rag_result: 知识库检索结果文本
+            knowledge_filter: 检索时使用的过滤条件（参与结果缓存键）
+            
+        Returns:
+            Dict包含审查结果
+        """
+        if self.provider is None:
+            return await self._simple_review(code, language, knowledge_filter)
+        
+        prompt_text = self.context_prompt.format(
+            code=code,
+            language=language,
+            flake8_result=flake8_result,
+            rag_result=rag_result
+        )
+        cache_key = self._review_cache_key(code, language, knowledge_filter)
+        
+        async def generate():
+            result = self._parse_review_response(await self.provider.complete(prompt_text))
+            cache = get_result_cache()
+            if cache is not None:
+                cache.set(cache_key, result)
+            return result
+        
+        # 与其他请求中相同代码的审查合并
+        result, _ = await get_single_flight().run(cache_key, generate)
+        return {**result, "cache_hit": False}
+    
+    def _review_cache_key(self, code: str, language: str, knowledge_filter: Optional[RetrievalFilter] = None) -> str:
+        """审查结果缓存键：审查模式、输出格式（Prompt和结果不同）和知识库过滤条件不同时分别缓存"""
+        variant = [f"mode={self.mode}", f"format={self.output_format}"]
+        if knowledge_filter:
+            variant.append(knowledge_filter.cache_token())
+        return make_cache_key("review", code, language, variant="|".join(variant))
+    
+    def static_cache_key(self, code: str, language: str) -> str:
+        """
+        规则审查结果（跳过LLM）的缓存键
+
+        与LLM审查结果分开缓存，并随LLM调用策略和阈值变化，切换为 always 后不会再命中跳过LLM时的结果。
+        """
+        return make_cache_key("review", code, language, variant=self.static_engine.cache_token())
+    
+    def cached_review(
+        self,
+        cache,
+        code: str,
+        language: str,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        查询已缓存的审查结果
+        
+        always 策略只查LLM审查结果，never 策略只查规则审查结果，auto 策略优先LLM审查结果。
+        """
+        cached = None
+        if self.static_engine.policy != POLICY_NEVER:
+            cached = cache.get(self._review_cache_key(code, language, knowledge_filter))
+        if cached is None and self.static_engine.policy != POLICY_ALWAYS:
+            cached = cache.get(self.static_cache_key(code, language))
+        return cached
+    
+    def _build_rag_queries(self, code: str) -> List[str]:
+        """按代码中的关键结构构造少量定向检索查询"""
+        return build_review_queries(code, max_queries=settings.rag_review_max_queries)
+    
+    @staticmethod
+    def _merge_docs(docs_per_query) -> List[Any]:
+        """合并多条查询的检索结果（按正文去重）"""
+        return merge_retrievals(docs_per_query, settings.rag_review_top_k, key=lambda doc: doc.page_content)
+    
+    def run_static_analysis(self, code: str) -> Tuple[Dict[str, Any], str, StaticReview]:
+        """
+        执行flake8检查、AST结构分析和规则审查
+        
+        Returns:
+            (static事件数据, 供Prompt使用的flake8报告文本, 静态预审查结果)
+        """
+        flake8_tool = get_flake8_tool()
+        flake8_ok = True
+        try:
+            issues = flake8_tool.check(code)
+            report = flake8_tool._create_analysis_report(issues) if issues \
+                else "✅ 代码风格检查通过，未发现问题"
+        except Exception as e:
+            logger.warning(f"Flake8检查失败: {e}")
+            flake8_ok = False
+            issues = []
+            report = "静态分析工具暂时不可用"
+        
+        analysis = CodeAnalyzer.analyze(code)
+        data = {
+            "issues": issues,
+            # 语法错误（E999）已在 syntax_errors 中给出，不再重复列为风格问题
+            "style_issues": [flake8_issue_to_style_issue(issue) for issue in issues if issue["code"] != "E999"],
+            "metrics": analysis.complexity,
+            "syntax_errors": analysis.syntax_errors
+        }
+        prereview = self.static_engine.review(code, issues if flake8_ok else None, analysis)
+        return data, report, prereview
+    
+    def static_result(self, prereview: StaticReview, cache_key: Optional[str]) -> Dict[str, Any]:
+        """
+        以静态预审查结果作为最终审查结果（写入结果缓存）
+        
+        Args:
+            prereview: 静态预审查结果
+            cache_key: 规则审查结果的缓存键（static_cache_key），为空时不缓存
+            
+        Returns:
+            Dict包含审查结果
+        """
+        logger.info(f"跳过LLM审查: {prereview.reason}")
+        result = prereview.to_result()
+        cache = get_result_cache()
+        if cache is not None and cache_key:
+            cache.set(cache_key, result)
+        return {**result, "cache_hit": False}
+    
+    async def _retrieve_knowledge(
+        self,
+        code: str,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> Tuple[List[Dict[str, str]], str]:
+        """
+        检索知识库中的相关最佳实践（与其他并发请求的检索合并为一批）
+        
+        Args:
+            code: 待审查的代码
+            knowledge_filter: 分类/主题过滤条件，为空时检索全部知识
+        
+        Returns:
+            (knowledge事件中的建议列表, 供Prompt使用的检索结果文本)
+        """
+        rag_tool = get_rag_tool()
+        try:
+            # 同一事件循环中并发发起，检索微批处理器会把它们合并为一次嵌入
+            docs_per_query = await asyncio.gather(
+                *(rag_tool.aretrieve(query, knowledge_filter=knowledge_filter)
+                  for query in self._build_rag_queries(code))
+            )
+        except ExecutorSaturatedError:
+            raise
+        except Exception as e:
+            logger.warning(f"RAG检索失败: {e}")
+            return [], "知识库查询暂时不可用"
+        return self._knowledge_from_docs(self._merge_docs(docs_per_query))
+    
+    def retrieve_knowledge_batch(
+        self,
+        codes: List[str],
+        filters: Optional[List[Optional[RetrievalFilter]]] = None
+    ) -> List[str]:
+        """
+        批量检索多段代码的相关最佳实践，所有查询只做一次批量嵌入
+        
+        Args:
+            codes: 代码列表
+            filters: 与codes一一对应的过滤条件，为空时均不过滤
+            
+        Returns:
+            与codes一一对应、供Prompt使用的检索结果文本
+        """
+        queries_per_code = [self._build_rag_queries(code) for code in codes]
+        filters = filters or [None] * len(codes)
+        try:
+            docs_per_query = get_rag_tool().retrieve_many(
+                [query for queries in queries_per_code for query in queries],
+                filters=[
+                    knowledge_filter
+                    for queries, knowledge_filter in zip(queries_per_code, filters)
+                    for _ in queries
+                ]
+            )
+        except Exception as e:
+            logger.warning(f"批量RAG检索失败: {e}")
+            return ["知识库查询暂时不可用"] * len(codes)
+        
+        results = []
+        offset = 0
+        for queries in queries_per_code:
+            docs = self._merge_docs(docs_per_query[offset:offset + len(queries)])
+            offset += len(queries)
+            results.append(self._knowledge_from_docs(docs)[1])
+        return results
+    
+    def _knowledge_from_docs(self, docs) -> Tuple[List[Dict[str, str]], str]:
+        """将检索到的文档转换为建议列表和Prompt文本"""
+        suggestions = [
+            {
+                "topic": doc.metadata.get("topic", "未知主题"),
+                "category": doc.metadata.get("category", "其他"),
+                "content": doc.page_content
+            }
+            for doc in docs
+        ]
+        return suggestions, get_rag_tool()._format_retrieval_results(docs)
+    
+    @staticmethod
+    def _item_events(result: Dict[str, Any]):
+        """将审查结果中的结构化条目展开为逐条事件"""
+        for key, (event, _) in REVIEW_ITEM_FIELDS.items():
+            for item in result.get(key, []):
+                yield {"event": event, "data": item}
+    
     def _parse_review_response(self, response: str) -> Dict[str, Any]:
         """
-        解析Agent的审查响应
+        解析LLM的审查回复
+        
+        优先按JSON解析（允许代码块围栏、前后说明文字和被截断的JSON），
+        不是JSON时按Markdown报告的分节提取评分和条目。
         
         Args:
-            response: Agent原始响应
+            response: LLM原始回复
             
         Returns:
             结构化的审查结果
         """
         try:
-            # 尝试解析JSON格式的响应
-            if response.strip().startswith('{'):
-                parsed = json.loads(response)
+            parsed = repair_json(response)
+            if parsed is not None:
                 return self._format_review_result(parsed)
             
             # 如果不是JSON格式，使用文本解析
@@ -219,48 +855,90 @@ class CodeReviewerService:
             logger.error(f"解析审查响应失败: {str(e)}")
             return self._create_fallback_result(response)
     
+    @staticmethod
+    def _build_item(model, data: Any):
+        """按模型校验单个条目，不合法时返回None"""
+        if not isinstance(data, dict):
+            return None
+        try:
+            return model(**data)
+        except Exception:
+            logger.debug(f"丢弃不合法的审查条目: {data}")
+            return None
+    
+    @staticmethod
+    def _clamp_score(value: Any) -> int:
+        try:
+            return max(0, min(100, int(round(float(value)))))
+        except (TypeError, ValueError):
+            return DEFAULT_SCORE
+    
     def _format_review_result(self, parsed_data: Dict) -> Dict[str, Any]:
-        """格式化解析后的审查结果"""
-        return {
-            "score": parsed_data.get("score", 75),
-            "summary": parsed_data.get("summary", "代码审查已完成"),
-            "bugs": [
-                BugReport(**bug) for bug in parsed_data.get("bugs", [])
-            ],
-            "style_issues": [
-                StyleIssue(**issue) for issue in parsed_data.get("style_issues", [])
-            ],
-            "optimizations": [
-                OptimizationSuggestion(**opt) for opt in parsed_data.get("optimizations", [])
-            ]
+        """格式化解析后的审查结果（逐条校验，单个条目不合法不影响其他条目）"""
+        result = {
+            "score": self._clamp_score(parsed_data.get("overall_score", parsed_data.get("score", DEFAULT_SCORE))),
+            "summary": str(parsed_data.get("summary") or "代码审查已完成"),
         }
+        for key, (_, model) in REVIEW_ITEM_FIELDS.items():
+            items = parsed_data.get(key) or []
+            built = [self._build_item(model, item) for item in items] if isinstance(items, list) else []
+            result[key] = [item for item in built if item is not None]
+        return result
     
     def _parse_text_response(self, response: str) -> Dict[str, Any]:
-        """解析文本格式的响应"""
-        # 简化的文本解析逻辑
-        lines = response.split('\n')
+        """解析Markdown格式的报告：按小节提取评分、总结和列表条目"""
+        sections: Dict[str, List[str]] = {}
+        current_section = None
+        for line in response.split('\n'):
+            stripped = line.strip()
+            if stripped.startswith("#"):
+                lowered = stripped.lower()
+                if "评分" in stripped or "score" in lowered:
+                    current_section = "score"
+                elif "bug" in lowered or "错误" in stripped:
+                    current_section = "bugs"
+                elif "风格" in stripped or "style" in lowered:
+                    current_section = "style"
+                elif "优化" in stripped or "optimization" in lowered:
+                    current_section = "optimization"
+                elif "总结" in stripped or "summary" in lowered:
+                    current_section = "summary"
+                else:
+                    current_section = None
+                continue
+            if current_section and stripped:
+                sections.setdefault(current_section, []).append(stripped)
         
-        bugs = []
-        style_issues = []
-        optimizations = []
+        score_match = _SCORE_PATTERN.search(" ".join(sections.get("score", [])))
+        score = self._clamp_score(score_match.group(1)) if score_match else DEFAULT_SCORE
         
-        # 基本的文本解析（在实际项目中需要更复杂的解析逻辑）
-        current_section = None
-        for line in lines:
-            line = line.strip()
-            if "bug" in line.lower() or "错误" in line:
-                current_section = "bugs"
-            elif "style" in line.lower() or "风格" in line:
-                current_section = "style"
-            elif "优化" in line or "optimization" in line.lower():
-                current_section = "optimization"
+        def bullets(name: str) -> List[Tuple[Optional[int], str]]:
+            found = []
+            for line in sections.get(name, []):
+                match = _BULLET_PATTERN.match(line)
+                if match:
+                    text = match.group(1).strip()
+                    line_match = _LINE_PATTERN.search(text)
+                    number = int(next(group for group in line_match.groups() if group)) if line_match else None
+                    found.append((number, text))
+            return found
         
+        summary_lines = [text for _, text in bullets("summary")] or sections.get("summary", [])
         return {
-            "score": 75,  # 默认分数
-            "summary": "代码审查已完成，请查看详细报告",
-            "bugs": bugs,
-            "style_issues": style_issues,
-            "optimizations": optimizations
+            "score": score,
+            "summary": "；".join(summary_lines[:3]) if summary_lines else "代码审查已完成，请查看详细报告",
+            "bugs": [
+                BugReport(line_number=number, description=text, suggestion="参考审查报告中的说明修复")
+                for number, text in bullets("bugs")
+            ],
+            "style_issues": [
+                StyleIssue(line_number=number, rule="review", message=text, suggestion="参考PEP 8调整")
+                for number, text in bullets("style")
+            ],
+            "optimizations": [
+                OptimizationSuggestion(category="优化建议", description=text, performance_impact="见审查报告")
+                for _, text in bullets("optimization")
+            ]
         }
     
     def _create_fallback_result(self, response: str) -> Dict[str, Any]:
@@ -0,0 +1,238 @@
+"""
+静态预审查服务
+负责人：组长
+作用：基于 CodeAnalyzer 的语法树和flake8结果，用确定性规则生成Bug、风格问题和优化建议并计算评分，
+      再按配置的策略判断是否还需要调用LLM；简单或没有问题的代码在毫秒级直接返回审查结果
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+from config.settings import get_settings
+from backend.models.schemas import BugReport, StyleIssue, OptimizationSuggestion
+from backend.utils.code_analyzer import CodeAnalysis, CodeAnalyzer
+from backend.utils.review_queries import locate_constructs
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+POLICY_AUTO = "auto"
+POLICY_ALWAYS = "always"
+POLICY_NEVER = "never"
+LLM_POLICIES = (POLICY_AUTO, POLICY_ALWAYS, POLICY_NEVER)
+
+# flake8错误代码前缀对应的通用改进建议
+FLAKE8_SUGGESTIONS = {
+    "E": "按PEP 8调整缩进、空格或换行",
+    "W": "按PEP 8清理多余空白和格式警告",
+    "F": "检查未使用、未定义或重复定义的名称",
+    "C": "拆分复杂逻辑以降低圈复杂度",
+    "N": "按PEP 8命名规范修改名称",
+}
+
+# 与语法树规则重复的flake8错误代码，由规则给出更具体的结果（E999语法错误已作为Bug报告）
+_FLAKE8_COVERED = {"E722": "bare_except", "E721": "type_comparison", "E999": "syntax_error"}
+
+# 规则名称 -> (严重程度, 问题描述, 修复建议)
+BUG_RULES = {
+    "bare_except": (
+        "high",
+        "使用了裸露的except语句，会同时吞掉KeyboardInterrupt、SystemExit等异常，掩盖真实错误",
+        "捕获具体的异常类型，例如 except ValueError:，确实需要兜底时使用 except Exception:"
+    ),
+    "mutable_default": (
+        "medium",
+        "函数参数使用了可变对象作为默认值，多次调用之间会共享并累积同一个对象",
+        "默认值改为None，在函数体内判断后再创建新的列表/字典/集合"
+    ),
+    "open_without_with": (
+        "medium",
+        "open()打开的文件没有使用with语句管理，出现异常时文件不会被关闭",
+        "改为 with open(...) as f:，确保文件在使用后自动关闭"
+    ),
+    "type_comparison": (
+        "low",
+        "使用type()比较类型，无法正确处理子类",
+        "改用 isinstance(obj, cls) 进行类型检查"
+    ),
+}
+
+STYLE_RULES = {
+    "shadowed_builtin": ("shadowed-builtin", "名称遮蔽了Python内置函数或类型", "换一个不与内置名称冲突的名字，例如在末尾加下划线"),
+    "unused_import": ("unused-import", "导入的模块或名称未被使用", "删除未使用的导入"),
+}
+
+# 各严重程度的扣分
+SEVERITY_PENALTY = {"high": 15, "medium": 8, "low": 4}
+STYLE_PENALTY = 1
+MAX_STYLE_PENALTY = 20
+OPTIMIZATION_PENALTY = 3
+
+
+class StaticReview:
+    """
+    静态预审查结果
+
+    使用 __slots__ 保持对象紧凑，与 CodeAnalysis 一致。
+    """
+
+    __slots__ = ("score", "summary", "bugs", "style_issues", "optimizations", "needs_llm", "reason")
+
+    def __init__(self):
+        self.score = 100
+        self.summary = ""
+        self.bugs: List[BugReport] = []
+        self.style_issues: List[StyleIssue] = []
+        self.optimizations: List[OptimizationSuggestion] = []
+        self.needs_llm = True
+        self.reason = ""
+
+    @property
+    def finding_count(self) -> int:
+        return len(self.bugs) + len(self.style_issues) + len(self.optimizations)
+
+    def to_result(self) -> Dict[str, Any]:
+        """转换为与LLM审查结果相同结构的字典"""
+        return {
+            "score": self.score,
+            "summary": self.summary,
+            "bugs": self.bugs,
+            "style_issues": self.style_issues,
+            "optimizations": self.optimizations,
+            "llm_skipped": True
+        }
+
+
+def flake8_issue_to_style_issue(issue: Dict[str, Any]) -> StyleIssue:
+    """将flake8问题转换为风格问题模型"""
+    return StyleIssue(
+        line_number=issue["line"],
+        rule=issue["code"],
+        message=issue["message"],
+        suggestion=FLAKE8_SUGGESTIONS.get(issue["code"][:1], "遵循PEP 8代码风格规范")
+    )
+
+
+class StaticReviewEngine:
+    """基于规则的静态审查引擎"""
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        trivial_max_lines: Optional[int] = None,
+        clean_max_lines: Optional[int] = None
+    ):
+        """
+        初始化静态审查引擎
+
+        Args:
+            policy: LLM调用策略：auto（简单或无问题的代码跳过LLM）、always（总是调用）、never（只做静态审查），默认取配置
+            trivial_max_lines: 不超过此非空行数的代码视为简单代码，默认取配置
+            clean_max_lines: 不超过此非空行数且没有任何问题的代码跳过LLM，默认取配置
+        """
+        self.policy = policy or settings.review_llm_policy
+        if self.policy not in LLM_POLICIES:
+            raise ValueError(f"不支持的LLM调用策略: {self.policy}，可选 {', '.join(LLM_POLICIES)}")
+        self.trivial_max_lines = trivial_max_lines if trivial_max_lines is not None else settings.review_trivial_max_lines
+        self.clean_max_lines = clean_max_lines if clean_max_lines is not None else settings.review_clean_max_lines
+
+    def cache_token(self) -> str:
+        """是否跳过LLM取决于策略和阈值，规则审查结果按此区分缓存"""
+        return f"static:{self.policy}:{self.trivial_max_lines}:{self.clean_max_lines}"
+
+    def review(
+        self,
+        code: str,
+        flake8_issues: Optional[List[Dict[str, Any]]] = None,
+        analysis: Optional[CodeAnalysis] = None
+    ) -> StaticReview:
+        """
+        静态审查代码
+
+        Args:
+            code: 待审查的代码
+            flake8_issues: flake8问题列表，None表示flake8不可用（此时由语法树检查未使用的导入）
+            analysis: 已有的分析结果，为空时重新解析
+
+        Returns:
+            StaticReview对象
+        """
+        analysis = analysis or CodeAnalyzer.analyze(code)
+        lines = code.split("\n")
+        result = StaticReview()
+
+        for error in analysis.syntax_errors:
+            result.bugs.append(BugReport(
+                line_number=error["line_number"],
+                description=f"语法错误: {error['message']}",
+                severity="high",
+                suggestion="修正语法错误后代码才能运行"
+            ))
+
+        found = locate_constructs(analysis)
+        for rule, (severity, description, suggestion) in BUG_RULES.items():
+            for line in found.get(rule, []):
+                result.bugs.append(BugReport(
+                    line_number=line, description=description, severity=severity, suggestion=suggestion
+                ))
+
+        for line in found.get("string_concat_in_loop", []):
+            result.optimizations.append(OptimizationSuggestion(
+                category="性能优化",
+                description="在循环中用 += 拼接字符串",
+                performance_impact="每次拼接都会创建新的字符串对象，n次拼接的总开销为O(n²)，join()为O(n)",
+                before_code=lines[line - 1].strip() if 0 < line <= len(lines) else None,
+                after_code="parts.append(...)  # 循环结束后 ''.join(parts)"
+            ))
+
+        for issue in flake8_issues or []:
+            if issue["code"] not in _FLAKE8_COVERED:
+                result.style_issues.append(flake8_issue_to_style_issue(issue))
+        style_rules = ["shadowed_builtin"] if flake8_issues is not None else ["shadowed_builtin", "unused_import"]
+        for name in style_rules:
+            rule, message, suggestion = STYLE_RULES[name]
+            for line in found.get(name, []):
+                result.style_issues.append(StyleIssue(
+                    line_number=line, rule=rule, message=message, suggestion=suggestion
+                ))
+
+        result.bugs.sort(key=lambda bug: bug.line_number or 0)
+        result.style_issues.sort(key=lambda issue: issue.line_number or 0)
+        result.score = self._score(result)
+        result.summary = self._summary(result)
+        result.needs_llm, result.reason = self._decide(result, sum(1 for line in lines if line.strip()), analysis)
+        return result
+
+    @staticmethod
+    def _score(result: StaticReview) -> int:
+        penalty = sum(SEVERITY_PENALTY.get(bug.severity, 8) for bug in result.bugs)
+        penalty += min(MAX_STYLE_PENALTY, STYLE_PENALTY * len(result.style_issues))
+        penalty += OPTIMIZATION_PENALTY * len(result.optimizations)
+        return max(0, 100 - penalty)
+
+    @staticmethod
+    def _summary(result: StaticReview) -> str:
+        if not result.finding_count:
+            return "静态审查未发现问题"
+        parts = []
+        if result.bugs:
+            parts.append(f"{len(result.bugs)} 个潜在Bug")
+        if result.style_issues:
+            parts.append(f"{len(result.style_issues)} 个风格问题")
+        if result.optimizations:
+            parts.append(f"{len(result.optimizations)} 条优化建议")
+        return f"静态审查发现{'、'.join(parts)}"
+
+    def _decide(self, result: StaticReview, non_empty_lines: int, analysis: CodeAnalysis):
+        """按策略判断是否需要LLM，返回 (是否需要, 原因)"""
+        if self.policy == POLICY_ALWAYS:
+            return True, "策略要求总是调用LLM"
+        if self.policy == POLICY_NEVER:
+            return False, "策略要求只做静态审查"
+        if not analysis.is_valid:
+            return False, "代码存在语法错误，静态审查结果已足够"
+        if non_empty_lines <= self.trivial_max_lines:
+            return False, f"代码只有 {non_empty_lines} 行"
+        if not result.finding_count and non_empty_lines <= self.clean_max_lines:
+            return False, "静态审查未发现问题"
+        return True, "代码需要LLM深入审查"
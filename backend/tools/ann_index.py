@@ -0,0 +1,356 @@
+"""
+FAISS近似最近邻索引
+负责人：组员B
+作用：按配置构建知识库向量索引（flat精确检索、float16/int8标量量化、IVF-Flat、IVF-PQ、HNSW），
+      负责在足够多的向量上训练聚类中心，设置nprobe/efSearch等检索参数，
+      以及以内存映射方式读写索引文件
+"""
+
+import logging
+import math
+import os
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+INDEX_FLAT = "flat"
+INDEX_SQ_FP16 = "sq_fp16"
+INDEX_SQ_INT8 = "sq_int8"
+INDEX_IVF_FLAT = "ivf_flat"
+INDEX_IVF_PQ = "ivf_pq"
+INDEX_HNSW = "hnsw"
+INDEX_TYPES = (INDEX_FLAT, INDEX_SQ_FP16, INDEX_SQ_INT8, INDEX_IVF_FLAT, INDEX_IVF_PQ, INDEX_HNSW)
+
+# 标量量化：float16 每维2字节；int8 每维1字节，按每一维训练得到的最小值和范围线性编码
+_SCALAR_QUANTIZERS = {
+    INDEX_SQ_FP16: faiss.ScalarQuantizer.QT_fp16,
+    INDEX_SQ_INT8: faiss.ScalarQuantizer.QT_8bit,
+}
+
+# FAISS建议每个聚类中心至少有39个训练向量
+MIN_POINTS_PER_CENTROID = 39
+
+# 训练聚类中心时最多使用的向量数，更大的语料随机采样
+MAX_TRAINING_POINTS = 100000
+
+
+def index_type_of(index) -> str:
+    """
+    识别FAISS索引类型
+
+    Args:
+        index: FAISS索引
+
+    Returns:
+        INDEX_TYPES 之一，无法识别时返回类名
+    """
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        for index_type, qtype in _SCALAR_QUANTIZERS.items():
+            if index.sq.qtype == qtype:
+                return index_type
+        return type(index).__name__
+    if isinstance(index, faiss.IndexHNSW):
+        return INDEX_HNSW
+    if isinstance(index, faiss.IndexIVFPQ):
+        return INDEX_IVF_PQ
+    if isinstance(index, faiss.IndexIVFFlat):
+        return INDEX_IVF_FLAT
+    if isinstance(index, faiss.IndexFlat):
+        return INDEX_FLAT
+    return type(index).__name__
+
+
+def effective_nlist(ntotal: int, nlist: Optional[int] = None) -> int:
+    """
+    按向量总数确定IVF聚类中心数
+
+    Args:
+        ntotal: 向量总数
+        nlist: 配置的聚类中心数，0表示按 4*sqrt(ntotal) 自动选择
+
+    Returns:
+        不超过 ntotal/39 的聚类中心数（至少为1）
+    """
+    nlist = settings.rag_ivf_nlist if nlist is None else nlist
+    if nlist <= 0:
+        nlist = int(4 * math.sqrt(ntotal))
+    return max(1, min(nlist, ntotal // MIN_POINTS_PER_CENTROID))
+
+
+def resolve_index_type(index_type: str, ntotal: int) -> str:
+    """
+    根据向量数量决定实际使用的索引类型
+
+    IVF索引训练需要至少 39 个向量/聚类中心，向量太少时回退到flat精确检索。
+
+    Args:
+        index_type: 配置的索引类型
+        ntotal: 向量总数
+
+    Returns:
+        实际使用的索引类型
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"不支持的索引类型: {index_type}，可选 {', '.join(INDEX_TYPES)}")
+    if index_type in (INDEX_IVF_FLAT, INDEX_IVF_PQ) and ntotal < MIN_POINTS_PER_CENTROID * 2:
+        return INDEX_FLAT
+    return index_type
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str,
+    metric: int = faiss.METRIC_L2,
+    nlist: Optional[int] = None,
+    pq_m: Optional[int] = None,
+    pq_nbits: Optional[int] = None,
+    hnsw_m: Optional[int] = None,
+    ef_construction: Optional[int] = None,
+    seed: int = 42
+):
+    """
+    构建并训练索引，按原顺序加入全部向量（位置与docstore映射保持一致）
+
+    Args:
+        vectors: 形状为 (n, d) 的float32向量矩阵
+        index_type: 索引类型
+        metric: 距离度量（faiss.METRIC_L2 或 faiss.METRIC_INNER_PRODUCT）
+        nlist: IVF聚类中心数，默认取配置
+        pq_m: PQ子空间数（必须整除向量维度），默认取配置
+        pq_nbits: 每个PQ子空间的编码位数，默认取配置
+        hnsw_m: HNSW每个节点的邻居数，默认取配置
+        ef_construction: HNSW构建时的候选队列长度，默认取配置
+        seed: 训练采样的随机种子
+
+    Returns:
+        已加入全部向量的FAISS索引
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dim = vectors.shape
+    index_type = resolve_index_type(index_type, ntotal)
+
+    if index_type == INDEX_FLAT:
+        index = faiss.IndexFlat(dim, metric)
+    elif index_type == INDEX_HNSW:
+        index = faiss.IndexHNSWFlat(dim, hnsw_m or settings.rag_hnsw_m, metric)
+        index.hnsw.efConstruction = ef_construction or settings.rag_hnsw_ef_construction
+    elif index_type in _SCALAR_QUANTIZERS:
+        index = faiss.IndexScalarQuantizer(dim, _SCALAR_QUANTIZERS[index_type], metric)
+        # int8需要按维统计取值范围，float16训练为空操作
+        index.train(_training_sample(vectors, seed))
+    else:
+        nlist = effective_nlist(ntotal, nlist)
+        quantizer = faiss.IndexFlat(dim, metric)
+        if index_type == INDEX_IVF_PQ:
+            pq_m = pq_m or settings.rag_pq_m
+            if dim % pq_m:
+                raise ValueError(f"PQ子空间数 {pq_m} 必须整除向量维度 {dim}")
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits or settings.rag_pq_nbits, metric)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, metric)
+
+        index.train(_training_sample(vectors, seed))
+
+    index.add(vectors)
+    configure_search(index)
+    return index
+
+
+def _training_sample(vectors: np.ndarray, seed: int) -> np.ndarray:
+    """训练用向量，更大的语料随机采样 MAX_TRAINING_POINTS 条"""
+    if len(vectors) <= MAX_TRAINING_POINTS:
+        return vectors
+    rng = np.random.default_rng(seed)
+    return vectors[rng.choice(len(vectors), MAX_TRAINING_POINTS, replace=False)]
+
+
+def search_subset(index, matrix: np.ndarray, k: int, ids: np.ndarray):
+    """
+    只在给定位置的向量中检索（用于按元数据过滤），不复制任何向量
+
+    以FAISS ID选择器在距离计算前跳过其余向量；IVF索引访问全部聚类，
+    HNSW索引直接扫描图中保存的原始向量，使过滤检索与精确扫描这些向量的结果一致。
+
+    Args:
+        index: FAISS索引
+        matrix: 形状为 (n, d) 的查询矩阵
+        k: 每个查询返回的向量数
+        ids: 允许返回的向量位置（int64数组）
+
+    Returns:
+        (距离矩阵, 位置矩阵)，不足k个时位置为-1
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        index = faiss.downcast_index(index.storage)
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        # 选中的向量可能落在任意聚类中
+        params = faiss.SearchParametersIVF()
+        params.nprobe = ivf.nlist
+        index = ivf
+    else:
+        params = faiss.SearchParameters()
+    selector = faiss.IDSelectorBatch(ids)
+    params.sel = selector
+    return index.search(matrix, k, params=params)
+
+
+def configure_search(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    设置检索参数（对flat索引无影响）
+
+    Args:
+        index: FAISS索引
+        nprobe: IVF检索时访问的聚类数，默认取配置
+        ef_search: HNSW检索时的候选队列长度，默认取配置
+    """
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search or settings.rag_hnsw_ef_search
+        return
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe or settings.rag_ivf_nprobe, ivf.nlist)
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """
+    取出索引中的全部原始向量（PQ索引为解码后的近似值）
+
+    Args:
+        index: FAISS索引
+
+    Returns:
+        形状为 (ntotal, d) 的float32矩阵
+    """
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        ivf.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def reconstruct_range(index, start: int, count: int) -> np.ndarray:
+    """
+    取出索引中一段连续位置的原始向量（PQ索引为解码后的近似值）
+
+    Args:
+        index: FAISS索引
+        start: 起始位置
+        count: 向量数
+
+    Returns:
+        形状为 (count, d) 的float32矩阵
+    """
+    ivf = _as_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.NoMap:
+        ivf.make_direct_map()
+    return index.reconstruct_n(start, count)
+
+
+def needs_rebuild(index, index_type: Optional[str] = None) -> bool:
+    """
+    判断是否应按配置重建索引
+
+    索引类型与配置不符（含向量增多后可以从flat回退状态升级），
+    或IVF聚类中心数已明显少于当前数据量所需时返回True。
+
+    Args:
+        index: 当前FAISS索引
+        index_type: 配置的索引类型，默认取配置
+
+    Returns:
+        是否需要重建
+    """
+    target = resolve_index_type(index_type or settings.rag_index_type, index.ntotal)
+    if index_type_of(index) != target:
+        return True
+    ivf = _as_ivf(index)
+    return ivf is not None and effective_nlist(index.ntotal) >= 2 * ivf.nlist
+
+
+def supports_mmap(index) -> bool:
+    """索引能否以内存映射方式共享（faiss 1.7.x 只能映射IVF类索引的倒排表）"""
+    return _as_ivf(index) is not None
+
+
+def read_index(path: str, mmap: bool = False):
+    """
+    读取索引文件
+
+    内存映射方式下，IVF类索引的倒排表直接映射文件页，多个进程读取同一文件时共享物理内存
+    （faiss 1.7.x 的flat和HNSW索引不支持映射，仍会读入进程内存）。
+
+    Args:
+        path: 索引文件路径
+        mmap: 是否以只读内存映射方式打开
+
+    Returns:
+        FAISS索引
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(path, flags)
+    configure_search(index)
+    return index
+
+
+def write_index(index, path: str):
+    """
+    写入索引文件（先写临时文件再原子替换，正在映射旧文件的进程不受影响）
+
+    Args:
+        index: FAISS索引（不能是内存映射的只读索引）
+        path: 索引文件路径
+    """
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def detach_index(index):
+    """
+    把内存映射的只读索引复制到进程内存，之后才能追加向量
+
+    Args:
+        index: FAISS索引，就地修改
+    """
+    ivf = _as_ivf(index)
+    if ivf is None:
+        return
+    source = ivf.invlists
+    copy = faiss.ArrayInvertedLists(source.nlist, source.code_size)
+    for list_no in range(source.nlist):
+        size = source.list_size(list_no)
+        if size:
+            copy.add_entries(list_no, size, source.get_ids(list_no), source.get_codes(list_no))
+    ivf.replace_invlists(copy, True)
+    copy.this.disown()
+
+
+def describe_index(index) -> Dict[str, Any]:
+    """获取索引类型和检索参数"""
+    info: Dict[str, Any] = {
+        "index_type": index_type_of(index),
+        "ntotal": index.ntotal,
+        "bytes_per_vector": getattr(index, "code_size", index.d * 4)
+    }
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        info["nlist"] = ivf.nlist
+        info["nprobe"] = ivf.nprobe
+    if isinstance(index, faiss.IndexHNSW):
+        info["ef_search"] = index.hnsw.efSearch
+    return info
+
+
+def _as_ivf(index):
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
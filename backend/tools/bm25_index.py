@@ -0,0 +1,232 @@
+"""
+BM25词法检索
+负责人：组员B
+作用：在知识库文档上建立面向代码的倒排索引（标识符、关键字按snake_case/camelCase拆分，中文按二元组切分），
+      按BM25打分，并提供与向量检索结果融合的倒数排名融合（RRF）
+"""
+
+import math
+import re
+import threading
+import logging
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+|[一-鿿]+")
+_CAMEL = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize_code(text: str) -> List[str]:
+    """
+    面向代码的分词
+
+    标识符整体保留（小写），同时拆出snake_case和camelCase的组成部分；
+    连续中文按相邻二字切分，单个汉字保留原样。
+
+    Args:
+        text: 代码或自然语言文本
+
+    Returns:
+        词项列表（含重复，用于统计词频）
+    """
+    tokens: List[str] = []
+    for match in _TOKEN.finditer(text):
+        word = match.group()
+        if "一" <= word[0] <= "鿿":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            continue
+
+        tokens.append(word.lower())
+        parts = [part.lower() for piece in word.split("_") for part in _CAMEL.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """
+    增量构建的BM25倒排索引
+
+    文档位置从0开始连续编号，与FAISS向量位置一致，检索结果可直接与向量检索结果融合。
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._lengths: List[int] = []
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def add(self, texts: Sequence[str]):
+        """
+        按顺序追加文档
+
+        Args:
+            texts: 文档文本，位置依次为 len(self), len(self)+1, ...
+        """
+        for text in texts:
+            position = len(self._lengths)
+            counts = Counter(tokenize_code(text))
+            for term, tf in counts.items():
+                positions, tfs = self._postings.setdefault(term, ([], []))
+                positions.append(position)
+                tfs.append(tf)
+                self._arrays.pop(term, None)
+            length = sum(counts.values())
+            self._lengths.append(length)
+            self._total_length += length
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """
+        检索与查询最相关的文档
+
+        Args:
+            query: 查询文本
+            k: 返回的文档数量
+            allowed: 允许返回的文档位置（元数据过滤结果），为空时不限制
+
+        Returns:
+            按得分从高到低排列的 (文档位置, BM25得分)，只包含得分大于0的文档
+        """
+        total = len(self._lengths)
+        terms = [term for term in set(tokenize_code(query)) if term in self._postings]
+        if not total or not terms:
+            return []
+
+        lengths = np.asarray(self._lengths, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * lengths / (self._total_length / total))
+        scores = np.zeros(total, dtype=np.float32)
+        for term in terms:
+            positions, tfs = self._term_arrays(term)
+            idf = math.log(1 + (total - len(positions) + 0.5) / (len(positions) + 0.5))
+            scores[positions] += idf * tfs * (self.k1 + 1) / (tfs + norm[positions])
+
+        if allowed is not None:
+            mask = np.zeros(total, dtype=bool)
+            mask[allowed[allowed < total]] = True
+            scores[~mask] = 0
+
+        k = min(k, total)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(position), float(scores[position])) for position in top if scores[position] > 0]
+
+    def _term_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            positions, tfs = self._postings[term]
+            arrays = (np.asarray(positions, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self._arrays[term] = arrays
+        return arrays
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]],
+    weights: Sequence[float],
+    k: int = 60
+) -> List[int]:
+    """
+    倒数排名融合：score(d) = Σ weight_i / (k + rank_i(d))
+
+    Args:
+        rankings: 各检索器按相关性排列的文档位置
+        weights: 各检索器的权重
+        k: 平滑常数，越大排名靠后的文档影响越大
+
+    Returns:
+        融合后按得分从高到低排列的文档位置
+    """
+    scores: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, position in enumerate(ranking, 1):
+            scores[position] = scores.get(position, 0.0) + weight / (k + rank)
+    return sorted(scores, key=lambda position: -scores[position])
+
+
+class LexicalIndex:
+    """
+    与向量数据库同步的BM25索引
+
+    首次检索时从文档存储构建，之后只补充新追加的文档；向量数据库被替换或变小时重新构建。
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._index: Optional[BM25Index] = None
+        self._store = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.shortcuts = 0
+
+    def sync(self, store, load_texts: Callable[[object, List[int]], List[str]]) -> BM25Index:
+        """
+        使BM25索引与向量数据库保持一致
+
+        Args:
+            store: 向量数据库
+            load_texts: 按位置读取文档文本的函数，参数为 (向量数据库, 位置列表)
+
+        Returns:
+            最新的BM25索引
+        """
+        total = len(store.index_to_docstore_id)
+        with self._lock:
+            if self._index is None or self._store is not store or len(self._index) > total:
+                self._index = BM25Index(self.k1, self.b)
+                self._store = store
+            start = len(self._index)
+            if start < total:
+                # 分段读取，避免一次把大知识库全部载入内存
+                for offset in range(start, total, 500):
+                    positions = list(range(offset, min(offset + 500, total)))
+                    self._index.add(load_texts(store, positions))
+                logger.info(f"BM25索引已更新，共 {total} 篇文档")
+            return self._index
+
+    def is_confident(self, hits: List[Tuple[int, float]], ratio: float, min_score: float) -> bool:
+        """
+        判断词法检索结果是否足够确定，可以跳过嵌入直接返回
+
+        Args:
+            hits: BM25检索结果
+            ratio: 第一名得分至少是第二名的多少倍，0表示从不跳过
+            min_score: 第一名的最低得分
+
+        Returns:
+            是否足够确定
+        """
+        if ratio <= 0 or not hits or hits[0][1] < min_score:
+            return False
+        return len(hits) == 1 or hits[0][1] >= ratio * hits[1][1]
+
+    def record(self, queries: int, shortcuts: int):
+        """记录检索次数和跳过嵌入的次数"""
+        with self._lock:
+            self.queries += queries
+            self.shortcuts += shortcuts
+
+    def get_stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "documents": len(index) if index is not None else 0,
+            "vocabulary": index.vocabulary_size if index is not None else 0,
+            "queries": self.queries,
+            "lexical_shortcuts": self.shortcuts,
+            "shortcut_rate": self.shortcuts / self.queries if self.queries else 0.0
+        }
@@ -0,0 +1,355 @@
+"""
+嵌入向量缓存
+负责人：组员B
+作用：按模型名和规范化文本的哈希缓存嵌入向量，内存LRU层保存float32向量，
+      可选的磁盘层以追加写入+内存映射读取的方式在重启后保留向量（多个worker进程可共享同一目录），
+      重复和仅空白不同的查询与知识文档不再经过嵌入模型计算
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain.schema.embeddings import Embeddings
+
+from config.settings import get_settings
+from backend.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def embedding_key(model_name: str, text: str, kind: str = "document") -> str:
+    """
+    生成嵌入缓存键
+
+    文本首尾空白去除、连续空白折叠后再哈希，排版不同但内容相同的查询共享同一条缓存。
+
+    Args:
+        model_name: 嵌入模型名称
+        text: 待嵌入的文本
+        kind: 嵌入类型（document / query），部分模型对两者的编码方式不同
+
+    Returns:
+        缓存键（sha256十六进制字符串）
+    """
+    normalized = _WHITESPACE.sub(" ", text).strip()
+    return hashlib.sha256("\x1f".join([model_name, kind, normalized]).encode("utf-8")).hexdigest()
+
+
+class _MemmapTier:
+    """
+    内存映射磁盘层
+
+    向量按行追加到 vectors.f32，键和行号按行追加到 keys.txt（"键 行号"）；
+    读取时通过只读内存映射按行取向量，不把整个文件载入内存。
+
+    多个worker进程可以共享同一目录：追加时持有跨进程文件锁，行号取自持锁时向量文件的大小，
+    并先读入其他进程追加的键；读取未命中时如果 keys.txt 变长了，再读入新增的键。
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._keys_path = os.path.join(directory, "keys.txt")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._file_lock = FileLock(os.path.join(directory, "append.lock"))
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._keys_line = 0
+        self._dim: Optional[int] = None
+        self._mmap: Optional[np.memmap] = None
+        with self._lock, self._file_lock:
+            self._refresh()
+
+    def _refresh(self):
+        """读入 keys.txt 中本进程尚未见过的完整行（调用方持有 _lock）"""
+        if self._dim is None:
+            if not os.path.exists(self._meta_path):
+                return
+            with open(self._meta_path, encoding="utf-8") as f:
+                self._dim = json.load(f)["dim"]
+        if not os.path.exists(self._keys_path):
+            return
+
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            data = f.read()
+        # 其他进程可能正在写最后一行，只读到最后一个换行符
+        complete = data[:data.rfind(b"\n") + 1]
+        if not complete:
+            return
+        self._keys_offset += len(complete)
+
+        stored = self._stored_rows()
+        for line in complete.decode("utf-8").splitlines():
+            parts = line.split()
+            if not parts:
+                continue
+            # 旧格式只有键，行号即行序
+            row = int(parts[1]) if len(parts) > 1 else self._keys_line
+            self._keys_line += 1
+            # 进程在写向量和写键之间退出时可能留下没有向量的键
+            if row < stored:
+                self._rows[parts[0]] = row
+
+    def _stored_rows(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * 4)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                if not os.path.exists(self._keys_path) or os.path.getsize(self._keys_path) <= self._keys_offset:
+                    return None
+                self._refresh()
+                row = self._rows.get(key)
+                if row is None:
+                    return None
+            if self._mmap is None or self._mmap.shape[0] <= row:
+                self._mmap = np.memmap(
+                    self._vectors_path, dtype=np.float32, mode="r", shape=(self._stored_rows(), self._dim)
+                )
+            return np.array(self._mmap[row])
+
+    def put_many(self, items: Dict[str, np.ndarray]):
+        with self._lock, self._file_lock:
+            self._refresh()
+            new_items = [(key, vector) for key, vector in items.items() if key not in self._rows]
+            if not new_items:
+                return
+            if self._dim is None:
+                self._dim = int(new_items[0][1].shape[0])
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self._dim}, f)
+            new_items = [(key, vector) for key, vector in new_items if vector.shape[0] == self._dim]
+
+            # 行号取自持锁时的向量文件大小；进程在写向量时退出留下的不完整行先截掉
+            first_row = self._stored_rows()
+            with open(self._vectors_path, "ab") as f:
+                f.truncate(first_row * self._dim * 4)
+                for _, vector in new_items:
+                    f.write(vector.tobytes())
+
+            # 先写向量再写键，保证已记录的键一定有对应的向量
+            lines = "".join(f"{key} {first_row + i}\n" for i, (key, _) in enumerate(new_items))
+            with open(self._keys_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._refresh()
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._rows)
+
+
+class EmbeddingCache:
+    """
+    两级嵌入向量缓存
+
+    内存层为按最近使用排序的LRU，超过 max_entries 时淘汰最久未使用的向量；
+    配置了磁盘目录时，新计算的向量同时落盘，内存未命中时从磁盘读取并回填内存。
+    """
+
+    def __init__(self, max_entries: int = 10000, disk_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk: Optional[_MemmapTier] = None
+
+        if disk_path:
+            try:
+                self._disk = _MemmapTier(disk_path)
+            except Exception as e:
+                logger.error(f"嵌入缓存磁盘层初始化失败: {str(e)}")
+                self._disk = None
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._computed = 0
+        self._compute_seconds = 0.0
+        self._saved_seconds = 0.0
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        批量读取缓存向量
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            与键一一对应的向量，未命中的位置为None
+        """
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                results.append(vector)
+
+        disk_hits = 0
+        if self._disk is not None:
+            for i, key in enumerate(keys):
+                if results[i] is not None:
+                    continue
+                try:
+                    vector = self._disk.get(key)
+                except Exception as e:
+                    logger.warning(f"读取磁盘嵌入缓存失败: {str(e)}")
+                    vector = None
+                if vector is not None:
+                    results[i] = vector
+                    disk_hits += 1
+                    with self._lock:
+                        self._store(key, vector)
+
+        hits = sum(1 for vector in results if vector is not None)
+        with self._lock:
+            self._hits += hits
+            self._disk_hits += disk_hits
+            self._misses += len(keys) - hits
+            # 按目前观测到的单条计算耗时估算命中节省的时间
+            if self._computed:
+                self._saved_seconds += hits * self._compute_seconds / self._computed
+        return results
+
+    def put_many(self, items: Dict[str, np.ndarray], compute_seconds: float = 0.0):
+        """
+        批量写入新计算的向量
+
+        Args:
+            items: 缓存键到向量的映射
+            compute_seconds: 计算这批向量花费的时间（秒），用于估算命中节省的时间
+        """
+        with self._lock:
+            for key, vector in items.items():
+                self._store(key, vector)
+            self._computed += len(items)
+            self._compute_seconds += compute_seconds
+
+        if self._disk is not None:
+            try:
+                self._disk.put_many(items)
+            except Exception as e:
+                logger.warning(f"写入磁盘嵌入缓存失败: {str(e)}")
+
+    def clear(self):
+        """清空内存层"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "avg_compute_ms": round(self._compute_seconds / self._computed * 1000, 3) if self._computed else 0.0,
+                "saved_ms": round(self._saved_seconds * 1000, 1),
+                "disk_enabled": self._disk is not None
+            }
+        if self._disk is not None:
+            stats["disk_entries"] = self._disk.count()
+        return stats
+
+    def _store(self, key: str, vector: np.ndarray):
+        """写入内存层并按条目数淘汰（调用方持有锁）"""
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    带缓存的嵌入模型包装
+
+    一批文本中只有未命中的部分交给底层模型计算，且只调用一次底层 embed_documents。
+    """
+
+    def __init__(self, base: Embeddings, model_name: str, cache: EmbeddingCache):
+        """
+        初始化带缓存的嵌入模型
+
+        Args:
+            base: 底层嵌入模型
+            model_name: 模型名称，作为缓存键的一部分
+            cache: 嵌入向量缓存
+        """
+        self.base = base
+        self.model_name = model_name
+        self.cache = cache
+
+    @property
+    def client(self):
+        """底层模型（供内存占用统计使用）"""
+        return getattr(self.base, "client", None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts), "document", self.base.embed_documents)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text], "query", lambda texts: [self.base.embed_query(texts[0])])[0]
+
+    def _embed(self, texts: List[str], kind: str, compute) -> List[List[float]]:
+        keys = [embedding_key(self.model_name, text, kind) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # 同一批中的重复文本只计算一次
+        missing: Dict[str, str] = {}
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None and key not in missing:
+                missing[key] = text
+
+        if missing:
+            start_time = time.perf_counter()
+            computed = compute(list(missing.values()))
+            elapsed = time.perf_counter() - start_time
+            fresh = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, computed)
+            }
+            self.cache.put_many(fresh, elapsed)
+            vectors = [vector if vector is not None else fresh[key] for key, vector in zip(keys, vectors)]
+
+        return [vector.tolist() for vector in vectors]
+
+
+_cache_instance: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """获取全局嵌入向量缓存（未启用时返回None）"""
+    global _cache_instance
+    if not settings.embedding_cache_enabled:
+        return None
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                _cache_instance = EmbeddingCache(
+                    max_entries=settings.embedding_cache_max_entries,
+                    disk_path=settings.embedding_cache_path or None
+                )
+    return _cache_instance
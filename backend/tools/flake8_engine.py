@@ -0,0 +1,342 @@
+"""
+Flake8检查引擎
+负责人：组员C
+作用：提供进程内和子进程两种flake8检查引擎，统一返回结构化的问题列表；
+      作为脚本直接运行时充当常驻worker，按行读取JSON请求并返回检查结果
+"""
+
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import logging
+from typing import Dict, List, Any, Sequence, Tuple
+
+import pycodestyle
+import pyflakes.checker
+
+try:
+    from backend.utils.code_analyzer import parse_source
+except ImportError:
+    # 以脚本方式运行的worker进程只有一个线程，直接解析即可
+    parse_source = ast.parse
+
+try:
+    from flake8.plugins.pyflakes import FLAKE8_PYFLAKES_CODES
+except ImportError:
+    # 未安装flake8时仅使用pyflakes，错误代码统一记为F
+    FLAKE8_PYFLAKES_CODES = {}
+
+logger = logging.getLogger(__name__)
+
+# 与原命令行参数保持一致：--max-line-length=88 --ignore=E203,W503
+FLAKE8_MAX_LINE_LENGTH = 88
+FLAKE8_IGNORE = ("E203", "W503")
+
+# flake8 风格的 noqa 注释
+NOQA_PATTERN = re.compile(
+    r"#\s*noqa(?::[\s]?(?P<codes>[A-Z][0-9]+(?:[,\s]+[A-Z][0-9]+)*))?",
+    re.IGNORECASE
+)
+
+
+class _CollectingReport(pycodestyle.BaseReport):
+    """收集pycodestyle检查结果而不打印的报告器"""
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.issues: List[Dict[str, Any]] = []
+
+    def error(self, line_number, offset, text, check):
+        code = super().error(line_number, offset, text, check)
+        if code:
+            self.issues.append({
+                "line": line_number,
+                "column": offset + 1,
+                "code": code,
+                "message": text[5:]
+            })
+        return code
+
+
+class _Flake8CompatibleChecker(pycodestyle.Checker):
+    """
+    与flake8行为一致的pycodestyle检查器
+
+    pycodestyle报告E101后会把缩进字符切换为当前行的缩进字符，
+    flake8始终使用文件中第一处缩进的字符；不切换时混用制表符和空格的文件里
+    后续行的E101/W191/E117与flake8命令行一致。
+    """
+
+    def check_physical(self, line):
+        indent_char = self.indent_char
+        super().check_physical(line)
+        self.indent_char = indent_char
+
+
+class InProcessFlake8Engine:
+    """
+    进程内flake8检查引擎
+
+    直接驱动pycodestyle和pyflakes检查内存中的代码，
+    不写临时文件，也不启动子进程。
+    """
+
+    name = "inprocess"
+
+    def __init__(
+        self,
+        max_line_length: int = FLAKE8_MAX_LINE_LENGTH,
+        ignore: Sequence[str] = FLAKE8_IGNORE
+    ):
+        self.style_guide = pycodestyle.StyleGuide(
+            max_line_length=max_line_length,
+            ignore=list(ignore),
+            reporter=_CollectingReport
+        )
+        self.ignore = tuple(ignore)
+
+    def check(self, code: str) -> List[Dict[str, Any]]:
+        """
+        检查代码
+
+        Args:
+            code: 待检查的Python代码
+
+        Returns:
+            问题列表，每项包含 line/column/code/message
+        """
+        lines = code.splitlines(True)
+        issues: List[Dict[str, Any]] = []
+
+        try:
+            tree = parse_source(code)
+        except SyntaxError as e:
+            # 与flake8一致：语法错误报告为E999，并跳过pyflakes检查
+            tree = None
+            line, column = self._syntax_error_position(e)
+            issues.append({
+                "line": line,
+                "column": column,
+                "code": "E999",
+                "message": f"{type(e).__name__}: {e.msg}"
+            })
+
+        if tree is not None:
+            issues.extend(self._run_pyflakes(tree))
+            issues.extend(self._run_pycodestyle(lines))
+
+        issues = [
+            issue for issue in issues
+            if not issue["code"].startswith(self.ignore)
+            and not self._is_noqa(lines, issue)
+        ]
+        # 与flake8一致：按位置稳定排序，同一位置pyflakes的结果在前
+        issues.sort(key=lambda issue: (issue["line"], issue["column"]))
+        return issues
+
+    @staticmethod
+    def _syntax_error_position(error: SyntaxError) -> Tuple[int, int]:
+        """
+        计算与flake8命令行一致的E999位置
+
+        Python 3.10起flake8直接把SyntaxError的列号（从1开始）当作从0开始的列号，
+        输出时再加1；更早的版本先减1。
+        """
+        if not error.lineno:
+            return 1, 1
+        column = error.offset or 0
+        if column > 0 and sys.version_info < (3, 10):
+            column -= 1
+        return error.lineno, column + 1
+
+    def _run_pycodestyle(self, lines: List[str]) -> List[Dict[str, Any]]:
+        """运行pycodestyle检查"""
+        report = _CollectingReport(self.style_guide.options)
+        checker = _Flake8CompatibleChecker(
+            lines=list(lines),
+            options=self.style_guide.options,
+            report=report
+        )
+        checker.check_all()
+        return report.issues
+
+    def _run_pyflakes(self, tree: ast.AST) -> List[Dict[str, Any]]:
+        """运行pyflakes检查"""
+        checker = pyflakes.checker.Checker(tree, filename="<snippet>")
+        issues = []
+        for message in checker.messages:
+            code = FLAKE8_PYFLAKES_CODES.get(type(message).__name__, "F")
+            issues.append({
+                "line": message.lineno,
+                "column": message.col + 1,
+                "code": code,
+                "message": message.message % message.message_args
+            })
+        return issues
+
+    @staticmethod
+    def _is_noqa(lines: List[str], issue: Dict[str, Any]) -> bool:
+        """判断问题所在行是否带有 noqa 注释"""
+        index = issue["line"] - 1
+        if index < 0 or index >= len(lines):
+            return False
+
+        match = NOQA_PATTERN.search(lines[index])
+        if not match:
+            return False
+
+        codes = match.group("codes")
+        if not codes:
+            return True
+        return any(
+            issue["code"].startswith(code.upper())
+            for code in re.split(r"[,\s]+", codes)
+        )
+
+
+class SubprocessFlake8Engine:
+    """
+    子进程flake8检查引擎（回退模式）
+
+    将代码写入临时文件并调用flake8命令行，兼容自定义插件。
+    """
+
+    name = "subprocess"
+
+    def __init__(
+        self,
+        max_line_length: int = FLAKE8_MAX_LINE_LENGTH,
+        ignore: Sequence[str] = FLAKE8_IGNORE,
+        timeout: float = 30
+    ):
+        self.max_line_length = max_line_length
+        self.ignore = tuple(ignore)
+        self.timeout = timeout
+
+    def check(self, code: str) -> List[Dict[str, Any]]:
+        """
+        检查代码
+
+        Args:
+            code: 待检查的Python代码
+
+        Returns:
+            问题列表
+
+        Raises:
+            subprocess.TimeoutExpired: flake8执行超时
+            FileNotFoundError: flake8命令不存在
+        """
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
+            f.write(code)
+            temp_file = f.name
+
+        try:
+            result = subprocess.run(
+                [
+                    'flake8',
+                    f'--max-line-length={self.max_line_length}',
+                    f'--ignore={",".join(self.ignore)}',
+                    temp_file
+                ],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout
+            )
+            if result.returncode == 0:
+                return []
+            return self._parse_output(result.stdout, temp_file)
+        finally:
+            os.unlink(temp_file)
+
+    @staticmethod
+    def _parse_output(output: str, temp_file: str) -> List[Dict[str, Any]]:
+        """解析flake8输出格式: filepath:line:col: code message"""
+        issues = []
+
+        for line in output.strip().split('\n'):
+            if temp_file not in line:
+                continue
+
+            parts = line.replace(temp_file + ':', '').split(':', 2)
+            if len(parts) < 3:
+                continue
+
+            error_code_and_msg = parts[2].strip()
+            if ' ' in error_code_and_msg:
+                error_code, message = error_code_and_msg.split(' ', 1)
+            else:
+                error_code, message = error_code_and_msg, ""
+
+            issues.append({
+                "line": int(parts[0]) if parts[0].isdigit() else parts[0],
+                "column": int(parts[1]) if parts[1].isdigit() else parts[1],
+                "code": error_code,
+                "message": message
+            })
+
+        return issues
+
+
+def create_flake8_engine(mode: str, timeout: float = 30):
+    """
+    根据配置创建flake8检查引擎
+
+    Args:
+        mode: 引擎类型（inprocess / subprocess / pool）
+        timeout: 单次检查的超时时间（秒）
+
+    Returns:
+        检查引擎实例
+    """
+    if mode == SubprocessFlake8Engine.name:
+        return SubprocessFlake8Engine(timeout=timeout)
+
+    if mode == "pool":
+        # 延迟导入，worker进程以脚本方式运行本模块时不需要进程池
+        from backend.tools.flake8_pool import PooledFlake8Engine, get_flake8_pool
+        return PooledFlake8Engine(get_flake8_pool())
+
+    if mode != InProcessFlake8Engine.name:
+        logger.warning(f"未知的flake8引擎 {mode}，使用进程内引擎")
+    return InProcessFlake8Engine()
+
+
+def serve_worker(stdin=None, stdout=None):
+    """
+    常驻worker主循环
+
+    协议为按行分隔的JSON：
+      启动完成后输出 {"ready": true}
+      请求 {"id": 1, "code": "..."}
+      响应 {"id": 1, "issues": [...]} 或 {"id": 1, "error": "..."}
+    """
+    stdin = stdin or sys.stdin.buffer
+    stdout = stdout or sys.stdout.buffer
+
+    engine = InProcessFlake8Engine()
+    # 预热：提前触发pycodestyle/pyflakes的检查注册和导入
+    engine.check("x = 1\n")
+    stdout.write(b'{"ready": true}\n')
+    stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            response = {"id": request_id, "issues": engine.check(request["code"])}
+        except Exception as e:
+            response = {"id": request_id, "error": str(e)}
+        stdout.write(json.dumps(response).encode("utf-8") + b"\n")
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    serve_worker()
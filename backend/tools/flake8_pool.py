@@ -0,0 +1,367 @@
+"""
+Flake8常驻worker进程池
+负责人：组员C
+作用：维护一组预热的flake8 worker进程，通过管道按行传输JSON请求，
+      让并发的代码审查请求不再在同一个GIL上串行执行静态分析；
+      响应由每个worker的读取线程从管道读出（不依赖select，Windows上同样可用）
+"""
+
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import logging
+from typing import Dict, List, Any, Optional
+
+from config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# worker入口脚本（flake8_engine.py 以脚本方式运行时进入worker主循环）
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "flake8_engine.py")
+
+
+class Flake8WorkerError(RuntimeError):
+    """worker进程异常"""
+
+
+class _Flake8Worker:
+    """单个常驻worker进程"""
+
+    def __init__(self, worker_id: int, startup_timeout: float):
+        self.worker_id = worker_id
+        self.jobs_done = 0
+        self._next_request_id = 0
+        # 读取线程按行放入的响应，进程退出时放入 None
+        self._lines: "queue.Queue[Optional[bytes]]" = queue.Queue()
+        self.process = subprocess.Popen(
+            [sys.executable, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+        threading.Thread(
+            target=self._read_lines,
+            name=f"flake8-worker-{worker_id}-reader",
+            daemon=True
+        ).start()
+        try:
+            ready = self._read_message(time.monotonic() + startup_timeout)
+        except Exception:
+            self.terminate()
+            raise
+        if not ready.get("ready"):
+            self.terminate()
+            raise Flake8WorkerError(f"flake8 worker {worker_id} 启动失败")
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def check(self, code: str, timeout: float) -> List[Dict[str, Any]]:
+        """发送一次检查请求并等待结果"""
+        self._next_request_id += 1
+        request_id = self._next_request_id
+        payload = json.dumps({"id": request_id, "code": code}).encode("utf-8") + b"\n"
+
+        try:
+            self.process.stdin.write(payload)
+        except (BrokenPipeError, OSError) as e:
+            raise Flake8WorkerError(f"flake8 worker {self.worker_id} 已退出: {e}")
+
+        response = self._read_message(time.monotonic() + timeout)
+        self.jobs_done += 1
+
+        if response.get("id") != request_id:
+            raise Flake8WorkerError("flake8 worker 响应与请求不匹配")
+        if "error" in response:
+            raise Flake8WorkerError(response["error"])
+        return response["issues"]
+
+    def _read_lines(self):
+        """读取线程：把worker输出按行放入队列，直到管道关闭"""
+        stdout = self.process.stdout
+        buffer = b""
+        try:
+            while True:
+                chunk = os.read(stdout.fileno(), 65536)
+                if not chunk:
+                    break
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    self._lines.put(line)
+        except (OSError, ValueError):
+            # 管道已被 terminate() 关闭
+            pass
+        finally:
+            self._lines.put(None)
+
+    def _read_message(self, deadline: float) -> Dict[str, Any]:
+        """读取一行JSON响应，超时抛出 subprocess.TimeoutExpired"""
+        try:
+            line = self._lines.get(timeout=max(deadline - time.monotonic(), 0.001))
+        except queue.Empty:
+            raise subprocess.TimeoutExpired(WORKER_SCRIPT, 0)
+        if line is None:
+            self._lines.put(None)
+            raise Flake8WorkerError(f"flake8 worker {self.worker_id} 意外退出")
+        return json.loads(line)
+
+    def terminate(self):
+        """结束worker进程"""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        if self.is_alive():
+            self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            logger.warning(f"flake8 worker {self.worker_id} 未能及时退出")
+        self.process.stdout.close()
+
+
+class Flake8WorkerPool:
+    """
+    flake8 worker进程池
+
+    每个worker同一时间只处理一个请求；调用方在没有空闲worker时排队等待。
+    worker处理超时会被杀掉并替换，处理满 max_jobs_per_worker 次后会被回收重建；
+    替换时创建失败的worker在之后的检查请求中补齐，进程池不会永久缩小。
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        job_timeout: float = 30,
+        max_jobs_per_worker: int = 500,
+        startup_timeout: float = 30
+    ):
+        self.size = max(1, size)
+        self.job_timeout = job_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.startup_timeout = startup_timeout
+
+        self._idle: "queue.Queue[_Flake8Worker]" = queue.Queue()
+        self._workers: Dict[int, _Flake8Worker] = {}
+        self._lock = threading.Lock()
+        self._next_worker_id = 0
+        self._spawning = 0
+        self._started = False
+
+        # 指标
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._jobs_completed = 0
+        self._jobs_failed = 0
+        self._timeouts = 0
+        self._recycled = 0
+        self._spawn_failures = 0
+        self._total_wait_time = 0.0
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def start(self):
+        """
+        启动并预热所有worker
+
+        Raises:
+            Flake8WorkerError: 一个worker都没有创建成功
+        """
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        self._replenish()
+        if not self._workers:
+            raise Flake8WorkerError("flake8 worker进程池启动失败")
+        logger.info(f"flake8 worker进程池已启动，worker数量: {len(self._workers)}")
+
+    def shutdown(self):
+        """关闭所有worker"""
+        with self._lock:
+            self._started = False
+            workers = list(self._workers.values())
+            self._workers.clear()
+
+        for worker in workers:
+            worker.terminate()
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        logger.info("flake8 worker进程池已关闭")
+
+    def check(self, code: str) -> List[Dict[str, Any]]:
+        """
+        使用空闲worker检查代码
+
+        Args:
+            code: 待检查的Python代码
+
+        Returns:
+            问题列表
+
+        Raises:
+            subprocess.TimeoutExpired: 排队或检查超时
+            Flake8WorkerError: worker异常
+        """
+        if not self._started:
+            self.start()
+
+        deadline = time.monotonic() + self.job_timeout
+        worker = self._acquire(deadline)
+
+        try:
+            issues = worker.check(code, max(deadline - time.monotonic(), 0.001))
+        except subprocess.TimeoutExpired:
+            with self._lock:
+                self._timeouts += 1
+                self._jobs_failed += 1
+            logger.error(f"flake8 worker {worker.worker_id} 处理超时，已替换")
+            self._replace(worker)
+            raise
+        except Exception:
+            with self._lock:
+                self._jobs_failed += 1
+            self._replace(worker)
+            raise
+
+        with self._lock:
+            self._jobs_completed += 1
+
+        if not self._started:
+            self._discard(worker)
+        elif worker.jobs_done >= self.max_jobs_per_worker:
+            with self._lock:
+                self._recycled += 1
+            self._replace(worker)
+        else:
+            self._idle.put(worker)
+        return issues
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取进程池指标"""
+        with self._lock:
+            completed = self._jobs_completed + self._jobs_failed
+            return {
+                "started": self._started,
+                "size": self.size,
+                "idle_workers": self._idle.qsize(),
+                "busy_workers": len(self._workers) - self._idle.qsize(),
+                "queue_depth": self._queue_depth,
+                "max_queue_depth": self._max_queue_depth,
+                "jobs_completed": self._jobs_completed,
+                "jobs_failed": self._jobs_failed,
+                "timeouts": self._timeouts,
+                "workers": len(self._workers),
+                "workers_recycled": self._recycled,
+                "spawn_failures": self._spawn_failures,
+                "avg_wait_ms": round(self._total_wait_time * 1000 / completed, 3) if completed else 0.0,
+                "job_timeout": self.job_timeout,
+                "max_jobs_per_worker": self.max_jobs_per_worker
+            }
+
+    def _acquire(self, deadline: float) -> _Flake8Worker:
+        """获取空闲worker，必要时排队等待"""
+        self._replenish()
+        if not self._workers:
+            raise Flake8WorkerError("没有可用的flake8 worker")
+
+        start = time.monotonic()
+        with self._lock:
+            self._queue_depth += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+
+        try:
+            worker = self._idle.get(timeout=max(deadline - start, 0.001))
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+                self._jobs_failed += 1
+            raise subprocess.TimeoutExpired(WORKER_SCRIPT, self.job_timeout)
+        finally:
+            with self._lock:
+                self._queue_depth -= 1
+                self._total_wait_time += time.monotonic() - start
+
+        if not worker.is_alive():
+            logger.warning(f"flake8 worker {worker.worker_id} 已退出，重新创建")
+            self._discard(worker)
+            worker = self._spawn_worker()
+        return worker
+
+    def _spawn_worker(self) -> _Flake8Worker:
+        with self._lock:
+            self._next_worker_id += 1
+            worker_id = self._next_worker_id
+
+        worker = _Flake8Worker(worker_id, self.startup_timeout)
+        with self._lock:
+            self._workers[worker_id] = worker
+        return worker
+
+    def _discard(self, worker: _Flake8Worker):
+        with self._lock:
+            self._workers.pop(worker.worker_id, None)
+        worker.terminate()
+
+    def _replace(self, worker: _Flake8Worker):
+        """结束旧worker并放回一个新的worker"""
+        self._discard(worker)
+        self._replenish()
+
+    def _replenish(self):
+        """把worker补齐到 size 个，创建失败时记录日志，留待下次检查请求重试"""
+        while True:
+            with self._lock:
+                if not self._started or len(self._workers) + self._spawning >= self.size:
+                    return
+                self._spawning += 1
+            try:
+                worker = self._spawn_worker()
+            except Exception as e:
+                with self._lock:
+                    self._spawn_failures += 1
+                logger.error(f"创建flake8 worker失败: {str(e)}")
+                return
+            finally:
+                with self._lock:
+                    self._spawning -= 1
+            self._idle.put(worker)
+
+
+class PooledFlake8Engine:
+    """基于worker进程池的flake8检查引擎"""
+
+    name = "pool"
+
+    def __init__(self, pool: Flake8WorkerPool):
+        self.pool = pool
+
+    def check(self, code: str) -> List[Dict[str, Any]]:
+        return self.pool.check(code)
+
+
+_pool_instance: Optional[Flake8WorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_flake8_pool() -> Flake8WorkerPool:
+    """获取全局flake8 worker进程池（单例模式）"""
+    global _pool_instance
+    with _pool_lock:
+        if _pool_instance is None:
+            _pool_instance = Flake8WorkerPool(
+                size=settings.flake8_pool_size,
+                job_timeout=settings.flake8_timeout,
+                max_jobs_per_worker=settings.flake8_worker_max_jobs
+            )
+        return _pool_instance
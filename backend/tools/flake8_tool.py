@@ -5,14 +5,16 @@ Flake8代码静态分析工具
 """
 
 import subprocess
-import tempfile
-import os
 import logging
+from functools import lru_cache
 from typing import Dict, List, Any
 from langchain.tools import BaseTool
-from pydantic import Field
+
+from config.settings import get_settings
+from backend.tools.flake8_engine import create_flake8_engine
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 class Flake8Tool(BaseTool):
@@ -24,6 +26,15 @@ class Flake8Tool(BaseTool):
     输入：Python代码字符串
     输出：flake8分析报告，包含行号、错误类型和错误描述
     """
+    engine: Any = None
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.engine is None:
+            self.engine = create_flake8_engine(
+                settings.flake8_engine,
+                timeout=settings.flake8_timeout
+            )
     
     def _run(self, code: str) -> str:
         """
@@ -36,29 +47,11 @@ class Flake8Tool(BaseTool):
             flake8分析结果
         """
         try:
-            # 创建临时文件
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False) as f:
-                f.write(code)
-                temp_file = f.name
+            issues = self.check(code)
             
-            try:
-                # 运行flake8命令
-                result = subprocess.run(
-                    ['flake8', '--max-line-length=88', '--ignore=E203,W503', temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=30
-                )
-                
-                # 处理flake8输出
-                if result.returncode == 0:
-                    return "✅ 代码风格检查通过，未发现问题"
-                else:
-                    return self._format_flake8_output(result.stdout, temp_file)
-                    
-            finally:
-                # 清理临时文件
-                os.unlink(temp_file)
+            if not issues:
+                return "✅ 代码风格检查通过，未发现问题"
+            return self._create_analysis_report(issues)
                 
         except subprocess.TimeoutExpired:
             logger.error("Flake8分析超时")
@@ -74,51 +67,20 @@ class Flake8Tool(BaseTool):
         """异步版本的运行方法"""
         return self._run(code)
     
-    def _format_flake8_output(self, output: str, temp_file: str) -> str:
+    def check(self, code: str) -> List[Dict[str, Any]]:
         """
-        格式化flake8输出结果
+        检查代码并返回结构化的问题列表
         
         Args:
-            output: flake8原始输出
-            temp_file: 临时文件路径
+            code: 待分析的Python代码
             
         Returns:
-            格式化后的分析报告
+            问题列表，每项包含 line/column/code/type/message
         """
-        if not output.strip():
-            return "✅ 代码风格检查通过"
-        
-        lines = output.strip().split('\n')
-        issues = []
-        
-        for line in lines:
-            if temp_file in line:
-                # 解析flake8输出格式: filepath:line:col: code message
-                parts = line.replace(temp_file + ':', '').split(':', 3)
-                if len(parts) >= 3:
-                    line_num = parts[0]
-                    col_num = parts[1]
-                    error_code_and_msg = parts[2].strip()
-                    
-                    # 分离错误代码和消息
-                    if ' ' in error_code_and_msg:
-                        error_code, message = error_code_and_msg.split(' ', 1)
-                    else:
-                        error_code = error_code_and_msg
-                        message = ""
-                    
-                    # 获取错误类型描述
-                    error_type = self._get_error_type(error_code)
-                    
-                    issues.append({
-                        'line': line_num,
-                        'column': col_num,
-                        'code': error_code,
-                        'type': error_type,
-                        'message': message
-                    })
-        
-        return self._create_analysis_report(issues)
+        issues = self.engine.check(code)
+        for issue in issues:
+            issue['type'] = self._get_error_type(issue['code'])
+        return issues
     
     def _get_error_type(self, error_code: str) -> str:
         """
@@ -182,6 +144,7 @@ class Flake8Tool(BaseTool):
         return report
 
 
+@lru_cache()
 def get_flake8_tool() -> Flake8Tool:
-    """获取Flake8工具实例"""
+    """获取共享的Flake8工具实例"""
     return Flake8Tool()
\ No newline at end of file
@@ -0,0 +1,297 @@
+"""
+知识库批量导入
+负责人：组员B
+作用：从知识库目录流式读取Markdown、JSONL和Python文件，切分为文本块后按批嵌入，
+      追加到共享向量数据库；已导入的文本块按内容ID跳过，重复执行只处理新增内容
+
+运行方式：python -m backend.tools.knowledge_ingest [--path 目录] [--batch-size 64] [--compact]
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain.schema import Document
+from langchain.text_splitter import Language, MarkdownHeaderTextSplitter, RecursiveCharacterTextSplitter
+
+from config.settings import get_settings
+from backend.tools.vector_registry import VectorStoreRegistry, get_vector_registry
+from backend.utils.code_analyzer import parse_source
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SUPPORTED_SUFFIXES = (".md", ".markdown", ".jsonl", ".py")
+
+_MARKDOWN_HEADERS = [("#", "h1"), ("##", "h2"), ("###", "h3")]
+
+
+class IngestionInProgressError(Exception):
+    """已有导入任务在执行"""
+
+
+def chunk_id(source: str, content: str) -> str:
+    """
+    计算文本块ID（来源路径+内容的哈希），内容不变时重复导入得到相同ID
+
+    Args:
+        source: 来源文件的相对路径
+        content: 文本块内容
+
+    Returns:
+        文本块ID
+    """
+    return hashlib.sha256(f"{source}\x1f{content}".encode("utf-8")).hexdigest()
+
+
+def iter_source_files(root: str) -> Iterator[str]:
+    """
+    按路径顺序遍历知识库目录下支持的文件
+
+    Args:
+        root: 知识库目录或单个文件
+
+    Yields:
+        文件路径
+    """
+    if os.path.isfile(root):
+        yield root
+        return
+
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith("."))
+        for filename in sorted(filenames):
+            if filename.endswith(SUPPORTED_SUFFIXES):
+                yield os.path.join(directory, filename)
+
+
+class KnowledgeIngestionPipeline:
+    """
+    知识库导入流水线
+
+    文件逐个读取、逐块产出，只在内存中保留一批待嵌入的文本块；
+    每批只调用一次 embed_documents，并通过注册中心追加写入增量日志。
+    """
+
+    def __init__(
+        self,
+        registry: Optional[VectorStoreRegistry] = None,
+        chunk_size: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        """
+        初始化导入流水线
+
+        Args:
+            registry: 向量存储注册中心，默认使用全局实例
+            chunk_size: 单个文本块的最大字符数，默认取配置
+            chunk_overlap: 相邻文本块重叠的字符数，默认取配置
+            batch_size: 每批嵌入的文本块数，默认取配置
+        """
+        self.registry = registry or get_vector_registry()
+        self.chunk_size = chunk_size or settings.knowledge_chunk_size
+        self.chunk_overlap = chunk_overlap if chunk_overlap is not None else settings.knowledge_chunk_overlap
+        self.batch_size = batch_size or settings.knowledge_ingest_batch_size
+
+        self._text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+        )
+        self._python_splitter = RecursiveCharacterTextSplitter.from_language(
+            Language.PYTHON, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+        )
+        self._markdown_splitter = MarkdownHeaderTextSplitter(headers_to_split_on=_MARKDOWN_HEADERS)
+        self._running = threading.Lock()
+
+    def run(
+        self,
+        path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        compact: bool = False,
+        root: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        导入知识库目录
+
+        文本块的来源（以及由来源决定的分类和ID）总是相对于知识库根目录计算，
+        只导入某个子目录或文件时得到的文本块与导入整个知识库时完全相同。
+
+        Args:
+            path: 本次导入的目录或单个文件，默认为整个知识库根目录
+            batch_size: 本次导入每批嵌入的文本块数，默认使用流水线配置
+            compact: 导入完成后是否立即压缩为新的索引快照
+            root: 知识库根目录，默认为 knowledge_base_path；path 不在根目录内时以 path 本身为根
+
+        Returns:
+            导入统计（文件数、文本块数、新增数、跳过数、批次数、耗时）
+
+        Raises:
+            IngestionInProgressError: 已有导入任务在执行
+        """
+        if not self._running.acquire(blocking=False):
+            raise IngestionInProgressError("已有知识库导入任务在执行")
+
+        try:
+            root = root or settings.knowledge_base_path
+            path = path or root
+            return self._run(path, self._source_root(path, root), batch_size or self.batch_size, compact)
+        finally:
+            self._running.release()
+
+    @staticmethod
+    def _source_root(path: str, root: str) -> str:
+        """计算来源路径的基准目录：path 位于知识库根目录内时为根目录，否则为 path 本身（文件取其所在目录）"""
+        real_root, real_path = os.path.realpath(root), os.path.realpath(path)
+        try:
+            if os.path.commonpath([real_root, real_path]) == real_root:
+                return real_root
+        except ValueError:
+            # Windows上不同盘符的路径
+            pass
+        return real_path if os.path.isdir(real_path) else os.path.dirname(real_path)
+
+    def _run(self, path: str, root: str, batch_size: int, compact: bool) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        if self.registry.get_vector_store() is None:
+            raise RuntimeError("向量存储未初始化")
+
+        existing = self.registry.existing_ids()
+        report = {"files": 0, "chunks": 0, "added": 0, "skipped": 0, "batches": 0, "compacted": False}
+        pending: List[Document] = []
+
+        for file_path in iter_source_files(path):
+            report["files"] += 1
+            source = os.path.relpath(os.path.realpath(file_path), root)
+            for doc in self.load_file(file_path, source):
+                report["chunks"] += 1
+                doc_id = doc.metadata["chunk_id"]
+                if doc_id in existing:
+                    report["skipped"] += 1
+                    continue
+                existing.add(doc_id)
+                pending.append(doc)
+                if len(pending) >= batch_size:
+                    report["added"] += self._flush(pending)
+                    report["batches"] += 1
+                    pending = []
+
+        if pending:
+            report["added"] += self._flush(pending)
+            report["batches"] += 1
+
+        # IVF/HNSW索引需要在足够多的向量上（重新）训练，借压缩一并完成
+        if compact or self.registry.needs_rebuild():
+            self.registry.compact()
+            report["compacted"] = True
+
+        report["execution_time"] = round(time.perf_counter() - start_time, 3)
+        logger.info(
+            f"知识库导入完成: 文件 {report['files']} 个，新增 {report['added']} 块，"
+            f"跳过 {report['skipped']} 块，耗时 {report['execution_time']:.2f}秒"
+        )
+        return report
+
+    def _flush(self, documents: List[Document]) -> int:
+        """嵌入一批文本块并追加到向量数据库"""
+        vectors = self.registry.get_embeddings().embed_documents([doc.page_content for doc in documents])
+        return self.registry.append_embedded(
+            documents, vectors, ids=[doc.metadata["chunk_id"] for doc in documents]
+        )
+
+    def load_file(self, file_path: str, source: str) -> Iterator[Document]:
+        """
+        读取单个文件并切分为文本块
+
+        Args:
+            file_path: 文件路径
+            source: 记录在元数据中的来源（相对路径）
+
+        Yields:
+            带 topic / category / source / chunk_id 元数据的文档
+        """
+        parts = source.replace("\\", "/").split("/")
+        category = parts[0] if len(parts) > 1 else "其他"
+        stem = os.path.splitext(parts[-1])[0]
+
+        try:
+            if file_path.endswith(".jsonl"):
+                chunks = self._load_jsonl(file_path, stem, category)
+            else:
+                with open(file_path, encoding="utf-8") as f:
+                    text = f.read()
+                if file_path.endswith(".py"):
+                    chunks = self._split_python(text, stem, category)
+                else:
+                    chunks = self._split_markdown(text, stem, category)
+
+            for content, metadata in chunks:
+                content = content.strip()
+                if not content:
+                    continue
+                metadata = {**metadata, "source": source, "chunk_id": chunk_id(source, content)}
+                yield Document(page_content=content, metadata=metadata)
+        except (OSError, UnicodeDecodeError) as e:
+            logger.warning(f"读取知识库文件失败 {file_path}: {str(e)}")
+
+    def _split_markdown(self, text: str, stem: str, category: str) -> Iterator[tuple]:
+        for section in self._markdown_splitter.split_text(text):
+            headers = section.metadata
+            topic = headers.get("h3") or headers.get("h2") or headers.get("h1") or stem
+            for chunk in self._text_splitter.split_text(section.page_content):
+                yield chunk, {"topic": topic, "category": category}
+
+    def _split_python(self, text: str, stem: str, category: str) -> Iterator[tuple]:
+        topic = stem
+        try:
+            docstring = ast.get_docstring(parse_source(text))
+            if docstring:
+                topic = docstring.strip().splitlines()[0]
+        except SyntaxError:
+            pass
+        for chunk in self._python_splitter.split_text(text):
+            yield chunk, {"topic": topic, "category": category}
+
+    def _load_jsonl(self, file_path: str, stem: str, category: str) -> Iterator[tuple]:
+        with open(file_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"跳过无法解析的JSONL行 {file_path}:{line_number}")
+                    continue
+                content = record.pop("content", None) or record.pop("page_content", "")
+                metadata = {"topic": stem, "category": category}
+                metadata.update({key: value for key, value in record.items() if isinstance(value, (str, int, float, bool))})
+                for chunk in self._text_splitter.split_text(content):
+                    yield chunk, metadata
+
+
+@lru_cache()
+def get_ingestion_pipeline() -> KnowledgeIngestionPipeline:
+    """获取共享的知识库导入流水线"""
+    return KnowledgeIngestionPipeline()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将知识库目录导入向量数据库")
+    parser.add_argument("--path", default=None, help="导入的目录或文件（来源路径相对于 KNOWLEDGE_BASE_PATH 计算），默认为整个知识库")
+    parser.add_argument("--batch-size", type=int, default=None, help="每批嵌入的文本块数")
+    parser.add_argument("--compact", action="store_true", help="导入完成后压缩为新的索引快照")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = get_ingestion_pipeline().run(args.path, batch_size=args.batch_size, compact=args.compact)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
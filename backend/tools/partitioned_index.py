@@ -0,0 +1,200 @@
+"""
+按分类分区的知识库子索引
+负责人：组员B
+作用：按文档元数据 category 和 topic 记录各分区的向量位置（不复制向量），
+      带过滤条件的检索在主索引上以FAISS ID选择器只计算选中位置的距离
+"""
+
+import threading
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.tools.ann_index import search_subset
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORY = "其他"
+
+
+class RetrievalFilter:
+    """
+    知识库检索的元数据过滤条件
+
+    categories 和 topics 各自为空表示不限制；同时给出时文档须同时满足两者。
+    """
+
+    __slots__ = ("categories", "topics")
+
+    def __init__(self, categories: Optional[Iterable[str]] = None, topics: Optional[Iterable[str]] = None):
+        self.categories = tuple(sorted(set(categories or ())))
+        self.topics = tuple(sorted(set(topics or ())))
+
+    @classmethod
+    def create(
+        cls,
+        categories: Optional[Iterable[str]] = None,
+        topics: Optional[Iterable[str]] = None
+    ) -> Optional["RetrievalFilter"]:
+        """构造过滤条件，两者都为空时返回None（不过滤）"""
+        knowledge_filter = cls(categories, topics)
+        return knowledge_filter if knowledge_filter else None
+
+    def __bool__(self) -> bool:
+        return bool(self.categories or self.topics)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RetrievalFilter) and (self.categories, self.topics) == (other.categories, other.topics)
+
+    def __hash__(self) -> int:
+        return hash((self.categories, self.topics))
+
+    def __repr__(self) -> str:
+        return f"RetrievalFilter(categories={list(self.categories)}, topics={list(self.topics)})"
+
+    def cache_token(self) -> str:
+        """用于结果缓存键的稳定字符串"""
+        return f"categories={','.join(self.categories)};topics={','.join(self.topics)}"
+
+
+class _Partition:
+    """单个分类的向量位置，以及按主题分组的位置（刷新后首次使用时计算一次）"""
+
+    __slots__ = ("positions", "topics", "_positions_array", "_topic_positions")
+
+    def __init__(self):
+        self.positions: List[int] = []
+        self.topics: List[Optional[str]] = []
+        self._positions_array: Optional[np.ndarray] = None
+        self._topic_positions: Optional[Dict[Optional[str], np.ndarray]] = None
+
+    def add(self, positions: List[int], topics: List[Optional[str]]):
+        self.positions.extend(positions)
+        self.topics.extend(topics)
+        self._positions_array = None
+        self._topic_positions = None
+
+    @property
+    def positions_array(self) -> np.ndarray:
+        if self._positions_array is None:
+            self._positions_array = np.asarray(self.positions, dtype=np.int64)
+        return self._positions_array
+
+    def positions_of(self, topics: tuple) -> np.ndarray:
+        """分区内属于给定主题的向量位置"""
+        if self._topic_positions is None:
+            grouped: Dict[Optional[str], List[int]] = {}
+            for position, topic in zip(self.positions, self.topics):
+                grouped.setdefault(topic, []).append(position)
+            self._topic_positions = {
+                topic: np.asarray(positions, dtype=np.int64) for topic, positions in grouped.items()
+            }
+        parts = [self._topic_positions[topic] for topic in topics if topic in self._topic_positions]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+class PartitionedIndex:
+    """
+    与向量数据库同步的分区子索引集合
+
+    首次带过滤条件检索时读取全部文档元数据并按分类分区，之后只补充新追加的向量；
+    向量数据库被替换或变小时重新构建。检索始终在主索引上进行，分区只保存位置。
+    """
+
+    def __init__(self):
+        self._partitions: Dict[str, _Partition] = {}
+        self._store = None
+        self._ntotal = 0
+        self._lock = threading.Lock()
+
+    def sync(
+        self,
+        store,
+        load_metadata: Callable[[object, List[int]], List[Optional[Dict[str, Any]]]]
+    ) -> "PartitionedIndex":
+        """
+        使分区与向量数据库保持一致
+
+        Args:
+            store: 向量数据库
+            load_metadata: 按位置读取文档元数据的函数，参数为 (向量数据库, 位置列表)，文档缺失时为None
+
+        Returns:
+            self
+        """
+        index = store.index
+        total = index.ntotal
+        with self._lock:
+            if self._store is not store or self._ntotal > total:
+                self._partitions = {}
+                self._store = store
+                self._ntotal = 0
+            if self._ntotal < total:
+                # 分段读取，避免一次把大知识库全部载入内存
+                for start in range(self._ntotal, total, 500):
+                    count = min(500, total - start)
+                    self._add_range(start, load_metadata(store, list(range(start, start + count))))
+                self._ntotal = total
+                logger.info(f"知识库分区子索引已更新，共 {len(self._partitions)} 个分区、{total} 条向量")
+        return self
+
+    def _add_range(self, start: int, metadata: List[Optional[Dict[str, Any]]]):
+        grouped: Dict[str, List[int]] = {}
+        for offset, meta in enumerate(metadata):
+            if meta is not None:
+                grouped.setdefault(meta.get("category", DEFAULT_CATEGORY), []).append(offset)
+        for category, offsets in grouped.items():
+            partition = self._partitions.get(category)
+            if partition is None:
+                partition = self._partitions[category] = _Partition()
+            partition.add(
+                [start + offset for offset in offsets],
+                [metadata[offset].get("topic") for offset in offsets]
+            )
+
+    def _selected(self, knowledge_filter: RetrievalFilter) -> List[_Partition]:
+        if not knowledge_filter.categories:
+            return list(self._partitions.values())
+        return [self._partitions[name] for name in knowledge_filter.categories if name in self._partitions]
+
+    def positions_for(self, knowledge_filter: RetrievalFilter) -> np.ndarray:
+        """
+        满足过滤条件的全部向量位置
+
+        Args:
+            knowledge_filter: 过滤条件
+
+        Returns:
+            全局向量位置数组
+        """
+        parts = []
+        for partition in self._selected(knowledge_filter):
+            if knowledge_filter.topics:
+                parts.append(partition.positions_of(knowledge_filter.topics))
+            else:
+                parts.append(partition.positions_array)
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def search(self, matrix: np.ndarray, k: int, knowledge_filter: RetrievalFilter) -> List[List[int]]:
+        """
+        只在满足过滤条件的向量中检索
+
+        Args:
+            matrix: 形状为 (n, d) 的查询矩阵（已按向量数据库的要求归一化）
+            k: 每个查询返回的向量数
+            knowledge_filter: 过滤条件
+
+        Returns:
+            每个查询按距离排列的全局向量位置
+        """
+        positions = self.positions_for(knowledge_filter)
+        if not len(positions) or self._store is None:
+            return [[] for _ in range(len(matrix))]
+
+        _, found = search_subset(self._store.index, matrix, min(k, len(positions)), positions)
+        return [[int(position) for position in row if position >= 0] for row in found]
+
+    def get_stats(self) -> Dict[str, int]:
+        """各分区的向量数"""
+        return {name: len(partition.positions) for name, partition in self._partitions.items()}
@@ -5,21 +5,20 @@ RAG知识库检索工具
 """
 
 import logging
-import os
-from typing import List, Dict, Any
-from langchain.tools import BaseTool
-# 修复 LangChain 导入警告
-try:
-    from langchain_community.vectorstores import FAISS
-    from langchain_community.embeddings import HuggingFaceEmbeddings
-except ImportError:
-    # 如果新版本导入失败，使用旧版本导入
-    from langchain.vectorstores import FAISS
-    from langchain.embeddings import HuggingFaceEmbeddings
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 
-from langchain.schema import Document
 import numpy as np
+from langchain.tools import BaseTool
+from langchain.schema import Document
 
+from backend.tools.vector_registry import get_vector_registry, EMBEDDING_MODEL_NAME
+from backend.tools.retrieval_batcher import RetrievalBatcher
+from backend.tools.embedding_cache import get_embedding_cache
+from backend.tools.ann_index import describe_index
+from backend.tools.bm25_index import LexicalIndex, reciprocal_rank_fusion
+from backend.tools.partitioned_index import PartitionedIndex, RetrievalFilter
+from backend.core.executors import ExecutorSaturatedError
 from config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -35,89 +34,31 @@ class RAGTool(BaseTool):
     输入：代码片段或编程概念关键词
     输出：相关的知识库内容，包括最佳实践和优化建议
     """
+    registry: Any = None
+    batcher: Any = None
+    lexical: Any = None
+    partitions: Any = None
     
-    def __init__(self):
-        super().__init__()
-        self.embeddings = None
-        self.vector_store = None
-        self._init_rag_system()
+    def __init__(self, registry=None, **kwargs):
+        super().__init__(**kwargs)
+        # 嵌入模型和向量数据库从进程级注册中心借用，首次检索时才加载
+        self.registry = registry or get_vector_registry()
+        # 异步检索的微批处理器：几毫秒内到达的查询合并为一次嵌入和一次FAISS搜索
+        self.batcher = RetrievalBatcher(self.retrieve_many)
+        # 与向量数据库同步的BM25索引，首次混合检索时构建
+        self.lexical = LexicalIndex(settings.rag_bm25_k1, settings.rag_bm25_b)
+        # 按category分区的向量位置，首次带过滤条件检索时构建
+        self.partitions = PartitionedIndex()
     
-    def _init_rag_system(self):
-        """初始化RAG系统"""
-        try:
-            # 初始化嵌入模型
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cpu'}
-            )
-            
-            # 尝试加载现有的向量数据库
-            vector_db_path = settings.vector_db_path
-            if os.path.exists(vector_db_path):
-                self.vector_store = FAISS.load_local(
-                    vector_db_path, 
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
-                logger.info("已加载现有向量数据库")
-            else:
-                # 创建新的向量数据库
-                self._create_initial_knowledge_base()
-                logger.info("已创建新的向量数据库")
-                
-        except Exception as e:
-            logger.error(f"RAG系统初始化失败: {str(e)}")
-            self.vector_store = None
+    @property
+    def embeddings(self):
+        """共享的嵌入模型"""
+        return self.registry.get_embeddings()
     
-    def _create_initial_knowledge_base(self):
-        """创建初始知识库"""
-        try:
-            # 基础Python最佳实践文档
-            documents = [
-                Document(
-                    page_content="使用列表推导式代替传统循环可以提高代码性能和可读性。例如：[x*2 for x in range(10)] 比使用for循环更加Pythonic。",
-                    metadata={"topic": "列表推导式", "category": "性能优化"}
-                ),
-                Document(
-                    page_content="使用with语句进行文件操作可以确保文件正确关闭，避免资源泄漏。例如：with open('file.txt', 'r') as f: content = f.read()",
-                    metadata={"topic": "文件操作", "category": "最佳实践"}
-                ),
-                Document(
-                    page_content="避免在循环中使用字符串拼接，使用join()方法或f-string会更高效。例如：''.join(items) 或 f'{name}_{id}'",
-                    metadata={"topic": "字符串操作", "category": "性能优化"}
-                ),
-                Document(
-                    page_content="使用isinstance()而不是type()进行类型检查，这样可以正确处理继承关系。例如：isinstance(obj, str) 而不是 type(obj) == str",
-                    metadata={"topic": "类型检查", "category": "最佳实践"}
-                ),
-                Document(
-                    page_content="函数应该遵循单一职责原则，每个函数只做一件事。复杂的函数应该拆分为多个小函数。",
-                    metadata={"topic": "函数设计", "category": "代码结构"}
-                ),
-                Document(
-                    page_content="使用异常处理时要捕获具体的异常类型，避免使用裸露的except语句。例如：except ValueError: 而不是 except:",
-                    metadata={"topic": "异常处理", "category": "最佳实践"}
-                ),
-                Document(
-                    page_content="使用生成器表达式处理大数据集可以节省内存。例如：sum(x*x for x in range(1000000))",
-                    metadata={"topic": "生成器", "category": "内存优化"}
-                ),
-                Document(
-                    page_content="类的命名应该使用帕斯卡命名法(PascalCase)，函数和变量使用蛇形命名法(snake_case)。",
-                    metadata={"topic": "命名规范", "category": "代码风格"}
-                )
-            ]
-            
-            # 创建向量存储
-            self.vector_store = FAISS.from_documents(documents, self.embeddings)
-            
-            # 保存向量数据库
-            os.makedirs(os.path.dirname(settings.vector_db_path), exist_ok=True)
-            self.vector_store.save_local(settings.vector_db_path)
-            
-        except Exception as e:
-            logger.error(f"创建知识库失败: {str(e)}")
-            raise
+    @property
+    def vector_store(self):
+        """共享的向量数据库"""
+        return self.registry.get_vector_store()
     
     def _run(self, query: str) -> str:
         """
@@ -133,11 +74,7 @@ class RAGTool(BaseTool):
             if not self.vector_store:
                 return "❌ 知识库未初始化"
             
-            # 执行相似度搜索
-            docs = self.vector_store.similarity_search(
-                query, 
-                k=3  # 返回最相关的3个结果
-            )
+            docs = self.retrieve(query)
             
             if not docs:
                 return "💡 未找到相关的最佳实践建议"
@@ -150,8 +87,215 @@ class RAGTool(BaseTool):
             return f"❌ 检索过程出错: {str(e)}"
     
     async def _arun(self, query: str) -> str:
-        """异步版本的运行方法"""
-        return self._run(query)
+        """
+        异步检索相关知识
+        
+        嵌入和FAISS搜索在嵌入线程池中执行，并与同时到达的其他查询合并为一批，不阻塞事件循环。
+        
+        Args:
+            query: 查询内容（代码片段或关键词）
+            
+        Returns:
+            相关的知识库内容
+        """
+        try:
+            docs = await self.aretrieve(query)
+            
+            if not self.registry.initialized:
+                return "❌ 知识库未初始化"
+            if not docs:
+                return "💡 未找到相关的最佳实践建议"
+            
+            return self._format_retrieval_results(docs)
+            
+        except ExecutorSaturatedError:
+            # 线程池饱和交给接口层返回429/503
+            raise
+        except Exception as e:
+            logger.error(f"知识库检索失败: {str(e)}")
+            return f"❌ 检索过程出错: {str(e)}"
+    
+    async def aretrieve(
+        self,
+        query: str,
+        k: int = 3,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> List[Document]:
+        """
+        异步检索相关文档（微批处理）
+        
+        Args:
+            query: 查询内容
+            k: 返回的文档数量
+            knowledge_filter: 元数据过滤条件（category/topic），为空时检索全部文档
+            
+        Returns:
+            相关文档列表，知识库未初始化时返回空列表
+        """
+        return await self.batcher.retrieve(query, k, knowledge_filter)
+    
+    def retrieve(
+        self,
+        query: str,
+        k: int = 3,
+        knowledge_filter: Optional[RetrievalFilter] = None
+    ) -> List[Document]:
+        """
+        检索相关文档（结构化结果）
+        
+        Args:
+            query: 查询内容
+            k: 返回的文档数量
+            knowledge_filter: 元数据过滤条件（category/topic），为空时检索全部文档
+            
+        Returns:
+            相关文档列表，知识库未初始化时返回空列表
+        """
+        return self.retrieve_many([query], k=k, filters=[knowledge_filter])[0]
+    
+    def retrieve_many(
+        self,
+        queries: List[str],
+        k: int = 3,
+        filters: Optional[List[Optional[RetrievalFilter]]] = None
+    ) -> List[List[Document]]:
+        """
+        批量检索相关文档，所有查询只调用一次 embed_documents 和一次FAISS搜索
+        
+        启用混合检索时，每个查询先做BM25词法检索：结果足够确定的查询直接返回，不再计算嵌入；
+        其余查询再做向量检索，两路排名按倒数排名融合（RRF）。
+        带过滤条件的查询只在选中的分类分区内做向量检索，BM25也只对满足条件的文档打分。
+        读取索引和文档存储时持有注册中心的读锁，计算嵌入时不持有，避免长时间阻塞知识库导入。
+        
+        Args:
+            queries: 查询内容列表
+            k: 每个查询返回的文档数量
+            filters: 与queries一一对应的过滤条件，为空时均不过滤
+            
+        Returns:
+            与queries一一对应的文档列表，知识库未初始化时均为空列表
+        """
+        vector_store = self.vector_store
+        if not vector_store or not queries:
+            return [[] for _ in queries]
+        
+        filters = list(filters) if filters else [None] * len(queries)
+        
+        if not settings.rag_hybrid_enabled:
+            vectors = self.embeddings.embed_documents(list(queries))
+            with self.registry.reading():
+                partitions = self.partitions.sync(vector_store, self._load_metadata) if any(filters) else None
+                return self._documents_at(
+                    vector_store, self._search_positions(vector_store, vectors, k, filters, partitions)
+                )
+        
+        depth = max(k, settings.rag_hybrid_candidates)
+        with self.registry.reading():
+            partitions = self.partitions.sync(vector_store, self._load_metadata) if any(filters) else None
+            bm25 = self.lexical.sync(vector_store, self._load_texts)
+            allowed = {
+                knowledge_filter: partitions.positions_for(knowledge_filter)
+                for knowledge_filter in set(filters) if knowledge_filter
+            }
+            lexical_hits = [
+                bm25.search(query, depth, allowed.get(knowledge_filter))
+                for query, knowledge_filter in zip(queries, filters)
+            ]
+        rankings: List[List[int]] = [[position for position, _ in hits] for hits in lexical_hits]
+        
+        pending = [
+            i for i, hits in enumerate(lexical_hits)
+            if not self.lexical.is_confident(
+                hits, settings.rag_lexical_shortcut_ratio, settings.rag_lexical_shortcut_min_score
+            )
+        ]
+        self.lexical.record(len(queries), len(queries) - len(pending))
+        
+        vectors = self.embeddings.embed_documents([queries[i] for i in pending]) if pending else []
+        with self.registry.reading():
+            if pending:
+                vector_rankings = self._search_positions(
+                    vector_store, vectors, depth, [filters[i] for i in pending], partitions
+                )
+                for i, vector_ranking in zip(pending, vector_rankings):
+                    rankings[i] = reciprocal_rank_fusion(
+                        [vector_ranking, rankings[i]],
+                        [settings.rag_vector_weight, settings.rag_bm25_weight],
+                        k=settings.rag_rrf_k
+                    )
+            return self._documents_at(vector_store, [ranking[:k] for ranking in rankings])
+    
+    @staticmethod
+    def _search_positions(
+        vector_store,
+        vectors: List[List[float]],
+        k: int,
+        filters: Optional[List[Optional[RetrievalFilter]]] = None,
+        partitions: Optional[PartitionedIndex] = None
+    ) -> List[List[int]]:
+        """
+        以二维查询矩阵调用一次FAISS搜索，返回每个查询按距离排列的向量位置
+        
+        不带过滤条件的查询一起搜索主索引，带过滤条件的查询按条件分组、只计算选中分区中向量的距离。
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if getattr(vector_store, "_normalize_L2", False):
+            import faiss
+            faiss.normalize_L2(matrix)
+        
+        filters = filters or [None] * len(matrix)
+        results: List[List[int]] = [[] for _ in range(len(matrix))]
+        groups: Dict[Optional[RetrievalFilter], List[int]] = {}
+        for i, knowledge_filter in enumerate(filters):
+            groups.setdefault(knowledge_filter or None, []).append(i)
+        
+        for knowledge_filter, rows in groups.items():
+            if knowledge_filter is None:
+                _, indices = vector_store.index.search(matrix[rows], k)
+                found = [[int(position) for position in row if position != -1] for row in indices]
+            else:
+                found = partitions.search(matrix[rows], k, knowledge_filter)
+            for i, positions in zip(rows, found):
+                results[i] = positions
+        return results
+    
+    @staticmethod
+    def _documents_at(vector_store, rows: List[List[int]]) -> List[List[Document]]:
+        """把每个查询的向量位置映射回文档"""
+        # SQLite文档存储按向量位置一次查出整批文档
+        get_by_positions = getattr(vector_store.docstore, "get_by_positions", None)
+        if get_by_positions is not None:
+            found = iter(get_by_positions([position for row in rows for position in row]))
+            results = []
+            for row in rows:
+                row_docs = [next(found) for _ in row]
+                results.append([doc for doc in row_docs if doc is not None])
+            return results
+        
+        results = []
+        for row in rows:
+            docs = []
+            for position in row:
+                doc = vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+                if isinstance(doc, Document):
+                    docs.append(doc)
+            results.append(docs)
+        return results
+    
+    @classmethod
+    def _load_texts(cls, vector_store, positions: List[int]) -> List[str]:
+        """读取建立BM25索引用的文本（主题 + 正文），缺失的文档为空文本"""
+        docs = cls._documents_at(vector_store, [[position] for position in positions])
+        return [
+            f"{row[0].metadata.get('topic', '')}\n{row[0].page_content}" if row else ""
+            for row in docs
+        ]
+    
+    @classmethod
+    def _load_metadata(cls, vector_store, positions: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """读取建立分区子索引用的文档元数据，缺失的文档为None"""
+        docs = cls._documents_at(vector_store, [[position] for position in positions])
+        return [row[0].metadata if row else None for row in docs]
     
     def _format_retrieval_results(self, docs: List[Document]) -> str:
         """
@@ -199,11 +343,8 @@ class RAGTool(BaseTool):
                 metadata={"topic": topic, "category": category}
             )
             
-            # 添加到向量存储
-            self.vector_store.add_documents([doc])
-            
-            # 保存更新
-            self.vector_store.save_local(settings.vector_db_path)
+            # 添加到共享向量存储并保存更新
+            self.registry.add_documents([doc])
             
             logger.info(f"已添加新知识: {topic}")
             return True
@@ -215,16 +356,25 @@ class RAGTool(BaseTool):
     def get_knowledge_stats(self) -> Dict[str, Any]:
         """获取知识库统计信息"""
         try:
-            if not self.vector_store:
+            vector_store = self.vector_store
+            if not vector_store:
                 return {"status": "未初始化", "count": 0}
             
-            # 获取向量数量（简化的统计）
-            index_size = self.vector_store.index.ntotal if hasattr(self.vector_store, 'index') else 0
+            with self.registry.reading():
+                # 获取向量数量（简化的统计）
+                index_size = vector_store.index.ntotal if hasattr(vector_store, 'index') else 0
+                index_description = describe_index(vector_store.index)
             
+            embedding_cache = get_embedding_cache()
             return {
                 "status": "可用",
                 "document_count": index_size,
-                "embedding_model": "all-MiniLM-L6-v2"
+                "embedding_model": EMBEDDING_MODEL_NAME.split("/")[-1],
+                "index": index_description,
+                "retrieval_batching": self.batcher.get_stats(),
+                "hybrid_retrieval": self.lexical.get_stats() if settings.rag_hybrid_enabled else None,
+                "partitions": self.partitions.get_stats(),
+                "embedding_cache": embedding_cache.get_stats() if embedding_cache is not None else None
             }
             
         except Exception as e:
@@ -232,6 +382,7 @@ class RAGTool(BaseTool):
             return {"status": "错误", "error": str(e)}
 
 
+@lru_cache()
 def get_rag_tool() -> RAGTool:
-    """获取RAG工具实例"""
+    """获取共享的RAG工具实例"""
     return RAGTool()
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+知识库检索微批处理
+负责人：组员B
+作用：把短时间内并发到达的异步检索请求合并成一批，在嵌入线程池中一次完成嵌入计算和FAISS搜索，
+      事件循环线程只负责排队和分发结果
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.settings import get_settings
+from backend.core.executors import EMBEDDING_POOL, get_executor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class RetrievalBatcher:
+    """
+    检索请求微批处理器
+
+    第一个请求到达后最多等待 max_wait_ms 毫秒收集后续请求，攒够 max_batch_size 个时立即发出；
+    每批只调用一次批量检索函数。带过滤条件的请求与其他请求合并在同一批中，过滤条件逐条传给批量检索函数。
+    """
+
+    def __init__(
+        self,
+        retrieve_many: Callable[[List[str], int], List[List[Any]]],
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        初始化微批处理器
+
+        Args:
+            retrieve_many: 批量检索函数，参数为 (查询列表, k)，批次中有过滤条件时追加与查询一一对应的过滤条件列表，
+                返回与查询一一对应的结果
+            max_batch_size: 单批最多合并的查询数，默认取配置
+            max_wait_ms: 收集同批查询的最长等待时间（毫秒），默认取配置
+        """
+        self.retrieve_many = retrieve_many
+        self.max_batch_size = max_batch_size or settings.rag_batch_max_size
+        self.max_wait = (max_wait_ms if max_wait_ms is not None else settings.rag_batch_wait_ms) / 1000
+
+        self._pending: List[Tuple[str, int, Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._batches = 0
+        self._queries = 0
+        self._max_batch = 0
+
+    async def retrieve(self, query: str, k: int = 3, knowledge_filter: Any = None) -> List[Any]:
+        """
+        提交检索请求并等待所在批次完成
+
+        Args:
+            query: 查询内容
+            k: 返回的文档数量
+            knowledge_filter: 元数据过滤条件，为空时不过滤
+
+        Returns:
+            相关文档列表
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 换了事件循环（如测试中多次asyncio.run），丢弃旧循环上的状态
+            self._pending = []
+            self._timer = None
+            self._loop = loop
+
+        future = loop.create_future()
+        self._pending.append((query, k, knowledge_filter, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """发出当前收集到的批次"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        batch = [item for item in batch if not item[3].cancelled()]
+        if batch:
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, int, Any, asyncio.Future]]):
+        """在嵌入线程池中执行一批检索并分发结果"""
+        self._batches += 1
+        self._queries += len(batch)
+        self._max_batch = max(self._max_batch, len(batch))
+
+        queries = [query for query, _, _, _ in batch]
+        k = max(item_k for _, item_k, _, _ in batch)
+        filters = [knowledge_filter for _, _, knowledge_filter, _ in batch]
+        args = (queries, k, filters) if any(filters) else (queries, k)
+        try:
+            results = await get_executor(EMBEDDING_POOL).run(self.retrieve_many, *args)
+        except Exception as e:
+            logger.error(f"批量检索失败: {str(e)}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, item_k, _, future), docs in zip(batch, results):
+            if not future.done():
+                future.set_result(docs[:item_k])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取微批处理统计"""
+        return {
+            "batches": self._batches,
+            "queries": self._queries,
+            "avg_batch_size": round(self._queries / self._batches, 2) if self._batches else 0.0,
+            "max_batch_size": self._max_batch
+        }
@@ -0,0 +1,244 @@
+"""
+SQLite文档存储
+负责人：组员B
+作用：替代pickle保存知识库文档和向量位置映射，按需从磁盘读取，
+      多个worker进程打开同一个数据库文件时共享操作系统页缓存，启动时无需反序列化全部文档
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import logging
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Set, Union
+
+from langchain.schema import Document
+from langchain_community.docstore.base import AddableMixin, Docstore
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    基于SQLite的LangChain文档存储
+
+    docs 表按ID保存文档正文和元数据，positions 表保存FAISS向量位置到文档ID的映射。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开（不存在时创建）文档数据库
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        # 写操作都在 with self._conn 中执行，一批记录一个事务
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS docs ("
+                "id TEXT PRIMARY KEY, page_content TEXT NOT NULL, metadata TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS positions (position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)"
+            )
+        self._lock = threading.Lock()
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        with self._lock:
+            overlapping = self._existing(list(texts))
+            if overlapping:
+                raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO docs (id, page_content, metadata) VALUES (?, ?, ?)",
+                    [
+                        (doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+                        for doc_id, doc in texts.items()
+                    ]
+                )
+
+    def delete(self, ids: List) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM docs WHERE id = ?", [(doc_id,) for doc_id in ids])
+
+    def search(self, search: str) -> Union[str, Document]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM docs WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(page_content=row[0], metadata=json.loads(row[1]))
+
+    def get_by_positions(self, positions: List[int]) -> List[Optional[Document]]:
+        """
+        按FAISS向量位置批量读取文档（一次查询）
+
+        Args:
+            positions: 向量位置列表
+
+        Returns:
+            与位置一一对应的文档，不存在的位置为None
+        """
+        if not positions:
+            return []
+        placeholders = ",".join("?" * len(positions))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.position, d.page_content, d.metadata FROM positions p "
+                f"JOIN docs d ON d.id = p.doc_id WHERE p.position IN ({placeholders})",
+                [int(position) for position in positions]
+            ).fetchall()
+        found = {row[0]: Document(page_content=row[1], metadata=json.loads(row[2])) for row in rows}
+        return [found.get(int(position)) for position in positions]
+
+    def existing(self, ids: List[str]) -> Set[str]:
+        """返回给定ID中已存在的部分"""
+        with self._lock:
+            return self._existing(ids)
+
+    def _existing(self, ids: List[str]) -> Set[str]:
+        found: Set[str] = set()
+        # SQLite单条语句的参数个数有上限，分段查询
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            placeholders = ",".join("?" * len(part))
+            found.update(
+                row[0] for row in self._conn.execute(f"SELECT id FROM docs WHERE id IN ({placeholders})", part)
+            )
+        return found
+
+    def positions_of(self, ids: List[str]) -> Dict[str, int]:
+        """返回给定ID中已有向量位置映射的部分及其位置"""
+        found: Dict[str, int] = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                part = ids[start:start + 500]
+                placeholders = ",".join("?" * len(part))
+                found.update(self._conn.execute(
+                    f"SELECT doc_id, position FROM positions WHERE doc_id IN ({placeholders})", part
+                ).fetchall())
+        return found
+
+    def truncate_positions(self, ntotal: int) -> int:
+        """
+        删除超出索引向量数的位置映射及其文档
+
+        追加文档时先写数据库再写增量日志，两步之间退出会留下没有向量的映射；
+        写入者持有文件锁、重放完增量日志后删除这些记录。
+
+        Args:
+            ntotal: 索引快照中的向量数
+
+        Returns:
+            删除的记录数
+        """
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "DELETE FROM docs WHERE id IN (SELECT doc_id FROM positions WHERE position >= ?)", (ntotal,)
+                )
+                removed = self._conn.execute("DELETE FROM positions WHERE position >= ?", (ntotal,)).rowcount
+        if removed:
+            logger.info(f"已删除 {removed} 条没有对应向量的文档映射")
+        return removed
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        """文档正文和元数据的总字节数"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(CAST(page_content AS BLOB)) + LENGTH(CAST(metadata AS BLOB))), 0) FROM docs"
+            ).fetchone()[0]
+
+    def index_mapping(self) -> "SQLiteIndexMapping":
+        """获取向量位置到文档ID的映射（作为FAISS的 index_to_docstore_id）"""
+        return SQLiteIndexMapping(self)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SQLiteIndexMapping(MutableMapping):
+    """存放在SQLite positions 表中的向量位置到文档ID映射"""
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self._docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        with self._docstore._lock:
+            row = self._docstore._conn.execute(
+                "SELECT doc_id FROM positions WHERE position = ?", (int(position),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __setitem__(self, position: int, doc_id: str):
+        self.update({position: doc_id})
+
+    def __delitem__(self, position: int):
+        with self._docstore._lock, self._docstore._conn:
+            deleted = self._docstore._conn.execute(
+                "DELETE FROM positions WHERE position = ?", (int(position),)
+            ).rowcount
+        if not deleted:
+            raise KeyError(position)
+
+    def __iter__(self) -> Iterator[int]:
+        with self._docstore._lock:
+            positions = [row[0] for row in self._docstore._conn.execute("SELECT position FROM positions ORDER BY position")]
+        return iter(positions)
+
+    def __len__(self) -> int:
+        # 位置从0开始连续编号，长度即下一个位置；每次查询数据库，其他进程追加的映射也能看到
+        with self._docstore._lock:
+            return self._docstore._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM positions"
+            ).fetchone()[0]
+
+    def update(self, mapping=(), **kwargs):
+        items = dict(mapping, **kwargs)
+        conn = self._docstore._conn
+        with self._docstore._lock:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO positions (position, doc_id) VALUES (?, ?)",
+                    [(int(position), doc_id) for position, doc_id in items.items()]
+                )
+
+    def values(self) -> List[str]:
+        with self._docstore._lock:
+            return [row[0] for row in self._docstore._conn.execute("SELECT doc_id FROM positions ORDER BY position")]
+
+
+def export_docstore(path: str, documents: Dict[str, Document], mapping: Dict[int, str]) -> SQLiteDocstore:
+    """
+    把内存中的文档和位置映射写入新的SQLite文档存储
+
+    Args:
+        path: 数据库文件路径（已存在时覆盖）
+        documents: 文档ID到文档的映射
+        mapping: 向量位置到文档ID的映射
+
+    Returns:
+        新的文档存储
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    docstore = SQLiteDocstore(path)
+    docstore.add(documents)
+    docstore.index_mapping().update(mapping)
+    return docstore
@@ -0,0 +1,761 @@
+"""
+向量存储注册中心
+负责人：组员B
+作用：在进程内共享嵌入模型和FAISS向量数据库，首次使用时线程安全地加载一次，
+      供RAGTool、代码审查服务和应用主类共同借用；
+      新增文档追加写入增量日志，累计到一定数量后才整体压缩为新的索引快照；
+      多个worker进程共享同一目录时，写入由文件锁串行化，其他进程按日志和快照追上最新状态
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+# 修复 LangChain 导入警告
+try:
+    from langchain_community.vectorstores import FAISS
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+except ImportError:
+    # 如果新版本导入失败，使用旧版本导入
+    from langchain.vectorstores import FAISS
+    from langchain.embeddings import HuggingFaceEmbeddings
+
+from langchain.schema import Document
+
+from config.settings import get_settings
+from backend.tools.embedding_cache import CachedEmbeddings, get_embedding_cache
+from backend.tools import ann_index
+from backend.tools.sqlite_docstore import SQLiteDocstore, export_docstore
+from backend.utils.file_lock import FileLock
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+# 初始化失败后，间隔多久允许再次尝试（秒）
+INIT_RETRY_INTERVAL = 60
+
+# 向量数据库目录下的文件：索引快照、SQLite文档存储、快照之后新增文档的追加日志
+INDEX_FILE_NAME = "index.faiss"
+DOCSTORE_FILE_NAME = "docstore.sqlite3"
+INGEST_LOG_NAME = "ingest.log"
+# 跨进程写入锁文件
+WRITE_LOCK_NAME = "ingest.lock"
+# 旧版LangChain pickle文档存储，下次压缩时转换为SQLite
+LEGACY_DOCSTORE_FILE_NAME = "index.pkl"
+
+
+def _initial_documents() -> List[Document]:
+    """基础Python最佳实践文档"""
+    return [
+        Document(
+            page_content="使用列表推导式代替传统循环可以提高代码性能和可读性。例如：[x*2 for x in range(10)] 比使用for循环更加Pythonic。",
+            metadata={"topic": "列表推导式", "category": "性能优化"}
+        ),
+        Document(
+            page_content="使用with语句进行文件操作可以确保文件正确关闭，避免资源泄漏。例如：with open('file.txt', 'r') as f: content = f.read()",
+            metadata={"topic": "文件操作", "category": "最佳实践"}
+        ),
+        Document(
+            page_content="避免在循环中使用字符串拼接，使用join()方法或f-string会更高效。例如：''.join(items) 或 f'{name}_{id}'",
+            metadata={"topic": "字符串操作", "category": "性能优化"}
+        ),
+        Document(
+            page_content="使用isinstance()而不是type()进行类型检查，这样可以正确处理继承关系。例如：isinstance(obj, str) 而不是 type(obj) == str",
+            metadata={"topic": "类型检查", "category": "最佳实践"}
+        ),
+        Document(
+            page_content="函数应该遵循单一职责原则，每个函数只做一件事。复杂的函数应该拆分为多个小函数。",
+            metadata={"topic": "函数设计", "category": "代码结构"}
+        ),
+        Document(
+            page_content="使用异常处理时要捕获具体的异常类型，避免使用裸露的except语句。例如：except ValueError: 而不是 except:",
+            metadata={"topic": "异常处理", "category": "最佳实践"}
+        ),
+        Document(
+            page_content="使用生成器表达式处理大数据集可以节省内存。例如：sum(x*x for x in range(1000000))",
+            metadata={"topic": "生成器", "category": "内存优化"}
+        ),
+        Document(
+            page_content="类的命名应该使用帕斯卡命名法(PascalCase)，函数和变量使用蛇形命名法(snake_case)。",
+            metadata={"topic": "命名规范", "category": "代码风格"}
+        )
+    ]
+
+
+class _ReadWriteLock:
+    """
+    写优先的读写锁
+
+    多个检索线程可以同时持有读锁；修改索引时独占写锁，等待写锁期间不再放入新的读者，避免写者饿死。
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._condition:
+            while self._writing or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class VectorStoreRegistry:
+    """
+    进程级向量存储注册中心
+
+    嵌入模型和向量数据库在第一次被访问时加载，之后所有调用方共享同一份实例。
+    self._lock 串行化所有修改操作；检索在 reading() 中进行，
+    原地修改索引或文档存储时持有写锁，与检索互斥。
+
+    多个进程共享同一目录时，索引快照和增量日志是唯一的事实来源：加载、追加、重建和压缩都持有跨进程文件锁，
+    持锁后先重放其他进程追加的日志（快照被其他进程压缩替换时重新打开），再做修改；
+    只读的进程每隔 knowledge_reload_interval 秒检查一次快照和日志，把其他进程的追加补进自己的索引。
+    """
+
+    def __init__(self, vector_db_path: Optional[str] = None, embeddings_factory=None):
+        """
+        初始化注册中心（不加载任何资源）
+
+        Args:
+            vector_db_path: 向量数据库目录，默认取配置
+            embeddings_factory: 创建嵌入模型的函数，默认加载HuggingFace模型并包装嵌入缓存
+        """
+        self.vector_db_path = vector_db_path or settings.vector_db_path
+        self.embeddings_factory = embeddings_factory or _default_embeddings
+        self._lock = threading.RLock()
+        self._rw_lock = _ReadWriteLock()
+        self._file_lock = FileLock(os.path.join(self.vector_db_path, WRITE_LOCK_NAME))
+        self._embeddings = None
+        self._vector_store = None
+        self._initialized = False
+        self._last_attempt = 0.0
+        self._load_time: Optional[float] = None
+        self._init_error: Optional[str] = None
+        self._log_records = 0
+        self._compactions = 0
+        self._index_mmapped = False
+        # 内存中的索引对应的快照文件，以及已经重放到的增量日志位置
+        self._snapshot_stamp: Optional[Tuple[int, int, int]] = None
+        self._log_inode: Optional[int] = None
+        self._log_offset = 0
+        self._last_refresh = 0.0
+
+    @property
+    def initialized(self) -> bool:
+        return self._initialized
+
+    def get_embeddings(self):
+        """获取共享的嵌入模型"""
+        self._ensure_initialized()
+        return self._embeddings
+
+    def get_vector_store(self):
+        """获取共享的向量数据库（按间隔追上其他进程的写入）"""
+        self._ensure_initialized()
+        self._maybe_refresh()
+        return self._vector_store
+
+    def reading(self):
+        """
+        检索时持有的共享读锁
+
+        在其中读取 index、docstore 和 index_to_docstore_id，
+        追加文档、压缩等修改操作会等待所有读者退出后再进行。
+        """
+        return self._rw_lock.read()
+
+    def add_documents(self, documents: List[Document]):
+        """
+        向共享向量数据库追加文档并持久化
+
+        Args:
+            documents: 待添加的文档列表
+        """
+        embeddings = self.get_embeddings()
+        if embeddings is None:
+            raise RuntimeError("向量存储未初始化")
+        vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+        self.append_embedded(documents, vectors)
+
+    def existing_ids(self) -> Set[str]:
+        """获取向量数据库中已有的文档ID"""
+        store = self.get_vector_store()
+        if store is None:
+            return set()
+        with self._lock:
+            return set(store.index_to_docstore_id.values())
+
+    def append_embedded(
+        self,
+        documents: List[Document],
+        vectors: List[List[float]],
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        追加已完成嵌入的文档
+
+        文档加入内存索引后写入追加日志，不重写整个索引文件；
+        日志累计超过 knowledge_compact_threshold 条时自动压缩。
+
+        Args:
+            documents: 待添加的文档列表
+            vectors: 与文档一一对应的嵌入向量
+            ids: 文档ID，默认随机生成；已存在的ID会被跳过
+
+        Returns:
+            实际新增的文档数
+        """
+        self._ensure_initialized()
+        ids = list(ids) if ids is not None else [uuid.uuid4().hex for _ in documents]
+
+        with self._exclusive():
+            if self._vector_store is None:
+                raise RuntimeError("向量存储未初始化")
+
+            existing = self._known_ids(ids)
+            records = []
+            for doc, vector, doc_id in zip(documents, vectors, ids):
+                if doc_id in existing:
+                    continue
+                existing.add(doc_id)
+                records.append((doc_id, doc, np.asarray(vector, dtype=np.float32)))
+            if not records:
+                return 0
+
+            with self._rw_lock.write():
+                self._ensure_writable()
+                self._vector_store.add_embeddings(
+                    [(doc.page_content, vector.tolist()) for _, doc, vector in records],
+                    metadatas=[doc.metadata for _, doc, _ in records],
+                    ids=[doc_id for doc_id, _, _ in records]
+                )
+            self._append_log(records)
+
+            if self._log_records >= settings.knowledge_compact_threshold:
+                self.compact()
+            return len(records)
+
+    def needs_rebuild(self) -> bool:
+        """当前索引类型或IVF聚类中心数是否与配置/数据量不符"""
+        store = self.get_vector_store()
+        return store is not None and ann_index.needs_rebuild(store.index)
+
+    def rebuild_index(self, index_type: Optional[str] = None):
+        """
+        按配置的索引类型重建并训练索引
+
+        向量按原顺序重新加入，docstore映射保持不变；向量过少无法训练IVF时回退为flat。
+        新索引在旁边构建（期间检索照常使用旧索引），完成后在写锁内替换。
+
+        Args:
+            index_type: 索引类型，默认取配置
+        """
+        self._ensure_initialized()
+        with self._exclusive():
+            if self._vector_store is None:
+                raise RuntimeError("向量存储未初始化")
+
+            old_index = self._vector_store.index
+            start_time = time.perf_counter()
+            new_index = ann_index.build_index(
+                ann_index.reconstruct_all(old_index),
+                index_type or settings.rag_index_type,
+                metric=old_index.metric_type
+            )
+            with self._rw_lock.write():
+                self._vector_store.index = new_index
+                self._index_mmapped = False
+            logger.info(
+                f"索引已重建为 {ann_index.index_type_of(new_index)}，"
+                f"共 {old_index.ntotal} 条向量，耗时: {time.perf_counter() - start_time:.2f}秒"
+            )
+
+    def compact(self):
+        """将当前索引整体保存为新的快照并清空追加日志，索引类型与配置不符时先重建"""
+        self._ensure_initialized()
+        with self._exclusive():
+            if self._vector_store is None:
+                raise RuntimeError("向量存储未初始化")
+
+            if ann_index.needs_rebuild(self._vector_store.index):
+                self.rebuild_index()
+
+            with self._rw_lock.write():
+                self._ensure_writable()
+                self._write_snapshot()
+
+            # 以新文件替换日志，其他进程据此知道旧日志的读取位置已失效
+            open(f"{self._log_path}.tmp", "w").close()
+            os.replace(f"{self._log_path}.tmp", self._log_path)
+            self._log_inode = _file_stamp(self._log_path)[0]
+            self._log_offset = 0
+            self._log_records = 0
+            self._compactions += 1
+            logger.info(f"向量数据库压缩完成，共 {self._vector_store.index.ntotal} 条向量")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.vector_db_path, INGEST_LOG_NAME)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.vector_db_path, name)
+
+    def _known_ids(self, ids: List[str]) -> Set[str]:
+        """给定ID中已在文档存储中的部分（调用方持有锁）"""
+        docstore = self._vector_store.docstore
+        if isinstance(docstore, SQLiteDocstore):
+            return docstore.existing(list(ids))
+        return {doc_id for doc_id in ids if doc_id in docstore._dict}
+
+    def _indexed_positions(self, ids: List[str]) -> Dict[str, int]:
+        """给定ID在文档存储中的向量位置（调用方持有锁）"""
+        docstore = self._vector_store.docstore
+        if isinstance(docstore, SQLiteDocstore):
+            return docstore.positions_of(list(ids))
+        wanted = set(ids)
+        return {
+            doc_id: position for position, doc_id in self._vector_store.index_to_docstore_id.items()
+            if doc_id in wanted
+        }
+
+    def _read_snapshot_index(self):
+        """读取索引快照，记录快照文件标识（调用方持有锁）"""
+        self._snapshot_stamp = _file_stamp(self._path(INDEX_FILE_NAME))
+        index = ann_index.read_index(self._path(INDEX_FILE_NAME), mmap=settings.rag_ivf_index_mmap)
+        self._index_mmapped = settings.rag_ivf_index_mmap and ann_index.supports_mmap(index)
+        if settings.rag_ivf_index_mmap and not self._index_mmapped:
+            logger.warning(
+                f"{ann_index.index_type_of(index)} 索引不支持内存映射（仅IVF类索引可以映射），"
+                f"已读入进程内存，每个worker各占一份"
+            )
+        return index
+
+    def _open_snapshot(self):
+        """打开索引快照和SQLite文档存储（调用方持有锁），快照之后追加的文档由增量日志重放"""
+        index = self._read_snapshot_index()
+        docstore = SQLiteDocstore(self._path(DOCSTORE_FILE_NAME))
+        return FAISS(self._embeddings, index, docstore, docstore.index_mapping())
+
+    def _write_snapshot(self):
+        """
+        写入索引快照（调用方持有锁）
+
+        文档存储还在内存中（新建或旧版pickle格式）时先导出为SQLite，再写索引；
+        两步之间退出时，加载到的是旧索引加新文档存储，多出的文档映射会被截断并由日志重放。
+        """
+        store = self._vector_store
+        if not isinstance(store.docstore, SQLiteDocstore):
+            docstore_path = self._path(DOCSTORE_FILE_NAME)
+            export_docstore(
+                f"{docstore_path}.tmp", store.docstore._dict, dict(store.index_to_docstore_id)
+            ).close()
+            os.replace(f"{docstore_path}.tmp", docstore_path)
+            docstore = SQLiteDocstore(docstore_path)
+            store.docstore = docstore
+            store.index_to_docstore_id = docstore.index_mapping()
+
+        ann_index.write_index(store.index, self._path(INDEX_FILE_NAME))
+        self._snapshot_stamp = _file_stamp(self._path(INDEX_FILE_NAME))
+        if os.path.exists(self._path(LEGACY_DOCSTORE_FILE_NAME)):
+            os.remove(self._path(LEGACY_DOCSTORE_FILE_NAME))
+
+    def _ensure_writable(self):
+        """内存映射的只读索引在追加前复制到进程内存（调用方持有锁和写锁）"""
+        if self._index_mmapped:
+            ann_index.detach_index(self._vector_store.index)
+            self._index_mmapped = False
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """
+        独占写入：进程内持有 _lock，跨进程持有文件锁
+
+        最外层进入时先追上其他进程的写入，之后内存中的索引、文档存储和日志三者一致，可以安全追加。
+        """
+        with self._lock:
+            outermost = self._file_lock.depth == 0
+            self._file_lock.acquire()
+            try:
+                if outermost and self._vector_store is not None:
+                    self._catch_up(exclusive=True)
+                yield
+            finally:
+                self._file_lock.release()
+
+    def _maybe_refresh(self):
+        """每隔 knowledge_reload_interval 秒追上一次其他进程的写入（不持有文件锁，只补充已完整写入的记录）"""
+        interval = settings.knowledge_reload_interval
+        if not interval or self._vector_store is None or time.monotonic() - self._last_refresh < interval:
+            return
+        # 本进程正在写入时跳过，写入前已经追上
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._last_refresh = time.monotonic()
+            if self._vector_store is not None:
+                self._catch_up(exclusive=False)
+        except Exception as e:
+            logger.warning(f"同步其他进程的知识库写入失败: {str(e)}")
+        finally:
+            self._lock.release()
+
+    def _catch_up(self, exclusive: bool):
+        """快照被其他进程压缩替换时重新打开，再重放新增的日志记录（调用方持有锁）"""
+        stamp = _file_stamp(self._path(INDEX_FILE_NAME))
+        if stamp is not None and stamp != self._snapshot_stamp:
+            self._reload_snapshot()
+        self._replay_log(exclusive)
+
+    def _reload_snapshot(self):
+        """重新打开其他进程压缩后的快照（向量位置不变，文档存储为SQLite时只替换索引）"""
+        store = self._vector_store
+        if isinstance(store.docstore, SQLiteDocstore):
+            index = self._read_snapshot_index()
+            with self._rw_lock.write():
+                store.index = index
+        else:
+            new_store = self._open_snapshot()
+            with self._rw_lock.write():
+                self._vector_store = new_store
+        self._log_inode = None
+        self._log_offset = 0
+        self._log_records = 0
+        logger.info("检测到其他进程压缩后的索引快照，已重新加载")
+
+    def _append_log(self, records: List[Tuple[str, Document, np.ndarray]]):
+        """追加写入增量日志（调用方持有锁和文件锁）"""
+        os.makedirs(self.vector_db_path, exist_ok=True)
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            for doc_id, doc, vector in records:
+                f.write(json.dumps({
+                    "id": doc_id,
+                    "page_content": doc.page_content,
+                    "metadata": doc.metadata,
+                    "vector": base64.b64encode(vector.tobytes()).decode("ascii")
+                }, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_inode, _, self._log_offset = _file_stamp(self._log_path)
+        self._log_records += len(records)
+
+    def _read_log(self, exclusive: bool) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        """
+        读取上次重放位置之后完整写入的日志记录（调用方持有锁）
+
+        Returns:
+            ([(记录结束处的文件偏移, 记录)], 已读完的文件偏移（含跳过的损坏记录）)
+        """
+        stamp = _file_stamp(self._log_path)
+        if stamp is None:
+            self._log_inode, self._log_offset = None, 0
+            return [], 0
+        inode, _, size = stamp
+        if inode != self._log_inode or size < self._log_offset:
+            # 日志被压缩替换，从头读取
+            self._log_inode, self._log_offset, self._log_records = inode, 0, 0
+
+        with open(self._log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+
+        entries = []
+        offset = self._log_offset
+        for line in data.split(b"\n")[:-1]:
+            offset += len(line) + 1
+            try:
+                entries.append((offset, json.loads(line)))
+            except ValueError:
+                logger.warning("跳过损坏的增量日志记录")
+        if exclusive and not data.endswith(b"\n") and data:
+            # 上次写入途中退出留下的半行：补上换行使之后追加的记录另起一行，这一行按损坏记录跳过
+            with open(self._log_path, "ab") as f:
+                f.write(b"\n")
+            logger.warning("跳过损坏的增量日志记录")
+            offset = self._log_offset + len(data) + 1
+        return entries, offset
+
+    def _replay_log(self, exclusive: bool = True):
+        """
+        把快照之后追加、尚未进入内存索引的文档加入索引（调用方持有锁）
+
+        其他进程追加的文档已写入共享的文档存储，位置紧接当前索引末尾时只补充向量；
+        持有文件锁时，文档映射不完整的记录（写入途中退出）先截断超出索引的映射，再整体重新加入。
+        不持有文件锁时遇到这类记录就停下，留给下一个写入者处理。
+        """
+        entries, tail = self._read_log(exclusive)
+        store = self._vector_store
+        positions = self._indexed_positions([record["id"] for _, record in entries])
+        next_position = store.index.ntotal
+        vectors, pending = [], []
+        consumed = self._log_offset
+        for end, record in entries:
+            position = positions.get(record["id"])
+            if position is not None and position < next_position:
+                pass
+            elif position == next_position and not pending:
+                vectors.append(_decode_vector(record["vector"]))
+                next_position += 1
+            elif exclusive:
+                pending.append(record)
+            else:
+                break
+            consumed = end
+            self._log_records += 1
+        else:
+            consumed = tail
+        self._log_offset = consumed
+        if vectors or exclusive:
+            with self._rw_lock.write():
+                if vectors:
+                    self._ensure_writable()
+                    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+                    if getattr(store, "_normalize_L2", False):
+                        import faiss
+                        faiss.normalize_L2(matrix)
+                    store.index.add(matrix)
+                if exclusive and isinstance(store.docstore, SQLiteDocstore):
+                    # 超出索引的映射来自写入途中退出的进程，没有对应向量
+                    store.docstore.truncate_positions(store.index.ntotal)
+                if pending:
+                    existing = self._known_ids([record["id"] for record in pending])
+                    entries = []
+                    for record in pending:
+                        if record["id"] not in existing:
+                            existing.add(record["id"])
+                            entries.append(record)
+                    if entries:
+                        self._ensure_writable()
+                        store.add_embeddings(
+                            [(record["page_content"], _decode_vector(record["vector"]).tolist()) for record in entries],
+                            metadatas=[record["metadata"] for record in entries],
+                            ids=[record["id"] for record in entries]
+                        )
+        if vectors or pending:
+            logger.info(f"已重放增量日志，恢复 {len(vectors) + len(pending)} 条文档")
+
+    def reset(self):
+        """释放共享实例，下次访问时重新加载"""
+        with self._lock:
+            self._embeddings = None
+            self._vector_store = None
+            self._initialized = False
+            self._last_attempt = 0.0
+            self._init_error = None
+            self._snapshot_stamp = None
+            self._log_inode = None
+            self._log_offset = 0
+
+    def _ensure_initialized(self):
+        """双重检查加锁，保证只初始化一次"""
+        if self._initialized:
+            return
+
+        with self._lock:
+            if self._initialized:
+                return
+            if self._init_error and time.time() - self._last_attempt < INIT_RETRY_INTERVAL:
+                return
+            self._load()
+
+    def _load(self):
+        """加载嵌入模型和向量数据库"""
+        self._last_attempt = time.time()
+        start_time = time.perf_counter()
+
+        try:
+            # 初始化嵌入模型
+            self._embeddings = self.embeddings_factory()
+
+            # 持有文件锁加载，避免与其他进程的追加或首次创建交错
+            with self._exclusive():
+                # 尝试加载现有的向量数据库
+                if not os.path.exists(self._path(INDEX_FILE_NAME)):
+                    # 创建新的向量数据库
+                    self._vector_store = FAISS.from_documents(_initial_documents(), self._embeddings)
+                    os.makedirs(self.vector_db_path, exist_ok=True)
+                    self._write_snapshot()
+                    logger.info("已创建新的向量数据库")
+                elif os.path.exists(self._path(DOCSTORE_FILE_NAME)):
+                    self._vector_store = self._open_snapshot()
+                    logger.info(f"已加载现有向量数据库（内存映射: {self._index_mmapped}）")
+                else:
+                    self._snapshot_stamp = _file_stamp(self._path(INDEX_FILE_NAME))
+                    self._vector_store = _load_faiss(self.vector_db_path, self._embeddings)
+                    logger.info("已加载现有向量数据库（旧版pickle文档存储，下次压缩时转换为SQLite）")
+
+                self._log_inode, self._log_offset, self._log_records = None, 0, 0
+                self._replay_log()
+            ann_index.configure_search(self._vector_store.index)
+            self._last_refresh = time.monotonic()
+
+            self._initialized = True
+            self._init_error = None
+            self._load_time = time.perf_counter() - start_time
+            logger.info(f"向量存储注册中心初始化完成，耗时: {self._load_time:.2f}秒")
+
+        except Exception as e:
+            logger.error(f"RAG系统初始化失败: {str(e)}")
+            self._init_error = str(e)
+            self._vector_store = None
+
+    def get_memory_footprint(self) -> Dict[str, Any]:
+        """
+        估算共享资源的内存占用（不会触发加载）
+
+        Returns:
+            内存占用统计
+        """
+        footprint: Dict[str, Any] = {
+            "initialized": self._initialized,
+            "load_time": round(self._load_time, 3) if self._load_time else None,
+            "error": self._init_error,
+            "embedding_model": EMBEDDING_MODEL_NAME,
+            "embedding_model_bytes": 0,
+            "index_vectors": 0,
+            "index_bytes": 0,
+            "docstore_documents": 0,
+            "docstore_bytes": 0,
+            "log_records": self._log_records,
+            "compactions": self._compactions,
+            "process_rss_bytes": _process_rss_bytes()
+        }
+
+        if self._embeddings is not None:
+            footprint["embedding_model_bytes"] = _model_bytes(self._embeddings)
+
+        store = self._vector_store
+        if store is not None:
+            with self._rw_lock.read():
+                index = getattr(store, "index", None)
+                if index is not None:
+                    code_size = getattr(index, "code_size", index.d * 4)
+                    footprint["index_type"] = ann_index.index_type_of(index)
+                    footprint["index_mmap"] = self._index_mmapped
+                    footprint["index_mmap_supported"] = ann_index.supports_mmap(index)
+                    footprint["index_vectors"] = index.ntotal
+                    footprint["index_bytes"] = index.ntotal * code_size
+
+            docstore = getattr(store, "docstore", None)
+            if isinstance(docstore, SQLiteDocstore):
+                footprint["docstore_documents"] = docstore.count()
+                footprint["docstore_bytes"] = docstore.total_bytes()
+            else:
+                documents = getattr(docstore, "_dict", {})
+                footprint["docstore_documents"] = len(documents)
+                footprint["docstore_bytes"] = sum(
+                    len(doc.page_content.encode("utf-8"))
+                    + len(json.dumps(doc.metadata, ensure_ascii=False).encode("utf-8"))
+                    for doc in documents.values()
+                )
+
+        footprint["total_bytes"] = (
+            footprint["embedding_model_bytes"]
+            + footprint["index_bytes"]
+            + footprint["docstore_bytes"]
+        )
+        return footprint
+
+
+def _file_stamp(path: str) -> Optional[Tuple[int, int, int]]:
+    """文件标识 (inode, 修改时间, 大小)，文件不存在时为None"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def _decode_vector(encoded: str) -> np.ndarray:
+    """解码增量日志中的向量"""
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def _load_faiss(path: str, embeddings):
+    """加载本地FAISS索引（requirements固定的langchain-community 0.0.10不接受反序列化开关参数）"""
+    try:
+        return FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+    except TypeError:
+        return FAISS.load_local(path, embeddings)
+
+
+def _default_embeddings():
+    """加载HuggingFace嵌入模型，重复的查询和知识文档直接取缓存向量，不再经过模型计算"""
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        model_kwargs={'device': 'cpu'}
+    )
+    cache = get_embedding_cache()
+    return CachedEmbeddings(embeddings, EMBEDDING_MODEL_NAME, cache) if cache is not None else embeddings
+
+
+def _model_bytes(embeddings) -> int:
+    """统计嵌入模型参数占用的字节数"""
+    client = getattr(embeddings, "client", None)
+    if client is None or not hasattr(client, "parameters"):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in client.parameters())
+    except Exception:
+        return 0
+
+
+def _process_rss_bytes() -> Optional[int]:
+    """读取当前进程常驻内存（仅Linux）"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+_registry_instance: Optional[VectorStoreRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_vector_registry() -> VectorStoreRegistry:
+    """获取全局向量存储注册中心（单例模式）"""
+    global _registry_instance
+    if _registry_instance is None:
+        with _registry_lock:
+            if _registry_instance is None:
+                _registry_instance = VectorStoreRegistry()
+    return _registry_instance
@@ -7,7 +7,7 @@
 from .text_processor import TextProcessor
 from .code_analyzer import CodeAnalyzer
 from .validation import validate_code_input, validate_language
-from .formatters import format_analysis_result, format_error_response
+from .formatters import format_analysis_result, format_error_response, format_sse_event
 
 __all__ = [
     "TextProcessor",
@@ -15,5 +15,6 @@ __all__ = [
     "validate_code_input",
     "validate_language",
     "format_analysis_result",
-    "format_error_response"
+    "format_error_response",
+    "format_sse_event"
 ]
\ No newline at end of file
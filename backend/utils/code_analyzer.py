@@ -1,16 +1,182 @@
 """
 代码分析工具
 负责人：组员C
-作用：提供代码结构分析和语法检查功能
+作用：提供代码结构分析和语法检查功能；一次解析、一次遍历即可得到函数、类、导入、复杂度和语法错误，
+      以及可在多个线程中同时调用的源码解析函数
 """
 
 import ast
 import keyword
 import logging
+import threading
+from collections import deque
 from typing import Dict, List, Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# CPython 3.11 构造AST节点时使用解释器全局的递归深度计数，两个线程同时解析
+# （如线程池中的flake8检查与事件循环上构造检索查询）会误报
+# "AST constructor recursion depth mismatch"，因此所有解析经由此锁串行执行
+_parse_lock = threading.Lock()
+
+
+def parse_source(code: str, filename: str = "<unknown>") -> ast.Module:
+    """
+    把源码解析为AST，可在多个线程中同时调用
+
+    Args:
+        code: Python代码
+        filename: 语法错误信息中显示的文件名
+
+    Returns:
+        AST模块节点
+
+    Raises:
+        SyntaxError: 代码存在语法错误
+    """
+    with _parse_lock:
+        return ast.parse(code, filename)
+
+
+class CodeAnalysis:
+    """
+    单次解析的代码分析结果
+
+    使用 __slots__ 保持对象紧凑，大批量分析时避免为每个结果分配实例字典。
+    """
+
+    __slots__ = (
+        "tree",
+        "functions",
+        "classes",
+        "imports",
+        "complexity",
+        "syntax_errors",
+        "error"
+    )
+
+    def __init__(self):
+        self.tree: Optional[ast.AST] = None
+        self.functions: List[Dict[str, Any]] = []
+        self.classes: List[Dict[str, Any]] = []
+        self.imports: List[Dict[str, Any]] = []
+        self.complexity: Dict[str, int] = {
+            "functions": 0,
+            "classes": 0,
+            "if_statements": 0,
+            "loops": 0,
+            "try_except": 0
+        }
+        self.syntax_errors: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    @property
+    def is_valid(self) -> bool:
+        """代码是否成功解析"""
+        return self.tree is not None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（不包含AST）"""
+        return {
+            "functions": self.functions,
+            "classes": self.classes,
+            "imports": self.imports,
+            "complexity": self.complexity,
+            "syntax_errors": self.syntax_errors
+        }
+
+
+class _AnalysisWalker:
+    """
+    单遍遍历器
+
+    按 ast.walk 的广度优先顺序只遍历一次语法树，根据节点类型分派处理函数，
+    因此各列表的顺序与逐项调用 ast.walk 时完全一致。
+    """
+
+    def __init__(self, analysis: CodeAnalysis):
+        self.analysis = analysis
+        self._handlers = {
+            ast.FunctionDef: self._visit_function,
+            ast.AsyncFunctionDef: self._visit_async_function,
+            ast.ClassDef: self._visit_class,
+            ast.Import: self._visit_import,
+            ast.ImportFrom: self._visit_import_from,
+            ast.If: self._visit_if,
+            ast.For: self._visit_loop,
+            ast.While: self._visit_loop,
+            ast.Try: self._visit_try,
+        }
+
+    def walk(self, tree: ast.AST):
+        handlers = self._handlers
+        pending = deque([tree])
+        while pending:
+            node = pending.popleft()
+            pending.extend(ast.iter_child_nodes(node))
+            handler = handlers.get(type(node))
+            if handler is not None:
+                handler(node)
+
+    def _visit_function(self, node: ast.FunctionDef):
+        self.analysis.complexity["functions"] += 1
+        self.analysis.functions.append(self._function_info(node, is_async=False))
+
+    def _visit_async_function(self, node: ast.AsyncFunctionDef):
+        self.analysis.functions.append(self._function_info(node, is_async=True))
+
+    @staticmethod
+    def _function_info(node, is_async: bool) -> Dict[str, Any]:
+        return {
+            "name": node.name,
+            "line_number": node.lineno,
+            "args": [arg.arg for arg in node.args.args],
+            "has_docstring": ast.get_docstring(node) is not None,
+            "is_async": is_async
+        }
+
+    def _visit_class(self, node: ast.ClassDef):
+        self.analysis.complexity["classes"] += 1
+        self.analysis.classes.append({
+            "name": node.name,
+            "line_number": node.lineno,
+            "methods": [
+                item.name for item in node.body
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))
+            ],
+            "has_docstring": ast.get_docstring(node) is not None,
+            "base_classes": [base.id if isinstance(base, ast.Name) else str(base)
+                             for base in node.bases]
+        })
+
+    def _visit_import(self, node: ast.Import):
+        for alias in node.names:
+            self.analysis.imports.append({
+                "type": "import",
+                "module": alias.name,
+                "alias": alias.asname,
+                "line_number": node.lineno
+            })
+
+    def _visit_import_from(self, node: ast.ImportFrom):
+        for alias in node.names:
+            self.analysis.imports.append({
+                "type": "from_import",
+                "module": node.module,
+                "name": alias.name,
+                "alias": alias.asname,
+                "line_number": node.lineno
+            })
+
+    def _visit_if(self, node: ast.If):
+        self.analysis.complexity["if_statements"] += 1
+
+    def _visit_loop(self, node):
+        self.analysis.complexity["loops"] += 1
+
+    def _visit_try(self, node: ast.Try):
+        self.analysis.complexity["try_except"] += 1
+
 
 class CodeAnalyzer:
     """代码分析工具类"""
@@ -27,7 +193,7 @@ class CodeAnalyzer:
             AST对象或None（如果解析失败）
         """
         try:
-            return ast.parse(code)
+            return parse_source(code)
         except SyntaxError as e:
             logger.warning(f"代码语法错误: {str(e)}")
             return None
@@ -36,45 +202,59 @@ class CodeAnalyzer:
             return None
     
     @staticmethod
-    def extract_functions(code: str) -> List[Dict[str, Any]]:
+    def analyze(code: str) -> CodeAnalysis:
         """
-        提取代码中的函数定义
+        一次解析、一次遍历完成全部结构分析
         
         Args:
             code: Python代码
             
         Returns:
-            函数信息列表
+            CodeAnalysis对象；解析失败时 syntax_errors 非空且 tree 为 None
         """
-        functions = []
+        analysis = CodeAnalysis()
         
         try:
-            tree = ast.parse(code)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    func_info = {
-                        "name": node.name,
-                        "line_number": node.lineno,
-                        "args": [arg.arg for arg in node.args.args],
-                        "has_docstring": ast.get_docstring(node) is not None,
-                        "is_async": False
-                    }
-                    functions.append(func_info)
-                elif isinstance(node, ast.AsyncFunctionDef):
-                    func_info = {
-                        "name": node.name,
-                        "line_number": node.lineno,
-                        "args": [arg.arg for arg in node.args.args],
-                        "has_docstring": ast.get_docstring(node) is not None,
-                        "is_async": True
-                    }
-                    functions.append(func_info)
-                    
+            analysis.tree = parse_source(code)
+        except SyntaxError as e:
+            analysis.error = str(e)
+            analysis.syntax_errors.append({
+                "type": "SyntaxError",
+                "message": str(e.msg),
+                "line_number": e.lineno,
+                "column": e.offset,
+                "text": e.text.strip() if e.text else ""
+            })
+            return analysis
         except Exception as e:
-            logger.error(f"提取函数失败: {str(e)}")
+            analysis.error = str(e)
+            analysis.syntax_errors.append({
+                "type": "ParseError",
+                "message": str(e),
+                "line_number": None,
+                "column": None,
+                "text": ""
+            })
+            return analysis
         
-        return functions
+        _AnalysisWalker(analysis).walk(analysis.tree)
+        return analysis
+    
+    @staticmethod
+    def extract_functions(code: str) -> List[Dict[str, Any]]:
+        """
+        提取代码中的函数定义
+        
+        Args:
+            code: Python代码
+            
+        Returns:
+            函数信息列表
+        """
+        analysis = CodeAnalyzer.analyze(code)
+        if not analysis.is_valid:
+            logger.error(f"提取函数失败: {analysis.error}")
+        return analysis.functions
     
     @staticmethod
     def extract_classes(code: str) -> List[Dict[str, Any]]:
@@ -87,32 +267,10 @@ class CodeAnalyzer:
         Returns:
             类信息列表
         """
-        classes = []
-        
-        try:
-            tree = ast.parse(code)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.ClassDef):
-                    methods = []
-                    for item in node.body:
-                        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                            methods.append(item.name)
-                    
-                    class_info = {
-                        "name": node.name,
-                        "line_number": node.lineno,
-                        "methods": methods,
-                        "has_docstring": ast.get_docstring(node) is not None,
-                        "base_classes": [base.id if isinstance(base, ast.Name) else str(base) 
-                                       for base in node.bases]
-                    }
-                    classes.append(class_info)
-                    
-        except Exception as e:
-            logger.error(f"提取类失败: {str(e)}")
-        
-        return classes
+        analysis = CodeAnalyzer.analyze(code)
+        if not analysis.is_valid:
+            logger.error(f"提取类失败: {analysis.error}")
+        return analysis.classes
     
     @staticmethod
     def extract_imports(code: str) -> List[Dict[str, Any]]:
@@ -125,34 +283,10 @@ class CodeAnalyzer:
         Returns:
             导入信息列表
         """
-        imports = []
-        
-        try:
-            tree = ast.parse(code)
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        imports.append({
-                            "type": "import",
-                            "module": alias.name,
-                            "alias": alias.asname,
-                            "line_number": node.lineno
-                        })
-                elif isinstance(node, ast.ImportFrom):
-                    for alias in node.names:
-                        imports.append({
-                            "type": "from_import",
-                            "module": node.module,
-                            "name": alias.name,
-                            "alias": alias.asname,
-                            "line_number": node.lineno
-                        })
-                        
-        except Exception as e:
-            logger.error(f"提取导入失败: {str(e)}")
-        
-        return imports
+        analysis = CodeAnalyzer.analyze(code)
+        if not analysis.is_valid:
+            logger.error(f"提取导入失败: {analysis.error}")
+        return analysis.imports
     
     @staticmethod
     def check_syntax_errors(code: str) -> List[Dict[str, Any]]:
@@ -165,28 +299,7 @@ class CodeAnalyzer:
         Returns:
             语法错误列表
         """
-        errors = []
-        
-        try:
-            ast.parse(code)
-        except SyntaxError as e:
-            errors.append({
-                "type": "SyntaxError",
-                "message": str(e.msg),
-                "line_number": e.lineno,
-                "column": e.offset,
-                "text": e.text.strip() if e.text else ""
-            })
-        except Exception as e:
-            errors.append({
-                "type": "ParseError",
-                "message": str(e),
-                "line_number": None,
-                "column": None,
-                "text": ""
-            })
-        
-        return errors
+        return CodeAnalyzer.analyze(code).syntax_errors
     
     @staticmethod
     def calculate_complexity(code: str) -> Dict[str, int]:
@@ -199,32 +312,8 @@ class CodeAnalyzer:
         Returns:
             复杂度指标
         """
-        try:
-            tree = ast.parse(code)
-            
-            # 简单的复杂度指标
-            complexity = {
-                "functions": 0,
-                "classes": 0,
-                "if_statements": 0,
-                "loops": 0,
-                "try_except": 0
-            }
-            
-            for node in ast.walk(tree):
-                if isinstance(node, ast.FunctionDef):
-                    complexity["functions"] += 1
-                elif isinstance(node, ast.ClassDef):
-                    complexity["classes"] += 1
-                elif isinstance(node, ast.If):
-                    complexity["if_statements"] += 1
-                elif isinstance(node, (ast.For, ast.While)):
-                    complexity["loops"] += 1
-                elif isinstance(node, ast.Try):
-                    complexity["try_except"] += 1
-            
-            return complexity
-            
-        except Exception as e:
-            logger.error(f"复杂度计算失败: {str(e)}")
-            return {"error": str(e)}
\ No newline at end of file
+        analysis = CodeAnalyzer.analyze(code)
+        if not analysis.is_valid:
+            logger.error(f"复杂度计算失败: {analysis.error}")
+            return {"error": analysis.error}
+        return analysis.complexity
@@ -0,0 +1,256 @@
+"""
+代码分块工具
+负责人：组员C
+作用：估算代码的token数，按语法树边界（顶层函数、类，过大的类再按方法）把大文件切分为不超过token上限的分块，
+      按单次请求的token预算挑选要交给LLM分析的分块，并以有限并发执行各分块的分析；
+      分块记录在原文件中的起始行，便于把分块内的行号换算回原文件
+"""
+
+import ast
+import asyncio
+import logging
+import re
+import textwrap
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, Tuple, TypeVar
+
+from backend.utils.code_analyzer import CodeAnalysis, CodeAnalyzer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 中日韩字符按每字约1个token计，其余字符按约4个字符1个token计（与通义千问分词器的统计大致相符）
+_CJK_PATTERN = re.compile(r"[　-〿㐀-鿿豈-﫿＀-￯]")
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    Args:
+        text: 任意文本
+
+    Returns:
+        估算的token数（至少为1）
+    """
+    cjk = len(_CJK_PATTERN.findall(text))
+    return max(1, cjk + (len(text) - cjk + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+class CodeChunk:
+    """
+    代码分块
+
+    使用 __slots__ 保持对象紧凑，与 CodeAnalysis 一致。
+    """
+
+    __slots__ = ("code", "start_line", "end_line", "names", "tokens")
+
+    def __init__(self, code: str, start_line: int, end_line: int, names: Optional[List[str]] = None):
+        self.code = code
+        self.start_line = start_line
+        self.end_line = end_line
+        self.names = names or []
+        self.tokens = estimate_tokens(code)
+
+    @property
+    def line_offset(self) -> int:
+        """分块内行号加上此偏移即为原文件行号"""
+        return self.start_line - 1
+
+    def to_original_line(self, line: Optional[int]) -> Optional[int]:
+        """把分块内的行号换算为原文件行号，超出分块范围时返回None"""
+        if line is None or line < 1 or line > self.end_line - self.start_line + 1:
+            return None
+        return line + self.line_offset
+
+    @property
+    def label(self) -> str:
+        """分块的简短说明，例如 “第12-40行（load, Parser）”"""
+        names = f"（{', '.join(self.names)}）" if self.names else ""
+        return f"第{self.start_line}-{self.end_line}行{names}"
+
+    def __repr__(self) -> str:
+        return f"CodeChunk({self.label}, tokens={self.tokens})"
+
+
+def _node_start(node: ast.AST) -> int:
+    """节点起始行（包含装饰器）"""
+    decorators = getattr(node, "decorator_list", None) or []
+    return min([node.lineno] + [decorator.lineno for decorator in decorators])
+
+
+def _node_name(node: ast.AST) -> Optional[str]:
+    return getattr(node, "name", None) if isinstance(
+        node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    ) else None
+
+
+def _segments(nodes: Sequence[ast.stmt], first_line: int, last_line: int) -> List[Tuple[int, int, Optional[ast.stmt]]]:
+    """
+    把语句序列转换为覆盖 [first_line, last_line] 的连续行段
+
+    语句之间的空行和注释归入下一条语句，最后一条语句之后的内容归入最后一段。
+    """
+    segments = []
+    start = first_line
+    for index, node in enumerate(nodes):
+        end = node.end_lineno if index + 1 < len(nodes) else last_line
+        if index + 1 < len(nodes):
+            end = max(end, _node_start(nodes[index + 1]) - 1)
+        segments.append((start, end, node))
+        start = end + 1
+    return segments
+
+
+class _Chunker:
+    """按token上限贪心合并相邻的行段"""
+
+    def __init__(self, lines: List[str], max_tokens: int):
+        self.lines = lines
+        self.max_tokens = max_tokens
+        self.chunks: List[CodeChunk] = []
+        self._start: Optional[int] = None
+        self._end = 0
+        self._names: List[str] = []
+        self._tokens = 0
+
+    def _text(self, start: int, end: int) -> str:
+        return "\n".join(self.lines[start - 1:end]) + "\n"
+
+    def flush(self):
+        if self._start is not None:
+            text = self._text(self._start, self._end)
+            if text.strip():
+                # 从类中拆出的方法带有缩进，去掉公共缩进后分块本身也能解析
+                self.chunks.append(CodeChunk(textwrap.dedent(text), self._start, self._end, self._names))
+        self._start, self._names, self._tokens = None, [], 0
+
+    def add(self, start: int, end: int, node: Optional[ast.stmt], prefix: str = ""):
+        tokens = estimate_tokens(self._text(start, end))
+        if tokens > self.max_tokens:
+            self.flush()
+            self._split(start, end, node)
+            return
+        if self._start is not None and self._tokens + tokens > self.max_tokens:
+            self.flush()
+        if self._start is None:
+            self._start = start
+        self._end = end
+        self._tokens += tokens
+        name = _node_name(node) if node is not None else None
+        if name:
+            self._names.append(prefix + name)
+
+    def _split(self, start: int, end: int, node: Optional[ast.stmt]):
+        """单个语句超过上限：类按方法拆分，其余按行拆分"""
+        body = getattr(node, "body", None) if isinstance(node, ast.ClassDef) else None
+        if body and len(body) > 1:
+            first = _node_start(body[0])
+            # 类头（装饰器、class行和文档字符串之前的部分）并入第一个成员
+            for index, (seg_start, seg_end, child) in enumerate(_segments(body, first, end)):
+                self.add(start if index == 0 else seg_start, seg_end, child, f"{node.name}.")
+            self.flush()
+            return
+        for line_start in range(start, end + 1):
+            self.add_line(line_start)
+        self.flush()
+
+    def add_line(self, line: int):
+        tokens = estimate_tokens(self.lines[line - 1] + "\n")
+        if self._start is not None and self._tokens + tokens > self.max_tokens:
+            self.flush()
+        if self._start is None:
+            self._start = line
+        self._end = line
+        self._tokens += tokens
+
+
+def chunk_code(code: str, max_tokens: int, analysis: Optional[CodeAnalysis] = None) -> List[CodeChunk]:
+    """
+    按语法树边界把代码切分为不超过token上限的分块
+
+    顶层语句按顺序贪心合并；单个函数超过上限时按行切分，类超过上限时按方法切分。
+    代码无法解析时按行切分。
+
+    Args:
+        code: 完整代码
+        max_tokens: 每个分块的token上限
+        analysis: 已有的分析结果，为空时重新解析
+
+    Returns:
+        按行号排列、覆盖全部代码的分块列表
+    """
+    lines = code.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    if not lines:
+        return []
+
+    chunker = _Chunker(lines, max(1, max_tokens))
+    analysis = analysis or CodeAnalyzer.analyze(code)
+    body = analysis.tree.body if analysis.is_valid else []
+    if body:
+        for start, end, node in _segments(body, 1, len(lines)):
+            chunker.add(start, end, node)
+    else:
+        for line in range(1, len(lines) + 1):
+            chunker.add_line(line)
+    chunker.flush()
+    return chunker.chunks
+
+
+def select_within_budget(
+    chunks: Sequence[CodeChunk],
+    budget: int,
+    overhead: int = 0
+) -> Tuple[List[CodeChunk], List[CodeChunk]]:
+    """
+    按顺序挑选在token预算内的分块
+
+    Args:
+        chunks: 候选分块（按优先级排列）
+        budget: 本次请求所有分块Prompt的token总预算
+        overhead: 每个分块Prompt除代码外的固定token开销
+
+    Returns:
+        (预算内的分块, 超出预算的分块)，至少选中第一个分块
+    """
+    selected, skipped = [], []
+    used = 0
+    for chunk in chunks:
+        cost = chunk.tokens + overhead
+        if not selected or used + cost <= budget:
+            selected.append(chunk)
+            used += cost
+        else:
+            skipped.append(chunk)
+    if skipped:
+        logger.info(f"分块分析超出token预算 {budget}，{len(skipped)} 个分块不调用LLM")
+    return selected, skipped
+
+
+async def gather_limited(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[Any]],
+    concurrency: int
+) -> List[Any]:
+    """
+    以有限并发执行异步任务，结果按输入顺序返回
+
+    Args:
+        items: 任务参数
+        worker: 异步处理函数
+        concurrency: 最大并发数
+
+    Returns:
+        各任务的结果
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: T):
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
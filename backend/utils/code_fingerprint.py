@@ -0,0 +1,168 @@
+"""
+代码指纹工具
+负责人：组员C
+作用：基于AST对代码做规范化，生成与空白、注释、引号风格和文档字符串排版无关的稳定指纹，
+      可选对函数局部变量做α重命名，用于结果缓存和请求去重
+"""
+
+import ast
+import hashlib
+import logging
+from typing import Dict, Optional, Set
+
+from .code_analyzer import CodeAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# 重命名后的占位名包含非法标识符字符，不会与源码中的真实名称冲突
+_PLACEHOLDER_PREFIX = "%v"
+
+_SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)
+
+
+def text_fingerprint(code: str) -> str:
+    """
+    原始文本指纹
+
+    Args:
+        code: 代码文本
+
+    Returns:
+        sha256十六进制字符串
+    """
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+class _DocstringNormalizer(ast.NodeTransformer):
+    """将文档字符串中的空白统一折叠为单个空格"""
+
+    def _normalize(self, node):
+        self.generic_visit(node)
+        body = getattr(node, "body", None)
+        if body and isinstance(body[0], ast.Expr) \
+                and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            body[0].value.value = " ".join(body[0].value.value.split())
+        return node
+
+    visit_Module = _normalize
+    visit_ClassDef = _normalize
+    visit_FunctionDef = _normalize
+    visit_AsyncFunctionDef = _normalize
+
+
+class _LocalRenamer(ast.NodeTransformer):
+    """按出现顺序将函数参数和局部变量重命名为占位名"""
+
+    def __init__(self):
+        self._scopes = []
+
+    def _visit_function(self, node):
+        mapping = self._collect_locals(node)
+        self._scopes.append(mapping)
+        self.generic_visit(node)
+        self._scopes.pop()
+        return node
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+    visit_Lambda = _visit_function
+
+    def visit_ClassDef(self, node):
+        # 类体中的名称是属性，不参与重命名
+        self._scopes.append({})
+        self.generic_visit(node)
+        self._scopes.pop()
+        return node
+
+    def visit_Name(self, node):
+        if self._scopes and node.id in self._scopes[-1]:
+            node.id = self._scopes[-1][node.id]
+        return node
+
+    def visit_arg(self, node):
+        if self._scopes and node.arg in self._scopes[-1]:
+            node.arg = self._scopes[-1][node.arg]
+        self.generic_visit(node)
+        return node
+
+    @staticmethod
+    def _collect_locals(node) -> Dict[str, str]:
+        """收集函数作用域内的参数和赋值目标（不进入嵌套作用域）"""
+        names = []
+        declared: Set[str] = set()
+
+        arguments = node.args
+        for arg in arguments.posonlyargs + arguments.args + arguments.kwonlyargs:
+            names.append(arg.arg)
+        if arguments.vararg:
+            names.append(arguments.vararg.arg)
+        if arguments.kwarg:
+            names.append(arguments.kwarg.arg)
+
+        body = node.body if isinstance(node.body, list) else [node.body]
+        pending = list(body)
+        while pending:
+            child = pending.pop(0)
+            if isinstance(child, (ast.Global, ast.Nonlocal)):
+                declared.update(child.names)
+            elif isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store):
+                names.append(child.id)
+            if isinstance(child, _SCOPE_NODES):
+                continue
+            pending.extend(ast.iter_child_nodes(child))
+
+        mapping: Dict[str, str] = {}
+        for name in names:
+            if name not in declared and name not in mapping:
+                mapping[name] = f"{_PLACEHOLDER_PREFIX}{len(mapping)}"
+        return mapping
+
+
+def canonicalize_ast(tree: ast.AST, rename_locals: bool = False) -> ast.AST:
+    """
+    规范化AST（原地修改）
+
+    Args:
+        tree: 解析得到的AST
+        rename_locals: 是否对函数局部变量做α重命名
+
+    Returns:
+        规范化后的AST
+    """
+    tree = _DocstringNormalizer().visit(tree)
+    if rename_locals:
+        tree = _LocalRenamer().visit(tree)
+    return tree
+
+
+def ast_fingerprint(
+    code: str,
+    rename_locals: bool = False,
+    include_lines: bool = False
+) -> Optional[str]:
+    """
+    生成AST指纹
+
+    注释、空白、引号风格和文档字符串排版不影响指纹。
+
+    Args:
+        code: Python代码
+        rename_locals: 是否对函数局部变量做α重命名
+        include_lines: 是否把各语句的行号纳入指纹（审查结果包含行号时需要）
+
+    Returns:
+        sha256十六进制字符串，代码无法解析时返回None
+    """
+    tree = CodeAnalyzer.parse_python_code(code)
+    if tree is None:
+        return None
+
+    canonical = ast.dump(canonicalize_ast(tree, rename_locals), annotate_fields=False)
+    if include_lines:
+        line_numbers = ",".join(
+            str(node.lineno) for node in ast.walk(tree) if isinstance(node, ast.stmt)
+        )
+        canonical = f"{canonical}|{line_numbers}"
+
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
@@ -0,0 +1,70 @@
+"""
+跨进程文件锁
+负责人：组员B
+作用：多个worker进程共享同一数据目录时，用排他文件锁串行化对共享文件的追加和重写
+"""
+
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    跨进程排他文件锁
+
+    同一实例可重入，最外层获取时才加锁文件；深度计数不是线程安全的，
+    同一进程内的多个线程需由调用方的线程锁串行化。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.depth = 0
+        self._file = None
+
+    def acquire(self):
+        if self.depth == 0:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(self.path, "a+b")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    while True:
+                        try:
+                            lock_file.seek(0)
+                            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                            break
+                        except OSError:
+                            # LK_LOCK 重试约10秒后放弃，其他进程的写入可能更久
+                            time.sleep(0.1)
+            except BaseException:
+                lock_file.close()
+                raise
+            self._file = lock_file
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            lock_file, self._file = self._file, None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            finally:
+                lock_file.close()
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -154,4 +154,25 @@ def truncate_large_response(
                 response[field] = response[field][:max_length - 3] + "..."
                 response["truncated"] = True
     
-    return response
\ No newline at end of file
+    return response
+
+def format_sse_event(event: str, data: Any) -> str:
+    """
+    格式化Server-Sent Events消息
+    
+    Args:
+        event: 事件类型
+        data: 事件数据（可包含Pydantic模型）
+        
+    Returns:
+        SSE格式的消息文本
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _json_default(value: Any) -> Any:
+    """JSON序列化兜底：支持Pydantic模型"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
@@ -0,0 +1,265 @@
+"""
+审查检索查询构造
+负责人：组员C
+作用：基于 CodeAnalyzer 的语法树找出代码中值得查阅最佳实践的结构（裸露except、循环中拼接字符串、
+      type()比较、嵌套循环、未使用with的文件操作等），为每类结构生成一条简短的定向检索查询，
+      并把多条查询的检索结果合并去重；结构定位结果同时供静态预审查使用
+"""
+
+import ast
+import builtins
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+from backend.utils.code_analyzer import CodeAnalysis, CodeAnalyzer
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 结构名称 -> 定向检索查询，按优先级排列（越靠前越可能是缺陷）
+CONSTRUCT_QUERIES: Dict[str, str] = {
+    "bare_except": "异常处理 避免裸露的 except: 语句，捕获具体的异常类型",
+    "open_without_with": "文件操作 使用 with open() 确保文件正确关闭",
+    "type_comparison": "类型检查 使用 isinstance() 而不是 type() == 比较",
+    "string_concat_in_loop": "字符串操作 避免在循环中用 += 拼接字符串，使用 join()",
+    "append_in_loop": "列表推导式 代替循环中的 append()",
+    "nested_loop": "嵌套循环 性能优化 拆分函数 降低复杂度",
+}
+
+FALLBACK_QUERY_PREFIX = "Python代码审查和优化建议: "
+FALLBACK_QUERY_LENGTH = 200
+
+# 被重新赋值时视为遮蔽内置名称（site模块注入的交互式帮助对象除外）
+BUILTIN_NAMES = frozenset(
+    name for name in dir(builtins) if not name.startswith("_")
+) - {"copyright", "credits", "license"}
+
+_MUTABLE_LITERALS = (ast.List, ast.Dict, ast.Set, ast.ListComp, ast.DictComp, ast.SetComp)
+
+
+class _ConstructFinder(ast.NodeVisitor):
+    """遍历语法树，记录每类结构出现的行号（带循环嵌套深度）"""
+
+    def __init__(self):
+        self.found: Dict[str, List[int]] = {}
+        self._loop_depth = 0
+        self._with_calls = set()
+        self._str_names = set()
+        self._imports: Dict[str, int] = {}
+        self._used_names = set()
+
+    def _mark(self, name: str, node: ast.AST):
+        self.found.setdefault(name, []).append(getattr(node, "lineno", 0))
+
+    def finish(self) -> Dict[str, List[int]]:
+        """遍历结束后补充需要全局信息的结构（未使用的导入）"""
+        for name, line in self._imports.items():
+            if name not in self._used_names:
+                self.found.setdefault("unused_import", []).append(line)
+        return self.found
+
+    def _visit_loop(self, node):
+        if self._loop_depth and isinstance(node, (ast.For, ast.AsyncFor, ast.While)):
+            self._mark("nested_loop", node)
+        self._loop_depth += 1
+        self.generic_visit(node)
+        self._loop_depth -= 1
+
+    visit_For = visit_AsyncFor = visit_While = _visit_loop
+    visit_ListComp = visit_SetComp = visit_DictComp = visit_GeneratorExp = _visit_loop
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler):
+        if node.type is None:
+            self._mark("bare_except", node)
+        self.generic_visit(node)
+
+    def _visit_with(self, node):
+        for item in node.items:
+            self._with_calls.add(id(item.context_expr))
+        self.generic_visit(node)
+
+    visit_With = visit_AsyncWith = _visit_with
+
+    def visit_Assign(self, node: ast.Assign):
+        if _is_string(node.value):
+            self._str_names.update(target.id for target in node.targets if isinstance(target, ast.Name))
+        if any(isinstance(target, ast.Name) and target.id == "__all__" for target in node.targets):
+            # __all__ 中导出的名称视为已使用
+            self._used_names.update(
+                element.value for element in getattr(node.value, "elts", [])
+                if isinstance(element, ast.Constant) and isinstance(element.value, str)
+            )
+        self.generic_visit(node)
+
+    def _visit_function(self, node):
+        defaults = [*node.args.defaults, *(default for default in node.args.kw_defaults if default is not None)]
+        if any(isinstance(default, _MUTABLE_LITERALS) or _is_call_to(default, "list", "dict", "set")
+               for default in defaults):
+            self._mark("mutable_default", node)
+        if not isinstance(node, ast.Lambda) and node.name in BUILTIN_NAMES:
+            self._mark("shadowed_builtin", node)
+        self.generic_visit(node)
+
+    visit_FunctionDef = visit_AsyncFunctionDef = visit_Lambda = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if node.name in BUILTIN_NAMES:
+            self._mark("shadowed_builtin", node)
+        self.generic_visit(node)
+
+    def visit_arg(self, node: ast.arg):
+        if node.arg in BUILTIN_NAMES:
+            self._mark("shadowed_builtin", node)
+        self.generic_visit(node)
+
+    def visit_Name(self, node: ast.Name):
+        if isinstance(node.ctx, ast.Store):
+            if node.id in BUILTIN_NAMES:
+                self._mark("shadowed_builtin", node)
+        else:
+            self._used_names.add(node.id)
+
+    def visit_Import(self, node: ast.Import):
+        for alias in node.names:
+            self._imports.setdefault(alias.asname or alias.name.split(".")[0], node.lineno)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom):
+        if node.module == "__future__":
+            return
+        for alias in node.names:
+            if alias.name != "*":
+                self._imports.setdefault(alias.asname or alias.name, node.lineno)
+
+    def visit_AugAssign(self, node: ast.AugAssign):
+        if self._loop_depth and isinstance(node.op, ast.Add) and (
+            _is_string(node.value) or (isinstance(node.target, ast.Name) and node.target.id in self._str_names)
+        ):
+            self._mark("string_concat_in_loop", node)
+        self.generic_visit(node)
+
+    def visit_Compare(self, node: ast.Compare):
+        if any(isinstance(op, (ast.Eq, ast.NotEq, ast.Is, ast.IsNot)) for op in node.ops) and any(
+            _is_call_to(operand, "type") for operand in [node.left, *node.comparators]
+        ):
+            self._mark("type_comparison", node)
+        self.generic_visit(node)
+
+    def visit_Call(self, node: ast.Call):
+        if _is_call_to(node, "open") and id(node) not in self._with_calls:
+            self._mark("open_without_with", node)
+        if self._loop_depth and isinstance(node.func, ast.Attribute) and node.func.attr == "append":
+            self._mark("append_in_loop", node)
+        self.generic_visit(node)
+
+
+def _is_string(node: ast.AST) -> bool:
+    return (isinstance(node, ast.Constant) and isinstance(node.value, str)) or isinstance(node, ast.JoinedStr) \
+        or _is_call_to(node, "str")
+
+
+def _is_call_to(node: ast.AST, *names: str) -> bool:
+    return isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in names
+
+
+def locate_constructs(analysis: CodeAnalysis) -> Dict[str, List[int]]:
+    """
+    定位代码中的各类结构
+
+    除 CONSTRUCT_QUERIES 中的结构外，还包括 mutable_default（可变默认参数）、
+    shadowed_builtin（遮蔽内置名称）和 unused_import（未使用的导入）。
+
+    Args:
+        analysis: CodeAnalyzer.analyze 的结果
+
+    Returns:
+        结构名称 -> 出现的行号列表，代码无法解析时为空字典
+    """
+    if not analysis.is_valid:
+        return {}
+    finder = _ConstructFinder()
+    finder.visit(analysis.tree)
+    return finder.finish()
+
+
+def find_constructs(analysis: CodeAnalysis) -> List[str]:
+    """
+    找出代码中值得检索最佳实践的结构
+
+    Args:
+        analysis: CodeAnalyzer.analyze 的结果
+
+    Returns:
+        按 CONSTRUCT_QUERIES 优先级排列的结构名称，代码无法解析时为空列表
+    """
+    found = locate_constructs(analysis)
+    return [name for name in CONSTRUCT_QUERIES if name in found]
+
+
+def build_review_queries(
+    code: str,
+    analysis: Optional[CodeAnalysis] = None,
+    max_queries: int = 3
+) -> List[str]:
+    """
+    构造代码审查的知识库检索查询
+
+    每类结构一条简短查询；没有找到任何结构时，用函数名和导入模块组成一条概括性查询，
+    代码无法解析时退回到代码开头的片段。
+
+    Args:
+        code: Python代码
+        analysis: 已有的分析结果，为空时重新解析
+        max_queries: 最多返回的查询数
+
+    Returns:
+        至少一条检索查询
+    """
+    analysis = analysis or CodeAnalyzer.analyze(code)
+    constructs = find_constructs(analysis)
+    if constructs:
+        return [CONSTRUCT_QUERIES[name] for name in constructs[:max(1, max_queries)]]
+
+    if not analysis.is_valid:
+        return [f"{FALLBACK_QUERY_PREFIX}{code[:FALLBACK_QUERY_LENGTH]}..."]
+
+    names = [function["name"] for function in analysis.functions]
+    names += [cls["name"] for cls in analysis.classes]
+    names += [item["module"] for item in analysis.imports if item.get("module")]
+    summary = " ".join(dict.fromkeys(names))[:FALLBACK_QUERY_LENGTH]
+    return [f"{FALLBACK_QUERY_PREFIX}{summary}" if summary else FALLBACK_QUERY_PREFIX.rstrip(": ")]
+
+
+def merge_retrievals(
+    results: Sequence[Iterable[T]],
+    limit: int,
+    key: Callable[[T], object] = id
+) -> List[T]:
+    """
+    轮流从各条查询的结果中取文档，去重后合并
+
+    Args:
+        results: 每条查询按相关性排列的结果
+        limit: 合并后最多保留的数量
+        key: 判断重复的键
+
+    Returns:
+        合并后的结果，每条查询的第一名排在最前
+    """
+    merged: List[T] = []
+    seen = set()
+    iterators = [iter(items) for items in results]
+    while iterators and len(merged) < limit:
+        remaining = []
+        for iterator in iterators:
+            for item in iterator:
+                item_key = key(item)
+                if item_key not in seen:
+                    seen.add(item_key)
+                    merged.append(item)
+                    remaining.append(iterator)
+                    break
+            if len(merged) >= limit:
+                break
+        iterators = remaining
+    return merged
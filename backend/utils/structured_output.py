@@ -0,0 +1,265 @@
+"""
+结构化审查输出
+负责人：组长
+作用：由 CodeReviewResponse 生成约束LLM输出的JSON Schema；在流式输出过程中增量解析JSON，
+      数组中的每个条目一闭合就立即产出；对带代码块围栏、前后有说明文字或被截断的JSON做修复后再解析
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.models.schemas import CodeReviewResponse
+
+logger = logging.getLogger(__name__)
+
+# 要求LLM输出的字段（耗时、缓存命中等由服务端填写）
+REVIEW_OUTPUT_FIELDS = ("overall_score", "summary", "bugs", "style_issues", "optimizations")
+
+# 修复截断JSON时最多回退尝试的截断点数量
+MAX_REPAIR_ATTEMPTS = 64
+
+_CLOSERS = {"{": "}", "[": "]"}
+_DECODER = json.JSONDecoder()
+
+
+def _strip_schema(node: Any) -> Any:
+    """去掉 title / example 等对约束输出无用的键，减少Prompt长度"""
+    if isinstance(node, dict):
+        return {
+            key: _strip_schema(value) for key, value in node.items()
+            if key not in ("title", "example", "examples")
+        }
+    if isinstance(node, list):
+        return [_strip_schema(value) for value in node]
+    return node
+
+
+def review_json_schema() -> Dict[str, Any]:
+    """
+    由 CodeReviewResponse 生成审查结果的JSON Schema
+
+    Returns:
+        只包含 REVIEW_OUTPUT_FIELDS 的Schema（所有字段必填，不允许额外字段）
+    """
+    schema = CodeReviewResponse.model_json_schema()
+    return _strip_schema({
+        "type": "object",
+        "properties": {name: schema["properties"][name] for name in REVIEW_OUTPUT_FIELDS},
+        "required": list(REVIEW_OUTPUT_FIELDS),
+        "additionalProperties": False,
+        "$defs": schema.get("$defs", {}),
+    })
+
+
+def review_json_schema_text() -> str:
+    """紧凑的Schema文本，供Prompt使用"""
+    return json.dumps(review_json_schema(), ensure_ascii=False, separators=(",", ":"))
+
+
+def _scan(text: str, start: int) -> Tuple[List[Tuple[int, List[str]]], List[str], bool]:
+    """
+    扫描JSON文本，记录可以安全截断的位置
+
+    Returns:
+        (截断点列表[(位置, 当时的容器栈)], 结束时的容器栈, 结束时是否在字符串内)
+    """
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = escape = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append(char)
+        elif char in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                return [], [], False
+            # 容器闭合后截断，得到的是完整的元素
+            cuts.append((index + 1, list(stack)))
+        elif char == ",":
+            cuts.append((index, list(stack)))
+    return cuts, stack, in_string
+
+
+def _close(fragment: str, stack: List[str]) -> str:
+    fragment = fragment.rstrip()
+    while fragment.endswith((",", ":")):
+        fragment = fragment[:-1].rstrip()
+    return fragment + "".join(_CLOSERS[char] for char in reversed(stack))
+
+
+def repair_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    从LLM回复中解析出JSON对象
+
+    依次尝试：直接解析第一个 { 开始的完整对象（忽略代码块围栏和前后说明文字）；
+    补全被截断的字符串和容器；从后往前在元素边界处截断后补全，丢弃最后一个不完整的元素。
+
+    Args:
+        text: LLM原始回复
+
+    Returns:
+        解析出的字典，找不到JSON对象时返回None
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    try:
+        parsed, _ = _DECODER.raw_decode(text, start)
+        return parsed if isinstance(parsed, dict) else None
+    except ValueError:
+        pass
+
+    cuts, stack, in_string = _scan(text, start)
+    if not stack:
+        # 对象已闭合但内容有误（如多余的逗号），不做猜测
+        return None
+
+    candidates = []
+    tail = text[start:] + ('"' if in_string else "")
+    candidates.append(_close(tail, stack))
+    for position, cut_stack in reversed(cuts[-MAX_REPAIR_ATTEMPTS:]):
+        candidates.append(_close(text[start:position], cut_stack))
+
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            logger.info("审查结果JSON不完整，已修复后解析")
+            return parsed
+    return None
+
+
+class StreamingJSONParser:
+    """
+    增量解析LLM流式输出的顶层JSON对象
+
+    每次 feed 只扫描新到达的字符：顶层数组字段中的对象元素一闭合即产出 (字段名, 元素)，
+    顶层标量字段在其后的逗号或对象结束时产出 (字段名, 值)。JSON之前的围栏和说明文字被忽略。
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._pos = 0
+        self._started = False
+        self._done = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """顶层对象是否已经闭合"""
+        return self._done
+
+    @property
+    def text(self) -> str:
+        """目前收到的全部文本"""
+        return self._text
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        输入一段新的输出文本
+
+        Args:
+            chunk: 新到达的文本片段
+
+        Returns:
+            本次新完成的 (字段名, 值或数组元素) 列表
+        """
+        events: List[Tuple[str, Any]] = []
+        self._text += chunk
+        text = self._text
+        index = self._pos
+        while index < len(text) and not self._done:
+            char = text[index]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(char)
+                    self._expect_key = True
+                index += 1
+                continue
+
+            depth = len(self._stack)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(text[self._key_start:index + 1])
+                        self._key_start = None
+                index += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if depth == 1:
+                    if self._expect_key:
+                        self._key_start = index
+                        self._expect_key = False
+                    elif self._value_start is None:
+                        self._value_start = index
+            elif char in "{[":
+                if depth == 1 and self._value_start is None:
+                    self._value_start = index
+                if depth == 2 and char == "{" and self._stack[-1] == "[":
+                    self._item_start = index
+                self._stack.append(char)
+            elif char in "}]":
+                self._stack.pop()
+                if len(self._stack) == 2 and char == "}" and self._item_start is not None:
+                    item = self._loads(text[self._item_start:index + 1])
+                    self._item_start = None
+                    if item is not None and self._key is not None:
+                        events.append((self._key, item))
+                elif not self._stack:
+                    self._finish_value(text, index, events)
+                    self._done = True
+            elif depth == 1:
+                if char == ",":
+                    self._finish_value(text, index, events)
+                    self._expect_key = True
+                elif not char.isspace() and char != ":" and self._value_start is None and not self._expect_key:
+                    self._value_start = index
+            index += 1
+        self._pos = index
+        return events
+
+    def _finish_value(self, text: str, end: int, events: List[Tuple[str, Any]]):
+        if self._key is not None and self._value_start is not None:
+            value = self._loads(text[self._value_start:end])
+            if value is not None and not isinstance(value, (list, dict)):
+                events.append((self._key, value))
+        self._key = None
+        self._value_start = None
+
+    @staticmethod
+    def _loads(fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except ValueError:
+            return None
@@ -8,14 +8,14 @@ import re
 import logging
 from typing import List, Dict, Any, Optional, Tuple
 
+from config.settings import get_settings
+
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 # 支持的编程语言列表
 SUPPORTED_LANGUAGES = ["python"]
 
-# 最大代码长度限制
-MAX_CODE_LENGTH = 10000
-
 
 def validate_code_input(code: str) -> Tuple[bool, Optional[str]]:
     """
@@ -36,8 +36,9 @@ def validate_code_input(code: str) -> Tuple[bool, Optional[str]]:
     if len(code.strip()) == 0:
         return False, "代码不能只包含空白字符"
     
-    if len(code) > MAX_CODE_LENGTH:
-        return False, f"代码长度不能超过 {MAX_CODE_LENGTH} 字符"
+    # 最大代码长度取配置 max_code_length，与请求模型的限制一致
+    if len(code) > settings.max_code_length:
+        return False, f"代码长度不能超过 {settings.max_code_length} 字符"
     
     # 检查是否包含潜在的恶意代码
     malicious_patterns = [
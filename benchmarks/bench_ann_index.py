@@ -0,0 +1,107 @@
+"""
+知识库向量索引基准测试
+负责人：组员C
+作用：在合成语料上比较flat（float32）、float16/int8标量量化、IVF-Flat、IVF-PQ和HNSW索引的
+      召回率（recall@k）、单次查询延迟、构建耗时和内存占用，并扫描nprobe/efSearch检索参数
+
+运行方式：python benchmarks/bench_ann_index.py [--vectors 100000] [--dim 384] [--queries 500] [--k 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("DASHSCOPE_API_KEY", "benchmark-key")
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+
+from backend.tools import ann_index  # noqa: E402
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int):
+    """生成按主题聚集的归一化向量（模拟句向量的分布），查询为语料点加噪声"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(clusters, size=n)] + rng.normal(scale=0.6, size=(n, dim))
+    vectors = vectors.astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, count: int, seed: int):
+    rng = np.random.default_rng(seed + 1)
+    queries = vectors[rng.choice(len(vectors), count, replace=False)]
+    queries = queries + rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def measure(index, queries: np.ndarray, truth: np.ndarray, k: int):
+    """逐条查询（与线上单请求检索一致），返回 (recall@k, 平均延迟毫秒, p99延迟毫秒)"""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len(set(found[0]) & set(expected))
+    return hits / (len(queries) * k), float(np.mean(latencies)), float(np.percentile(latencies, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库向量索引基准测试")
+    parser.add_argument("--vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--threads", type=int, default=1, help="FAISS线程数（默认1，模拟线程池中的单次检索）")
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(args.threads)
+    vectors = synthetic_corpus(args.vectors, args.dim, args.clusters, args.seed)
+    queries = make_queries(vectors, args.queries, args.seed)
+    raw_bytes = vectors.nbytes
+
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"语料: {args.vectors} 条 {args.dim} 维向量，{args.queries} 条查询，k={args.k}，原始向量 {raw_bytes / 2**20:.1f} MiB")
+    print(f"{'索引':<10}{'参数':<14}{'recall@k':>10}{'平均延迟ms':>12}{'p99延迟ms':>12}{'构建s':>9}{'内存MiB':>10}")
+
+    sweeps = {
+        ann_index.INDEX_FLAT: [("-", {})],
+        ann_index.INDEX_SQ_FP16: [("-", {})],
+        ann_index.INDEX_SQ_INT8: [("-", {})],
+        ann_index.INDEX_IVF_FLAT: [(f"nprobe={n}", {"nprobe": n}) for n in (1, 4, 16, 64)],
+        ann_index.INDEX_IVF_PQ: [(f"nprobe={n}", {"nprobe": n}) for n in (1, 4, 16, 64)],
+        ann_index.INDEX_HNSW: [(f"ef={ef}", {"ef_search": ef}) for ef in (16, 64, 256)]
+    }
+
+    for index_type, params in sweeps.items():
+        start = time.perf_counter()
+        index = ann_index.build_index(vectors, index_type, pq_m=args.pq_m)
+        build_seconds = time.perf_counter() - start
+        memory = faiss.serialize_index(index).nbytes / 2**20
+
+        for label, search_params in params:
+            ann_index.configure_search(index, **search_params)
+            recall, mean_ms, p99_ms = measure(index, queries, truth, args.k)
+            print(
+                f"{index_type:<10}{label:<14}{recall:>10.3f}{mean_ms:>12.3f}{p99_ms:>12.3f}"
+                f"{build_seconds:>9.1f}{memory:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+缓存键命中率基准测试
+负责人：组员C
+作用：在近似重复提交的语料上比较规范化文本指纹、AST指纹和AST+α重命名指纹的缓存命中率与计算开销
+
+运行方式：python benchmarks/bench_cache_keys.py [--submissions 5000] [--seed 42]
+"""
+
+import argparse
+import io
+import random
+import re
+import sys
+import time
+import tokenize
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.utils.code_fingerprint import ast_fingerprint, text_fingerprint  # noqa: E402
+from backend.utils.text_processor import TextProcessor  # noqa: E402
+from backend.utils.validation import sanitize_code  # noqa: E402
+
+
+# 课堂上常见的入门代码片段
+BASE_SNIPPETS = [
+    '''def factorial(n):
+    """计算阶乘"""
+    result = 1
+    for i in range(1, n + 1):
+        result *= i
+    return result
+''',
+    '''def fibonacci(n):
+    """返回第n个斐波那契数"""
+    if n <= 1:
+        return n
+    return fibonacci(n - 1) + fibonacci(n - 2)
+''',
+    '''def bubble_sort(items):
+    """冒泡排序"""
+    data = list(items)
+    for i in range(len(data)):
+        for j in range(len(data) - i - 1):
+            if data[j] > data[j + 1]:
+                data[j], data[j + 1] = data[j + 1], data[j]
+    return data
+''',
+    '''def count_words(text):
+    """统计单词出现次数"""
+    counts = {}
+    for word in text.split():
+        counts[word] = counts.get(word, 0) + 1
+    return counts
+''',
+    '''class Stack:
+    """简单的栈实现"""
+
+    def __init__(self):
+        self.items = []
+
+    def push(self, item):
+        self.items.append(item)
+
+    def pop(self):
+        return self.items.pop()
+''',
+    '''def is_prime(number):
+    """判断素数"""
+    if number < 2:
+        return False
+    for divisor in range(2, int(number ** 0.5) + 1):
+        if number % divisor == 0:
+            return False
+    return True
+''',
+]
+
+RENAMES = {
+    "result": ["res", "acc", "total"],
+    "data": ["arr", "values", "lst"],
+    "counts": ["freq", "table"],
+    "word": ["w", "token"],
+    "divisor": ["d", "k"],
+    "number": ["num", "x"],
+    "items": ["xs", "seq"],
+    "text": ["s", "sentence"],
+}
+
+
+def add_trailing_whitespace(code: str, rng: random.Random) -> str:
+    return "\n".join(line + " " * rng.randint(0, 3) for line in code.split("\n"))
+
+
+def add_blank_lines(code: str, rng: random.Random) -> str:
+    lines = code.split("\n")
+    index = rng.randint(1, max(1, len(lines) - 1))
+    return "\n".join(lines[:index] + [""] * rng.randint(1, 2) + lines[index:])
+
+
+def add_comments(code: str, rng: random.Random) -> str:
+    lines = code.split("\n")
+    out = []
+    for line in lines:
+        if line.strip() and not line.rstrip().endswith(":") and rng.random() < 0.3:
+            line = f"{line}  # 注释"
+        out.append(line)
+    return "# 作业提交\n" + "\n".join(out)
+
+
+def reflow_docstring(code: str, rng: random.Random) -> str:
+    return re.sub(
+        r'"""(.*?)"""',
+        lambda m: '"""\n    ' + m.group(1).strip() + '\n    """',
+        code,
+        count=1,
+        flags=re.DOTALL
+    )
+
+
+def swap_quotes(code: str, rng: random.Random) -> str:
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(code).readline):
+        value = token.string
+        if token.type == tokenize.STRING and value.startswith("'") and '"' not in value:
+            value = '"' + value[1:-1] + '"'
+        tokens.append((token.type, value))
+    return tokenize.untokenize(tokens)
+
+
+def crlf_line_endings(code: str, rng: random.Random) -> str:
+    return code.replace("\n", "\r\n")
+
+
+def rename_local(code: str, rng: random.Random) -> str:
+    candidates = [name for name in RENAMES if re.search(rf"\b{name}\b", code)]
+    if not candidates:
+        return code
+    name = rng.choice(candidates)
+    return re.sub(rf"\b{name}\b", rng.choice(RENAMES[name]), code)
+
+
+COSMETIC_TRANSFORMS = [
+    add_trailing_whitespace,
+    add_blank_lines,
+    add_comments,
+    reflow_docstring,
+    swap_quotes,
+    crlf_line_endings,
+]
+
+
+def build_corpus(submissions: int, seed: int, rename_probability: float):
+    """生成近似重复的提交语料"""
+    rng = random.Random(seed)
+    # 越靠前的片段越常见（近似Zipf分布）
+    weights = [1.0 / (rank + 1) for rank in range(len(BASE_SNIPPETS))]
+    corpus = []
+    for _ in range(submissions):
+        code = rng.choices(BASE_SNIPPETS, weights=weights)[0]
+        for transform in rng.sample(COSMETIC_TRANSFORMS, rng.randint(0, 3)):
+            code = transform(code, rng)
+        if rng.random() < rename_probability:
+            code = rename_local(code, rng)
+        corpus.append(code)
+    return corpus
+
+
+STRATEGIES = {
+    "raw_text": lambda code: text_fingerprint(code),
+    "normalized_text": lambda code: text_fingerprint(TextProcessor.clean_code(sanitize_code(code))),
+    "ast": lambda code: ast_fingerprint(code),
+    "ast_alpha": lambda code: ast_fingerprint(code, rename_locals=True),
+}
+
+
+def run(submissions: int, seed: int, rename_probability: float):
+    corpus = build_corpus(submissions, seed, rename_probability)
+    distinct_sources = len(set(corpus))
+    print(f"语料: {submissions} 次提交, {distinct_sources} 种不同文本, "
+          f"{len(BASE_SNIPPETS)} 个基础片段, 重命名概率 {rename_probability}")
+    print(f"{'策略':<18}{'唯一键':>8}{'命中率':>10}{'平均耗时(us)':>16}")
+
+    for name, strategy in STRATEGIES.items():
+        seen = set()
+        hits = 0
+        start = time.perf_counter()
+        for code in corpus:
+            key = strategy(code) or text_fingerprint(code)
+            if key in seen:
+                hits += 1
+            else:
+                seen.add(key)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<18}{len(seen):>8}{hits / submissions:>10.2%}"
+              f"{elapsed * 1e6 / submissions:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="缓存键命中率基准测试")
+    parser.add_argument("--submissions", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rename-probability", type=float, default=0.2)
+    args = parser.parse_args()
+    run(args.submissions, args.seed, args.rename_probability)
+
+
+if __name__ == "__main__":
+    main()
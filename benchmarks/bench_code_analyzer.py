@@ -0,0 +1,172 @@
+"""
+代码结构分析基准测试
+负责人：组员C
+作用：比较单次解析的 CodeAnalyzer.analyze 与原先逐项解析（每个方法各自 ast.parse + ast.walk）的耗时，
+      并校验两者结果一致
+
+运行方式：python benchmarks/bench_code_analyzer.py [--lines 10000] [--repeat 5]
+"""
+
+import argparse
+import ast
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.utils.code_analyzer import CodeAnalyzer  # noqa: E402
+
+
+TEMPLATE = '''
+import os
+from collections import defaultdict as dd
+
+
+class Worker{index}(Base):
+    """第{index}个工作类"""
+
+    def run(self, items, limit=10):
+        """处理数据"""
+        total = 0
+        for item in items:
+            if item > limit:
+                total += item
+            elif item < 0:
+                continue
+        try:
+            value = total / limit
+        except ZeroDivisionError:
+            value = 0
+        return value
+
+    async def fetch(self, url):
+        while url:
+            url = url[1:]
+        return url
+
+
+def helper_{index}(x, y):
+    if x:
+        return [i * y for i in range(x)]
+    return []
+'''
+
+
+def build_source(target_lines: int) -> str:
+    """生成至少 target_lines 行的代码"""
+    block_lines = TEMPLATE.count("\n")
+    blocks = target_lines // block_lines + 1
+    return "".join(TEMPLATE.format(index=i) for i in range(blocks))
+
+
+def legacy_analyze(code: str):
+    """原实现：每个分析项各自解析和遍历一次"""
+    def functions():
+        result = []
+        for node in ast.walk(ast.parse(code)):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                result.append({
+                    "name": node.name,
+                    "line_number": node.lineno,
+                    "args": [arg.arg for arg in node.args.args],
+                    "has_docstring": ast.get_docstring(node) is not None,
+                    "is_async": isinstance(node, ast.AsyncFunctionDef)
+                })
+        return result
+
+    def classes():
+        result = []
+        for node in ast.walk(ast.parse(code)):
+            if isinstance(node, ast.ClassDef):
+                result.append({
+                    "name": node.name,
+                    "line_number": node.lineno,
+                    "methods": [item.name for item in node.body
+                                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))],
+                    "has_docstring": ast.get_docstring(node) is not None,
+                    "base_classes": [base.id if isinstance(base, ast.Name) else str(base)
+                                     for base in node.bases]
+                })
+        return result
+
+    def imports():
+        result = []
+        for node in ast.walk(ast.parse(code)):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    result.append({"type": "import", "module": alias.name,
+                                   "alias": alias.asname, "line_number": node.lineno})
+            elif isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    result.append({"type": "from_import", "module": node.module,
+                                   "name": alias.name, "alias": alias.asname,
+                                   "line_number": node.lineno})
+        return result
+
+    def syntax_errors():
+        ast.parse(code)
+        return []
+
+    def complexity():
+        counts = {"functions": 0, "classes": 0, "if_statements": 0, "loops": 0, "try_except": 0}
+        for node in ast.walk(ast.parse(code)):
+            if isinstance(node, ast.FunctionDef):
+                counts["functions"] += 1
+            elif isinstance(node, ast.ClassDef):
+                counts["classes"] += 1
+            elif isinstance(node, ast.If):
+                counts["if_statements"] += 1
+            elif isinstance(node, (ast.For, ast.While)):
+                counts["loops"] += 1
+            elif isinstance(node, ast.Try):
+                counts["try_except"] += 1
+        return counts
+
+    return {
+        "functions": functions(),
+        "classes": classes(),
+        "imports": imports(),
+        "complexity": complexity(),
+        "syntax_errors": syntax_errors()
+    }
+
+
+def single_pass_analyze(code: str):
+    return CodeAnalyzer.analyze(code).to_dict()
+
+
+def measure(func, code: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(code)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="代码结构分析基准测试")
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    code = build_source(args.lines)
+    line_count = code.count("\n")
+
+    assert legacy_analyze(code) == single_pass_analyze(code), "单次解析结果与原实现不一致"
+
+    legacy = measure(legacy_analyze, code, args.repeat)
+    single = measure(single_pass_analyze, code, args.repeat)
+
+    print(f"输入: {line_count} 行, 重复 {args.repeat} 次取中位数")
+    print(f"原实现（5次解析+5次遍历）: {legacy * 1000:8.1f} ms")
+    print(f"单次解析（1次解析+1次遍历）: {single * 1000:8.1f} ms")
+    print(f"加速比: {legacy / single:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
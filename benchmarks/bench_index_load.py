@@ -0,0 +1,115 @@
+"""
+知识库快照加载基准测试
+负责人：组员C
+作用：比较旧版快照（FAISS索引+pickle文档存储，FAISS.load_local）与新版快照
+      （内存映射IVF索引+SQLite文档存储）的冷启动耗时和进程常驻内存增量
+
+运行方式：python benchmarks/bench_index_load.py [--documents 200000] [--dim 384]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+os.environ.setdefault("DASHSCOPE_API_KEY", "benchmark-key")
+
+import numpy as np  # noqa: E402
+from langchain.schema import Document  # noqa: E402
+from langchain.schema.embeddings import Embeddings  # noqa: E402
+from langchain_community.docstore.in_memory import InMemoryDocstore  # noqa: E402
+from langchain_community.vectorstores import FAISS  # noqa: E402
+
+from backend.tools import ann_index  # noqa: E402
+from backend.tools.sqlite_docstore import SQLiteDocstore, export_docstore  # noqa: E402
+from backend.tools.vector_registry import _process_rss_bytes  # noqa: E402
+
+
+class _ZeroEmbeddings(Embeddings):
+    """加载快照不需要嵌入模型，占位用"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def embed_documents(self, texts):
+        return [[0.0] * self.dim for _ in texts]
+
+    def embed_query(self, text):
+        return [0.0] * self.dim
+
+
+def build_snapshots(directory: str, documents: int, dim: int, index_type: str):
+    """生成同一份语料的两种快照"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(documents, dim)).astype(np.float32)
+    ids = [f"doc-{i}" for i in range(documents)]
+    docs = {
+        doc_id: Document(
+            page_content=f"第{i}条最佳实践：" + "使用生成器表达式处理大数据集可以节省内存。" * 4,
+            metadata={"topic": f"主题{i % 100}", "category": "性能优化"}
+        )
+        for i, doc_id in enumerate(ids)
+    }
+    mapping = dict(enumerate(ids))
+    index = ann_index.build_index(vectors, index_type)
+
+    legacy_dir = os.path.join(directory, "legacy")
+    FAISS(_ZeroEmbeddings(dim), index, InMemoryDocstore(docs), mapping).save_local(legacy_dir)
+
+    mmap_dir = os.path.join(directory, "mmap")
+    os.makedirs(mmap_dir)
+    ann_index.write_index(index, os.path.join(mmap_dir, "index.faiss"))
+    export_docstore(os.path.join(mmap_dir, "docstore.sqlite3"), docs, mapping).close()
+    return legacy_dir, mmap_dir
+
+
+def measure(load):
+    rss_before = _process_rss_bytes() or 0
+    start = time.perf_counter()
+    store = load()
+    elapsed = time.perf_counter() - start
+    rss_delta = (_process_rss_bytes() or 0) - rss_before
+    return store, elapsed, rss_delta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库快照加载基准测试")
+    parser.add_argument("--documents", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--index-type", default="ivf_flat", choices=ann_index.INDEX_TYPES)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"生成 {args.documents} 条 {args.dim} 维 {args.index_type} 快照...")
+        legacy_dir, mmap_dir = build_snapshots(directory, args.documents, args.dim, args.index_type)
+
+        def load_mmap():
+            index = ann_index.read_index(os.path.join(mmap_dir, "index.faiss"), mmap=True)
+            docstore = SQLiteDocstore(os.path.join(mmap_dir, "docstore.sqlite3"))
+            return FAISS(_ZeroEmbeddings(args.dim), index, docstore, docstore.index_mapping())
+
+        def load_legacy():
+            return FAISS.load_local(legacy_dir, _ZeroEmbeddings(args.dim))
+
+        # 先测内存映射方式，避免旧方式读入的内存影响RSS增量
+        mmap_store, mmap_seconds, mmap_rss = measure(load_mmap)
+        legacy_store, legacy_seconds, legacy_rss = measure(load_legacy)
+
+        query = np.zeros((1, args.dim), dtype=np.float32)
+        for store in (mmap_store, legacy_store):
+            _, positions = store.index.search(query, 3)
+            assert all(store.docstore.search(store.index_to_docstore_id[int(p)]) for p in positions[0])
+
+        print(f"{'快照格式':<14}{'加载耗时ms':>12}{'RSS增量MiB':>12}")
+        print(f"{'pickle':<14}{legacy_seconds * 1000:>12.1f}{legacy_rss / 2**20:>12.1f}")
+        print(f"{'mmap+sqlite':<14}{mmap_seconds * 1000:>12.1f}{mmap_rss / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+LLM调用并发基准测试
+负责人：组员C
+作用：在本地模拟的DashScope接口上比较两种调用方式在高并发下的吞吐和线程占用：
+      同步SDK（通义千问LangChain适配器）在LLM线程池中调用，与原生异步HTTP客户端在事件循环上并发调用
+
+运行方式：python benchmarks/bench_llm_provider.py [--requests 400] [--concurrency 200] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+# 压测时放开LLM线程池的排队上限，只比较执行方式本身
+os.environ.setdefault("DASHSCOPE_API_KEY", "benchmark-key")
+os.environ.setdefault("EXECUTOR_LLM_QUEUE", "100000")
+
+import dashscope  # noqa: E402
+from langchain_community.llms import Tongyi  # noqa: E402
+
+from config.settings import get_settings  # noqa: E402
+from backend.core.executors import AsyncBoundedLimiter  # noqa: E402
+from backend.core.llm_provider import DashScopeAsyncProvider, LangChainLLMProvider  # noqa: E402
+from benchmarks.fake_dashscope import create_fake_dashscope_app, run_fake_dashscope_server  # noqa: E402
+
+settings = get_settings()
+
+
+async def drive(provider, requests: int, concurrency: int):
+    """以固定并发数发送请求，返回 (总耗时, 峰值线程数)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    peak_threads = threading.active_count()
+
+    async def one(index: int):
+        nonlocal peak_threads
+        async with semaphore:
+            await provider.complete(f"请解释第{index}段代码")
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    await provider.aclose()
+    return elapsed, peak_threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM调用并发基准测试")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    app = create_fake_dashscope_app(latency=args.latency)
+    with run_fake_dashscope_server(app=app) as base_url:
+        dashscope.base_http_api_url = base_url
+        threaded = LangChainLLMProvider(Tongyi(
+            dashscope_api_key="benchmark-key",
+            model_name=settings.model_name,
+            temperature=settings.temperature,
+            max_tokens=512
+        ))
+        native = DashScopeAsyncProvider(
+            api_key="benchmark-key",
+            model_name=settings.model_name,
+            temperature=settings.temperature,
+            max_tokens=512,
+            base_url=base_url,
+            max_connections=args.concurrency,
+            max_keepalive_connections=args.concurrency,
+            # 原生异步客户端的并发上限与压测并发一致，不受LLM线程池大小约束
+            limiter=AsyncBoundedLimiter("benchmark", max_workers=args.concurrency, max_queue=args.requests)
+        )
+
+        print(f"请求数: {args.requests}, 并发: {args.concurrency}, 模拟模型延迟: {args.latency}s, "
+              f"LLM线程池: {settings.executor_llm_workers} 线程")
+        print(f"{'调用方式':<28}{'总耗时(s)':>10}{'吞吐(req/s)':>14}{'服务端峰值并发':>16}{'进程峰值线程':>14}")
+        for name, provider in (("同步SDK + LLM线程池", threaded), ("原生异步HTTP客户端", native)):
+            app.state.stats.max_in_flight = 0
+            elapsed, peak_threads = asyncio.run(drive(provider, args.requests, args.concurrency))
+            print(f"{name:<28}{elapsed:>10.2f}{args.requests / elapsed:>14.1f}"
+                  f"{app.state.stats.max_in_flight:>16}{peak_threads:>14}")
+
+
+if __name__ == "__main__":
+    main()
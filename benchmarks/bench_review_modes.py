@@ -0,0 +1,182 @@
+"""
+代码审查模式基准测试
+负责人：组员C
+作用：在本地模拟的DashScope接口上比较两种审查模式的端到端耗时、LLM调用次数和token用量：
+      agent 模式由ReAct Agent逐轮决定调用flake8和知识库检索工具（每轮一次LLM往返），
+      pipeline 模式并行执行两个工具后把结果注入Prompt，只调用一次LLM
+
+运行方式：python benchmarks/bench_review_modes.py [--reviews 10] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+# 只比较审查模式本身：关闭结果缓存和静态预审查的LLM跳过，不输出Agent中间过程
+os.environ.setdefault("DASHSCOPE_API_KEY", "benchmark-key")
+os.environ["RESULT_CACHE_ENABLED"] = "False"
+os.environ["REVIEW_LLM_POLICY"] = "always"
+os.environ["DEBUG"] = "False"
+
+import dashscope  # noqa: E402
+from langchain.schema.embeddings import Embeddings  # noqa: E402
+from langchain_community.llms import Tongyi  # noqa: E402
+from langchain_community.vectorstores import FAISS  # noqa: E402
+
+from config.settings import get_settings  # noqa: E402
+from backend.core.llm_provider import DashScopeAsyncProvider  # noqa: E402
+from backend.services import code_reviewer  # noqa: E402
+from backend.services.code_reviewer import CodeReviewerService  # noqa: E402
+from backend.tools.rag_tool import RAGTool  # noqa: E402
+from benchmarks.fake_dashscope import create_fake_dashscope_app, run_fake_dashscope_server  # noqa: E402
+
+settings = get_settings()
+
+SAMPLE_CODE = '''
+import os
+
+
+def load_lines(paths, cache={}):
+    text = ""
+    for path in paths:
+        f = open(path)
+        for line in f:
+            text += line
+    try:
+        os.remove("tmp.txt")
+    except:
+        pass
+    return text
+'''
+
+REPORT = (
+    "## 📊 总体评分\n60分，存在资源泄漏和异常处理问题。\n"
+    "## 🐛 潜在Bug分析\n- 文件没有关闭\n- 裸露的except会吞掉所有异常\n"
+    "## 🎨 代码风格检查\n- 可变默认参数\n"
+    "## ⚡ 优化建议\n- 使用join拼接字符串\n"
+    "## 💡 总结建议\n1. 使用with打开文件\n2. 捕获具体异常\n"
+)
+
+# Agent的三轮回复：调用flake8、调用知识库检索、给出最终报告
+AGENT_RESPONSES = [
+    f"Thought: 先检查代码风格\nAction: flake8_analyzer\nAction Input: {SAMPLE_CODE}",
+    "Thought: 再检索相关最佳实践\nAction: knowledge_retriever\nAction Input: 文件操作 异常处理 字符串拼接",
+    f"Thought: 我已经可以给出最终报告\nFinal Answer: {REPORT}",
+]
+
+KNOWLEDGE = [
+    ("使用 with open() 确保文件在异常时也能关闭", "文件操作"),
+    ("捕获具体的异常类型，避免裸露的 except:", "异常处理"),
+    ("循环中拼接字符串应先收集到列表再 ''.join()", "字符串操作"),
+    ("可变对象不要作为函数参数默认值", "函数设计"),
+]
+
+
+class _HashEmbeddings(Embeddings):
+    """按字符哈希生成固定维度向量的嵌入模型，避免访问真实嵌入服务"""
+
+    dim = 64
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * self.dim
+        for char in text:
+            vector[hashlib.md5(char.encode()).digest()[0] % self.dim] += 1.0
+        return vector
+
+
+class _BenchRegistry:
+    """内存中的小型知识库"""
+
+    def __init__(self):
+        self.embeddings = _HashEmbeddings()
+        self.store = FAISS.from_texts(
+            [content for content, _ in KNOWLEDGE],
+            self.embeddings,
+            metadatas=[{"topic": topic, "category": "最佳实践"} for _, topic in KNOWLEDGE]
+        )
+        self.initialized = True
+
+    def get_embeddings(self):
+        return self.embeddings
+
+    def get_vector_store(self):
+        return self.store
+
+
+async def run_reviews(reviewer: CodeReviewerService, reviews: int):
+    """依次审查，返回每次审查的耗时"""
+    latencies = []
+    for index in range(reviews):
+        start = time.perf_counter()
+        await reviewer.review_code(f"{SAMPLE_CODE}\n# 第{index}次审查\n")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure(mode: str, reviews: int, latency: float):
+    """在独立的模拟服务上运行一种审查模式，返回 (耗时列表, 统计信息)"""
+    app = create_fake_dashscope_app(
+        latency=latency,
+        responses=AGENT_RESPONSES if mode == code_reviewer.REVIEW_MODE_AGENT else [REPORT]
+    )
+    with run_fake_dashscope_server(app=app) as base_url:
+        dashscope.base_http_api_url = base_url
+        provider = DashScopeAsyncProvider(
+            api_key="benchmark-key",
+            model_name=settings.model_name,
+            temperature=settings.temperature,
+            max_tokens=settings.max_tokens,
+            base_url=base_url
+        )
+        llm = Tongyi(
+            dashscope_api_key="benchmark-key",
+            model_name=settings.model_name,
+            temperature=settings.temperature,
+            max_tokens=settings.max_tokens
+        )
+        reviewer = CodeReviewerService(llm=llm, provider=provider, mode=mode)
+        if mode == code_reviewer.REVIEW_MODE_AGENT and reviewer.agent_executor is None:
+            raise RuntimeError("Agent初始化失败，无法比较agent模式")
+
+        async def scenario():
+            try:
+                return await run_reviews(reviewer, reviews)
+            finally:
+                await provider.aclose()
+
+        latencies = asyncio.run(scenario())
+    return latencies, app.state.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="代码审查模式基准测试")
+    parser.add_argument("--reviews", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    tool = RAGTool(registry=_BenchRegistry())
+    code_reviewer.get_rag_tool = lambda: tool
+
+    print(f"审查次数: {args.reviews}, 模拟模型延迟: {args.latency}s（token按字符数计）")
+    print(f"{'审查模式':<12}{'平均耗时(s)':>12}{'最大耗时(s)':>12}{'LLM调用/次':>12}"
+          f"{'输入token/次':>14}{'输出token/次':>14}")
+    for mode in (code_reviewer.REVIEW_MODE_AGENT, code_reviewer.REVIEW_MODE_PIPELINE):
+        latencies, stats = measure(mode, args.reviews, args.latency)
+        print(f"{mode:<12}{sum(latencies) / len(latencies):>12.3f}{max(latencies):>12.3f}"
+              f"{stats.requests / args.reviews:>12.1f}{stats.input_tokens / args.reviews:>14.0f}"
+              f"{stats.output_tokens / args.reviews:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+DashScope模拟服务
+负责人：组员C
+作用：在本地模拟通义千问文本生成接口（普通JSON响应和SSE增量输出），
+      可配置响应延迟和逐token间隔，供单元测试和LLM并发压测使用，无需真实API密钥和网络
+
+运行方式：python benchmarks/fake_dashscope.py [--port 8765] [--latency 0.5] [--token-delay 0.01]
+         然后设置 DASHSCOPE_BASE_URL=http://127.0.0.1:8765/api/v1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import socket
+import threading
+import time
+import uuid
+from typing import Iterator, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+DEFAULT_RESPONSE = "这段代码定义了一个函数，通过循环处理输入数据并返回结果。"
+
+
+class FakeDashScopeStats:
+    """模拟服务的请求统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.prompts = []
+        # 模拟服务按字符数计算token用量
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def enter(self, prompt: str):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.prompts.append(prompt)
+        self.input_tokens += len(prompt)
+
+    def exit(self):
+        self.in_flight -= 1
+
+
+def create_fake_dashscope_app(
+    response_text: str = DEFAULT_RESPONSE,
+    latency: float = 0.0,
+    token_delay: float = 0.0,
+    chunk_size: int = 4,
+    fail_status: Optional[int] = None,
+    responses: Optional[List[str]] = None
+) -> FastAPI:
+    """
+    创建模拟DashScope接口的应用
+
+    Args:
+        response_text: 模型回复内容
+        responses: 按请求顺序循环使用的回复列表（模拟Agent多轮对话），设置后忽略 response_text
+        latency: 返回第一个字节前的延迟（秒）
+        token_delay: 流式输出时每个片段之间的间隔（秒）
+        chunk_size: 流式输出时每个片段的字符数
+        fail_status: 设置后所有请求返回该HTTP状态码的错误
+
+    Returns:
+        FastAPI应用，统计信息在 app.state.stats
+    """
+    app = FastAPI()
+    app.state.stats = FakeDashScopeStats()
+
+    @app.post("/api/v1/services/aigc/text-generation/generation")
+    async def generation(request: Request):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"code": "InvalidApiKey", "message": "缺少API密钥"})
+
+        body = await request.json()
+        if fail_status is not None:
+            return JSONResponse(status_code=fail_status, content={"code": "Throttling", "message": "模拟错误"})
+
+        stats = app.state.stats
+        stats.enter(body["input"]["prompt"])
+        text = responses[(stats.requests - 1) % len(responses)] if responses else response_text
+        stats.output_tokens += len(text)
+        request_id = str(uuid.uuid4())
+        streaming = request.headers.get("x-dashscope-sse") == "enable" \
+            or "text/event-stream" in request.headers.get("accept", "")
+        incremental = body.get("parameters", {}).get("incremental_output", False)
+
+        try:
+            await asyncio.sleep(latency)
+        except BaseException:
+            stats.exit()
+            raise
+
+        if not streaming:
+            stats.exit()
+            return {
+                "output": {"text": text, "finish_reason": "stop"},
+                "usage": {"input_tokens": len(body["input"]["prompt"]), "output_tokens": len(text)},
+                "request_id": request_id
+            }
+
+        async def events():
+            try:
+                chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+                sent = ""
+                for index, chunk in enumerate(chunks, 1):
+                    if index > 1 and token_delay:
+                        await asyncio.sleep(token_delay)
+                    sent += chunk
+                    data = {
+                        "output": {
+                            "text": chunk if incremental else sent,
+                            "finish_reason": "stop" if index == len(chunks) else "null"
+                        },
+                        "request_id": request_id
+                    }
+                    yield f"id:{index}\nevent:result\n:HTTP_STATUS/200\ndata:{json.dumps(data, ensure_ascii=False)}\n\n"
+            finally:
+                stats.exit()
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def run_fake_dashscope_server(
+    app: Optional[FastAPI] = None,
+    port: Optional[int] = None,
+    **app_options
+) -> Iterator[str]:
+    """
+    在后台线程中启动模拟服务
+
+    Args:
+        app: 已创建的模拟应用（需要读取统计信息时传入），默认按 app_options 创建
+        port: 监听端口，默认随机选择空闲端口
+        **app_options: 传给 create_fake_dashscope_app 的参数
+
+    Yields:
+        可直接作为 DASHSCOPE_BASE_URL 的地址
+    """
+    port = port or _free_port()
+    app = app or create_fake_dashscope_app(**app_options)
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 10
+    while not server.started and time.time() < deadline:
+        time.sleep(0.01)
+    if not server.started:
+        raise RuntimeError("模拟DashScope服务启动失败")
+
+    try:
+        yield f"http://127.0.0.1:{port}/api/v1"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DashScope模拟服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    args = parser.parse_args()
+
+    app = create_fake_dashscope_app(latency=args.latency, token_delay=args.token_delay)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
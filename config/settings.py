@@ -7,7 +7,7 @@ CodeWise AI 项目配置文件
 import os
 from typing import List, Optional
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import AliasChoices, Field
 
 
 class Settings(BaseSettings):
@@ -18,20 +18,151 @@ class Settings(BaseSettings):
     debug: bool = Field(True, description="调试模式")
     host: str = Field("0.0.0.0", description="服务器主机地址")
     port: int = Field(8000, description="服务器端口")
+    admin_api_key: Optional[str] = Field(None, description="管理接口密钥（请求头 X-Admin-Key），为空时禁用管理接口")
     
     # 数据库配置
     vector_db_path: str = Field("./data/vector_db", description="向量数据库路径")
     knowledge_base_path: str = Field("./data/knowledge_base", description="知识库路径")
+    knowledge_chunk_size: int = Field(800, description="知识库导入时单个文本块的最大字符数")
+    knowledge_chunk_overlap: int = Field(100, description="相邻文本块重叠的字符数")
+    knowledge_ingest_batch_size: int = Field(64, description="知识库导入时每批嵌入的文本块数")
+    knowledge_compact_threshold: int = Field(1000, description="增量日志累计多少条文档后压缩为新的索引快照")
+    knowledge_reload_interval: float = Field(
+        30, description="多worker部署时每隔多少秒同步其他worker导入的文档和压缩后的快照，0表示不同步"
+    )
     
     # 模型配置
     model_name: str = Field("qwen-turbo", description="默认使用的LLM模型")
     max_tokens: int = Field(20000, description="最大token数量")
     temperature: float = Field(0.5, description="模型温度参数")
+
+    # LLM调用配置
+    llm_provider: str = Field(
+        "dashscope",
+        description="LLM调用方式：dashscope（原生异步HTTP客户端）或 langchain（同步SDK，在线程池中调用）"
+    )
+    dashscope_base_url: str = Field(
+        "https://dashscope.aliyuncs.com/api/v1",
+        description="DashScope API地址，可指向本地模拟服务"
+    )
+    llm_max_connections: int = Field(200, description="LLM HTTP连接池最大连接数")
+    llm_max_keepalive_connections: int = Field(50, description="LLM HTTP连接池最多保持的空闲长连接数")
+    llm_keepalive_expiry: float = Field(30, description="空闲长连接保持时间（秒）")
+    llm_request_timeout: float = Field(120, description="单次LLM请求超时时间（秒）")
+    llm_http2: bool = Field(False, description="是否启用HTTP/2（需要安装h2）")
+    llm_async_max_in_flight: int = Field(64, description="dashscope原生异步调用的最大并发请求数（不占用线程，与LLM线程池分开限制）")
+    llm_async_queue: int = Field(256, description="dashscope原生异步调用的最大排队请求数，超出返回429")
     
     # 代码分析配置
-    max_code_length: int = Field(10000, description="最大代码长度限制")
+    max_code_length: int = Field(100000, description="最大代码长度限制（字符数），请求模型和输入校验均使用此值")
     analysis_timeout: int = Field(30, description="分析超时时间（秒）")
-    
+
+    # 大文件分块配置
+    chunk_max_tokens: int = Field(2000, description="单个代码分块的token上限，代码超过此值时按语法树边界分块分析")
+    request_token_budget: int = Field(16000, description="单个请求所有分块Prompt的token总预算，超出预算的分块不调用LLM")
+    chunk_concurrency: int = Field(4, description="单个请求内并发分析的分块数")
+
+    # 代码审查配置
+    review_mode: str = Field(
+        "agent",
+        description="审查模式：agent（由Agent多轮决定调用工具）、pipeline（并行执行flake8和知识库检索后单次调用LLM）"
+    )
+
+    review_output_format: str = Field(
+        "markdown",
+        description="单次调用LLM审查时的输出格式：markdown（分节的文本报告）、json（按Schema输出结构化结果，流式时逐条解析）"
+    )
+
+    # 静态预审查配置
+    review_llm_policy: str = Field(
+        "auto",
+        description="审查时的LLM调用策略：auto（简单或无问题的代码只做规则审查）、always（总是调用LLM）、never（只做规则审查）"
+    )
+    review_trivial_max_lines: int = Field(10, description="非空行数不超过此值的代码视为简单代码，auto策略下不调用LLM")
+    review_clean_max_lines: int = Field(50, description="规则审查未发现问题且非空行数不超过此值时，auto策略下不调用LLM")
+
+    # 静态分析配置
+    flake8_engine: str = Field(
+        "inprocess",
+        description="flake8执行引擎：inprocess（进程内检查）、pool（常驻worker进程池）或 subprocess（子进程回退模式）"
+    )
+    flake8_timeout: float = Field(30, description="单次flake8检查超时时间（秒）")
+    flake8_pool_size: int = Field(2, description="flake8 worker进程池大小")
+    flake8_worker_max_jobs: int = Field(500, description="单个flake8 worker处理多少次请求后回收重建")
+
+    # 结果缓存配置
+    result_cache_enabled: bool = Field(True, description="是否启用解释/审查结果缓存")
+    result_cache_ttl: int = Field(86400, description="结果缓存有效期（秒）")
+    result_cache_max_bytes: int = Field(64 * 1024 * 1024, description="内存结果缓存的最大字节数")
+    result_cache_key_mode: str = Field(
+        "ast",
+        description="解释结果缓存键的指纹模式：text（规范化文本）、ast（AST指纹）或 ast_alpha（AST指纹+局部变量重命名），审查结果始终按原始文本"
+    )
+    result_cache_db_path: Optional[str] = Field(
+        None,
+        description="SQLite磁盘缓存路径，为空时仅使用内存缓存"
+    )
+
+    # 阻塞任务执行器配置（LLM调用 / CPU密集的静态分析 / 嵌入与向量检索）
+    executor_llm_workers: int = Field(8, description="LLM线程池（langchain方式调用）的最大并发数")
+    executor_llm_queue: int = Field(32, description="LLM线程池的最大排队任务数，超出返回429")
+    executor_cpu_workers: int = Field(2, description="静态分析线程池的最大并发数")
+    executor_cpu_queue: int = Field(64, description="静态分析线程池的最大排队任务数，超出返回429")
+    executor_embedding_workers: int = Field(2, description="嵌入与向量检索线程池的最大并发数")
+    executor_embedding_queue: int = Field(32, description="嵌入与向量检索线程池的最大排队任务数，超出返回429")
+    executor_queue_timeout: float = Field(30, description="任务最长排队时间（秒），超时不再执行并返回503")
+
+    # 知识库向量索引配置（类型变更在下次压缩或导入时生效）
+    rag_index_type: str = Field(
+        "flat",
+        description="向量索引类型：flat（精确检索）、sq_fp16、sq_int8（标量量化）、ivf_flat、ivf_pq 或 hnsw"
+    )
+    rag_ivf_nlist: int = Field(0, description="IVF聚类中心数，0表示按 4*sqrt(向量数) 自动选择")
+    rag_ivf_nprobe: int = Field(16, description="IVF检索时访问的聚类数，越大召回越高、越慢")
+    rag_pq_m: int = Field(48, description="IVF-PQ的子空间数，必须整除向量维度（MiniLM为384）")
+    rag_pq_nbits: int = Field(8, description="IVF-PQ每个子空间的编码位数")
+    rag_hnsw_m: int = Field(32, description="HNSW每个节点的邻居数")
+    rag_hnsw_ef_construction: int = Field(200, description="HNSW构建时的候选队列长度")
+    rag_hnsw_ef_search: int = Field(64, description="HNSW检索时的候选队列长度，越大召回越高、越慢")
+    rag_ivf_index_mmap: bool = Field(
+        True,
+        validation_alias=AliasChoices("rag_ivf_index_mmap", "rag_index_mmap"),
+        description="以只读内存映射方式加载IVF类索引快照，多个worker共享物理内存页；"
+                    "flat/sq/hnsw索引不支持映射，无论此项取值都读入各进程内存（旧名 RAG_INDEX_MMAP 仍可用）"
+    )
+
+    # 嵌入向量缓存配置
+    embedding_cache_enabled: bool = Field(True, description="是否缓存查询和知识文档的嵌入向量")
+    embedding_cache_max_entries: int = Field(10000, description="内存嵌入缓存的最大向量数")
+    embedding_cache_path: Optional[str] = Field(
+        None,
+        description="嵌入缓存磁盘目录（内存映射，多个worker进程可共享），为空时仅使用内存缓存"
+    )
+
+    # 知识库检索微批处理配置
+    rag_batch_max_size: int = Field(32, description="异步检索单批最多合并的查询数")
+    rag_batch_wait_ms: float = Field(5, description="异步检索收集同批查询的最长等待时间（毫秒）")
+
+    # 知识库混合检索配置（BM25词法检索 + 向量检索，倒数排名融合）
+    rag_hybrid_enabled: bool = Field(True, description="是否启用BM25与向量检索的混合检索")
+    rag_hybrid_candidates: int = Field(20, description="融合前每种检索方式取回的候选文档数")
+    rag_rrf_k: int = Field(60, description="倒数排名融合的平滑常数")
+    rag_vector_weight: float = Field(1.0, description="融合时向量检索排名的权重")
+    rag_bm25_weight: float = Field(1.0, description="融合时BM25排名的权重")
+    rag_bm25_k1: float = Field(1.5, description="BM25词频饱和参数k1")
+    rag_bm25_b: float = Field(0.75, description="BM25文档长度归一化参数b")
+    rag_lexical_shortcut_ratio: float = Field(
+        2.0,
+        description="BM25第一名得分达到第二名的多少倍时直接返回词法结果、跳过嵌入，0表示不跳过"
+    )
+    rag_lexical_shortcut_min_score: float = Field(1.0, description="跳过嵌入所需的BM25最低得分")
+    rag_review_max_queries: int = Field(3, description="代码审查时按代码结构生成的最多检索查询数")
+    rag_review_top_k: int = Field(3, description="代码审查合并多条查询结果后保留的文档数")
+
+    # 批量分析配置
+    batch_max_items: int = Field(default=50, description="单次批量分析请求的最大条目数")
+    batch_max_concurrency: int = Field(default=4, description="批量分析中静态分析和模型调用的最大并行数")
+
     # CORS配置
     allowed_origins: List[str] = Field(
         default=["http://localhost:3000", "http://127.0.0.1:3000"],
@@ -0,0 +1,52 @@
+"""
+测试公共夹具
+负责人：组员C
+作用：提供不依赖真实嵌入模型的向量存储注册中心，供RAG相关测试共用
+"""
+
+from contextlib import nullcontext
+
+import pytest
+from langchain_community.vectorstores import FAISS
+
+
+class CountingEmbeddings:
+    """按文本长度生成一维向量的假嵌入模型，记录每次 embed_documents 调用"""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class FakeRegistry:
+    """内存中的向量存储注册中心，文档“向量N”的向量为[N]"""
+
+    def __init__(self, size: int = 5):
+        self.embeddings = CountingEmbeddings()
+        self.store = FAISS.from_embeddings(
+            [(f"向量{i}", [float(i)]) for i in range(1, size + 1)],
+            self.embeddings,
+            metadatas=[{"topic": f"主题{i}", "category": "测试"} for i in range(1, size + 1)]
+        )
+        self.embeddings.calls.clear()
+        self.initialized = True
+
+    def get_embeddings(self):
+        return self.embeddings
+
+    def get_vector_store(self):
+        return self.store
+
+    def reading(self):
+        return nullcontext()
+
+
+@pytest.fixture
+def fake_registry():
+    return FakeRegistry()
@@ -0,0 +1,119 @@
+"""
+近似最近邻索引测试文件
+负责人：组员C
+作用：测试各类FAISS索引的构建、训练回退、检索参数以及注册中心按配置重建索引
+"""
+
+import faiss
+import numpy as np
+import pytest
+
+from backend.tools import ann_index
+from backend.tools.rag_tool import RAGTool
+from backend.tools.vector_registry import VectorStoreRegistry
+from config.settings import get_settings
+from tests.conftest import CountingEmbeddings
+
+
+def clustered_vectors(n=3000, dim=16, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)) * 5
+    return (centers[rng.integers(clusters, size=n)] + rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def recall_at_k(index, vectors, queries, k=5):
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    _, found = index.search(queries, k)
+    return np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)])
+
+
+class TestBuildIndex:
+    """build_index 测试"""
+
+    @pytest.mark.parametrize("index_type, min_recall", [
+        ("flat", 1.0),
+        ("sq_fp16", 0.95),
+        ("sq_int8", 0.8),
+        ("ivf_flat", 0.9),
+        ("ivf_pq", 0.3),
+        ("hnsw", 0.9)
+    ])
+    def test_recall(self, index_type, min_recall):
+        vectors = clustered_vectors()
+        queries = vectors[:50] + 0.01
+
+        index = ann_index.build_index(vectors, index_type, nlist=16, pq_m=4)
+
+        assert ann_index.index_type_of(index) == index_type
+        assert index.ntotal == len(vectors)
+        assert recall_at_k(index, vectors, queries) >= min_recall
+
+    def test_scalar_quantization_shrinks_codes(self):
+        vectors = clustered_vectors(n=500)
+        fp16 = ann_index.build_index(vectors, "sq_fp16")
+        int8 = ann_index.build_index(vectors, "sq_int8")
+
+        assert ann_index.describe_index(fp16)["bytes_per_vector"] == vectors.shape[1] * 2
+        assert ann_index.describe_index(int8)["bytes_per_vector"] == vectors.shape[1]
+        np.testing.assert_allclose(ann_index.reconstruct_range(fp16, 0, 10), vectors[:10], rtol=1e-3)
+        # 过滤检索直接扫描量化编码，只返回允许的位置
+        _, found = ann_index.search_subset(int8, vectors[:1], 3, np.array([4, 7, 9], dtype=np.int64))
+        assert sorted(found[0].tolist()) == [4, 7, 9]
+
+    def test_ivf_falls_back_to_flat_when_too_few_vectors(self):
+        index = ann_index.build_index(clustered_vectors(n=20), "ivf_pq", pq_m=4)
+
+        assert ann_index.index_type_of(index) == "flat"
+
+    def test_rejects_unknown_type_and_bad_pq_m(self):
+        with pytest.raises(ValueError):
+            ann_index.build_index(clustered_vectors(n=10), "annoy")
+        with pytest.raises(ValueError):
+            ann_index.build_index(clustered_vectors(), "ivf_pq", pq_m=5)
+
+    def test_search_parameters(self):
+        vectors = clustered_vectors()
+        ivf = ann_index.build_index(vectors, "ivf_flat", nlist=16)
+        hnsw = ann_index.build_index(vectors, "hnsw")
+
+        ann_index.configure_search(ivf, nprobe=4)
+        ann_index.configure_search(hnsw, ef_search=128)
+
+        assert ann_index.describe_index(ivf)["nprobe"] == 4
+        assert ann_index.describe_index(hnsw)["ef_search"] == 128
+
+    def test_reconstruct_keeps_vector_order(self):
+        vectors = clustered_vectors(n=500)
+        index = ann_index.build_index(vectors, "ivf_flat", nlist=4)
+
+        np.testing.assert_allclose(ann_index.reconstruct_all(index), vectors, rtol=1e-5)
+
+    def test_needs_rebuild(self):
+        flat = ann_index.build_index(clustered_vectors(), "flat")
+
+        assert not ann_index.needs_rebuild(flat, "flat")
+        assert ann_index.needs_rebuild(flat, "hnsw")
+
+
+class TestRegistryRebuild:
+    """注册中心按配置重建索引"""
+
+    @pytest.mark.parametrize("index_type", ["hnsw", "sq_int8"])
+    def test_compact_rebuilds_and_persists_index_type(self, tmp_path, monkeypatch, index_type):
+        monkeypatch.setattr(get_settings(), "rag_index_type", index_type)
+        registry = VectorStoreRegistry(vector_db_path=str(tmp_path), embeddings_factory=CountingEmbeddings)
+        before = RAGTool(registry=registry).retrieve("列表推导式", k=2)
+
+        assert registry.needs_rebuild()
+        registry.compact()
+
+        assert not registry.needs_rebuild()
+        after = RAGTool(registry=registry).retrieve("列表推导式", k=2)
+        assert [doc.page_content for doc in after] == [doc.page_content for doc in before]
+
+        reopened = VectorStoreRegistry(vector_db_path=str(tmp_path), embeddings_factory=CountingEmbeddings)
+        assert reopened.get_memory_footprint()["initialized"] is False
+        reopened.get_vector_store()
+        assert reopened.get_memory_footprint()["index_type"] == index_type
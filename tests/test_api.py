@@ -7,7 +7,9 @@
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
+from config.settings import get_settings
 from backend.main import app
+from backend.utils.validation import validate_code_input
 
 # 创建测试客户端
 client = TestClient(app)
@@ -70,6 +72,20 @@ def hello_world():
         response = client.post("/api/v1/explain", json=payload)
         assert response.status_code == 422  # 验证错误
     
+    def test_explain_code_too_long(self):
+        """测试超过配置长度上限的代码"""
+        payload = {
+            "code": "x" * (get_settings().max_code_length + 1),
+            "language": "python",
+            "analysis_type": "explain"
+        }
+        
+        response = client.post("/api/v1/explain", json=payload)
+        assert response.status_code == 422
+        
+        valid, error = validate_code_input(payload["code"])
+        assert not valid and str(get_settings().max_code_length) in error
+    
     def test_explain_invalid_analysis_type(self):
         """测试错误的分析类型"""
         payload = {
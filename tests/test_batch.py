@@ -0,0 +1,134 @@
+"""
+批量分析接口测试文件
+负责人：组员C
+作用：使用假LLM测试批量分析的去重、顺序、NDJSON流式输出以及批量知识库检索
+"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from langchain_community.llms.fake import FakeListLLM
+
+from backend.main import app
+from backend.core.dependencies import get_code_explainer, get_code_reviewer
+from backend.models.schemas import CodeAnalysisRequest
+from backend.services.batch_analyzer import BatchAnalyzerService
+from backend.services.code_explainer import CodeExplainerService
+from backend.services.code_reviewer import CodeReviewerService
+from backend.services.static_reviewer import StaticReviewEngine
+from backend.tools.rag_tool import RAGTool
+
+client = TestClient(app)
+
+
+class TestBatchEndpoint:
+    """批量分析接口测试"""
+
+    def setup_method(self):
+        explain_llm = FakeListLLM(responses=["这段代码定义了一个函数。"])
+        review_llm = FakeListLLM(responses=["## 📊 总体评分\n80分"])
+        app.dependency_overrides[get_code_explainer] = lambda: CodeExplainerService(llm=explain_llm)
+        app.dependency_overrides[get_code_reviewer] = lambda: CodeReviewerService(llm=review_llm)
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    @staticmethod
+    def _items():
+        code = "def batch_demo(x):\n    return x * 2\n"
+        return [
+            {"code": code, "language": "python", "analysis_type": "review"},
+            {"code": "def batch_explain():\n    pass\n", "language": "python", "analysis_type": "explain"},
+            {"code": code + "   ", "language": "python", "analysis_type": "review"},
+        ]
+
+    def test_results_in_request_order_with_dedup(self):
+        response = client.post("/api/v1/batch", json={"items": self._items()})
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total_items"] == 3
+        assert data["unique_items"] == 2
+        assert [item["index"] for item in data["results"]] == [0, 1, 2]
+        assert all(item["status"] == "ok" for item in data["results"])
+
+        review, explain, duplicate = data["results"]
+        assert review["analysis_type"] == "review"
+        assert "overall_score" in review["result"]
+        assert explain["result"]["explanation"] == "这段代码定义了一个函数。"
+        assert duplicate["duplicate_of"] == 0
+        assert duplicate["result"] == review["result"]
+
+    def test_ndjson_stream(self):
+        response = client.post("/api/v1/batch", json={"items": self._items(), "stream": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = [json.loads(line) for line in response.text.strip().split("\n")]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+
+    def test_rejects_too_many_items(self):
+        items = [{"code": f"x = {i}", "language": "python", "analysis_type": "explain"}
+                 for i in range(51)]
+        response = client.post("/api/v1/batch", json={"items": items})
+        assert response.status_code == 400
+
+
+class _JSONReviewProvider:
+    """返回固定JSON审查结果的模型"""
+
+    async def complete(self, prompt: str) -> str:
+        return json.dumps({"overall_score": 80, "summary": "模型审查", "bugs": [],
+                           "style_issues": [], "optimizations": []})
+
+
+class TestBatchKnowledgeRetrieval:
+    """批量审查的知识库检索测试"""
+
+    def test_retrieves_only_for_items_needing_llm(self, monkeypatch):
+        monkeypatch.setattr("backend.services.batch_analyzer.get_result_cache", lambda: None)
+        monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: None)
+        reviewer = CodeReviewerService(provider=_JSONReviewProvider(), mode="pipeline", output_format="json")
+        reviewer.static_engine = StaticReviewEngine(policy="auto")
+        retrieved = []
+
+        def retrieve_knowledge_batch(codes, filters=None):
+            retrieved.append(codes)
+            return [f"知识{i}" for i in range(len(codes))]
+
+        monkeypatch.setattr(reviewer, "retrieve_knowledge_batch", retrieve_knowledge_batch)
+        trivial = "def tiny(x):\n    return x\n"
+        complex_code = "def risky(items):\n" + "".join(
+            f"    try:\n        items[{i}] += 1\n    except:\n        pass\n" for i in range(4)
+        )
+        batch = BatchAnalyzerService(CodeExplainerService(provider=_JSONReviewProvider()), reviewer)
+        items = [CodeAnalysisRequest(code=code, language="python", analysis_type="review")
+                 for code in (trivial, complex_code)]
+
+        async def run():
+            return [result async for result in batch.analyze(items)]
+
+        results = {result.index: result for result in asyncio.run(run())}
+
+        assert retrieved == [[complex_code]]
+        assert results[0].result.llm_skipped
+        assert results[1].result.summary == "模型审查"
+
+
+class TestRetrieveMany:
+    """批量检索测试"""
+
+    def test_single_embedding_call(self, fake_registry):
+        tool = RAGTool(registry=fake_registry)
+
+        results = tool.retrieve_many(["a", "bb", "ccc"])
+
+        assert len(fake_registry.embeddings.calls) == 1
+        assert [docs[0].page_content for docs in results] == ["向量1", "向量2", "向量3"]
+
+    def test_uninitialized_store_returns_empty(self, fake_registry):
+        fake_registry.store = None
+        tool = RAGTool(registry=fake_registry)
+
+        assert tool.retrieve_many(["a", "b"]) == [[], []]
@@ -0,0 +1,117 @@
+"""
+混合检索测试文件
+负责人：组员C
+作用：测试面向代码的分词、BM25打分、倒数排名融合，以及RAGTool词法结果确定时跳过嵌入
+"""
+
+from langchain_community.vectorstores import FAISS
+
+from backend.tools.bm25_index import BM25Index, reciprocal_rank_fusion, tokenize_code
+from backend.tools.rag_tool import RAGTool
+from config.settings import get_settings
+from tests.conftest import CountingEmbeddings, FakeRegistry
+
+
+CODE_DOCS = [
+    ("避免使用裸露的 except: 子句，应捕获具体异常类型", "异常处理"),
+    ("类型检查优先使用 isinstance 而不是 type() 比较", "类型检查"),
+    ("拼接大量字符串时使用 str.join 代替循环中的 +=", "字符串拼接"),
+    ("使用列表推导式替代简单的for循环", "列表推导式"),
+]
+
+
+class CodeRegistry(FakeRegistry):
+    """包含代码最佳实践文档的注册中心，向量按文档序号生成"""
+
+    def __init__(self):
+        self.embeddings = CountingEmbeddings()
+        self.store = FAISS.from_embeddings(
+            [(content, [float(i)]) for i, (content, _) in enumerate(CODE_DOCS)],
+            self.embeddings,
+            metadatas=[{"topic": topic, "category": "测试"} for _, topic in CODE_DOCS]
+        )
+        self.embeddings.calls.clear()
+        self.initialized = True
+
+
+class TestTokenizer:
+    """tokenize_code 测试"""
+
+    def test_splits_identifiers(self):
+        tokens = tokenize_code("def getUserName(user_id): return isinstance(x, int)")
+        assert "getusername" in tokens
+        assert {"get", "user", "name"} <= set(tokens)
+        assert {"user_id", "id"} <= set(tokens)
+        assert "isinstance" in tokens
+
+    def test_chinese_bigrams(self):
+        assert tokenize_code("列表推导") == ["列表", "表推", "推导"]
+        assert tokenize_code("用 join") == ["用", "join"]
+
+
+class TestBM25Index:
+    """BM25Index 测试"""
+
+    def test_exact_token_ranks_first(self):
+        index = BM25Index()
+        index.add([content for content, _ in CODE_DOCS])
+
+        hits = index.search("isinstance", k=3)
+
+        assert hits[0][0] == 1
+        assert len(hits) == 1
+
+    def test_unknown_terms_return_nothing(self):
+        index = BM25Index()
+        index.add(["except 子句"])
+        assert index.search("yield", k=3) == []
+        assert BM25Index().search("except", k=3) == []
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], [1.0, 1.0], k=60)
+        assert fused[0] == 1
+        assert fused.index(3) < fused.index(2)
+        assert reciprocal_rank_fusion([[1, 2], [2, 1]], [1.0, 3.0], k=60)[0] == 2
+
+
+class TestHybridRetrieval:
+    """RAGTool 混合检索测试"""
+
+    def test_confident_lexical_query_skips_embedding(self):
+        registry = CodeRegistry()
+        tool = RAGTool(registry=registry)
+
+        docs = tool.retrieve("isinstance", k=2)
+
+        assert docs[0].metadata["topic"] == "类型检查"
+        assert registry.embeddings.calls == []
+        assert tool.get_knowledge_stats()["hybrid_retrieval"]["lexical_shortcuts"] == 1
+
+    def test_ambiguous_queries_fuse_in_one_embedding_call(self, fake_registry):
+        tool = RAGTool(registry=fake_registry)
+
+        results = tool.retrieve_many(["a", "向量"], k=2)
+
+        assert fake_registry.embeddings.calls == [["a", "向量"]]
+        assert [doc.page_content for doc in results[0]] == ["向量1", "向量2"]
+        assert len(results[1]) == 2
+
+    def test_new_documents_are_indexed_incrementally(self):
+        registry = CodeRegistry()
+        tool = RAGTool(registry=registry)
+        tool.retrieve("except", k=1)
+
+        registry.store.add_embeddings([("生成器表达式 yield 可以节省内存", [9.0])], metadatas=[{"topic": "生成器"}])
+
+        assert tool.retrieve("yield", k=1)[0].metadata["topic"] == "生成器"
+        assert tool.lexical.get_stats()["documents"] == len(CODE_DOCS) + 1
+
+    def test_disabled_uses_vectors_only(self, fake_registry, monkeypatch):
+        monkeypatch.setattr(get_settings(), "rag_hybrid_enabled", False)
+        tool = RAGTool(registry=fake_registry)
+
+        docs = tool.retrieve("向量", k=1)
+
+        assert fake_registry.embeddings.calls == [["向量"]]
+        assert docs[0].page_content == "向量2"
+        assert tool.lexical.get_stats()["documents"] == 0
@@ -0,0 +1,114 @@
+"""
+代码分析工具测试文件
+负责人：组员C
+作用：测试单次解析的 CodeAnalysis 结果、兼容原有静态方法的包装，以及多线程解析的串行化
+"""
+
+import threading
+import time
+
+from backend.utils import code_analyzer
+from backend.utils.code_analyzer import CodeAnalyzer, parse_source
+
+
+SAMPLE_CODE = '''
+import os
+from typing import List as L
+
+
+class Greeter(object):
+    """问候类"""
+
+    def greet(self, name):
+        if name:
+            return f"Hello, {name}"
+        return "Hello"
+
+    async def fetch(self):
+        for _ in range(3):
+            pass
+
+
+def main():
+    try:
+        Greeter().greet("world")
+    except Exception:
+        pass
+'''
+
+
+class TestCodeAnalysis:
+    """单次解析测试"""
+
+    def test_single_pass_fills_all_fields(self):
+        analysis = CodeAnalyzer.analyze(SAMPLE_CODE)
+
+        assert analysis.is_valid
+        assert [f["name"] for f in analysis.functions] == ["main", "greet", "fetch"]
+        assert analysis.functions[2]["is_async"] is True
+        assert analysis.classes[0]["methods"] == ["greet", "fetch"]
+        assert analysis.classes[0]["base_classes"] == ["object"]
+        assert [i["module"] for i in analysis.imports] == ["os", "typing"]
+        assert analysis.complexity == {
+            "functions": 2,
+            "classes": 1,
+            "if_statements": 1,
+            "loops": 1,
+            "try_except": 1
+        }
+        assert analysis.syntax_errors == []
+
+    def test_uses_slots(self):
+        analysis = CodeAnalyzer.analyze("x = 1")
+        assert not hasattr(analysis, "__dict__")
+
+    def test_syntax_error(self):
+        analysis = CodeAnalyzer.analyze("def broken(:\n    pass")
+        assert not analysis.is_valid
+        assert analysis.syntax_errors[0]["type"] == "SyntaxError"
+        assert analysis.syntax_errors[0]["line_number"] == 1
+
+
+class TestWrappers:
+    """原有静态方法兼容性测试"""
+
+    def test_wrappers_match_analysis(self):
+        analysis = CodeAnalyzer.analyze(SAMPLE_CODE)
+        assert CodeAnalyzer.extract_functions(SAMPLE_CODE) == analysis.functions
+        assert CodeAnalyzer.extract_imports(SAMPLE_CODE) == analysis.imports
+        assert CodeAnalyzer.calculate_complexity(SAMPLE_CODE) == analysis.complexity
+        assert CodeAnalyzer.check_syntax_errors(SAMPLE_CODE) == []
+
+    def test_wrappers_on_invalid_code(self):
+        code = "def broken(:\n    pass"
+        assert CodeAnalyzer.extract_functions(code) == []
+        assert CodeAnalyzer.extract_classes(code) == []
+        assert "error" in CodeAnalyzer.calculate_complexity(code)
+        assert len(CodeAnalyzer.check_syntax_errors(code)) == 1
+
+
+class TestParseSource:
+    """parse_source 测试"""
+
+    def test_threads_parse_one_at_a_time(self, monkeypatch):
+        real_parse = code_analyzer.ast.parse
+        active, peak = [0], [0]
+        counter_lock = threading.Lock()
+
+        def slow_parse(*args, **kwargs):
+            with counter_lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with counter_lock:
+                active[0] -= 1
+            return real_parse(*args, **kwargs)
+
+        monkeypatch.setattr(code_analyzer.ast, "parse", slow_parse)
+        threads = [threading.Thread(target=parse_source, args=(SAMPLE_CODE,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 1
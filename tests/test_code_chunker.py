@@ -0,0 +1,160 @@
+"""
+代码分块测试文件
+负责人：组员C
+作用：测试token估算、按语法树边界分块、token预算选择，以及大文件分块审查和分块解释的合并结果
+"""
+
+import asyncio
+import json
+import textwrap
+
+from config.settings import get_settings
+from backend.services.code_explainer import CodeExplainerService
+from backend.services.code_reviewer import CodeReviewerService
+from backend.tools.rag_tool import RAGTool
+from backend.utils.code_chunker import (
+    CodeChunk, chunk_code, estimate_tokens, gather_limited, select_within_budget
+)
+
+
+def _function(name: str, body_lines: int = 30) -> str:
+    return f"def {name}(x):\n" + "    x += 1\n" * body_lines + "    return x\n"
+
+
+LARGE_CODE = "import os\n\n\n" + "\n\n".join(_function(f"step{i}") for i in range(6)) + (
+    "\n\nclass Pipeline:\n    '''流水线'''\n\n"
+    + "\n".join(f"    def run{i}(self):\n" + "        y = 1\n" * 40 for i in range(3))
+)
+
+
+class TestEstimateTokens:
+    """estimate_tokens 测试"""
+
+    def test_ascii_and_cjk(self):
+        assert estimate_tokens("abcdefgh") == 2
+        assert estimate_tokens("代码审查") == 4
+        assert estimate_tokens("") == 1
+
+
+class TestChunkCode:
+    """chunk_code 测试"""
+
+    def test_chunks_cover_file_on_ast_boundaries(self):
+        chunks = chunk_code(LARGE_CODE, 300)
+        lines = LARGE_CODE.rstrip("\n").split("\n")
+
+        assert chunks[0].start_line == 1
+        assert chunks[-1].end_line == len(lines)
+        for previous, current in zip(chunks, chunks[1:]):
+            assert current.start_line == previous.end_line + 1
+        for chunk in chunks:
+            original = "\n".join(lines[chunk.start_line - 1:chunk.end_line]) + "\n"
+            assert chunk.code == textwrap.dedent(original)
+            assert chunk.tokens <= 300
+            compile(chunk.code, chunk.label, "exec")
+
+    def test_large_class_split_by_method(self):
+        chunks = chunk_code(LARGE_CODE, 300)
+        names = [name for chunk in chunks for name in chunk.names]
+
+        assert names[:6] == [f"step{i}" for i in range(6)]
+        assert "Pipeline.run2" in names
+
+    def test_small_code_single_chunk(self):
+        chunks = chunk_code(_function("tiny", 2), 300)
+        assert len(chunks) == 1 and chunks[0].names == ["tiny"]
+
+    def test_invalid_code_split_by_lines(self):
+        chunks = chunk_code("def broken(:\n" + "    x = 1\n" * 50, 40)
+        assert len(chunks) > 1
+        assert chunks[-1].end_line == 51
+
+    def test_line_mapping(self):
+        chunk = CodeChunk("a = 1\nb = 2\n", 10, 11)
+        assert chunk.to_original_line(2) == 11
+        assert chunk.to_original_line(3) is None
+
+
+class TestBudget:
+    """select_within_budget / gather_limited 测试"""
+
+    def test_budget_keeps_order_and_first_chunk(self):
+        chunks = [CodeChunk("x" * 400, i * 10 + 1, i * 10 + 10) for i in range(3)]
+
+        selected, skipped = select_within_budget(chunks, budget=250, overhead=20)
+
+        assert selected == chunks[:2] and skipped == chunks[2:]
+        assert select_within_budget(chunks, budget=1)[0] == chunks[:1]
+
+    def test_gather_limited_respects_concurrency(self):
+        running, peak = 0, 0
+
+        async def worker(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return item * 2
+
+        assert asyncio.run(gather_limited(list(range(6)), worker, 2)) == [0, 2, 4, 6, 8, 10]
+        assert peak == 2
+
+
+class ChunkEchoProvider:
+    """按Prompt中的代码返回JSON审查结果：每个分块报告其第2行的问题"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return json.dumps({
+            "overall_score": 80,
+            "summary": "分块审查",
+            "bugs": [{"line_number": 2, "description": "分块第2行的问题", "severity": "low", "suggestion": "修改"}],
+            "style_issues": [],
+            "optimizations": []
+        }, ensure_ascii=False)
+
+
+class TestChunkedAnalysis:
+    """大文件分块审查和解释测试"""
+
+    def test_review_maps_lines_and_respects_budget(self, fake_registry, monkeypatch):
+        tool = RAGTool(registry=fake_registry)
+        monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+        monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: None)
+        monkeypatch.setattr(get_settings(), "chunk_max_tokens", 300)
+        code = LARGE_CODE + "\ntry:\n    pass\nexcept:\n    pass\n"
+        chunks = chunk_code(code, 300)
+        provider = ChunkEchoProvider()
+        reviewer = CodeReviewerService(provider=provider, mode="pipeline", output_format="json")
+        monkeypatch.setattr(get_settings(), "request_token_budget", 1)
+
+        result = asyncio.run(reviewer.review_code(code))
+
+        # 预算只够第一个分块调用LLM
+        assert len(provider.prompts) == 1
+        llm_bug_lines = [bug.line_number for bug in result["bugs"] if bug.description == "分块第2行的问题"]
+        assert llm_bug_lines == [chunks[0].start_line + 1]
+        # 规则审查覆盖整个文件，包括超出预算的分块
+        assert any(bug.severity == "high" and bug.line_number > chunks[-2].end_line for bug in result["bugs"])
+        assert f"共分为 {len(chunks)} 块" in result["summary"]
+        assert f"其中 {len(chunks) - 1} 块" in result["summary"]
+
+    def test_explanation_sections_per_chunk(self, monkeypatch):
+        monkeypatch.setattr("backend.services.code_explainer.get_result_cache", lambda: None)
+        monkeypatch.setattr(get_settings(), "chunk_max_tokens", 300)
+
+        class EchoProvider:
+            async def complete(self, prompt: str) -> str:
+                return "这一部分定义了函数，并使用了循环。"
+
+        explainer = CodeExplainerService(provider=EchoProvider())
+        result = asyncio.run(explainer.explain_code(LARGE_CODE))
+        chunks = chunk_code(LARGE_CODE, 300)
+
+        assert result["explanation"].count("### 第") == len(chunks)
+        assert f"### {chunks[0].label}" in result["explanation"]
+        assert "函数" in result["key_concepts"]
@@ -0,0 +1,148 @@
+"""
+嵌入向量缓存测试文件
+负责人：组员C
+作用：测试嵌入缓存的命中、LRU淘汰、磁盘层持久化（含多进程共享目录）以及只计算未命中文本
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from backend.tools.embedding_cache import CachedEmbeddings, EmbeddingCache, embedding_key
+from backend.tools.rag_tool import RAGTool
+from tests.conftest import CountingEmbeddings
+
+
+class TestEmbeddingCache:
+    """EmbeddingCache 测试"""
+
+    def test_only_misses_are_computed(self):
+        base = CountingEmbeddings()
+        embeddings = CachedEmbeddings(base, "test-model", EmbeddingCache())
+
+        first = embeddings.embed_documents(["a", "bb"])
+        second = embeddings.embed_documents(["bb", "ccc", "a", "ccc"])
+
+        assert first == [[1.0], [2.0]]
+        assert second == [[2.0], [3.0], [1.0], [3.0]]
+        assert base.calls == [["a", "bb"], ["ccc"]]
+
+    def test_whitespace_variants_share_entry(self):
+        assert embedding_key("m", "def f():\n    pass") == embedding_key("m", "  def f():   \n  pass\n")
+        assert embedding_key("m", "x") != embedding_key("other", "x")
+        assert embedding_key("m", "x", "query") != embedding_key("m", "x", "document")
+
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put_many({"a": np.ones(2, dtype=np.float32), "b": np.ones(2, dtype=np.float32)})
+        cache.get_many(["a"])
+        cache.put_many({"c": np.ones(2, dtype=np.float32)})
+
+        assert [vector is not None for vector in cache.get_many(["a", "b", "c"])] == [True, False, True]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_stats_report_hit_rate_and_saved_time(self):
+        cache = EmbeddingCache()
+        embeddings = CachedEmbeddings(CountingEmbeddings(), "test-model", cache)
+
+        embeddings.embed_query("a")
+        embeddings.embed_query("a")
+        embeddings.embed_query("a")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 4)
+        assert stats["saved_ms"] >= 0
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        vector = np.arange(4, dtype=np.float32)
+        EmbeddingCache(disk_path=str(tmp_path)).put_many({"k": vector})
+
+        reopened = EmbeddingCache(disk_path=str(tmp_path))
+        restored = reopened.get_many(["k", "missing"])
+
+        np.testing.assert_array_equal(restored[0], vector)
+        assert restored[1] is None
+        assert reopened.get_stats()["disk_hits"] == 1
+        assert reopened.get_stats()["disk_entries"] == 1
+
+    def test_disk_tier_truncates_partial_write(self, tmp_path):
+        cache = EmbeddingCache(disk_path=str(tmp_path))
+        cache.put_many({"a": np.ones(2, dtype=np.float32), "b": np.zeros(2, dtype=np.float32)})
+        with open(tmp_path / "keys.txt", "a", encoding="utf-8") as f:
+            f.write("orphan\n")
+
+        reopened = EmbeddingCache(disk_path=str(tmp_path))
+
+        assert reopened.get_stats()["disk_entries"] == 2
+        np.testing.assert_array_equal(reopened.get_many(["b"])[0], np.zeros(2, dtype=np.float32))
+
+
+def _write_vectors(directory: str, prefix: int, batches: int):
+    """子进程：分批写入向量（各分量均为其编号），清空内存层后从磁盘层读回校验"""
+    cache = EmbeddingCache(disk_path=directory)
+    expected = {}
+    for batch in range(batches):
+        items = {
+            f"{prefix}-{batch}-{i}": np.full(4, prefix * 1000 + batch * 10 + i, dtype=np.float32)
+            for i in range(5)
+        }
+        cache.put_many(items)
+        expected.update(items)
+    cache.clear()
+    for key, vector in zip(expected, cache.get_many(list(expected))):
+        if vector is None or not np.array_equal(vector, expected[key]):
+            raise SystemExit(1)
+
+
+class TestSharedDiskTier:
+    """多个进程共享磁盘层目录"""
+
+    def test_concurrent_processes_get_distinct_rows(self, tmp_path):
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=_write_vectors, args=(str(tmp_path), prefix, 20))
+            for prefix in (1, 2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+
+        reopened = EmbeddingCache(disk_path=str(tmp_path))
+        keys = [f"{prefix}-{batch}-{i}" for prefix in (1, 2) for batch in range(20) for i in range(5)]
+        vectors = reopened.get_many(keys)
+        assert reopened.get_stats()["disk_entries"] == len(keys)
+        for key, vector in zip(keys, vectors):
+            prefix, batch, i = map(int, key.split("-"))
+            np.testing.assert_array_equal(vector, np.full(4, prefix * 1000 + batch * 10 + i, dtype=np.float32))
+
+    def test_reads_rows_appended_by_other_process(self, tmp_path):
+        reader = EmbeddingCache(disk_path=str(tmp_path))
+        writer = EmbeddingCache(disk_path=str(tmp_path))
+        writer.put_many({"a": np.ones(2, dtype=np.float32)})
+        reader.put_many({"b": np.zeros(2, dtype=np.float32)})
+        writer.put_many({"c": np.full(2, 3, dtype=np.float32)})
+        reader.clear()
+        writer.clear()
+
+        np.testing.assert_array_equal(reader.get_many(["b"])[0], np.zeros(2, dtype=np.float32))
+        np.testing.assert_array_equal(reader.get_many(["a"])[0], np.ones(2, dtype=np.float32))
+        np.testing.assert_array_equal(reader.get_many(["c"])[0], np.full(2, 3, dtype=np.float32))
+        np.testing.assert_array_equal(writer.get_many(["b"])[0], np.zeros(2, dtype=np.float32))
+
+
+class TestRAGToolEmbeddingCache:
+    """RAGTool 使用缓存嵌入模型"""
+
+    def test_repeated_query_skips_model(self, fake_registry):
+        base = fake_registry.embeddings
+        fake_registry.embeddings = CachedEmbeddings(base, "test-model", EmbeddingCache())
+        tool = RAGTool(registry=fake_registry)
+
+        tool.retrieve("bb")
+        tool.retrieve("bb")
+
+        assert base.calls == [["bb"]]
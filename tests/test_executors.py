@@ -0,0 +1,174 @@
+"""
+有界执行器测试文件
+负责人：组员C
+作用：测试阻塞任务线程池和协程并发限制器的排队上限、排队超时、指标统计以及接口层的429/503转换
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.core.dependencies import get_code_explainer
+from backend.core.executors import AsyncBoundedLimiter, BoundedExecutor, ExecutorSaturatedError
+
+client = TestClient(app)
+
+
+class TestBoundedExecutor:
+    """有界线程池测试"""
+
+    def setup_method(self):
+        self.release = threading.Event()
+        self.executor = BoundedExecutor("test", max_workers=1, max_queue=1)
+
+    def teardown_method(self):
+        self.release.set()
+        self.executor.shutdown()
+
+    def _block(self):
+        self.release.wait(5)
+        return "done"
+
+    def _wait_until_active(self):
+        deadline = time.time() + 5
+        while self.executor.get_metrics()["active"] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_rejects_when_queue_full(self):
+        running = self.executor.submit(self._block)
+        self._wait_until_active()
+        queued = self.executor.submit(self._block)
+
+        with pytest.raises(ExecutorSaturatedError) as exc_info:
+            self.executor.submit(self._block)
+        assert exc_info.value.status_code == 429
+
+        metrics = self.executor.get_metrics()
+        assert metrics["active"] == 1
+        assert metrics["queued"] == 1
+        assert metrics["utilization"] == 1.0
+        assert metrics["rejected"] == 1
+
+        self.release.set()
+        assert running.result(5) == "done"
+        assert queued.result(5) == "done"
+        assert self.executor.get_metrics()["completed"] == 2
+
+    def test_queue_timeout_skips_stale_tasks(self):
+        self.executor.queue_timeout = 0.05
+        self.executor.submit(self._block)
+        self._wait_until_active()
+        stale = self.executor.submit(lambda: "never")
+        time.sleep(0.1)
+        self.release.set()
+
+        with pytest.raises(ExecutorSaturatedError) as exc_info:
+            stale.result(5)
+        assert exc_info.value.status_code == 503
+        assert self.executor.get_metrics()["timed_out"] == 1
+
+    def test_cancelled_queued_tasks_release_slots(self):
+        self.executor.max_queue = 2
+        self.executor.submit(self._block)
+        self._wait_until_active()
+
+        async def cancel_queued():
+            calls = [asyncio.ensure_future(self.executor.run(lambda: "never")) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            for call in calls:
+                call.cancel()
+            await asyncio.gather(*calls, return_exceptions=True)
+
+        asyncio.run(cancel_queued())
+
+        metrics = self.executor.get_metrics()
+        assert metrics["queued"] == 0
+        assert metrics["cancelled"] == 2
+        self.release.set()
+        assert self.executor.submit(lambda: "ok").result(5) == "ok"
+        assert self.executor.get_metrics()["queued"] == 0
+
+    def test_async_run(self):
+        self.release.set()
+        assert asyncio.run(self.executor.run(lambda x, y: x + y, 1, y=2)) == 3
+
+    def test_rejects_after_shutdown(self):
+        self.executor.shutdown()
+        with pytest.raises(ExecutorSaturatedError) as exc_info:
+            self.executor.submit(lambda: None)
+        assert exc_info.value.status_code == 503
+
+
+class TestAsyncBoundedLimiter:
+    """协程并发限制器测试"""
+
+    def test_queue_timeout_returns_503(self):
+        limiter = AsyncBoundedLimiter("test", max_workers=1, max_queue=1, queue_timeout=0.05)
+
+        async def run():
+            async with limiter.slot():
+                with pytest.raises(ExecutorSaturatedError) as exc_info:
+                    async with limiter.slot():
+                        pass
+                return exc_info.value
+
+        assert asyncio.run(run()).status_code == 503
+        metrics = limiter.get_metrics()
+        assert metrics["timed_out"] == 1
+        assert metrics["completed"] == 1
+        assert metrics["active"] == 0 and metrics["queued"] == 0
+
+    def test_cancelled_waiters_release_queue(self):
+        limiter = AsyncBoundedLimiter("test", max_workers=1, max_queue=2)
+
+        async def hold(release: asyncio.Event):
+            async with limiter.slot():
+                await release.wait()
+
+        async def run():
+            release = asyncio.Event()
+            holder = asyncio.ensure_future(hold(release))
+            await asyncio.sleep(0)
+            waiters = [asyncio.ensure_future(hold(release)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            assert limiter.get_metrics()["queued"] == 2
+            waiters[0].cancel()
+            await asyncio.sleep(0)
+            release.set()
+            await asyncio.gather(holder, *waiters, return_exceptions=True)
+
+        asyncio.run(run())
+        metrics = limiter.get_metrics()
+        assert metrics["cancelled"] == 1
+        assert metrics["completed"] == 2
+        assert metrics["active"] == 0 and metrics["queued"] == 0
+
+
+class _SaturatedExplainer:
+    async def explain_code(self, code, language="python"):
+        raise ExecutorSaturatedError("llm", 429, "排队任务已达上限 32")
+
+
+class TestSaturationResponse:
+    """接口层饱和响应测试"""
+
+    def setup_method(self):
+        app.dependency_overrides[get_code_explainer] = lambda: _SaturatedExplainer()
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    def test_saturated_pool_returns_429(self):
+        payload = {"code": "print(1)", "language": "python", "analysis_type": "explain"}
+        response = client.post("/api/v1/explain", json=payload)
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+
+    def test_status_reports_executor_metrics(self):
+        response = client.get("/api/v1/status")
+        assert response.status_code == 200
+        assert isinstance(response.json()["executors"], dict)
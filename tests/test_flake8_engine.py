@@ -0,0 +1,128 @@
+"""
+Flake8检查引擎测试文件
+负责人：组员C
+作用：测试进程内检查引擎、worker进程池的结果与flake8命令行保持一致，以及worker创建失败后的补齐
+"""
+
+import shutil
+
+import pytest
+
+from backend.tools.flake8_engine import InProcessFlake8Engine, SubprocessFlake8Engine
+from backend.tools import flake8_pool
+from backend.tools.flake8_pool import Flake8WorkerError, Flake8WorkerPool
+
+
+SAMPLE_CODE = """import os
+def badFunction(x,y):
+  result=x+y
+  return result  # noqa: E111
+"""
+
+
+# 制表符缩进过深的代码块（E117），以及先用空格缩进、后混用制表符的代码块（E101/W191）
+TAB_INDENTED_CODE = """x = 1
+if x:
+\t\t\t# c
+\t\t\tpass
+if x:
+  # c
+  pass
+while x:
+\t pass
+def f():
+        y = 1
+for y in x:
+\t\ty = 1
+"""
+
+
+def _codes(issues):
+    return [(issue["line"], issue["column"], issue["code"]) for issue in issues]
+
+
+class TestInProcessEngine:
+    """进程内引擎测试"""
+
+    def test_detects_style_and_logic_issues(self):
+        codes = {issue["code"] for issue in InProcessFlake8Engine().check(SAMPLE_CODE)}
+        assert "F401" in codes
+        assert "E302" in codes
+        assert "E231" in codes
+
+    def test_respects_noqa(self):
+        issues = InProcessFlake8Engine().check(SAMPLE_CODE)
+        assert not [i for i in issues if i["line"] == 4 and i["code"] == "E111"]
+
+    def test_clean_code(self):
+        assert InProcessFlake8Engine().check("x = 1\n") == []
+
+    def test_syntax_error(self):
+        issues = InProcessFlake8Engine().check("def f(:\n    pass\n")
+        assert [issue["code"] for issue in issues] == ["E999"]
+
+    @pytest.mark.skipif(shutil.which("flake8") is None, reason="flake8命令不可用")
+    def test_matches_subprocess_engine(self):
+        assert _codes(InProcessFlake8Engine().check(SAMPLE_CODE)) == \
+            _codes(SubprocessFlake8Engine().check(SAMPLE_CODE))
+
+    @pytest.mark.skipif(shutil.which("flake8") is None, reason="flake8命令不可用")
+    @pytest.mark.parametrize("code", [
+        TAB_INDENTED_CODE,
+        "def f():\n\t\tx = 1\n\t\treturn x\n",
+        "def f(:\n    pass\n",
+        "def g(x):\n\t\tclass A:\n",
+    ])
+    def test_matches_subprocess_engine_on_tabs_and_syntax_errors(self, code):
+        inprocess = _codes(InProcessFlake8Engine().check(code))
+        assert inprocess == _codes(SubprocessFlake8Engine().check(code))
+
+    def test_tab_indentation_and_syntax_error_positions(self):
+        issues = _codes(InProcessFlake8Engine().check(TAB_INDENTED_CODE))
+        assert (3, 4, "E117") in issues
+        assert (7, 1, "E101") in issues
+        assert (13, 3, "E117") in issues
+        assert (11, 9, "E117") not in issues
+        assert _codes(InProcessFlake8Engine().check("def f(:\n    pass\n")) == [(1, 8, "E999")]
+
+
+class TestWorkerPool:
+    """worker进程池测试"""
+
+    def test_pool_matches_inprocess_and_recycles(self):
+        pool = Flake8WorkerPool(size=1, job_timeout=10, max_jobs_per_worker=2)
+        try:
+            expected = _codes(InProcessFlake8Engine().check(SAMPLE_CODE))
+            for _ in range(3):
+                assert _codes(pool.check(SAMPLE_CODE)) == expected
+
+            metrics = pool.get_metrics()
+            assert metrics["jobs_completed"] == 3
+            assert metrics["workers_recycled"] == 1
+            assert metrics["queue_depth"] == 0
+        finally:
+            pool.shutdown()
+
+    def test_recreates_workers_after_failed_respawn(self, monkeypatch):
+        pool = Flake8WorkerPool(size=1, job_timeout=10, max_jobs_per_worker=1)
+        try:
+            pool.start()
+            expected = _codes(InProcessFlake8Engine().check(SAMPLE_CODE))
+
+            def fail_spawn(worker_id, startup_timeout):
+                raise Flake8WorkerError("模拟启动失败")
+
+            with monkeypatch.context() as patch:
+                patch.setattr(flake8_pool, "_Flake8Worker", fail_spawn)
+                # 检查成功后回收worker，替换的worker创建失败
+                assert _codes(pool.check(SAMPLE_CODE)) == expected
+                assert pool.get_metrics()["workers"] == 0
+                with pytest.raises(Flake8WorkerError):
+                    pool.check(SAMPLE_CODE)
+
+            assert _codes(pool.check(SAMPLE_CODE)) == expected
+            metrics = pool.get_metrics()
+            assert metrics["spawn_failures"] == 2
+            assert metrics["workers"] == 1
+        finally:
+            pool.shutdown()
@@ -0,0 +1,217 @@
+"""
+知识库导入测试文件
+负责人：组员C
+作用：测试知识库文件的切分、按批嵌入、重复导入跳过、增量日志重放与压缩，以及管理接口
+"""
+
+import json
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain.schema import Document
+
+from backend.main import app
+from backend.core.dependencies import get_knowledge_ingestion
+from backend.tools.knowledge_ingest import KnowledgeIngestionPipeline
+from backend.tools.vector_registry import INGEST_LOG_NAME, VectorStoreRegistry
+from config.settings import get_settings
+from tests.conftest import CountingEmbeddings
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    root = tmp_path / "knowledge"
+    (root / "性能优化").mkdir(parents=True)
+    (root / "性能优化" / "loops.md").write_text(
+        "# 循环\n\n## 列表推导式\n\n用列表推导式代替append循环。\n\n## 生成器\n\n大数据集使用生成器表达式。\n",
+        encoding="utf-8"
+    )
+    (root / "tips.jsonl").write_text(
+        json.dumps({"content": "用with语句管理文件。", "topic": "文件操作", "category": "最佳实践"}, ensure_ascii=False)
+        + "\n不是JSON\n"
+        + json.dumps({"content": "捕获具体异常类型。", "topic": "异常处理"}, ensure_ascii=False) + "\n",
+        encoding="utf-8"
+    )
+    (root / "example.py").write_text('"""使用enumerate遍历"""\n\nfor i, x in enumerate(items):\n    print(i, x)\n', encoding="utf-8")
+    (root / "ignored.txt").write_text("不支持的格式", encoding="utf-8")
+    return root
+
+
+def make_registry(path):
+    return VectorStoreRegistry(vector_db_path=str(path), embeddings_factory=CountingEmbeddings)
+
+
+class TestKnowledgeIngestion:
+    """KnowledgeIngestionPipeline 测试"""
+
+    def test_ingest_files_in_batches(self, tmp_path, knowledge_dir):
+        registry = make_registry(tmp_path / "db")
+        base_total = registry.get_vector_store().index.ntotal
+        pipeline = KnowledgeIngestionPipeline(registry=registry, batch_size=2)
+
+        report = pipeline.run(str(knowledge_dir))
+
+        assert report["files"] == 3
+        assert report["chunks"] == 5
+        assert report["added"] == 5
+        assert report["batches"] == 3
+        assert [len(calls) for calls in registry.get_embeddings().calls[-3:]] == [2, 2, 1]
+        assert registry.get_vector_store().index.ntotal == base_total + 5
+
+        store = registry.get_vector_store()
+        docs = [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+        topics = {doc.metadata["topic"]: doc.metadata for doc in docs if "source" in doc.metadata}
+        assert topics["列表推导式"]["category"] == "性能优化"
+        assert topics["文件操作"]["category"] == "最佳实践"
+        assert topics["异常处理"]["category"] == "其他"
+        assert "使用enumerate遍历" in topics
+
+    def test_rerun_skips_existing_chunks(self, tmp_path, knowledge_dir):
+        registry = make_registry(tmp_path / "db")
+        pipeline = KnowledgeIngestionPipeline(registry=registry)
+        pipeline.run(str(knowledge_dir))
+        calls = len(registry.get_embeddings().calls)
+
+        report = pipeline.run(str(knowledge_dir))
+
+        assert report["added"] == 0
+        assert report["skipped"] == 5
+        assert len(registry.get_embeddings().calls) == calls
+
+    def test_log_replayed_on_restart_without_rewriting_snapshot(self, tmp_path, knowledge_dir):
+        db_path = tmp_path / "db"
+        registry = make_registry(db_path)
+        registry.get_vector_store()
+        snapshot_mtime = os.path.getmtime(db_path / "index.faiss")
+
+        KnowledgeIngestionPipeline(registry=registry).run(str(knowledge_dir))
+        total = registry.get_vector_store().index.ntotal
+
+        assert os.path.getmtime(db_path / "index.faiss") == snapshot_mtime
+        assert registry.get_memory_footprint()["log_records"] == 5
+
+        with open(db_path / INGEST_LOG_NAME, "a", encoding="utf-8") as f:
+            f.write('{"id": "截断的记录')
+
+        reopened = make_registry(db_path)
+        assert reopened.get_vector_store().index.ntotal == total
+
+    def test_compaction_clears_log(self, tmp_path, knowledge_dir):
+        db_path = tmp_path / "db"
+        registry = make_registry(db_path)
+
+        report = KnowledgeIngestionPipeline(registry=registry).run(str(knowledge_dir), compact=True)
+
+        assert report["compacted"] is True
+        assert os.path.getsize(db_path / INGEST_LOG_NAME) == 0
+        assert make_registry(db_path).get_vector_store().index.ntotal == registry.get_vector_store().index.ntotal
+
+    def test_threshold_triggers_compaction(self, tmp_path, knowledge_dir, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_compact_threshold", 3)
+        registry = make_registry(tmp_path / "db")
+
+        KnowledgeIngestionPipeline(registry=registry, batch_size=2).run(str(knowledge_dir))
+
+        footprint = registry.get_memory_footprint()
+        assert footprint["compactions"] == 1
+        assert footprint["log_records"] == 1
+
+    def test_append_waits_for_running_searches(self, tmp_path):
+        registry = make_registry(tmp_path / "db")
+        total = registry.get_vector_store().index.ntotal
+        appended = threading.Event()
+
+        def append():
+            registry.append_embedded([Document(page_content="新文档")], [[3.0]])
+            appended.set()
+
+        with registry.reading():
+            writer = threading.Thread(target=append)
+            writer.start()
+            assert not appended.wait(0.2)
+            assert registry.get_vector_store().index.ntotal == total
+
+        writer.join(5)
+        assert appended.is_set()
+        assert registry.get_vector_store().index.ntotal == total + 1
+
+
+    def test_subdirectory_then_root_adds_no_duplicates(self, tmp_path, knowledge_dir):
+        registry = make_registry(tmp_path / "db")
+        pipeline = KnowledgeIngestionPipeline(registry=registry)
+
+        partial = pipeline.run(str(knowledge_dir / "性能优化"), root=str(knowledge_dir))
+        full = pipeline.run(root=str(knowledge_dir))
+
+        assert partial["added"] == 2
+        assert full["added"] == 3 and full["skipped"] == 2
+        store = registry.get_vector_store()
+        docs = [store.docstore.search(doc_id) for doc_id in store.index_to_docstore_id.values()]
+        ingested = [doc for doc in docs if "source" in doc.metadata]
+        assert len(ingested) == 5
+        loops = [doc for doc in ingested if doc.metadata["source"].endswith("loops.md")]
+        assert {doc.metadata["source"] for doc in loops} == {os.path.join("性能优化", "loops.md")}
+        assert {doc.metadata["category"] for doc in loops} == {"性能优化"}
+
+
+class TestIngestEndpoint:
+    """POST /api/v1/admin/knowledge/ingest 测试"""
+
+    headers = {"X-Admin-Key": "secret"}
+
+    def setup_method(self):
+        self.calls = []
+
+        class _Pipeline:
+            def run(pipeline_self, path, batch_size=None, compact=False, root=None):
+                self.calls.append((path, batch_size, compact, root))
+                return {"files": 1, "chunks": 2, "added": 2, "skipped": 0, "batches": 1,
+                        "compacted": compact, "execution_time": 0.01}
+
+        app.dependency_overrides[get_knowledge_ingestion] = lambda: _Pipeline()
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    def test_ingest_subdirectory(self, tmp_path, monkeypatch):
+        (tmp_path / "docs").mkdir()
+        monkeypatch.setattr(get_settings(), "knowledge_base_path", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "admin_api_key", "secret")
+
+        response = client.post(
+            "/api/v1/admin/knowledge/ingest", json={"path": "docs", "batch_size": 8}, headers=self.headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["added"] == 2
+        assert self.calls == [(os.path.realpath(tmp_path / "docs"), 8, False, os.path.realpath(tmp_path))]
+
+    def test_rejects_path_outside_knowledge_base(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_base_path", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "admin_api_key", "secret")
+
+        response = client.post("/api/v1/admin/knowledge/ingest", json={"path": "../"}, headers=self.headers)
+
+        assert response.status_code == 400
+        assert self.calls == []
+
+    def test_requires_admin_key(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_base_path", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "admin_api_key", "secret")
+
+        assert client.post("/api/v1/admin/knowledge/ingest", json={}).status_code == 403
+        response = client.post("/api/v1/admin/knowledge/ingest", json={}, headers=self.headers)
+        assert response.status_code == 200
+
+    def test_disabled_without_configured_key(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_base_path", str(tmp_path))
+        monkeypatch.setattr(get_settings(), "admin_api_key", None)
+
+        response = client.post("/api/v1/admin/knowledge/ingest", json={}, headers={"X-Admin-Key": ""})
+
+        assert response.status_code == 403
+        assert self.calls == []
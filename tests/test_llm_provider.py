@@ -0,0 +1,203 @@
+"""
+LLM适配层测试文件
+负责人：组员C
+作用：使用本地模拟的DashScope接口测试异步客户端的完整输出、流式输出、错误处理、并发上限和换事件循环时的客户端关闭与重建
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from langchain_community.llms.fake import FakeListLLM
+
+from backend.core.executors import AsyncBoundedLimiter, ExecutorSaturatedError, get_executor_metrics
+from backend.core.llm_provider import DashScopeAsyncProvider, LangChainLLMProvider, LLMProviderError
+from backend.services.code_explainer import CodeExplainerService
+from benchmarks.fake_dashscope import DEFAULT_RESPONSE, create_fake_dashscope_app
+
+
+def make_provider(app, limiter=None) -> DashScopeAsyncProvider:
+    return DashScopeAsyncProvider(
+        api_key="test-key",
+        model_name="qwen-turbo",
+        temperature=0.5,
+        max_tokens=512,
+        base_url="http://fake-dashscope/api/v1",
+        transport=httpx.ASGITransport(app=app),
+        limiter=limiter
+    )
+
+
+class TestDashScopeAsyncProvider:
+    """DashScope异步客户端测试"""
+
+    def test_complete(self):
+        app = create_fake_dashscope_app()
+        provider = make_provider(app)
+
+        async def run():
+            try:
+                return await provider.complete("解释这段代码")
+            finally:
+                await provider.aclose()
+
+        assert asyncio.run(run()) == DEFAULT_RESPONSE
+        assert app.state.stats.prompts == ["解释这段代码"]
+        metrics = provider.get_metrics()
+        assert metrics["requests"] == 1
+        assert metrics["errors"] == 0
+        assert metrics["in_flight"] == 0
+
+    def test_stream_incremental_chunks(self):
+        provider = make_provider(create_fake_dashscope_app(chunk_size=3))
+
+        async def run():
+            try:
+                return [chunk async for chunk in provider.stream("解释")]
+            finally:
+                await provider.aclose()
+
+        chunks = asyncio.run(run())
+        assert len(chunks) > 1
+        assert "".join(chunks) == DEFAULT_RESPONSE
+
+    def test_error_status_raises(self):
+        provider = make_provider(create_fake_dashscope_app(fail_status=429))
+
+        async def run():
+            try:
+                await provider.complete("解释")
+            finally:
+                await provider.aclose()
+
+        with pytest.raises(LLMProviderError) as exc_info:
+            asyncio.run(run())
+        assert exc_info.value.status_code == 429
+        assert provider.get_metrics()["errors"] == 1
+
+    def test_concurrent_requests_share_event_loop(self):
+        app = create_fake_dashscope_app(latency=0.05)
+        provider = make_provider(app, AsyncBoundedLimiter("test", max_workers=50, max_queue=0))
+
+        async def run():
+            try:
+                return await asyncio.gather(*(provider.complete(f"请求{i}") for i in range(50)))
+            finally:
+                await provider.aclose()
+
+        results = asyncio.run(run())
+        assert results == [DEFAULT_RESPONSE] * 50
+        assert provider.get_metrics()["max_in_flight"] == 50
+        assert app.state.stats.max_in_flight > 1
+
+    def test_limiter_bounds_concurrency_and_rejects_overflow(self):
+        app = create_fake_dashscope_app(latency=0.05)
+        limiter = AsyncBoundedLimiter("test", max_workers=2, max_queue=1)
+        provider = make_provider(app, limiter)
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(provider.complete(f"请求{i}") for i in range(4)), return_exceptions=True
+                )
+            finally:
+                await provider.aclose()
+
+        results = asyncio.run(run())
+        rejected = [result for result in results if isinstance(result, ExecutorSaturatedError)]
+        assert len(rejected) == 1 and rejected[0].status_code == 429
+        assert results.count(DEFAULT_RESPONSE) == 3
+        assert app.state.stats.max_in_flight == 2
+        metrics = limiter.get_metrics()
+        assert metrics["rejected"] == 1
+        assert metrics["completed"] == 3
+        assert metrics["active"] == 0 and metrics["queued"] == 0
+
+    def test_default_limiter_reported_in_executor_metrics(self):
+        provider = make_provider(create_fake_dashscope_app())
+
+        async def run():
+            try:
+                return await provider.complete("解释")
+            finally:
+                await provider.aclose()
+
+        before = get_executor_metrics().get("llm_async", {}).get("completed", 0)
+        asyncio.run(run())
+        assert get_executor_metrics()["llm_async"]["completed"] == before + 1
+
+    def test_client_closed_when_event_loop_changes(self):
+        provider = make_provider(create_fake_dashscope_app())
+        clients = []
+
+        async def run():
+            await provider.complete("解释")
+            clients.append(provider._client)
+
+        asyncio.run(run())
+        asyncio.run(run())
+        try:
+            assert clients[0] is not clients[1]
+            assert clients[0].is_closed
+            assert not clients[1].is_closed
+        finally:
+            asyncio.run(provider.aclose())
+
+    def test_concurrent_requests_create_one_client_per_loop(self, monkeypatch):
+        provider = make_provider(create_fake_dashscope_app())
+        created = []
+
+        class RecordingClient(httpx.AsyncClient):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                created.append(self)
+
+        close_stale = provider._close_stale
+
+        async def slow_close_stale(client, loop):
+            await asyncio.sleep(0.01)
+            await close_stale(client, loop)
+
+        monkeypatch.setattr(httpx, "AsyncClient", RecordingClient)
+        monkeypatch.setattr(provider, "_close_stale", slow_close_stale)
+
+        async def run(count):
+            await asyncio.gather(*(provider.complete(f"请求{i}") for i in range(count)))
+
+        asyncio.run(run(1))
+        asyncio.run(run(10))
+        try:
+            # 换循环后并发的首批请求只重建一个客户端，旧客户端全部关闭
+            assert len(created) == 2
+            assert created[0].is_closed and created[1] is provider._client
+        finally:
+            asyncio.run(provider.aclose())
+
+    def test_default_limiter_uses_async_settings(self, monkeypatch):
+        from backend.core import executors
+
+        monkeypatch.setattr(executors.settings, "llm_async_max_in_flight", 5)
+        monkeypatch.setattr(executors.settings, "llm_async_queue", 7)
+        monkeypatch.setattr(executors, "_limiters", {})
+
+        limiter = executors.get_async_limiter(executors.LLM_POOL)
+
+        assert (limiter.max_workers, limiter.max_queue) == (5, 7)
+        assert executors.get_executor(executors.LLM_POOL).max_workers == executors.settings.executor_llm_workers
+
+
+class TestServiceWiring:
+    """服务与适配层集成测试"""
+
+    def test_explainer_uses_injected_provider(self):
+        provider = make_provider(create_fake_dashscope_app(response_text="这段代码使用了循环和函数。"))
+        explainer = CodeExplainerService(provider=provider)
+
+        result = asyncio.run(explainer.explain_code("def provider_demo():\n    for i in range(2):\n        pass\n"))
+        assert result["explanation"] == "这段代码使用了循环和函数。"
+        assert "循环" in result["key_concepts"]
+
+    def test_injected_langchain_llm_is_wrapped(self):
+        explainer = CodeExplainerService(llm=FakeListLLM(responses=["假模型输出"]))
+        assert isinstance(explainer.provider, LangChainLLMProvider)
+        assert asyncio.run(explainer.provider.complete("任意提示")) == "假模型输出"
@@ -0,0 +1,157 @@
+"""
+分区检索测试文件
+负责人：组员C
+作用：测试按category分区的子索引、topic过滤、增量同步，以及RAGTool和审查缓存键对过滤条件的处理
+"""
+
+import asyncio
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from backend.core.result_cache import make_cache_key
+from backend.services.code_reviewer import CodeReviewerService
+from backend.tools.partitioned_index import PartitionedIndex, RetrievalFilter
+from backend.tools.rag_tool import RAGTool
+from tests.conftest import CountingEmbeddings, FakeRegistry
+
+
+class CategoryRegistry(FakeRegistry):
+    """文档“文档N”的向量为[N]，奇数为性能优化、偶数为最佳实践"""
+
+    def __init__(self, size: int = 8):
+        self.embeddings = CountingEmbeddings()
+        self.store = FAISS.from_embeddings(
+            [(f"文档{i}", [float(i)]) for i in range(1, size + 1)],
+            self.embeddings,
+            metadatas=[
+                {"topic": f"主题{i % 3}", "category": "性能优化" if i % 2 else "最佳实践"}
+                for i in range(1, size + 1)
+            ]
+        )
+        self.embeddings.calls.clear()
+        self.initialized = True
+
+
+def _metadata(store, positions):
+    return [store.docstore.search(store.index_to_docstore_id[position]).metadata for position in positions]
+
+
+class TestPartitionedIndex:
+    """PartitionedIndex 测试"""
+
+    def test_partitions_by_category(self):
+        store = CategoryRegistry().store
+        partitions = PartitionedIndex().sync(store, _metadata)
+        assert partitions.get_stats() == {"性能优化": 4, "最佳实践": 4}
+
+    def test_search_only_scans_selected_partition(self):
+        store = CategoryRegistry().store
+        partitions = PartitionedIndex().sync(store, _metadata)
+
+        found = partitions.search(np.array([[2.9]], dtype="float32"), 3, RetrievalFilter(["性能优化"]))
+
+        # 只在奇数（性能优化）文档中按距离排序：文档3、文档1、文档5
+        assert found == [[2, 0, 4]]
+
+    def test_topic_filter_within_partition(self):
+        store = CategoryRegistry().store
+        partitions = PartitionedIndex().sync(store, _metadata)
+        knowledge_filter = RetrievalFilter(["性能优化"], ["主题0"])
+
+        found = partitions.search(np.array([[1.0]], dtype="float32"), 5, knowledge_filter)
+
+        assert found == [[2]]
+        assert partitions.positions_for(knowledge_filter).tolist() == [2]
+        assert sorted(partitions.positions_for(RetrievalFilter(topics=["主题1"])).tolist()) == [0, 3, 6]
+
+    def test_incremental_sync(self):
+        store = CategoryRegistry().store
+        partitions = PartitionedIndex().sync(store, _metadata)
+        store.add_embeddings([("新文档", [100.0])], metadatas=[{"topic": "新主题", "category": "内存优化"}])
+
+        partitions.sync(store, _metadata)
+
+        assert partitions.get_stats()["内存优化"] == 1
+        assert partitions.search(np.array([[99.0]], dtype="float32"), 1, RetrievalFilter(["内存优化"])) == [[8]]
+
+    def test_empty_filter_is_none(self):
+        assert RetrievalFilter.create(None, []) is None
+        assert RetrievalFilter.create(["b", "a"]) == RetrievalFilter(["a", "b"])
+
+
+class TestFilteredRetrieval:
+    """RAGTool 带过滤条件检索测试"""
+
+    def test_retrieve_respects_category(self):
+        tool = RAGTool(registry=CategoryRegistry())
+
+        docs = tool.retrieve("xx", k=3, knowledge_filter=RetrievalFilter(["最佳实践"]))
+
+        assert [doc.page_content for doc in docs] == ["文档2", "文档4", "文档6"]
+
+    def test_mixed_filters_share_one_embedding(self):
+        registry = CategoryRegistry()
+        tool = RAGTool(registry=registry)
+
+        async def scenario():
+            return await asyncio.gather(
+                tool.aretrieve("x", k=1),
+                tool.aretrieve("x", k=1, knowledge_filter=RetrievalFilter(["最佳实践"]))
+            )
+
+        unfiltered, filtered = asyncio.run(scenario())
+
+        assert registry.embeddings.calls == [["x", "x"]]
+        assert unfiltered[0].page_content == "文档1"
+        assert filtered[0].page_content == "文档2"
+
+    def test_review_cache_key_includes_filter(self):
+        code = "print(1)\n"
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+        reviewer.mode, reviewer.output_format = "pipeline", "json"
+        plain = reviewer._review_cache_key(code, "python")
+        filtered = reviewer._review_cache_key(code, "python", RetrievalFilter(["性能优化"]))
+
+        assert plain != make_cache_key("review", code, "python")
+        assert filtered != plain
+
+
+class TestFilteredSearchOnMainIndex:
+    """分区只保存位置、在主索引上过滤检索的测试"""
+
+    @staticmethod
+    def _store(index_type: str):
+        from backend.tools.ann_index import build_index
+
+        rng = np.random.default_rng(0)
+        vectors = rng.random((400, 8), dtype=np.float32)
+        store = FAISS.from_embeddings(
+            [(f"文档{i}", vector.tolist()) for i, vector in enumerate(vectors)],
+            CountingEmbeddings(),
+            metadatas=[{"topic": f"主题{i % 5}", "category": "性能优化" if i % 2 else "最佳实践"} for i in range(400)]
+        )
+        store.index = build_index(vectors, index_type=index_type, nlist=8)
+        return store, vectors
+
+    def test_partitions_hold_no_vectors(self):
+        store, _ = self._store("flat")
+        partitions = PartitionedIndex().sync(store, _metadata)
+
+        assert all(not hasattr(partition, "index") for partition in partitions._partitions.values())
+        assert partitions.get_stats() == {"性能优化": 200, "最佳实践": 200}
+
+    def test_approximate_indexes_filter_exactly(self):
+        for index_type in ("ivf_flat", "hnsw"):
+            store, vectors = self._store(index_type)
+            partitions = PartitionedIndex().sync(store, _metadata)
+            knowledge_filter = RetrievalFilter(["性能优化"], ["主题1"])
+            query = vectors[:3] + 0.01
+
+            found = partitions.search(query, 5, knowledge_filter)
+
+            allowed = np.array([i for i in range(400) if i % 2 and i % 5 == 1])
+            exact = [
+                allowed[np.argsort(((vectors[allowed] - row) ** 2).sum(axis=1))[:5]].tolist() for row in query
+            ]
+            assert found == exact, index_type
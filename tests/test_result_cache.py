@@ -0,0 +1,118 @@
+"""
+结果缓存测试文件
+负责人：组长
+作用：测试缓存键的规范化、AST指纹、LRU/TTL淘汰以及SQLite磁盘层的持久化
+"""
+
+import time
+
+from backend.core.result_cache import ResultCache, compute_fingerprint, make_cache_key
+from backend.utils.code_fingerprint import ast_fingerprint
+from backend.models.schemas import BugReport
+
+
+class TestCacheKey:
+    """缓存键测试"""
+
+    def test_whitespace_variants_share_key(self):
+        code_a = "def f():\n    return 1\n"
+        code_b = "﻿def f():   \r\n    return 1\r\n\r\n\r\n"
+        assert make_cache_key("explain", code_a, "python") == \
+            make_cache_key("explain", code_b, "python")
+
+    def test_key_depends_on_kind_and_model(self):
+        code = "print('hi')"
+        key = make_cache_key("explain", code, "python", model_name="qwen-turbo", temperature=0.5)
+        assert key != make_cache_key("review", code, "python", model_name="qwen-turbo", temperature=0.5)
+        assert key != make_cache_key("explain", code, "python", model_name="qwen-max", temperature=0.5)
+        assert key != make_cache_key("explain", code, "python", model_name="qwen-turbo", temperature=0.7)
+
+
+class TestAstFingerprint:
+    """AST指纹测试"""
+
+    BASE = 'def total(values):\n    """求和"""\n    result = 0\n    for v in values:\n        result += v\n    return result\n'
+
+    def test_cosmetic_variants_share_fingerprint(self):
+        variant = (
+            "# 作业\n"
+            "def total(values):  # 求和函数\n"
+            '    """\n    求和\n    """\n'
+            "    result=0\n"
+            "    for v in values :\n"
+            "        result+=v\n"
+            "    return result\n"
+        )
+        assert ast_fingerprint(self.BASE) == ast_fingerprint(variant)
+
+    def test_alpha_renaming(self):
+        renamed = self.BASE.replace("result", "acc").replace("values", "nums")
+        assert ast_fingerprint(self.BASE) != ast_fingerprint(renamed)
+        assert ast_fingerprint(self.BASE, rename_locals=True) == \
+            ast_fingerprint(renamed, rename_locals=True)
+
+    def test_semantic_change_differs(self):
+        changed = self.BASE.replace("result = 0", "result = 1")
+        assert ast_fingerprint(self.BASE, rename_locals=True) != \
+            ast_fingerprint(changed, rename_locals=True)
+
+    def test_review_fingerprint_tracks_line_numbers(self):
+        shifted = "\n\n" + self.BASE
+        assert compute_fingerprint("explain", self.BASE, "python", mode="ast") == \
+            compute_fingerprint("explain", shifted, "python", mode="ast")
+        assert compute_fingerprint("review", self.BASE, "python", mode="ast") != \
+            compute_fingerprint("review", shifted, "python", mode="ast")
+
+    def test_review_key_keeps_whitespace_and_comments(self):
+        variants = ["x=1\n", "x = 1\n", "x = 1  # noqa\n", "x = 1 \ny = 2\n", "x = 1\ny = 2\n"]
+        for mode in ("text", "ast", "ast_alpha"):
+            fingerprints = {compute_fingerprint("review", code, "python", mode=mode) for code in variants}
+            assert len(fingerprints) == len(variants)
+        assert make_cache_key("review", "x=1", "python") != make_cache_key("review", "x = 1", "python")
+        assert make_cache_key("explain", "x=1", "python") == make_cache_key("explain", "x = 1", "python")
+
+    def test_unparsable_code_falls_back_to_text(self):
+        assert compute_fingerprint("explain", "def broken(:", "python", mode="ast").startswith("text:")
+
+
+class TestResultCache:
+    """缓存层测试"""
+
+    def test_round_trip_with_models(self):
+        cache = ResultCache()
+        bug = BugReport(line_number=1, description="除零", suggestion="检查分母")
+        cache.set("k", {"score": 80, "bugs": [bug]})
+
+        cached = cache.get("k")
+        assert cached["score"] == 80
+        assert cached["bugs"][0]["description"] == "除零"
+        assert cache.get("missing") is None
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=0.01)
+        cache.set("k", {"value": 1})
+        time.sleep(0.02)
+        assert cache.get("k") is None
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = ResultCache(max_bytes=60)
+        cache.set("a", {"value": "x" * 10})
+        cache.set("b", {"value": "y" * 10})
+        cache.get("a")
+        cache.set("c", {"value": "z" * 10})
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()["bytes"] <= 60
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        db_path = str(tmp_path / "results.sqlite3")
+        ResultCache(db_path=db_path).set("k", {"summary": "缓存结果"})
+
+        restarted = ResultCache(db_path=db_path)
+        assert restarted.get("k") == {"summary": "缓存结果"}
+        assert restarted.get_stats()["disk_hits"] == 1
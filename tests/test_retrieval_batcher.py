@@ -0,0 +1,95 @@
+"""
+检索微批处理测试文件
+负责人：组员C
+作用：测试并发检索请求的合并、批次切分、异常传播以及RAGTool异步检索只做一次嵌入计算
+"""
+
+import asyncio
+
+from backend.tools.rag_tool import RAGTool
+from backend.tools.retrieval_batcher import RetrievalBatcher
+
+
+class TestRetrievalBatcher:
+    """RetrievalBatcher 测试"""
+
+    def test_concurrent_queries_share_one_batch(self):
+        calls = []
+
+        def retrieve_many(queries, k):
+            calls.append((list(queries), k))
+            return [[f"{query}-{i}" for i in range(k)] for query in queries]
+
+        batcher = RetrievalBatcher(retrieve_many, max_batch_size=32, max_wait_ms=20)
+
+        async def scenario():
+            return await asyncio.gather(
+                batcher.retrieve("a", k=1),
+                batcher.retrieve("b", k=3),
+                batcher.retrieve("c", k=2)
+            )
+
+        results = asyncio.run(scenario())
+
+        assert calls == [(["a", "b", "c"], 3)]
+        assert results == [["a-0"], ["b-0", "b-1", "b-2"], ["c-0", "c-1"]]
+        assert batcher.get_stats()["batches"] == 1
+        assert batcher.get_stats()["max_batch_size"] == 3
+
+    def test_full_batch_flushes_without_waiting(self):
+        calls = []
+
+        def retrieve_many(queries, k):
+            calls.append(list(queries))
+            return [[query] for query in queries]
+
+        batcher = RetrievalBatcher(retrieve_many, max_batch_size=2, max_wait_ms=10_000)
+
+        async def scenario():
+            return await asyncio.wait_for(
+                asyncio.gather(batcher.retrieve("a"), batcher.retrieve("b")),
+                timeout=5
+            )
+
+        assert asyncio.run(scenario()) == [["a"], ["b"]]
+        assert calls == [["a", "b"]]
+
+    def test_error_propagates_to_every_waiter(self):
+        def retrieve_many(queries, k):
+            raise RuntimeError("嵌入失败")
+
+        batcher = RetrievalBatcher(retrieve_many, max_batch_size=32, max_wait_ms=5)
+
+        async def scenario():
+            return await asyncio.gather(
+                batcher.retrieve("a"),
+                batcher.retrieve("b"),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+
+class TestRAGToolAsync:
+    """RAGTool 异步检索测试"""
+
+    def test_concurrent_arun_uses_one_embedding_call(self, fake_registry):
+        tool = RAGTool(registry=fake_registry)
+
+        async def scenario():
+            return await asyncio.gather(*[tool._arun(query) for query in ["a", "bb", "ccc"]])
+
+        results = asyncio.run(scenario())
+
+        assert len(fake_registry.embeddings.calls) == 1
+        assert [result.count("🔸") for result in results] == [3, 3, 3]
+        assert tool.batcher.get_stats()["queries"] == 3
+
+    def test_arun_reports_uninitialized_store(self, fake_registry):
+        fake_registry.store = None
+        fake_registry.initialized = False
+        tool = RAGTool(registry=fake_registry)
+
+        assert asyncio.run(tool._arun("a")) == "❌ 知识库未初始化"
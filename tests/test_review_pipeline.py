@@ -0,0 +1,113 @@
+"""
+流水线审查模式测试文件
+负责人：组长
+作用：测试pipeline模式并行执行flake8和知识库检索、只调用一次LLM，以及审查模式的选择
+"""
+
+import asyncio
+
+import pytest
+
+from backend.services.code_reviewer import CodeReviewerService
+from backend.services.static_reviewer import StaticReviewEngine
+from backend.tools.rag_tool import RAGTool
+
+
+REPORT = "## 📊 总体评分\n70分，需要处理异常。\n## 💡 总结建议\n捕获具体异常。"
+
+CODE = '''
+def risky(path):
+    try:
+        return open(path).read()
+    except:
+        return None
+'''
+
+
+class RecordingProvider:
+    """记录Prompt的假LLM适配器"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        return REPORT
+
+    async def stream(self, prompt: str):
+        self.prompts.append(prompt)
+        yield REPORT
+
+
+@pytest.fixture
+def pipeline_reviewer(fake_registry, monkeypatch):
+    tool = RAGTool(registry=fake_registry)
+    monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+    monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: None)
+    reviewer = CodeReviewerService(provider=RecordingProvider(), mode="pipeline")
+    reviewer.static_engine = StaticReviewEngine(policy="always")
+    return reviewer
+
+
+class TestPipelineReview:
+    """pipeline 审查模式测试"""
+
+    def test_single_llm_call_with_tool_context(self, pipeline_reviewer, fake_registry):
+        result = asyncio.run(pipeline_reviewer.review_code(CODE))
+
+        prompts = pipeline_reviewer.provider.prompts
+        assert len(prompts) == 1
+        assert "E722" in prompts[0]
+        assert "向量" in prompts[0]
+        assert len(fake_registry.embeddings.calls) == 1
+        assert result["cache_hit"] is False
+
+    def test_skips_llm_for_trivial_code(self, pipeline_reviewer):
+        pipeline_reviewer.static_engine = StaticReviewEngine(policy="auto")
+
+        result = asyncio.run(pipeline_reviewer.review_code(CODE))
+
+        assert result["llm_skipped"] is True
+        assert pipeline_reviewer.provider.prompts == []
+
+    def test_pipeline_does_not_build_agent(self, pipeline_reviewer):
+        assert pipeline_reviewer.agent_executor is None
+
+    def test_cache_key_depends_on_mode_and_format(self):
+        keys = {
+            CodeReviewerService(provider=RecordingProvider(), mode=mode, output_format=output_format)
+            ._review_cache_key(CODE, "python")
+            for mode in ("pipeline", "agent") for output_format in ("json", "markdown")
+        }
+        assert len(keys) == 4
+
+    def test_rejects_unknown_mode(self):
+        with pytest.raises(ValueError):
+            CodeReviewerService(provider=RecordingProvider(), mode="chain")
+
+    def test_stream_cancels_retrieval_when_static_fails(self, pipeline_reviewer, monkeypatch):
+        started, cancelled = [], []
+
+        async def slow_retrieval(code, knowledge_filter=None):
+            started.append(code)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(code)
+                raise
+
+        def broken_static(code):
+            raise RuntimeError("flake8 crashed")
+
+        monkeypatch.setattr(pipeline_reviewer, "_retrieve_knowledge", slow_retrieval)
+        monkeypatch.setattr(pipeline_reviewer, "run_static_analysis", broken_static)
+
+        async def scenario():
+            with pytest.raises(RuntimeError):
+                async for _ in pipeline_reviewer.stream_review(CODE):
+                    pass
+            await asyncio.sleep(0)
+            # 生成器退出时检索任务已被取消，而不是等事件循环关闭时才被清理
+            assert started and cancelled == started
+
+        asyncio.run(scenario())
@@ -0,0 +1,110 @@
+"""
+审查检索查询测试文件
+负责人：组员C
+作用：测试按代码结构生成定向检索查询、无结构时的概括查询以及多查询结果的合并去重
+"""
+
+import asyncio
+
+from backend.services.code_reviewer import CodeReviewerService
+from backend.tools.rag_tool import RAGTool
+from backend.utils.code_analyzer import CodeAnalyzer
+from backend.utils.review_queries import (
+    CONSTRUCT_QUERIES, build_review_queries, find_constructs, merge_retrievals
+)
+
+
+SMELLY_CODE = '''
+import os
+
+
+def load(paths):
+    text = ""
+    for path in paths:
+        f = open(path)
+        for line in f:
+            text += line
+        if type(path) == str:
+            pass
+    try:
+        os.remove("x")
+    except:
+        pass
+    return text
+'''
+
+
+class TestFindConstructs:
+    """find_constructs 测试"""
+
+    def test_detects_salient_constructs(self):
+        found = find_constructs(CodeAnalyzer.analyze(SMELLY_CODE))
+        assert found == [
+            "bare_except", "open_without_with", "type_comparison", "string_concat_in_loop", "nested_loop"
+        ]
+
+    def test_clean_code_has_no_constructs(self):
+        code = "with open('a') as f:\n    data = [line for line in f]\nif isinstance(data, list):\n    pass\n"
+        assert find_constructs(CodeAnalyzer.analyze(code)) == []
+
+    def test_append_in_loop(self):
+        code = "result = []\nfor x in range(3):\n    result.append(x * 2)\n"
+        assert find_constructs(CodeAnalyzer.analyze(code)) == ["append_in_loop"]
+
+
+class TestBuildReviewQueries:
+    """build_review_queries 测试"""
+
+    def test_limits_query_count(self):
+        queries = build_review_queries(SMELLY_CODE, max_queries=2)
+        assert queries == [CONSTRUCT_QUERIES["bare_except"], CONSTRUCT_QUERIES["open_without_with"]]
+
+    def test_fallback_summarises_names_instead_of_leading_imports(self):
+        code = "import json\n\n\ndef parse_config(text):\n    return json.loads(text)\n"
+        assert build_review_queries(code) == ["Python代码审查和优化建议: parse_config json"]
+
+    def test_invalid_code_falls_back_to_prefix(self):
+        queries = build_review_queries("def broken(:\n    pass")
+        assert len(queries) == 1
+        assert "def broken(" in queries[0]
+
+
+class TestMergeRetrievals:
+    """merge_retrievals 测试"""
+
+    def test_round_robin_with_dedup(self):
+        merged = merge_retrievals([["a", "b", "c"], ["a", "d"], ["e"]], limit=4, key=str)
+        assert merged == ["a", "d", "e", "b"]
+
+    def test_stops_when_exhausted(self):
+        assert merge_retrievals([["a"], []], limit=3, key=str) == ["a"]
+
+
+class TestReviewerRetrieval:
+    """CodeReviewerService 多查询检索测试"""
+
+    def test_targeted_queries_share_one_embedding(self, fake_registry, monkeypatch):
+        tool = RAGTool(registry=fake_registry)
+        monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+
+        suggestions, _ = asyncio.run(reviewer._retrieve_knowledge(SMELLY_CODE))
+
+        assert fake_registry.embeddings.calls == [[
+            CONSTRUCT_QUERIES["bare_except"],
+            CONSTRUCT_QUERIES["open_without_with"],
+            CONSTRUCT_QUERIES["type_comparison"]
+        ]]
+        contents = [item["content"] for item in suggestions]
+        assert len(contents) == len(set(contents)) <= 3
+
+    def test_batch_retrieval_splits_per_code(self, fake_registry, monkeypatch):
+        tool = RAGTool(registry=fake_registry)
+        monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+
+        texts = reviewer.retrieve_knowledge_batch([SMELLY_CODE, "x = 1\n"])
+
+        assert len(texts) == 2
+        assert len(fake_registry.embeddings.calls) == 1
+        assert len(fake_registry.embeddings.calls[0]) == 4
@@ -0,0 +1,134 @@
+"""
+相同请求合并测试文件
+负责人：组员C
+作用：测试single-flight的结果共享、异常传播、取消语义以及代码解释服务中的合并效果
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from backend.core.llm_provider import DashScopeAsyncProvider
+from backend.core.single_flight import SingleFlight
+from backend.services.code_explainer import CodeExplainerService
+from benchmarks.fake_dashscope import create_fake_dashscope_app
+
+
+class TestSingleFlight:
+    """SingleFlight单元测试"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        async def run():
+            return await asyncio.gather(*(flight.run("key", work) for _ in range(10)))
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(result == {"value": 42} for result, _ in results)
+        assert [shared for _, shared in results].count(False) == 1
+
+        stats = flight.get_stats()
+        assert stats["executed"] == 1
+        assert stats["coalesced"] == 9
+        assert stats["in_flight"] == 0
+
+    def test_error_propagates_and_is_not_kept(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("模型调用失败")
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.run("key", failing) for _ in range(3)),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, ValueError) for result in results)
+        assert len(calls) == 1
+        assert flight.get_stats()["failed"] == 1
+
+        # 失败不缓存，下一次请求重新执行
+        with pytest.raises(ValueError):
+            asyncio.run(flight.run("key", failing))
+        assert len(calls) == 2
+
+    def test_cancelling_one_waiter_keeps_others(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def run():
+            first = asyncio.ensure_future(flight.run("key", work))
+            second = asyncio.ensure_future(flight.run("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            return await second
+
+        assert asyncio.run(run()) == ("done", True)
+        assert flight.get_stats()["cancelled"] == 0
+
+    def test_cancelling_all_waiters_cancels_work(self):
+        flight = SingleFlight()
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.5)
+            finished.append(1)
+
+        async def run():
+            waiters = [asyncio.ensure_future(flight.run("key", work)) for _ in range(2)]
+            await asyncio.sleep(0.01)
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        assert finished == []
+        stats = flight.get_stats()
+        assert stats["cancelled"] == 1
+        assert stats["in_flight"] == 0
+
+
+class TestExplainerCoalescing:
+    """代码解释服务合并测试"""
+
+    def test_identical_requests_make_one_llm_call(self):
+        app = create_fake_dashscope_app(latency=0.05)
+        provider = DashScopeAsyncProvider(
+            api_key="test-key",
+            model_name="qwen-turbo",
+            temperature=0.5,
+            max_tokens=512,
+            base_url="http://fake-dashscope/api/v1",
+            transport=httpx.ASGITransport(app=app)
+        )
+        explainer = CodeExplainerService(provider=provider)
+        code = "def single_flight_demo(items):\n    return sorted(items)\n"
+
+        async def run():
+            try:
+                return await asyncio.gather(*(explainer.explain_code(code) for _ in range(20)))
+            finally:
+                await provider.aclose()
+
+        results = asyncio.run(run())
+        assert app.state.stats.requests == 1
+        assert len({result["explanation"] for result in results}) == 1
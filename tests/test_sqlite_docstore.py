@@ -0,0 +1,200 @@
+"""
+SQLite文档存储与索引快照测试文件
+负责人：组员C
+作用：测试SQLite文档存储、旧版pickle快照迁移、IVF索引内存映射加载后的追加、flat索引的映射状态、未压缩追加的重启恢复，
+      以及多个worker共用同一目录时的写入串行化和同步
+"""
+
+import os
+import threading
+
+import numpy as np
+import pytest
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+
+from backend.tools.rag_tool import RAGTool
+from backend.tools.sqlite_docstore import SQLiteDocstore
+from backend.tools.vector_registry import (
+    DOCSTORE_FILE_NAME,
+    LEGACY_DOCSTORE_FILE_NAME,
+    VectorStoreRegistry
+)
+from config.settings import get_settings
+from tests.conftest import CountingEmbeddings
+
+
+def make_registry(path):
+    return VectorStoreRegistry(vector_db_path=str(path), embeddings_factory=CountingEmbeddings)
+
+
+def numbered_documents(start, count):
+    documents = [Document(page_content=f"文档{i}", metadata={"topic": f"主题{i}"}) for i in range(start, start + count)]
+    vectors = [[float(i)] for i in range(start, start + count)]
+    ids = [f"doc-{i}" for i in range(start, start + count)]
+    return documents, vectors, ids
+
+
+class TestSQLiteDocstore:
+    """SQLiteDocstore 测试"""
+
+    def test_add_search_and_positions(self, tmp_path):
+        docstore = SQLiteDocstore(str(tmp_path / "docs.sqlite3"))
+        docstore.add({"a": Document(page_content="甲", metadata={"topic": "A"}), "b": Document(page_content="乙")})
+        mapping = docstore.index_mapping()
+        mapping.update({0: "a", 1: "b"})
+
+        assert docstore.search("a").metadata == {"topic": "A"}
+        assert docstore.search("missing") == "ID missing not found."
+        assert len(mapping) == 2 and mapping[1] == "b" and mapping.values() == ["a", "b"]
+        assert [doc.page_content for doc in docstore.get_by_positions([1, 0, 1])] == ["乙", "甲", "乙"]
+        with pytest.raises(ValueError):
+            docstore.add({"a": Document(page_content="重复")})
+
+    def test_truncate_positions_removes_unindexed_documents(self, tmp_path):
+        docstore = SQLiteDocstore(str(tmp_path / "docs.sqlite3"))
+        docstore.add({"a": Document(page_content="甲"), "b": Document(page_content="乙")})
+        docstore.index_mapping().update({0: "a", 1: "b"})
+
+        assert docstore.truncate_positions(1) == 1
+        assert docstore.existing(["a", "b"]) == {"a"}
+        assert len(docstore.index_mapping()) == 1
+
+
+class TestSnapshotFormat:
+    """注册中心索引快照格式"""
+
+    def test_new_store_uses_sqlite_docstore(self, tmp_path):
+        registry = make_registry(tmp_path)
+        expected = RAGTool(registry=registry).retrieve("列表推导式")
+
+        assert os.path.exists(tmp_path / DOCSTORE_FILE_NAME)
+        assert not os.path.exists(tmp_path / LEGACY_DOCSTORE_FILE_NAME)
+
+        reopened = make_registry(tmp_path)
+        assert isinstance(reopened.get_vector_store().docstore, SQLiteDocstore)
+        assert RAGTool(registry=reopened).retrieve("列表推导式") == expected
+
+    def test_legacy_pickle_store_migrates_on_compaction(self, tmp_path):
+        FAISS.from_texts(["甲", "乙乙", "丙丙丙"], CountingEmbeddings()).save_local(str(tmp_path))
+        registry = make_registry(tmp_path)
+
+        assert [doc.page_content for doc in RAGTool(registry=registry).retrieve("xx", k=1)] == ["乙乙"]
+        registry.compact()
+
+        assert not os.path.exists(tmp_path / LEGACY_DOCSTORE_FILE_NAME)
+        reopened = make_registry(tmp_path)
+        assert isinstance(reopened.get_vector_store().docstore, SQLiteDocstore)
+        assert [doc.page_content for doc in RAGTool(registry=reopened).retrieve("xx", k=1)] == ["乙乙"]
+
+    def test_uncompacted_appends_recovered_after_restart(self, tmp_path):
+        registry = make_registry(tmp_path)
+        registry.get_vector_store()
+        registry.append_embedded(*numbered_documents(100, 3))
+        total = registry.get_vector_store().index.ntotal
+
+        reopened = make_registry(tmp_path)
+
+        assert reopened.get_vector_store().index.ntotal == total
+        assert reopened.get_memory_footprint()["docstore_documents"] == total
+        assert [doc.page_content for doc in reopened.get_vector_store().similarity_search_by_vector([101.0], k=1)] == ["文档101"]
+
+    def test_mmapped_ivf_index_accepts_appends(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "rag_index_type", "ivf_flat")
+        registry = make_registry(tmp_path)
+        registry.get_vector_store()
+        registry.append_embedded(*numbered_documents(100, 200))
+        registry.compact()
+
+        reopened = make_registry(tmp_path)
+        reopened.get_vector_store()
+        footprint = reopened.get_memory_footprint()
+        assert footprint["index_type"] == "ivf_flat"
+        assert footprint["index_mmap"] is True and footprint["index_mmap_supported"] is True
+
+        reopened.append_embedded(*numbered_documents(400, 2))
+
+        assert reopened.get_memory_footprint()["index_mmap"] is False
+        assert reopened.get_vector_store().index.ntotal == 210
+        docs = RAGTool(registry=reopened).retrieve_many(["x" * 401, "x" * 150], k=1)
+        assert [result[0].page_content for result in docs] == ["文档401", "文档150"]
+
+    def test_flat_index_reports_mmap_unsupported(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "rag_index_type", "flat")
+        make_registry(tmp_path).get_vector_store()
+
+        reopened = make_registry(tmp_path)
+        reopened.get_vector_store()
+        footprint = reopened.get_memory_footprint()
+
+        assert get_settings().rag_ivf_index_mmap is True
+        assert footprint["index_type"] == "flat"
+        assert footprint["index_mmap"] is False and footprint["index_mmap_supported"] is False
+
+    def test_legacy_mmap_setting_name(self, monkeypatch):
+        monkeypatch.setenv("RAG_INDEX_MMAP", "false")
+
+        assert type(get_settings())().rag_ivf_index_mmap is False
+
+
+class TestMultipleWorkers:
+    """多个worker共用同一向量数据库目录"""
+
+    def test_startup_waits_for_running_append(self, tmp_path):
+        writer = make_registry(tmp_path)
+        writer.get_vector_store()
+        starting = make_registry(tmp_path)
+        loaded = threading.Event()
+
+        def start():
+            starting.get_vector_store()
+            loaded.set()
+
+        with writer._exclusive():
+            writer.get_vector_store().add_embeddings([("文档100", [100.0])], ids=["doc-100"])
+            thread = threading.Thread(target=start)
+            thread.start()
+            # 追加尚未写入日志，启动中的worker不能在此时截断文档映射
+            assert not loaded.wait(0.2)
+            writer._append_log([("doc-100", Document(page_content="文档100"), np.array([100.0], dtype=np.float32))])
+
+        thread.join(5)
+        assert loaded.is_set()
+        for registry in (writer, starting):
+            docs = registry.get_vector_store().similarity_search_by_vector([100.0], k=1)
+            assert [doc.page_content for doc in docs] == ["文档100"]
+
+    def test_concurrent_writers_get_distinct_positions(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_reload_interval", 0)
+        first = make_registry(tmp_path)
+        second = make_registry(tmp_path)
+        base = first.get_vector_store().index.ntotal
+        second.get_vector_store()
+
+        first.append_embedded(*numbered_documents(100, 2))
+        second.append_embedded(*numbered_documents(200, 2))
+
+        store = second.get_vector_store()
+        assert store.index.ntotal == base + 4
+        assert [store.index_to_docstore_id[position] for position in range(base, base + 4)] == [
+            "doc-100", "doc-101", "doc-200", "doc-201"
+        ]
+        for value in (101.0, 200.0):
+            assert store.similarity_search_by_vector([value], k=1)[0].page_content == f"文档{int(value)}"
+
+    def test_readers_pick_up_appends_and_compaction(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(get_settings(), "knowledge_reload_interval", 1e-6)
+        writer = make_registry(tmp_path)
+        reader = make_registry(tmp_path)
+        base = reader.get_vector_store().index.ntotal
+
+        writer.append_embedded(*numbered_documents(100, 3))
+        assert reader.get_vector_store().index.ntotal == base + 3
+
+        writer.compact()
+        writer.append_embedded(*numbered_documents(300, 1))
+
+        store = reader.get_vector_store()
+        assert store.index.ntotal == base + 4
+        assert store.similarity_search_by_vector([300.0], k=1)[0].page_content == "文档300"
+        assert reader.get_memory_footprint()["log_records"] == 1
@@ -0,0 +1,166 @@
+"""
+静态预审查测试文件
+负责人：组长
+作用：测试基于语法树的规则审查、评分、LLM调用策略，以及审查服务在跳过LLM时的返回结果
+"""
+
+import asyncio
+
+import pytest
+
+from backend.core.result_cache import ResultCache
+from backend.services.code_reviewer import CodeReviewerService
+from backend.services.static_reviewer import StaticReviewEngine
+from backend.tools.flake8_engine import InProcessFlake8Engine
+from backend.tools.rag_tool import RAGTool
+from backend.utils.code_analyzer import CodeAnalyzer
+from backend.utils.review_queries import locate_constructs
+
+
+BUGGY_CODE = '''
+def collect(item, items=[]):
+    items.append(item)
+    try:
+        f = open("log.txt")
+        f.write(str(item))
+    except:
+        pass
+    return items
+'''
+
+CLEAN_CODE = '''
+def average(values):
+    """计算平均值"""
+    if not values:
+        return 0.0
+    return sum(values) / len(values)
+'''
+
+
+def _long_code(lines: int) -> str:
+    body = "\n".join(f"    total += {i}" for i in range(lines))
+    return f"def accumulate():\n    total = 0\n{body}\n    return total\n"
+
+
+class TestLocateConstructs:
+    """locate_constructs 测试"""
+
+    def test_reports_every_occurrence(self):
+        code = "try:\n    pass\nexcept:\n    pass\ntry:\n    pass\nexcept:\n    pass\n"
+        assert locate_constructs(CodeAnalyzer.analyze(code))["bare_except"] == [3, 7]
+
+    def test_mutable_default_and_shadowed_builtin(self):
+        found = locate_constructs(CodeAnalyzer.analyze("def f(list, cache={}):\n    id = 1\n    return id\n"))
+        assert found["mutable_default"] == [1]
+        assert found["shadowed_builtin"] == [1, 2]
+
+    def test_unused_import_respects_all(self):
+        code = "import os\nimport sys\nfrom json import loads\n__all__ = ['loads']\nprint(sys.argv)\n"
+        assert locate_constructs(CodeAnalyzer.analyze(code))["unused_import"] == [1]
+
+
+class TestStaticReviewEngine:
+    """StaticReviewEngine 测试"""
+
+    def test_rule_findings_and_score(self):
+        review = StaticReviewEngine(policy="never").review(BUGGY_CODE)
+
+        assert [(bug.line_number, bug.severity) for bug in review.bugs] == [(2, "medium"), (5, "medium"), (7, "high")]
+        assert review.score == 100 - 8 - 8 - 15
+        assert "3 个潜在Bug" in review.summary
+        assert review.needs_llm is False
+
+    def test_flake8_duplicates_are_replaced_by_rules(self):
+        issues = [
+            {"line": 7, "column": 5, "code": "E722", "message": "do not use bare 'except'"},
+            {"line": 2, "column": 1, "code": "E302", "message": "expected 2 blank lines"},
+        ]
+        review = StaticReviewEngine(policy="never").review(BUGGY_CODE, issues)
+
+        assert [issue.rule for issue in review.style_issues] == ["E302"]
+        assert sum(bug.line_number == 7 for bug in review.bugs) == 1
+
+    def test_syntax_error_is_high_bug(self):
+        review = StaticReviewEngine().review("def broken(:\n    pass\n")
+
+        assert review.bugs[0].severity == "high"
+        assert review.needs_llm is False
+
+    def test_syntax_error_reported_once_with_flake8(self):
+        code = "def broken(:\n    pass\n"
+        issues = InProcessFlake8Engine().check(code)
+        review = StaticReviewEngine().review(code, issues)
+
+        assert [issue["code"] for issue in issues] == ["E999"]
+        assert len(review.bugs) == 1 and "语法错误" in review.bugs[0].description
+        assert review.style_issues == []
+
+    def test_static_event_lists_syntax_error_once(self):
+        reviewer = CodeReviewerService(mode="pipeline")
+
+        data, _, _ = reviewer.run_static_analysis("def broken(:\n    pass\n")
+
+        assert len(data["syntax_errors"]) == 1
+        assert data["style_issues"] == []
+
+    @pytest.mark.parametrize("code, policy, needs_llm", [
+        (CLEAN_CODE, "auto", False),
+        (_long_code(20), "auto", False),
+        (_long_code(20) + "\ntry:\n    accumulate()\nexcept:\n    pass\n", "auto", True),
+        (_long_code(60), "auto", True),
+        (CLEAN_CODE, "always", True),
+        (_long_code(60), "never", False),
+    ])
+    def test_llm_policy(self, code, policy, needs_llm):
+        engine = StaticReviewEngine(policy=policy, trivial_max_lines=10, clean_max_lines=50)
+        assert engine.review(code).needs_llm is needs_llm
+
+    def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            StaticReviewEngine(policy="sometimes")
+
+
+class TestReviewerSkipsLLM:
+    """CodeReviewerService 跳过LLM测试"""
+
+    def test_trivial_code_returns_static_result(self, monkeypatch):
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+        reviewer.mode, reviewer.output_format = "agent", "markdown"
+        reviewer.static_engine = StaticReviewEngine(policy="auto")
+        monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: None)
+
+        async def fail(*args, **kwargs):
+            raise AssertionError("不应调用LLM审查")
+
+        reviewer._simple_review = reviewer._run_agent_review = fail
+
+        result = asyncio.run(reviewer.review_code(BUGGY_CODE))
+
+        assert result["llm_skipped"] is True
+        assert result["cache_hit"] is False
+        assert result["score"] < 100
+        assert any(bug.severity == "high" for bug in result["bugs"])
+
+    def test_static_result_not_served_after_policy_change(self, fake_registry, monkeypatch):
+        cache = ResultCache()
+        tool = RAGTool(registry=fake_registry)
+        monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+        monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: cache)
+        prompts = []
+
+        class Provider:
+            async def complete(self, prompt):
+                prompts.append(prompt)
+                return '{"overall_score": 55, "summary": "LLM审查", "bugs": [], "style_issues": [], "optimizations": []}'
+
+        reviewer = CodeReviewerService(provider=Provider(), mode="pipeline", output_format="json")
+        reviewer.static_engine = StaticReviewEngine(policy="auto")
+        assert asyncio.run(reviewer.review_code(BUGGY_CODE))["llm_skipped"] is True
+        assert asyncio.run(reviewer.review_code(BUGGY_CODE))["cache_hit"] is True
+
+        reviewer.static_engine = StaticReviewEngine(policy="always")
+        result = asyncio.run(reviewer.review_code(BUGGY_CODE))
+
+        assert len(prompts) == 1
+        assert result["summary"] == "LLM审查" and result["cache_hit"] is False
+        assert not result.get("llm_skipped")
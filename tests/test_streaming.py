@@ -0,0 +1,129 @@
+"""
+流式接口测试文件
+负责人：组员C
+作用：使用假的流式LLM测试SSE代码解释和代码审查接口的事件顺序和内容
+"""
+
+import json
+
+from fastapi.testclient import TestClient
+from langchain_community.llms.fake import FakeStreamingListLLM
+
+from backend.main import app
+from backend.core.dependencies import get_code_explainer, get_code_reviewer
+from backend.services.code_explainer import CodeExplainerService
+from backend.services.code_reviewer import CodeReviewerService
+from backend.services.static_reviewer import StaticReviewEngine
+
+client = TestClient(app)
+
+
+def parse_sse(body: str):
+    """解析SSE响应为 (事件类型, 数据) 列表"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if ": " in line)
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestExplainStream:
+    """流式代码解释接口测试"""
+
+    def setup_method(self):
+        fake_llm = FakeStreamingListLLM(responses=["这段代码定义了一个函数，并使用了循环。"])
+        app.dependency_overrides[get_code_explainer] = lambda: CodeExplainerService(llm=fake_llm)
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    def test_streams_tokens_then_done(self):
+        payload = {
+            "code": "def stream_demo():\n    for i in range(3):\n        print(i)\n",
+            "language": "python",
+            "analysis_type": "explain"
+        }
+
+        response = client.post("/api/v1/explain/stream", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_sse(response.text)
+        tokens = [data["text"] for event, data in events if event == "token"]
+        assert len(tokens) > 1
+        assert "".join(tokens) == "这段代码定义了一个函数，并使用了循环。"
+
+        event, done = events[-1]
+        assert event == "done"
+        assert "函数" in done["key_concepts"]
+        assert done["time_to_first_token"] is not None
+        assert done["time_to_first_token"] <= done["execution_time"]
+
+    def test_rejects_wrong_analysis_type(self):
+        payload = {"code": "print(1)", "language": "python", "analysis_type": "review"}
+        response = client.post("/api/v1/explain/stream", json=payload)
+        assert response.status_code == 400
+
+    def test_reports_missing_llm(self):
+        explainer = CodeExplainerService(llm=FakeStreamingListLLM(responses=["unused"]))
+        explainer.provider = None
+        app.dependency_overrides[get_code_explainer] = lambda: explainer
+        payload = {"code": "def no_llm():\n    return 1\n", "language": "python", "analysis_type": "explain"}
+
+        response = client.post("/api/v1/explain/stream", json=payload)
+
+        events = parse_sse(response.text)
+        assert [event for event, _ in events] == ["error"]
+        assert "LLM未初始化" in events[0][1]["detail"]
+
+
+class TestReviewStream:
+    """流式代码审查接口测试"""
+
+    REPORT = "## 📊 总体评分\n80分，结构清晰。\n## 💡 总结建议\n删除未使用的导入。"
+
+    def setup_method(self):
+        fake_llm = FakeStreamingListLLM(responses=[self.REPORT])
+        self.reviewer = CodeReviewerService(llm=fake_llm)
+        # 测试代码很短，强制调用LLM以覆盖流式输出
+        self.reviewer.static_engine = StaticReviewEngine(policy="always")
+        app.dependency_overrides[get_code_reviewer] = lambda: self.reviewer
+
+    def teardown_method(self):
+        app.dependency_overrides.clear()
+
+    def test_static_results_precede_llm_tokens(self):
+        payload = {
+            "code": "import os\n\n\ndef review_stream_demo(x):\n    if x:\n        return x\n",
+            "language": "python",
+            "analysis_type": "review"
+        }
+
+        response = client.post("/api/v1/review/stream", json=payload)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = parse_sse(response.text)
+        names = [event for event, _ in events]
+        assert names[0] == "static"
+        assert names[1] == "knowledge"
+        assert names.index("token") > names.index("knowledge")
+        assert names[-1] == "done"
+
+        static = events[0][1]
+        assert any(issue["code"] == "F401" for issue in static["issues"])
+        assert static["style_issues"][0]["rule"] == static["issues"][0]["code"]
+        assert static["metrics"]["functions"] == 1
+        assert static["metrics"]["if_statements"] == 1
+
+        tokens = [data["text"] for event, data in events if event == "token"]
+        assert "".join(tokens) == self.REPORT
+
+        done = events[-1][1]
+        assert done["cache_hit"] is False
+        assert 0 <= done["score"] <= 100
+
+    def test_rejects_wrong_analysis_type(self):
+        payload = {"code": "print(1)", "language": "python", "analysis_type": "explain"}
+        response = client.post("/api/v1/review/stream", json=payload)
+        assert response.status_code == 400
@@ -0,0 +1,139 @@
+"""
+结构化审查输出测试文件
+负责人：组长
+作用：测试由响应模型生成的JSON Schema、流式增量JSON解析、截断/围栏JSON修复，
+      以及审查服务按JSON格式解析结果和逐条推送流式事件
+"""
+
+import asyncio
+import json
+
+from backend.services.code_reviewer import CodeReviewerService
+from backend.tools.rag_tool import RAGTool
+from backend.utils.structured_output import (
+    REVIEW_OUTPUT_FIELDS, StreamingJSONParser, repair_json, review_json_schema
+)
+
+
+REVIEW_JSON = json.dumps({
+    "overall_score": 62,
+    "summary": "存在异常处理问题",
+    "bugs": [
+        {"line_number": 3, "description": "裸露的except \"吞掉\"异常", "severity": "high", "suggestion": "捕获具体异常"},
+        {"line_number": 5, "description": "文件未关闭", "severity": "medium", "suggestion": "使用with"}
+    ],
+    "style_issues": [{"line_number": 1, "rule": "E302", "message": "缺少空行", "suggestion": "添加两个空行"}],
+    "optimizations": []
+}, ensure_ascii=False)
+
+
+class FakeStreamingProvider:
+    """按固定大小切片流式返回回复的假LLM适配器"""
+
+    def __init__(self, response: str, chunk_size: int = 7):
+        self.response = response
+        self.chunk_size = chunk_size
+
+    async def complete(self, prompt: str) -> str:
+        return self.response
+
+    async def stream(self, prompt: str):
+        for start in range(0, len(self.response), self.chunk_size):
+            yield self.response[start:start + self.chunk_size]
+
+
+class TestReviewSchema:
+    """review_json_schema 测试"""
+
+    def test_schema_derived_from_response_model(self):
+        schema = review_json_schema()
+        assert tuple(schema["properties"]) == REVIEW_OUTPUT_FIELDS
+        assert schema["required"] == list(REVIEW_OUTPUT_FIELDS)
+        assert "BugReport" in schema["$defs"]
+        assert "example" not in json.dumps(schema)
+
+
+class TestStreamingJSONParser:
+    """StreamingJSONParser 测试"""
+
+    def test_items_emitted_as_soon_as_closed(self):
+        parser = StreamingJSONParser()
+        first_bug_end = REVIEW_JSON.index("}") + 1
+
+        events = parser.feed("```json\n" + REVIEW_JSON[:first_bug_end])
+
+        assert events == [
+            ("overall_score", 62), ("summary", "存在异常处理问题"),
+            ("bugs", json.loads(REVIEW_JSON)["bugs"][0])
+        ]
+        assert not parser.done
+
+    def test_character_by_character(self):
+        parser = StreamingJSONParser()
+        events = []
+        for char in REVIEW_JSON + "\n```":
+            events += parser.feed(char)
+
+        assert [key for key, _ in events] == ["overall_score", "summary", "bugs", "bugs", "style_issues"]
+        assert parser.done
+
+
+class TestRepairJSON:
+    """repair_json 测试"""
+
+    def test_fenced_with_surrounding_text(self):
+        assert repair_json(f"审查结果如下：\n```json\n{REVIEW_JSON}\n```\n以上。")["overall_score"] == 62
+
+    def test_truncated_inside_string(self):
+        assert repair_json('{"overall_score": 80, "summary": "结构清') == {"overall_score": 80, "summary": "结构清"}
+
+    def test_truncated_inside_item_keeps_complete_items(self):
+        truncated = REVIEW_JSON[:REVIEW_JSON.index("文件未关闭")]
+        parsed = repair_json(truncated)
+        assert parsed["bugs"][0]["line_number"] == 3
+        assert parsed["summary"] == "存在异常处理问题"
+
+    def test_no_json(self):
+        assert repair_json("## 📊 总体评分\n80分") is None
+
+
+class TestReviewerStructuredOutput:
+    """CodeReviewerService 结构化输出测试"""
+
+    def test_parse_drops_only_invalid_items(self):
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+        truncated = REVIEW_JSON[:REVIEW_JSON.index("文件未关闭")]
+
+        result = reviewer._parse_review_response(truncated)
+
+        assert result["score"] == 62
+        assert [bug.line_number for bug in result["bugs"]] == [3]
+
+    def test_markdown_report_score_and_items(self):
+        reviewer = CodeReviewerService.__new__(CodeReviewerService)
+        report = "## 📊 总体评分\n80分，结构清晰。\n## 🐛 潜在Bug分析\n- 第3行 可能除零\n## 💡 总结建议\n1. 删除未使用的导入"
+
+        result = reviewer._parse_review_response(report)
+
+        assert result["score"] == 80
+        assert result["bugs"][0].line_number == 3
+        assert result["summary"] == "删除未使用的导入"
+
+    def test_stream_emits_items_before_done(self, fake_registry, monkeypatch):
+        tool = RAGTool(registry=fake_registry)
+        monkeypatch.setattr("backend.services.code_reviewer.get_rag_tool", lambda: tool)
+        monkeypatch.setattr("backend.services.code_reviewer.get_result_cache", lambda: None)
+        reviewer = CodeReviewerService(provider=FakeStreamingProvider(REVIEW_JSON), output_format="json")
+
+        async def scenario():
+            return [event async for event in reviewer.stream_review(
+                "import os\n" + "\n".join(f"x{i} = {i}" for i in range(20)) + "\ntry:\n    pass\nexcept:\n    pass\n"
+            )]
+
+        events = asyncio.run(scenario())
+        names = [event["event"] for event in events]
+
+        # 第一个bug在全部token之前就已推送
+        assert names.index("bug") < len(names) - 1 - names[::-1].index("token")
+        assert names.count("bug") == 2 and names.count("style_issue") == 1
+        assert events[-1]["data"]["score"] == 62